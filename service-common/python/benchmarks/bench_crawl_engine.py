@@ -0,0 +1,133 @@
+"""
+created 2026-10-18
+benchmark - crawl_engine.CrawlEngine vs the queue.Queue + threading.Thread pattern previously used by the vendor
+crawlers, both fetching and parsing pages from a local http server with a fixed response latency. the thread pool
+fetches with requests.get as the crawlers did, the engine is set up as the vendor clients set it up and fetches with
+the veeam download_manager.download_instance through the pooled http_client and its per host limit
+
+usage: python service-common/python/benchmarks/bench_crawl_engine.py [pages] [latency ms]
+"""
+import importlib
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Queue
+
+import lxml.html
+import requests
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
+http_client = importlib.import_module("service-common.python.lib.http_client")
+sys.path.insert(0, os.path.join(root_dir, "service-vendor-veeam-api"))
+download_manager = importlib.import_module("download_manager")
+
+THREADS = 30
+PAGE = ("<html><head><title>KB {}</title></head><body><main id='main'>" + "<p>fixed issue</p>" * 200 +
+        "</main></body></html>")
+
+
+def serve(latency):
+    """
+    start a local http server answering every GET with a kb like html page after latency seconds
+    :param latency:
+    :return: server
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # pylint: disable=invalid-name
+            time.sleep(latency)
+            body = PAGE.format(self.path).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fetch_and_parse(url):
+    """
+    :param url:
+    :return: page title
+    """
+    root = lxml.html.fromstring(requests.get(url, timeout=30).text)
+    return root.xpath("//title/text()")[0]
+
+
+def download_and_parse(url):
+    """
+    :param url:
+    :return: page title
+    """
+    root = lxml.html.fromstring(download_manager.download_instance(link=url, headers=None).text)
+    return root.xpath("//title/text()")[0]
+
+
+def thread_pool(urls):
+    """
+    the queue.Queue + threading.Thread crawl replaced by the crawl engine
+    :param urls:
+    :return:
+    """
+    titles = []
+    q = Queue()
+    for url in urls:
+        q.put(url)
+
+    def worker():
+        while not q.empty():
+            url = q.get()
+            titles.append(fetch_and_parse(url))
+            q.task_done()
+
+    for _ in range(THREADS):
+        threading.Thread(target=worker).start()
+    q.join()
+    return titles
+
+
+def engine(urls):
+    """
+    :param urls:
+    :return:
+    """
+    # as VeeamApiClient.get_bugs
+    crawler = crawl_engine.CrawlEngine(concurrency=THREADS, host_concurrency=THREADS)
+    crawl_results = crawler.run(items=urls, handler=download_and_parse, host=crawl_engine.url_host)
+    return [x.result for x in crawl_results if not x.error]
+
+
+def main(pages, latency_ms):
+    """
+    :param pages:
+    :param latency_ms:
+    :return:
+    """
+    server = serve(latency_ms / 1000)
+    urls = [f"http://127.0.0.1:{server.server_address[1]}/kb/{index}" for index in range(pages)]
+    timings = {}
+    for name, crawl in (("thread pool", thread_pool), ("crawl engine", engine)):
+        started = time.perf_counter()
+        titles = crawl(urls)
+        timings[name] = time.perf_counter() - started
+        assert len(titles) == pages
+    server.shutdown()
+    host_concurrency = http_client.get_client().host_concurrency
+    print(f"{pages} pages @ {latency_ms}ms | http_client per host limit {host_concurrency} | " +
+          " | ".join(f"{name} {seconds:.2f}s ({pages / seconds:.0f} pages/s)" for name, seconds in timings.items()))
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    )
@@ -0,0 +1,87 @@
+"""
+created 2026-10-18
+benchmark - MsftApiClient.match_cu_kbs ( bisect index over CU build numbers, one lookup per distinct CI build ) vs the
+per CI list comprehension over all the CU kbs previously used by get_sql_release_bugs
+
+usage: python service-common/python/benchmarks/bench_cu_kb_index.py [CIs] [CU kbs] [distinct CI builds]
+"""
+import os
+import random
+import sys
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.join(root_dir, "service-vendor-msft-api"))
+from vendor_msft_api_client import MsftApiClient  # noqa: E402 pylint: disable=wrong-import-position
+
+
+def per_ci_filter(cumulative_update_kbs, active_cis):
+    """
+    the O(CIs x kbs) matching replaced by match_cu_kbs
+    :param cumulative_update_kbs:
+    :param active_cis:
+    :return:
+    """
+    filtered_kbs = {}
+    for ci in active_cis:
+        ci_build_version = int(ci['version'].replace(".", ""))
+        ci_filtered_kbs = [x for x in cumulative_update_kbs if x["build_version_number"] > ci_build_version]
+        for kb in ci_filtered_kbs:
+            if kb["kb_id"] not in filtered_kbs:
+                filtered_kbs[kb["kb_id"]] = {
+                    "kb": kb, "affected_ci_versions": {ci['version']}, "affected_ci": [
+                        {"version": ci['version'], "sys_id": ci['sys_id']}
+                    ]
+                }
+            else:
+                filtered_kbs[kb["kb_id"]]["affected_ci_versions"].add(ci['version'])
+    return filtered_kbs
+
+
+def generate(cis, kbs, builds):
+    """
+    SQL Server 2019 like CU kbs and CIs spread over a number of distinct builds
+    :param cis:
+    :param kbs:
+    :param builds:
+    :return: (cumulative_update_kbs sorted by build_version, active_cis)
+    """
+    rand = random.Random(0)
+    cumulative_update_kbs = []
+    for i in range(kbs):
+        build_version = f"15.0.{4000 + i * 10}.{rand.randint(1, 9)}"
+        cumulative_update_kbs.append({
+            "kb_id": f"KB{5000000 + i}", "build_version": build_version,
+            "build_version_number": int(build_version.replace(".", "")[:8])
+        })
+    versions = [f"15.0.{rand.randint(3990, 4000 + kbs * 10)}.{rand.randint(1, 9)}" for _ in range(builds)]
+    active_cis = [{"version": rand.choice(versions), "sys_id": f"{i:032x}"} for i in range(cis)]
+    return sorted(cumulative_update_kbs, key=lambda x: x["build_version"]), active_cis
+
+
+def main(cis, kbs, builds):
+    """
+    :param cis:
+    :param kbs:
+    :param builds:
+    :return:
+    """
+    cumulative_update_kbs, active_cis = generate(cis=cis, kbs=kbs, builds=builds)
+    timings = {}
+    results = {}
+    for name, match in (("per CI filter", per_ci_filter), ("bisect index", MsftApiClient.match_cu_kbs)):
+        started = time.perf_counter()
+        results[name] = match(cumulative_update_kbs, active_cis)
+        timings[name] = time.perf_counter() - started
+    assert list(results["per CI filter"].items()) == list(results["bisect index"].items())
+    print(f"{cis} CIs / {kbs} kbs / {builds} builds | " +
+          " | ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in timings.items()) +
+          f" | speedup x{timings['per CI filter'] / timings['bisect index']:.0f}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 300,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 40
+    )
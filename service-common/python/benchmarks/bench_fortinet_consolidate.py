@@ -0,0 +1,173 @@
+"""
+created 2026-10-18
+benchmark - FortinetApiClient.consolidate_bugs ( rows folded by bugId into BugAccumulator records as they arrive ) vs
+the global sort, per bug nested dicts and per bug re.sub previously used, on a synthetic multi version release notes
+dataset. reports the time and the tracemalloc peak of both and checks the consolidated bugs are identical
+- prebuilt rows: the rows list is built before measuring, most of the peak is retained by the consolidated bugs
+  ( every row description is part of a consolidated description ), the transient part is the consolidation itself
+- streamed rows: the rows are generated while consolidating as parse_release_notes yields them, the global sort keeps
+  every row while the accumulators only keep the descriptions of the folded rows
+
+usage: python service-common/python/benchmarks/bench_fortinet_consolidate.py [rows] [versions] [distinct bugs]
+"""
+import datetime
+import logging
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.join(root_dir, "service-vendor-fortinet-api"))
+from vendor_fortinet_api_client import FortinetApiClient  # noqa: E402 pylint: disable=wrong-import-position
+
+WORDS = "FortiGate policy VDOM interface HA SSL VPN tunnel session memory crash GUI admin route IPsec proxy".split()
+
+
+def sorted_consolidate(bugs):
+    """
+    the consolidation replaced by the BugAccumulator records
+    :param bugs:
+    :return:
+    """
+    consolidated_bugs = dict()
+    bugs = sorted(bugs, key=lambda x: (int(x["bugId"]), x['release_note_timestamp']), reverse=True)
+    for bug in bugs:
+        bug_id = bug["bugId"]
+        version = bug.get("knownFixedReleases", bug.get("knownAffectedReleases"))
+        if bug_id not in consolidated_bugs:
+            consolidated_bugs[bug_id] = {
+                "bugId": bug_id, "bug_urls": {bug["bugUrl"]: bug['release_note_timestamp']}, "description_list": [],
+                "fixed_description_list": [], "summary": bug['summary'], "knownAffectedReleases": [],
+                "knownFixedReleases": [], "release_notes_timestamps": {}, "status": bug["status"]
+            }
+        else:
+            if bug["release_note_timestamp"] not in consolidated_bugs[bug_id]["release_notes_timestamps"]:
+                consolidated_bugs[bug_id]["release_notes_timestamps"][bug["release_note_timestamp"]] = \
+                    (version, bug['product_name'])
+            if bug["bugUrl"] not in consolidated_bugs[bug_id]["bug_urls"]:
+                consolidated_bugs[bug_id]["bug_urls"][bug["bugUrl"]] = bug['release_note_timestamp']
+        if bug.get('knownFixedReleases'):
+            if bug['knownFixedReleases'] not in consolidated_bugs[bug_id]['knownFixedReleases']:
+                consolidated_bugs[bug_id]['knownFixedReleases'].append(bug['knownFixedReleases'])
+            consolidated_bugs[bug_id]["fixed_description_list"].append(
+                f"\nThis bug is fixed in versions {bug['knownFixedReleases']} released on "
+                f"{bug['release_note_timestamp'].strftime('%B %d, %Y')}:"
+            )
+            consolidated_bugs[bug_id]["fixed_description_list"].append(bug['description'])
+        elif bug.get('knownAffectedReleases'):
+            if bug['knownAffectedReleases'] not in consolidated_bugs[bug_id]['knownAffectedReleases']:
+                consolidated_bugs[bug_id]['knownAffectedReleases'].append(bug.get('knownAffectedReleases'))
+            consolidated_bugs[bug_id]['description_list'].append(
+                f"\nInformation from {bug['product_name']} v{bug['knownAffectedReleases']} release notes:\n"
+                f"{bug['description']}"
+            )
+            consolidated_bugs[bug_id]['summary'] = bug['summary']
+
+    for bug_data in consolidated_bugs.values():
+        try:
+            earliest_release_note_date = min(bug_data['release_notes_timestamps'])
+            version, product_name = bug_data['release_notes_timestamps'][earliest_release_note_date]
+            bug_data["description_list"].append(
+                f"\nThe earliest recollection of this bug is traced back to {product_name} v{version} released on "
+                f"{earliest_release_note_date.strftime('%B %d, %Y')}."
+            )
+        except ValueError:
+            bug_data["description_list"].append("\nThe earliest recollection of this bug is unknown.")
+        bug_data["description"] = "\n".join(bug_data["description_list"])
+        if bug_data["fixed_description_list"]:
+            bug_data["description"] += "\n" + "\n".join(bug_data["fixed_description_list"])
+        bug_data['description'] += "\n\nFor more information:\n" + "\n".join(sorted(bug_data['bug_urls']))
+        bug_data['description'] = re.sub(r' {2,}', r' ', bug_data["description"])
+        try:
+            bug_data["vendorLastUpdatedDate"] = max(bug_data['release_notes_timestamps'])
+        except ValueError:
+            pass
+        del bug_data["description_list"]
+        del bug_data["fixed_description_list"]
+        del bug_data["release_notes_timestamps"]
+    return list(consolidated_bugs.values())
+
+
+def generate(rows, versions, distinct_bugs):
+    """
+    FortiOS like known / resolved issues rows spread over versions, every bug listed by a few consecutive versions
+    :param rows:
+    :param versions:
+    :param distinct_bugs:
+    :return: generator of the parsed rows as returned by parse_release_notes, the same rows on every call
+    """
+    rand = random.Random(0)
+    released = [
+        (f"7.{i // 20}.{i % 20}", datetime.datetime(2020, 1, 1) + datetime.timedelta(days=30 * i))
+        for i in range(versions)
+    ]
+    descriptions = [" ".join(rand.choice(WORDS) for _ in range(rand.randint(10, 60))) for _ in range(500)]
+    for n in range(rows):
+        bug_id = str(600000 + n % distinct_bugs)
+        version, timestamp = released[(n // distinct_bugs + int(bug_id) % versions) % versions]
+        fixed = rand.random() < 0.3
+        url = f"https://docs.fortinet.com/document/fortigate/{version}/fortios-release-notes/" + \
+              ("resolved-issues" if fixed else "known-issues")
+        description = f"Product Element: {rand.choice(WORDS)}\n{rand.choice(descriptions)}"
+        bug = {
+            "bugId": bug_id, "description": description, "summary": description.replace("\n", " | ", 1),
+            "bugUrl": url, "status": "Fixed" if fixed else "Open", "release_note_timestamp": timestamp,
+            "product_name": "FortiGate"
+        }
+        bug["knownFixedReleases" if fixed else "knownAffectedReleases"] = version
+        yield bug
+
+
+def measure(consolidate, bugs):
+    """
+    :param consolidate:
+    :param bugs: callable returning the rows
+    :return: (consolidated bugs, seconds, tracemalloc peak bytes, bytes retained by the consolidated bugs)
+    """
+    rows = bugs()
+    started = time.perf_counter()
+    consolidate(rows)
+    seconds = time.perf_counter() - started
+    rows = bugs()
+    tracemalloc.start()
+    consolidated = consolidate(rows)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return consolidated, seconds, peak, retained
+
+
+def main(rows, versions, distinct_bugs):
+    """
+    :param rows:
+    :param versions:
+    :param distinct_bugs:
+    :return:
+    """
+    # the client initializer opens a secrets manager session, consolidate_bugs only needs the vendor and logger
+    client = FortinetApiClient.__new__(FortinetApiClient)
+    client.vendor_id = "fortinet"
+    client.logger = logging.getLogger()
+    prebuilt = list(generate(rows=rows, versions=versions, distinct_bugs=distinct_bugs))
+    for mode, bugs in (
+            ("prebuilt rows", lambda: prebuilt),
+            ("streamed rows", lambda: generate(rows=rows, versions=versions, distinct_bugs=distinct_bugs))
+    ):
+        results = {}
+        for name, consolidate in (("sorted dicts", sorted_consolidate), ("bug accumulators", client.consolidate_bugs)):
+            results[name] = measure(consolidate, bugs)
+        assert results["sorted dicts"][0] == results["bug accumulators"][0]
+        print(f"{rows} rows / {versions} versions / {distinct_bugs} bugs | {mode} | " + " | ".join(
+            f"{name} {seconds * 1000:.0f}ms peak {peak / 1024 / 1024:.1f}MiB ( transient "
+            f"{(peak - retained) / 1024 / 1024:.1f}MiB )"
+            for name, (_consolidated, seconds, peak, retained) in results.items()
+        ) + f" | speedup x{results['sorted dicts'][1] / results['bug accumulators'][1]:.1f}")
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 60,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+    )
@@ -0,0 +1,159 @@
+"""
+created 2026-10-18
+benchmark - parse_stage plans ( xpaths compiled once per thread ) vs the xpath strings evaluated by element.xpath on
+every page previously used. every parse_stage plan of a vendor client is applied to the html fixtures saved in the
+tests directory of its service and to the pages saved in benchmarks/fixtures/<service> ( services without html test
+fixtures - fortinet release notes / change log / issues pages, hpe documents ), reports the evaluation time of both
+per service ( lxml.html.fromstring, the same for both, is not timed ) and checks the parsed values are identical
+
+usage: python service-common/python/benchmarks/bench_parse_plans.py [repeats]
+"""
+import ast
+import functools
+import glob
+import importlib
+import os
+import sys
+import time
+
+import lxml.html
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+parse_stage = importlib.import_module("service-common.python.lib.parse_stage")
+
+# saved pages of the services without html test fixtures, one directory per service
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# service modules with the same name in every service directory
+SERVICE_MODULES = ("download_manager", "vendor_exceptions")
+
+
+def string_evaluate(element, fields):
+    """
+    the fields evaluation replaced by the compiled plans
+    :param element:
+    :param fields:
+    :return:
+    """
+    values = {}
+    for name, settings in fields.items():
+        if not isinstance(settings, dict):
+            settings = {"xpath": settings}
+        xpaths = settings["xpath"] if isinstance(settings["xpath"], (list, tuple)) else [settings["xpath"]]
+        container = []
+        for xpath in xpaths:
+            container = element.xpath(xpath)
+            if container:
+                break
+        if not isinstance(container, list):
+            values[name] = container
+        elif settings.get("fields"):
+            values[name] = [string_evaluate(x, settings["fields"]) for x in container]
+        else:
+            values[name] = [
+                str(x) if isinstance(x, str) else lxml.html.tostring(x, encoding="unicode") for x in container
+            ]
+    return values
+
+
+def string_apply(root, spec):
+    """
+    :param root: parsed tree, modified in place
+    :param spec:
+    :return:
+    """
+    for xpath in spec.get("remove", []):
+        for element in root.xpath(xpath):
+            element.getparent().remove(element)
+    return string_evaluate(root, spec["fields"])
+
+
+def html_fixtures(service_dir):
+    """
+    module level html strings ( pages and fragments ) of the service tests and the saved pages of the service
+    :param service_dir:
+    :return: {name: html}
+    """
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(service_dir, "tests", "*.py"))):
+        with open(path, encoding="utf-8") as file:
+            tree = ast.parse(file.read())
+        for node in tree.body:
+            if not isinstance(node, ast.Assign) or not isinstance(node.targets[0], ast.Name):
+                continue
+            try:
+                value = ast.literal_eval(node.value)
+            except (ValueError, TypeError, SyntaxError):
+                continue
+            if isinstance(value, str) and value.lstrip().startswith("<") and "</" in value:
+                fixtures[node.targets[0].id] = value
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, os.path.basename(service_dir), "*.html"))):
+        with open(path, encoding="utf-8") as file:
+            fixtures[os.path.basename(path)] = file.read()
+    return fixtures
+
+
+def client_plans(service_dir):
+    """
+    import the vendor client of a service and return its parse_stage plans
+    :param service_dir:
+    :return: {name: Plan}
+    """
+    paths = glob.glob(os.path.join(service_dir, "vendor_*_api_client.py"))
+    if not paths:
+        return {}
+    module_name = os.path.splitext(os.path.basename(paths[0]))[0]
+    sys.path.insert(0, service_dir)
+    try:
+        module = importlib.import_module(module_name)
+        return {k: v for k, v in vars(module).items() if isinstance(v, parse_stage.Plan)}
+    finally:
+        sys.path.remove(service_dir)
+        for name in (module_name,) + SERVICE_MODULES:
+            sys.modules.pop(name, None)
+
+
+def measure(apply, html, repeats):
+    """
+    :param apply: callable(root) evaluating a spec on a parsed tree
+    :param html:
+    :param repeats:
+    :return: (parsed values, seconds)
+    """
+    parsed = apply(lxml.html.fromstring(html))
+    seconds = 0.0
+    for _ in range(repeats):
+        # the removed elements modify the tree, every repeat evaluates a new one
+        root = lxml.html.fromstring(html)
+        started = time.perf_counter()
+        apply(root)
+        seconds += time.perf_counter() - started
+    return parsed, seconds
+
+
+def main(repeats):
+    """
+    :param repeats:
+    :return:
+    """
+    for service_dir in sorted(glob.glob(os.path.join(root_dir, "service-*"))):
+        fixtures = html_fixtures(service_dir)
+        plans = client_plans(service_dir) if fixtures else {}
+        if not plans:
+            continue
+        totals = {"xpath strings": 0.0, "compiled plans": 0.0}
+        for html in fixtures.values():
+            for plan in plans.values():
+                strings, seconds = measure(functools.partial(string_apply, spec=plan.spec), html, repeats)
+                totals["xpath strings"] += seconds
+                compiled, seconds = measure(plan.apply, html, repeats)
+                totals["compiled plans"] += seconds
+                assert strings == compiled
+        service = os.path.basename(service_dir)
+        print(f"{service} | {len(fixtures)} fixtures x {len(plans)} plans x {repeats} | " + " | ".join(
+            f"{name} {seconds * 1000:.0f}ms" for name, seconds in totals.items()
+        ) + f" | speedup x{totals['xpath strings'] / totals['compiled plans']:.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,109 @@
+"""
+created 2026-10-18
+micro-benchmark - precomputed truncation plan vs the per field reflection walk previously done by
+Database.insert_bug_updates / Database.truncate_varchar_values
+
+usage: python service-common/python/benchmarks/bench_truncation_plan.py [bugs]
+"""
+import copy
+import datetime
+import importlib
+import os
+import sys
+import time
+
+from sqlalchemy import Column, DATETIME, INTEGER, JSON, TEXT, VARCHAR
+from sqlalchemy.dialects.mysql import TINYINT
+from sqlalchemy.orm import declarative_base
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+db_utils = importlib.import_module("service-common.python.lib.db_utils")
+
+# mirrors service-common/db/models/bug.model.js as reflected by automap
+bugs_table = type("bugs", (declarative_base(),), {
+    "__tablename__": "bugs",
+    "id": Column(INTEGER, primary_key=True),
+    "bugId": Column(VARCHAR(255)),
+    "bugUrl": Column(VARCHAR(1000)),
+    "description": Column(TEXT),
+    "priority": Column(VARCHAR(255)),
+    "snCiFilter": Column(VARCHAR(1000)),
+    "snCiTable": Column(VARCHAR(255)),
+    "summary": Column(VARCHAR(500)),
+    "status": Column(VARCHAR(255)),
+    "knownAffectedReleases": Column(VARCHAR(1000)),
+    "knownFixedReleases": Column(VARCHAR(1000)),
+    "knownAffectedOs": Column(VARCHAR(1000)),
+    "vendorData": Column(JSON),
+    "vendorCreatedDate": Column(DATETIME),
+    "vendorLastUpdatedDate": Column(DATETIME),
+    "processed": Column(TINYINT),
+    "managedProductId": Column(INTEGER),
+    "vendorId": Column(VARCHAR(255)),
+})
+
+
+def legacy_truncate(bugs, table_class, default=1000):
+    """
+    the per field reflection walk replaced by the truncation plan
+    :param bugs:
+    :param table_class:
+    :param default:
+    :return:
+    """
+    for bug in bugs:
+        for key, value in bug.items():
+            if type(getattr(table_class, key).prop.columns[0].type).__name__ in ["VARCHAR", "TEXT"]:
+                max_len = getattr(table_class, key).prop.columns[0].type.length
+                if not max_len:
+                    max_len = default
+                if value and len(value) > max_len:
+                    value = value[:max_len - 3] + "..."
+                bug[key] = value
+    return bugs
+
+
+def synthetic_bugs(count):
+    """
+    :param count:
+    :return:
+    """
+    now = datetime.datetime.utcnow()
+    return [
+        {
+            "bugId": str(index), "bugUrl": f"https://example.com/kb/{index}", "description": "d" * (index % 1500),
+            "priority": "High", "snCiFilter": f"sys_idIN{index}", "snCiTable": "cmdb_ci_spkg",
+            "summary": "s" * (index % 700), "status": "Fixed", "knownAffectedReleases": "1.0, 1.1",
+            "knownFixedReleases": "1.2", "knownAffectedOs": "", "vendorData": {"vendorProductName": "bench"},
+            "vendorCreatedDate": now, "vendorLastUpdatedDate": now, "processed": 0, "managedProductId": 1,
+            "vendorId": "bench"
+        }
+        for index in range(count)
+    ]
+
+
+def main(count):
+    """
+    :param count:
+    :return:
+    """
+    bugs = synthetic_bugs(count)
+    legacy_bugs, plan_bugs = copy.deepcopy(bugs), copy.deepcopy(bugs)
+
+    started = time.perf_counter()
+    legacy_truncate(legacy_bugs, bugs_table)
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    plan = db_utils.build_truncation_plan(bugs_table)
+    db_utils.apply_truncation_plan(plan_bugs, plan)
+    plan_seconds = time.perf_counter() - started
+
+    assert legacy_bugs == plan_bugs
+    print(f"{count} bugs | reflection walk {legacy_seconds:.3f}s | truncation plan {plan_seconds:.3f}s | "
+          f"{legacy_seconds / plan_seconds:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
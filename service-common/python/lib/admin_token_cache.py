@@ -0,0 +1,140 @@
+"""
+created 2026-10-18
+cache of the Microsoft admin portal tokens shared by the msft and msft365 services
+
+gen_admin_dashboard_tokens replays a 5 step login flow ( admin portal session, credential type, login, kmsi, landing )
+before any health data is requested. warm lambda containers keep the RootAuthToken / UserIndex / OIDCAuthCookie
+tokens of the last login in the cache and reuse them until they expire:
+- entries are keyed by a sha256 of the portal and the credentials, changed credentials never reuse older tokens
+- the expiry is the earliest expiry of the token cookies, capped by the cache TTL, minus a safety margin
+- tokens are validated before reuse without any request - all the tokens present and the expiry not reached
+- tokens rejected by the admin portal are invalidated so the next call logs in again
+
+ADMIN_TOKEN_CACHE_TTL ( seconds, 0 - the default - disables the cache ) / ADMIN_TOKEN_CACHE_MARGIN env variables
+override the defaults
+"""
+import collections
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+TTL = int(os.environ.get("ADMIN_TOKEN_CACHE_TTL", 0))
+# seconds before the expiry after which tokens are not reused
+MARGIN = int(os.environ.get("ADMIN_TOKEN_CACHE_MARGIN", 300))
+TOKEN_NAMES = ("RootAuthToken", "UserIndex", "OIDCAuthCookie")
+
+
+def cookie_expiry(cookies):
+    """
+    :param cookies: requests session cookie jar
+    :return: earliest expiry ( epoch seconds ) of the token cookies or None for session cookies
+    """
+    try:
+        expiry = [x.expires for x in cookies if x.name in TOKEN_NAMES and x.expires]
+    except (TypeError, AttributeError):
+        return None
+    return min(expiry) if expiry else None
+
+
+class TokenCache:
+    """
+    in process cache of admin portal tokens with their expiry
+    """
+
+    def __init__(self, ttl=TTL, margin=MARGIN, logger=logging.getLogger()):
+        """
+        :param ttl: max seconds a login is reused
+        :param margin: seconds before the expiry after which tokens are refreshed
+        :param logger:
+        """
+        self.ttl = ttl
+        self.margin = margin
+        self.logger = logger
+        self.entries = dict()
+        self.stats = collections.Counter({"hits": 0, "logins": 0, "expired": 0, "invalidated": 0})
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(portal, username, password):
+        """
+        :param portal: e.g. admin.microsoft.com
+        :param username:
+        :param password:
+        :return:
+        """
+        return hashlib.sha256(json.dumps([portal, username, password]).encode()).hexdigest()
+
+    def valid(self, entry):
+        """
+        :param entry: {"tokens", "expires_at"}
+        :return: True when all the tokens are set and the expiry is not within the margin
+        """
+        if not all(entry["tokens"].get(x) for x in TOKEN_NAMES):
+            return False
+        return entry["expires_at"] - self.margin > time.time()
+
+    def tokens(self, key, login):
+        """
+        return the cached tokens of a key or log in and cache the new tokens
+        :param key: TokenCache.key(...)
+        :param login: callable() returning (tokens, expires_at or None)
+        :return:
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if self.valid(entry):
+                    self.stats["hits"] += 1
+                    return dict(entry["tokens"])
+                self.stats["expired"] += 1
+                del self.entries[key]
+            tokens, expires_at = login()
+            self.stats["logins"] += 1
+            expires_at = min(x for x in (expires_at, time.time() + self.ttl) if x is not None)
+            self.entries[key] = {"tokens": dict(tokens), "expires_at": expires_at}
+            return tokens
+
+    def invalidate(self, tokens):
+        """
+        drop the entry holding tokens rejected by the admin portal
+        :param tokens:
+        :return: True when cached tokens were dropped
+        """
+        with self._lock:
+            for key, entry in list(self.entries.items()):
+                if entry["tokens"].get("RootAuthToken") == tokens.get("RootAuthToken"):
+                    del self.entries[key]
+                    self.stats["invalidated"] += 1
+                    self.logger.warning("admin portal tokens rejected | cached tokens invalidated")
+                    return True
+        return False
+
+    def log_stats(self):
+        """
+        :return:
+        """
+        self.logger.info(f"admin token cache stats | {json.dumps(self.stats)}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache():
+    """
+    return the token cache of this container - None when ADMIN_TOKEN_CACHE_TTL is 0
+    :return:
+    """
+    return TokenCache() if TTL > 0 else None
+
+
+def invalidate(tokens):
+    """
+    invalidate rejected tokens when the cache is enabled
+    :param tokens:
+    :return:
+    """
+    cache = get_cache()
+    if cache is not None:
+        cache.invalidate(tokens)
@@ -0,0 +1,230 @@
+"""
+created 2026-10-18
+TTL cache of ServiceNow CMDB table API results shared by the vendor services
+
+the vendor lambdas query the same CMDB tables ( cmdb_ci_spkg, cmdb_ci_computer, cmdb_ci_db_mssql_instance ) with
+overlapping filters on every run. cmdb_reader stores the records of a fully read query in the cache and answers the
+same query from it until the TTL expires:
+- entries are keyed by the normalized (instance, table, sysparm_query, sysparm_fields) - the order of the ^ / ^NQ
+  conditions and of the fields does not change the key
+- the local store is a /tmp directory kept by warm containers, the least recently used entries are evicted once the
+  directory exceeds max_bytes
+- an optional shared store ( kv_store.S3Store with CMDB_CACHE_BUCKET, kv_store.MemoryStore as a local stand-in ) is
+  looked up on a local miss and shares the results between the vendor lambdas
+- hits, shared hits, misses, expired entries, stores and evictions are counted in stats and logged by log_stats
+
+CMDB_CACHE_TTL ( seconds, 0 - the default - disables the cache ) / CMDB_CACHE_DIR / CMDB_CACHE_MAX_BYTES /
+CMDB_CACHE_MAX_RECORDS / CMDB_CACHE_BUCKET env variables override the defaults
+
+updated 2026-10-18
+- the stores moved to kv_store to be shared with kb_fingerprints
+"""
+import collections
+import functools
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+kv_store = importlib.import_module("service-common.python.lib.kv_store")
+
+TTL = int(os.environ.get("CMDB_CACHE_TTL", 0))
+DIRECTORY = os.environ.get("CMDB_CACHE_DIR", "/tmp/cmdb_cache")
+MAX_BYTES = int(os.environ.get("CMDB_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# larger results are streamed without being cached
+MAX_RECORDS = int(os.environ.get("CMDB_CACHE_MAX_RECORDS", 50000))
+BUCKET = os.environ.get("CMDB_CACHE_BUCKET", "")
+
+
+def normalize_query(sysparm_query):
+    """
+    normalize an encoded query - AND conditions ( with their ^OR alternatives ) and ^NQ segments are sorted, ORDERBY
+    terms keep their order
+    :param sysparm_query:
+    :return:
+    """
+    segments = []
+    order = []
+    for segment in unquote(sysparm_query or "").split("^NQ"):
+        groups = []
+        for term in segment.split("^"):
+            term = term.strip()
+            if not term or term == "EQ":
+                continue
+            if term.startswith("ORDERBY"):
+                order.append(term)
+            elif term.startswith("OR") and groups:
+                groups[-1].append(term[2:])
+            else:
+                groups.append([term])
+        if groups:
+            segments.append("^".join("^OR".join(sorted(x)) for x in sorted(groups, key=sorted)))
+    return "^".join(["^NQ".join(sorted(segments))] + order)
+
+
+def cache_key(instance, table, sysparm_query, sysparm_fields):
+    """
+    :param instance: SN instance host
+    :param table:
+    :param sysparm_query:
+    :param sysparm_fields: comma separated fields, empty for all fields
+    :return: sha256 hex digest of the normalized query
+    """
+    fields = sorted({x.strip() for x in (sysparm_fields or "").split(",") if x.strip()})
+    normalized = json.dumps([
+        (instance or "").lower(), (table or "").strip().lower(), normalize_query(sysparm_query), fields
+    ])
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def url_key(query_url):
+    """
+    cache key of a table API url /api/now/table/<table>?sysparm_query=...&sysparm_fields=...
+    :param query_url:
+    :return:
+    """
+    parts = urlsplit(query_url)
+    # '+' is not a space in the sn_sync urls
+    params = parse_qs(parts.query.replace("+", "%2B"), keep_blank_values=True)
+    return cache_key(
+        instance=parts.netloc, table=parts.path.rstrip("/").split("/")[-1],
+        sysparm_query=params.get("sysparm_query", [""])[0], sysparm_fields=params.get("sysparm_fields", [""])[0]
+    )
+
+
+class CmdbCache:
+    """
+    TTL cache of table API results in a local store with an optional shared store
+    """
+
+    def __init__(self, ttl=TTL, local_store=None, shared_store=None, max_records=MAX_RECORDS,
+                 logger=logging.getLogger()):
+        """
+        :param ttl: seconds
+        :param local_store: defaults to a FileStore in CMDB_CACHE_DIR
+        :param shared_store: optional store shared between lambdas
+        :param max_records: results with more records are not cached
+        :param logger:
+        """
+        self.ttl = ttl
+        self.local_store = local_store if local_store is not None else kv_store.FileStore(DIRECTORY, MAX_BYTES)
+        self.shared_store = shared_store
+        self.max_records = max_records
+        self.logger = logger
+        self.stats = collections.Counter({"hits": 0, "shared_hits": 0, "misses": 0, "expired": 0, "stores": 0})
+        self._lock = threading.Lock()
+
+    def count(self, stat):
+        """
+        :param stat:
+        :return:
+        """
+        with self._lock:
+            self.stats[stat] += 1
+
+    def load(self, store, key):
+        """
+        :param store:
+        :param key:
+        :return: entry {"stored_at", "count", "records"} or None when missing / expired
+        """
+        value = store.get(key)
+        if value is None:
+            return None
+        try:
+            entry = json.loads(value)
+        except json.JSONDecodeError:
+            store.delete(key)
+            return None
+        if time.time() - entry["stored_at"] > self.ttl:
+            self.count("expired")
+            store.delete(key)
+            return None
+        return entry
+
+    def get(self, query_url):
+        """
+        :param query_url: table API url
+        :return: (count, records) or None
+        """
+        key = url_key(query_url)
+        entry = self.load(self.local_store, key)
+        if entry is not None:
+            self.count("hits")
+            return entry["count"], entry["records"]
+        if self.shared_store is not None:
+            entry = self.load(self.shared_store, key)
+            if entry is not None:
+                self.count("shared_hits")
+                self.local_store.set(key, json.dumps(entry))
+                return entry["count"], entry["records"]
+        self.count("misses")
+        return None
+
+    def set(self, query_url, count, records):
+        """
+        :param query_url: table API url
+        :param count:
+        :param records:
+        :return:
+        """
+        key = url_key(query_url)
+        value = json.dumps({"stored_at": time.time(), "count": count, "records": records})
+        self.local_store.set(key, value)
+        if self.shared_store is not None:
+            self.shared_store.set(key, value)
+        self.count("stores")
+
+    def collect(self, query_url, count, records):
+        """
+        yield the records of a read and store them once the generator is fully consumed
+        :param query_url:
+        :param count:
+        :param records: iterator of records
+        :return:
+        """
+        collected = [] if count <= self.max_records else None
+        for record in records:
+            if collected is not None:
+                collected.append(record)
+            yield record
+        if collected is not None:
+            self.set(query_url=query_url, count=count, records=collected)
+
+    def evictions(self):
+        """
+        :return: evicted entries of the local and shared stores
+        """
+        return self.local_store.evictions + (self.shared_store.evictions if self.shared_store is not None else 0)
+
+    def log_stats(self):
+        """
+        log the hit / miss metrics
+        :return:
+        """
+        self.logger.info(f"CMDB cache stats | {json.dumps({**self.stats, 'evictions': self.evictions()})}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache():
+    """
+    return the cache shared by all the sn queries of this container - None when CMDB_CACHE_TTL is 0
+    :return:
+    """
+    if TTL <= 0:
+        return None
+    return CmdbCache(shared_store=kv_store.S3Store(bucket=BUCKET, prefix="cmdb-cache/") if BUCKET else None)
+
+
+def log_stats():
+    """
+    log the hit / miss metrics of the shared cache when it is enabled
+    :return:
+    """
+    cache = get_cache()
+    if cache is not None:
+        cache.log_stats()
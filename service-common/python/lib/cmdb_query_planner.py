@@ -0,0 +1,186 @@
+"""
+created 2026-10-18
+CMDB query planner - run the sn_sync queries of many products with one ServiceNow request per table
+
+the vendor services look for the CIs of every supported product with a separate table API query, mostly against the
+same table. the planner joins the product queries of a table into one ^NQ ( OR of full queries ) sysparm_query, adds
+the fields referenced by the product queries to sysparm_fields, reads the result with cmdb_reader and demultiplexes the
+CIs back to every product by evaluating its encoded query locally.
+
+only plain field conditions joined by ^ / ^OR are evaluated locally ( =, !=, LIKE, NOTLIKE, STARTSWITH, ENDSWITH, IN,
+NOT IN, ISEMPTY, ISNOTEMPTY - case insensitive like the ServiceNow string operators ). products with other queries
+( dot-walked fields, dates, ^NQ ... ) are left out of the plan and keep their own query.
+SN_PLAN_MAX_QUERIES env variable sets the max number of product queries joined in a single request
+"""
+import logging
+import os
+import re
+from urllib.parse import unquote
+
+MAX_QUERIES = int(os.environ.get("SN_PLAN_MAX_QUERIES", 25))
+
+# longest operators first - NOT IN must win over IN and NOTLIKE over LIKE
+CONDITION_REGEX = re.compile(
+    r"^(?P<field>[a-z0-9_]+?)(?P<operator>ISNOTEMPTY|ISEMPTY|NOTLIKE|STARTSWITH|ENDSWITH|NOT IN|LIKE|IN|!=|=)"
+    r"(?P<value>.*)$"
+)
+OPERATORS = {
+    "=": lambda value, target: value == target,
+    "!=": lambda value, target: value != target,
+    "LIKE": lambda value, target: target in value,
+    "NOTLIKE": lambda value, target: target not in value,
+    "STARTSWITH": lambda value, target: value.startswith(target),
+    "ENDSWITH": lambda value, target: value.endswith(target),
+    "IN": lambda value, target: value in [x.strip() for x in target.split(",")],
+    "NOT IN": lambda value, target: value not in [x.strip() for x in target.split(",")],
+    "ISEMPTY": lambda value, _target: not value,
+    "ISNOTEMPTY": lambda value, _target: bool(value),
+}
+
+
+class UnsupportedQuery(Exception):
+    """
+    raised when an encoded query can not be evaluated locally
+    """
+
+
+class QueryMatcher:
+    """
+    local evaluation of a ServiceNow encoded query - AND of OR groups of field conditions
+    """
+
+    def __init__(self, query):
+        """
+        :param query: encoded query e.g. osLIKEWindows 2019^os_versionSTARTSWITH10.0.17
+        """
+        self.query = query
+        self.groups = []
+        self.fields = []
+        for term in query.split("^"):
+            if not term or term == "EQ" or term.startswith("ORDERBY"):
+                continue
+            if term.startswith("NQ"):
+                raise UnsupportedQuery(f"nested ^NQ query is not supported | {query}")
+            is_or = term.startswith("OR") and bool(self.groups)
+            condition = self.condition(term[2:] if is_or else term)
+            if is_or:
+                self.groups[-1].append(condition)
+            else:
+                self.groups.append([condition])
+
+    def condition(self, term):
+        """
+        parse a single field condition
+        :param term:
+        :return: (field, operator callable, casefolded value)
+        """
+        match = CONDITION_REGEX.match(term)
+        if not match:
+            raise UnsupportedQuery(f"unsupported condition '{term}' | {self.query}")
+        field = match.group("field")
+        if field not in self.fields:
+            self.fields.append(field)
+        return field, OPERATORS[match.group("operator")], unquote(match.group("value")).casefold()
+
+    def match(self, ci):
+        """
+        :param ci: table API record
+        :return: True when the record matches the query
+        """
+        return all(
+            any(operator(str(ci.get(field) or "").casefold(), value) for field, operator, value in group)
+            for group in self.groups
+        )
+
+
+def join_query(*queries):
+    """
+    AND encoded queries, skipping empty ones
+    :param queries:
+    :return:
+    """
+    return "^".join(x for x in queries if x)
+
+
+def plan(queries, base_query="", max_queries=MAX_QUERIES, logger=logging.getLogger()):
+    """
+    group product queries by table into batched ^NQ queries
+    :param queries: list of (table, sysparm_query, sysparm_fields or None for all fields)
+    :param base_query: encoded query ANDed to every product query ( snAffectedCIQuery )
+    :param max_queries: max product queries per request
+    :param logger:
+    :return: list of batches {"table", "sysparm_query", "sysparm_fields", "matchers": {(table, query): (matcher,
+             product sysparm_fields)}}
+    """
+    if "^NQ" in (base_query or ""):
+        logger.info(f"affected CI query contains ^NQ, product queries are not batched | {base_query}")
+        return []
+    tables = {}
+    for table, query, fields in dict.fromkeys(queries):
+        try:
+            matcher = QueryMatcher(query)
+        except UnsupportedQuery as e:
+            logger.info(f"'{table}' - query is not batched | {e}")
+            continue
+        tables.setdefault(table, []).append((query, fields, matcher))
+
+    batches = []
+    for table, entries in tables.items():
+        for index in range(0, len(entries), max_queries):
+            chunk = entries[index:index + max_queries]
+            # all fields are returned when any product needs all fields
+            fields = None
+            if all(x[1] for x in chunk):
+                fields = []
+                for query, product_fields, matcher in chunk:
+                    for field in product_fields.split(",") + matcher.fields + ["sys_id"]:
+                        if field and field not in fields:
+                            fields.append(field)
+            batches.append({
+                "table": table,
+                "sysparm_query": "^NQ".join(join_query(query, base_query) for query, _fields, _matcher in chunk),
+                "sysparm_fields": ",".join(fields) if fields else None,
+                "matchers": {(table, query): (matcher, product_fields) for query, product_fields, matcher in chunk},
+            })
+    return batches
+
+
+def batch_url(sn_api_url, batch):
+    """
+    table API url of a batch - the product queries are url fragments ( partly percent encoded ) like the sn_sync urls
+    so they are not quoted again
+    :param sn_api_url:
+    :param batch:
+    :return:
+    """
+    url = f"{sn_api_url}/api/now/table/{batch['table']}?sysparm_query={batch['sysparm_query']}"
+    if batch["sysparm_fields"]:
+        url = f"{url}&sysparm_fields={batch['sysparm_fields']}"
+    return url
+
+
+def run(reader, sn_api_url, queries, base_query="", max_queries=MAX_QUERIES, logger=logging.getLogger()):
+    """
+    run the product queries with one request per table ( per max_queries products ) and demultiplex the CIs
+    :param reader: cmdb_reader.CmdbReader
+    :param sn_api_url:
+    :param queries: list of (table, sysparm_query, sysparm_fields or None for all fields)
+    :param base_query: encoded query ANDed to every product query
+    :param max_queries:
+    :param logger:
+    :return: {(table, sysparm_query): list of CIs} for every planned query - missing keys were not planned
+    """
+    results = {}
+    for batch in plan(queries=queries, base_query=base_query, max_queries=max_queries, logger=logger):
+        matchers = batch["matchers"]
+        for key in matchers:
+            results[key] = []
+        url = batch_url(sn_api_url=sn_api_url, batch=batch)
+        count, cis = reader.read(url)
+        logger.info(f"'{batch['table']}' - {count} CI(s) found for {len(matchers)} product queries")
+        for ci in cis:
+            for key, (matcher, fields) in matchers.items():
+                if matcher.match(ci):
+                    # keep the fields the product query asked for
+                    results[key].append({x: ci.get(x) for x in fields.split(",")} if fields else ci)
+    return results
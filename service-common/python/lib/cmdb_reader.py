@@ -0,0 +1,186 @@
+"""
+created 2026-10-18
+paginated ServiceNow table API reader shared by the vendor sn_sync methods
+
+a single /api/now/table/<table>?sysparm_query=... request is truncated by the instance max record limit on large CMDBs
+and holds the whole result set in memory. the reader requests sysparm_limit sized pages ordered by sys_id, reads
+x-total-count from the first page, fetches the remaining pages with up to page_concurrency parallel requests and yields
+the CIs page by page, so only page_concurrency pages are held in memory at a time.
+
+the vendor services pass their own download_instance ( retries, pooled sessions ) and their ApiConnectionError /
+ApiResponseError classes, errors of any page - including the pages fetched while iterating - are raised as those
+exceptions. SN_PAGE_SIZE / SN_PAGE_CONCURRENCY env variables override the defaults
+
+updated 2026-10-18
+- read() answers from a cmdb_cache.CmdbCache when one is passed and stores fully read results in it
+"""
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+PAGE_SIZE = int(os.environ.get("SN_PAGE_SIZE", 1000))
+PAGE_CONCURRENCY = int(os.environ.get("SN_PAGE_CONCURRENCY", 4))
+CONNECTION_EVENT_MESSAGE = "a connection to ServiceNow could not be established - check ServiceNow settings"
+RESPONSE_EVENT_MESSAGE = "ServiceNow query returned a malformed response - check ServiceNow settings"
+
+
+class CmdbReadError(Exception):
+    """
+    base class of the reader errors
+    """
+    def __init__(self, url, internal_message, event_message):
+        """
+        :param url:
+        :param internal_message:
+        :param event_message:
+        """
+        super().__init__(internal_message)
+        self.url = url
+        self.internal_message = internal_message
+        self.event_message = event_message
+
+
+class CmdbConnectionError(CmdbReadError):
+    """
+    a page could not be downloaded
+    """
+
+
+class CmdbResponseError(CmdbReadError):
+    """
+    a page is missing x-total-count or is not a valid table API response
+    """
+
+
+def page_url(query_url, limit, offset):
+    """
+    add the paging parameters to a table API query url - results are ordered by sys_id so offsets are stable between
+    pages unless the query already sets an order. the order is appended to the end of sysparm_query so it applies to
+    all the ^NQ segments of batched queries
+    :param query_url: /api/now/table/<table>?sysparm_query=...
+    :param limit:
+    :param offset:
+    :return:
+    """
+    if "ORDERBY" not in query_url and "sysparm_query=" in query_url:
+        start = query_url.index("sysparm_query=")
+        end = query_url.find("&", start)
+        end = len(query_url) if end == -1 else end
+        query_url = f"{query_url[:end]}^ORDERBYsys_id{query_url[end:]}"
+    separator = "&" if "?" in query_url else "?"
+    return f"{query_url}{separator}sysparm_limit={limit}&sysparm_offset={offset}"
+
+
+class CmdbReader:
+    """
+    paginated, streaming ServiceNow table API reader
+    """
+
+    def __init__(self, download, headers, connection_error=CmdbConnectionError, response_error=CmdbResponseError,
+                 page_size=PAGE_SIZE, page_concurrency=PAGE_CONCURRENCY, cache=None, logger=logging.getLogger(),
+                 **download_kwargs):
+        """
+        :param download: the service download_instance(link, headers, **download_kwargs)
+        :param headers: request headers ( Authorization )
+        :param connection_error: exception class(url, internal_message, event_message) raised for failed downloads
+        :param response_error: exception class(url, internal_message, event_message) raised for malformed pages
+        :param page_size: sysparm_limit
+        :param page_concurrency: max parallel page requests
+        :param cache: optional cmdb_cache.CmdbCache used by read()
+        :param logger:
+        :param download_kwargs: additional download_instance arguments e.g. session=False
+        """
+        self.download = download
+        self.headers = headers
+        self.connection_error = connection_error
+        self.response_error = response_error
+        self.page_size = max(1, page_size)
+        self.page_concurrency = max(1, page_concurrency)
+        self.cache = cache
+        self.logger = logger
+        self.download_kwargs = download_kwargs
+
+    def fetch_page(self, query_url, offset, limit=None):
+        """
+        download a single page
+        :param query_url:
+        :param offset:
+        :param limit: defaults to page_size
+        :return: (x-total-count, list of records)
+        """
+        url = page_url(query_url=query_url, limit=limit or self.page_size, offset=offset)
+        response = self.download(link=url, headers=self.headers, **self.download_kwargs)
+        if not response:
+            self.logger.error(f"SN API connection error - {url}")
+            raise self.connection_error(
+                url=query_url, internal_message="SN API connection error", event_message=CONNECTION_EVENT_MESSAGE
+            )
+        try:
+            count = int(response.headers["x-total-count"])
+        except KeyError as e:
+            raise self.response_error(
+                url=query_url, internal_message="missing 'x-total-count' in sn query response",
+                event_message=RESPONSE_EVENT_MESSAGE
+            ) from e
+        if not count:
+            return count, []
+        try:
+            records = json.loads(response.text)["result"]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            raise self.response_error(
+                url=query_url, internal_message="error parsing serviceNow response - check url",
+                event_message=RESPONSE_EVENT_MESSAGE
+            ) from e
+        return count, records
+
+    def count(self, query_url):
+        """
+        return the number of records matching a query using a single record page
+        :param query_url:
+        :return:
+        """
+        return self.fetch_page(query_url=query_url, offset=0, limit=1)[0]
+
+    def read(self, query_url):
+        """
+        download the first page and return the total count with a generator over all the records - the first page
+        is downloaded immediately so its connection / response errors are raised by read() itself. cached results
+        are returned without any request
+        :param query_url:
+        :return: (x-total-count, generator of records)
+        """
+        if self.cache is not None:
+            cached = self.cache.get(query_url)
+            if cached is not None:
+                count, records = cached
+                return count, iter(records)
+        count, records = self.fetch_page(query_url=query_url, offset=0)
+        records = self.stream(query_url=query_url, count=count, first_page=records)
+        if self.cache is not None:
+            records = self.cache.collect(query_url=query_url, count=count, records=records)
+        return count, records
+
+    def stream(self, query_url, count, first_page):
+        """
+        yield the first page records and then the remaining pages in order, fetching up to page_concurrency pages
+        in parallel
+        :param query_url:
+        :param count: x-total-count of the first page
+        :param first_page:
+        :return:
+        """
+        yield from first_page
+        # pages are requested up to x-total-count - ACLs can return fewer rows than sysparm_limit on any page
+        offsets = list(range(self.page_size, count, self.page_size))
+        if not offsets:
+            return
+        self.logger.info(f"reading {count} SN records in {len(offsets) + 1} pages | {query_url}")
+        with ThreadPoolExecutor(max_workers=self.page_concurrency) as executor:
+            for index in range(0, len(offsets), self.page_concurrency):
+                futures = [
+                    executor.submit(self.fetch_page, query_url, offset)
+                    for offset in offsets[index:index + self.page_concurrency]
+                ]
+                for future in futures:
+                    yield from future.result()[1]
@@ -0,0 +1,140 @@
+"""
+created 2026-10-18
+AIMD ( additive increase / multiplicative decrease ) concurrency controller of the docs site crawlers
+
+the docs crawlers ran a fixed number of threads and aborted the run after a fixed number of failed downloads, whether
+the site was throttling the crawler or the pages were gone. the controller adapts the number of in flight items to
+the site response instead:
+- every http attempt is observed with its status code and latency ( download_instance observer ), a fast successful
+  response adds 1 to the limit once per window of `limit` successes, a transient failure ( 429, 5xx, timeout or
+  connection error ) divides the limit by 2 - at most once per cooldown so a burst of throttled responses counts once
+- failed items are classified by their last attempt - structural failures ( 404, 401, 403, other 4xx ) are counted
+  towards abort_threshold, transient failures only count once the limit is back at the minimum, a site still failing
+  at the lowest concurrency is an outage rather than throttling
+- CrawlEngine(controller=...) runs up to `maximum` workers and starts a new item only while the in flight items are
+  below the current limit
+
+AIMD_INITIAL_LIMIT / AIMD_MIN_LIMIT / AIMD_MAX_LIMIT / AIMD_LATENCY_TARGET ( seconds ) / AIMD_ABORT_THRESHOLD env
+variables override the defaults
+"""
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+INITIAL_LIMIT = int(os.environ.get("AIMD_INITIAL_LIMIT", 3))
+MIN_LIMIT = int(os.environ.get("AIMD_MIN_LIMIT", 1))
+MAX_LIMIT = int(os.environ.get("AIMD_MAX_LIMIT", 10))
+# responses slower than the target hold the limit
+LATENCY_TARGET = float(os.environ.get("AIMD_LATENCY_TARGET", 5))
+ABORT_THRESHOLD = int(os.environ.get("AIMD_ABORT_THRESHOLD", 10))
+
+SUCCESS = "success"
+TRANSIENT = "transient"
+STRUCTURAL = "structural"
+
+
+def classify(status_code):
+    """
+    :param status_code: http status code of an attempt, None for a timeout / connection error
+    :return: SUCCESS, TRANSIENT or STRUCTURAL
+    """
+    if status_code is None or status_code == 429 or status_code >= 500:
+        return TRANSIENT
+    if status_code < 400:
+        return SUCCESS
+    return STRUCTURAL
+
+
+class AimdController:
+    """
+    thread safe adaptive concurrency limit
+    """
+
+    def __init__(self, initial=INITIAL_LIMIT, minimum=MIN_LIMIT, maximum=MAX_LIMIT, latency_target=LATENCY_TARGET,
+                 decrease=0.5, cooldown=None, abort_threshold=ABORT_THRESHOLD, logger=logging.getLogger()):
+        """
+        :param initial: starting limit
+        :param minimum:
+        :param maximum:
+        :param latency_target: seconds, slower successful responses do not raise the limit
+        :param decrease: multiplicative decrease factor
+        :param cooldown: min seconds between two decreases, defaults to latency_target
+        :param abort_threshold: structural failures ( or transient failures at the minimum limit ) aborting the crawl
+        :param logger:
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(self.maximum, max(self.minimum, initial))
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.cooldown = latency_target if cooldown is None else cooldown
+        self.abort_threshold = abort_threshold
+        self.logger = logger
+        self.stats = collections.Counter({SUCCESS: 0, TRANSIENT: 0, STRUCTURAL: 0, "increased": 0, "decreased": 0})
+        self.failures = collections.Counter({TRANSIENT: 0, STRUCTURAL: 0})
+        self._credit = 0
+        self._decreased_at = None
+        self._last = threading.local()
+        self._lock = threading.Lock()
+
+    def observe(self, status_code, latency):
+        """
+        adjust the limit after an http attempt, download_instance observer
+        :param status_code: None for a timeout / connection error
+        :param latency: seconds
+        :return: the attempt kind
+        """
+        kind = classify(status_code)
+        self._last.kind = kind
+        with self._lock:
+            self.stats[kind] += 1
+            if kind == SUCCESS:
+                # a transient failure at the minimum limit is not an outage when the site answers again
+                self.failures[TRANSIENT] = 0
+                if latency <= self.latency_target:
+                    self._credit += 1
+                    if self._credit >= self.limit and self.limit < self.maximum:
+                        self.limit += 1
+                        self._credit = 0
+                        self.stats["increased"] += 1
+            elif kind == TRANSIENT:
+                now = time.monotonic()
+                if self._decreased_at is None or now - self._decreased_at >= self.cooldown:
+                    limit = max(self.minimum, int(self.limit * self.decrease))
+                    if limit < self.limit:
+                        self.logger.warning(
+                            f"concurrency controller | {status_code or 'connection error'} - limit {self.limit} -> "
+                            f"{limit}"
+                        )
+                        self.limit = limit
+                        self.stats["decreased"] += 1
+                    self._decreased_at = now
+                    self._credit = 0
+        return kind
+
+    def fail(self, kind=None):
+        """
+        count a failed item
+        :param kind: TRANSIENT / STRUCTURAL, defaults to the kind of the last attempt observed by this thread
+        :return: True when the failures exceed abort_threshold and the crawl should stop
+        """
+        kind = kind or self._last.__dict__.pop("kind", None)
+        kind = kind if kind in (TRANSIENT, STRUCTURAL) else STRUCTURAL
+        with self._lock:
+            # throttling is absorbed by the decreases, only failures at the lowest concurrency are counted
+            if kind == STRUCTURAL or self.limit <= self.minimum:
+                self.failures[kind] += 1
+            return max(self.failures.values()) >= self.abort_threshold
+
+    def log_stats(self, name=""):
+        """
+        :param name: e.g. the crawled product
+        :return:
+        """
+        self.logger.info(
+            f"'{name}' - concurrency controller | limit {self.limit} | {json.dumps(self.stats)} | "
+            f"failures {json.dumps(self.failures)}"
+        )
@@ -0,0 +1,198 @@
+"""
+created 2026-10-18
+asyncio fetch-and-parse engine shared by the vendor crawlers
+
+the vendor crawlers used to start 3-30 threads polling a queue.Queue and appending to shared lists. the engine runs
+a blocking handler(item) ( download_instance + lxml parsing ) for every item on a bounded thread pool driven by an
+asyncio event loop and:
+- limits the number of in flight items globally and per host
+- streams CrawlResult(item, result, error) entries in completion order through an async iterator ( stream )
+- stops scheduling new items and drops the pending ones when the Lambda deadline approaches
+- with a concurrency_controller.AimdController runs up to controller.maximum items and starts a new item only while
+  the in flight items are below the controller limit
+
+set_deadline is called by the lambda handlers with the context remaining time, engines without an explicit deadline
+use it. CRAWL_CONCURRENCY / CRAWL_HOST_CONCURRENCY / CRAWL_DEADLINE_MARGIN env variables override the defaults
+"""
+import asyncio
+import collections
+import functools
+import logging
+import os
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", 30))
+# the vendor crawls fetch their pages from a single host, the per host limit defaults to the global one
+HOST_CONCURRENCY = int(os.environ.get("CRAWL_HOST_CONCURRENCY", CONCURRENCY))
+# seconds kept free before the lambda deadline for inserting the crawled bugs
+DEADLINE_MARGIN = float(os.environ.get("CRAWL_DEADLINE_MARGIN", 60))
+
+CrawlResult = collections.namedtuple("CrawlResult", ["item", "result", "error"])
+# end of the items iterator marker
+_END = object()
+
+
+@functools.lru_cache(maxsize=None)
+def get_defaults():
+    """
+    return the crawl defaults of this container - deadline: time.monotonic() value after which no new items are
+    scheduled
+    :return:
+    """
+    return types.SimpleNamespace(deadline=None)
+
+
+def set_deadline(remaining_ms, margin=DEADLINE_MARGIN):
+    """
+    set the default crawl deadline from the lambda context remaining time
+    :param remaining_ms: context.get_remaining_time_in_millis()
+    :param margin: seconds kept free before the lambda deadline
+    :return:
+    """
+    get_defaults().deadline = time.monotonic() + remaining_ms / 1000 - margin
+
+
+def clear_deadline():
+    """
+    remove the default crawl deadline
+    :return:
+    """
+    get_defaults().deadline = None
+
+
+def url_host(url):
+    """
+    return the host of a url, used as the per host concurrency key
+    :param url:
+    :return:
+    """
+    return urlsplit(url).netloc.lower()
+
+
+class CrawlEngine:
+    """
+    bounded concurrency crawl of blocking fetch-and-parse handlers
+    """
+
+    def __init__(self, concurrency=CONCURRENCY, host_concurrency=HOST_CONCURRENCY, deadline=None, controller=None,
+                 logger=logging.getLogger()):
+        """
+        :param concurrency: max in flight items, controller.maximum with a controller
+        :param host_concurrency: max in flight items per host
+        :param deadline: time.monotonic() value, defaults to the set_deadline value
+        :param controller: optional concurrency_controller.AimdController adapting the in flight items
+        :param logger:
+        """
+        self.controller = controller
+        self.concurrency = max(1, concurrency if controller is None else controller.maximum)
+        self.host_concurrency = max(1, host_concurrency)
+        self.deadline = deadline
+        self.logger = logger
+        self.stats = {"completed": 0, "failed": 0, "cancelled": 0}
+
+    def time_left(self):
+        """
+        seconds left until the deadline or None when no deadline is set
+        :return:
+        """
+        deadline = self.deadline if self.deadline is not None else get_defaults().deadline
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+
+    async def stream(self, items, handler, host=None):
+        """
+        run handler(item) for every item and yield a CrawlResult for each one as soon as it completes
+        handler exceptions are returned in CrawlResult.error, items not finished before the deadline are dropped
+        :param items:
+        :param handler: blocking callable(item)
+        :param host: callable(item) returning the per host concurrency key, e.g. url_host(item["url"])
+        :return: async iterator of CrawlResult
+        """
+        loop = asyncio.get_event_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        host_limits = {}
+        results = asyncio.Queue()
+        items = iter(items)
+        in_flight = collections.Counter()
+        # notified when an item completes, the controller limit only changes while items are in flight
+        completed = asyncio.Condition()
+
+        async def crawl(item):
+            key = host(item) if host else None
+            if key not in host_limits:
+                host_limits[key] = asyncio.Semaphore(self.host_concurrency)
+            async with host_limits[key]:
+                return await loop.run_in_executor(executor, handler, item)
+
+        async def worker():
+            # every worker pulls the next item from the shared iterator until it is exhausted
+            try:
+                while True:
+                    if self.controller is not None:
+                        async with completed:
+                            await completed.wait_for(lambda: in_flight["items"] < self.controller.limit)
+                    item = next(items, _END)
+                    if item is _END:
+                        break
+                    in_flight["items"] += 1
+                    in_flight["started"] += 1
+                    try:
+                        crawl_result = CrawlResult(item, await crawl(item), None)
+                    except Exception as e:  # pylint: disable=broad-except
+                        crawl_result = CrawlResult(item, None, e)
+                    in_flight["items"] -= 1
+                    if self.controller is not None:
+                        async with completed:
+                            completed.notify_all()
+                    await results.put(crawl_result)
+            finally:
+                # the end of worker marker is always sent so the consumer never waits for a dead worker
+                results.put_nowait(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        finished_workers = 0
+        yielded = 0
+        try:
+            while finished_workers < len(workers):
+                try:
+                    crawl_result = await asyncio.wait_for(results.get(), timeout=self.time_left())
+                except asyncio.TimeoutError:
+                    # started items not yielded - in flight or completed and not consumed yet - and pending items
+                    self.stats["cancelled"] += in_flight["started"] - yielded + sum(1 for _ in items)
+                    self.logger.warning(f"crawl deadline reached | pending items cancelled | {self.stats}")
+                    break
+                if crawl_result is None:
+                    finished_workers += 1
+                    continue
+                self.stats["failed" if crawl_result.error else "completed"] += 1
+                yielded += 1
+                yield crawl_result
+        finally:
+            for task in workers:
+                task.cancel()
+            executor.shutdown(wait=False)
+
+    def run(self, items, handler, host=None):
+        """
+        blocking iterator over stream() for the synchronous vendor api clients - every step runs the event loop until
+        the next result is available
+        :param items:
+        :param handler:
+        :param host:
+        :return: iterator of CrawlResult in completion order
+        """
+        loop = asyncio.new_event_loop()
+        crawl_results = self.stream(items=items, handler=handler, host=host)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(crawl_results.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(crawl_results.aclose())
+            loop.close()
@@ -0,0 +1,218 @@
+"""
+created 2026-10-18
+engine registry and reflected schema metadata cache shared by the vendor Database (db_client.py) classes
+
+engines are kept in a module level registry keyed by DSN so warm Lambda invocations reuse pooled MySQL connections
+instead of opening a new TCP+TLS connection per initiate() call.
+
+automap reflection of the whole Aurora schema is the most expensive part of a cold start. the reflected MetaData is
+pickled once per schema version and later invocations load it from a packaged or /tmp pickle instead of reflecting.
+the schema version marker is the latest applied sequelize migration ( SequelizeMeta holds the filenames of
+service-common/db/migrations ) and can be pinned with the SCHEMA_VERSION env variable
+"""
+import logging
+import os
+import pickle
+import re
+import threading
+
+from sqlalchemy import MetaData, create_engine, event, text
+from sqlalchemy.exc import SQLAlchemyError
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGED_METADATA_DIR = os.path.join(LIB_DIR, "schema_cache")
+TMP_METADATA_DIR = os.path.join("/tmp", "schema_cache")
+SCHEMA_VERSION_QUERY = "SELECT MAX(name) FROM SequelizeMeta"
+
+# pool configuration - Aurora closes idle connections, recycle them before that happens
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+POOL_MAX_OVERFLOW = int(os.environ.get("DB_POOL_MAX_OVERFLOW", 5))
+POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 280))
+POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+
+# engines created during this container lifetime keyed by DSN
+_engines = {}
+_engines_lock = threading.Lock()
+# engine_hits/engine_misses - registry lookups, connection_hits/connection_misses - pooled vs new DBAPI connections
+pool_stats = {
+    "engine_hits": 0,
+    "engine_misses": 0,
+    "connection_hits": 0,
+    "connection_misses": 0
+}
+
+# pickled MetaData loaded during this container lifetime - every session gets its own unpickled copy so repeated
+# automap_base().prepare() calls never map the same Table objects twice
+_loaded_metadata = {}
+
+
+def _count_checkout(_dbapi_connection, connection_record, _connection_proxy):
+    """
+    pool checkout listener - a checkout of a connection that was already used is a pool hit
+    :param _dbapi_connection:
+    :param connection_record:
+    :param _connection_proxy:
+    :return:
+    """
+    if connection_record.info.get("checked_out"):
+        pool_stats["connection_hits"] += 1
+    else:
+        pool_stats["connection_misses"] += 1
+        connection_record.info["checked_out"] = True
+
+
+def get_engine(dsn, engine_factory=create_engine, **engine_options):
+    """
+    return the pooled engine registered for a DSN, creating it on the first call
+    :param dsn: sqlalchemy database url
+    :param engine_factory:
+    :param engine_options: overrides for the default pool configuration
+    :return:
+    """
+    with _engines_lock:
+        engine = _engines.get(dsn)
+        if engine is not None:
+            pool_stats["engine_hits"] += 1
+            return engine
+        pool_stats["engine_misses"] += 1
+        options = {
+            "pool_pre_ping": True,
+            "pool_recycle": POOL_RECYCLE,
+            "pool_size": POOL_SIZE,
+            "max_overflow": POOL_MAX_OVERFLOW,
+            "pool_timeout": POOL_TIMEOUT,
+            **engine_options
+        }
+        engine = engine_factory(dsn, **options)
+        event.listen(engine, "checkout", _count_checkout)
+        _engines[dsn] = engine
+        return engine
+
+
+def get_pool_stats():
+    """
+    return a copy of the engine registry and connection pool counters
+    :return:
+    """
+    return dict(pool_stats)
+
+
+def dispose_engines():
+    """
+    close all pooled connections and empty the engine registry
+    :return:
+    """
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+class FileMetadataCache:
+    """
+    pickle based MetaData store - entries are looked up in read_dirs order and written to write_dir
+    any object implementing load(key)/save(key, metadata) can be used instead
+    """
+
+    def __init__(self, read_dirs=(PACKAGED_METADATA_DIR, TMP_METADATA_DIR), write_dir=TMP_METADATA_DIR,
+                 logger=logging.getLogger()):
+        """
+        :param read_dirs:
+        :param write_dir:
+        :param logger:
+        """
+        self.read_dirs = read_dirs
+        self.write_dir = write_dir
+        self.logger = logger
+
+    @staticmethod
+    def file_name(key):
+        """
+        convert a cache key to a safe pickle file name
+        :param key:
+        :return:
+        """
+        return re.sub(r"[^\w.-]", "_", key) + ".pickle"
+
+    def load(self, key):
+        """
+        return the cached MetaData for a key or None
+        :param key:
+        :return:
+        """
+        for directory in self.read_dirs:
+            path = os.path.join(directory, self.file_name(key))
+            if not os.path.isfile(path):
+                continue
+            try:
+                with open(path, "rb") as cache_file:
+                    metadata = pickle.load(cache_file)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+                self.logger.warning(f"failed to load schema cache '{path}' | {e}")
+                continue
+            if isinstance(metadata, MetaData):
+                return metadata
+        return None
+
+    def save(self, key, metadata):
+        """
+        write the MetaData pickle ( write to a temp file and rename so concurrent readers never see partial files )
+        :param key:
+        :param metadata:
+        :return:
+        """
+        path = os.path.join(self.write_dir, self.file_name(key))
+        try:
+            os.makedirs(self.write_dir, exist_ok=True)
+            with open(f"{path}.{os.getpid()}", "wb") as cache_file:
+                pickle.dump(metadata, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{path}.{os.getpid()}", path)
+        except (OSError, pickle.PicklingError) as e:
+            self.logger.warning(f"failed to save schema cache '{path}' | {e}")
+
+
+def get_schema_version(engine, logger=logging.getLogger()):
+    """
+    return the schema version marker - SCHEMA_VERSION env variable or the latest applied migration name
+    :param engine:
+    :param logger:
+    :return: version string or None when the marker is not available
+    """
+    if os.environ.get("SCHEMA_VERSION"):
+        return os.environ["SCHEMA_VERSION"]
+    try:
+        with engine.connect() as connection:
+            return connection.execute(text(SCHEMA_VERSION_QUERY)).scalar()
+    except SQLAlchemyError as e:
+        logger.warning(f"schema version marker is not available | {e}")
+        return None
+
+
+def reflect_metadata(engine, db_name, cache=None, logger=logging.getLogger()):
+    """
+    return the reflected MetaData of a database, reflecting only when the schema version marker has changed
+    :param engine:
+    :param db_name:
+    :param cache: MetaData store, defaults to FileMetadataCache
+    :param logger:
+    :return:
+    """
+    version = get_schema_version(engine=engine, logger=logger)
+    if not version:
+        metadata = MetaData()
+        metadata.reflect(bind=engine)
+        return metadata
+
+    key = f"{db_name}-{version}"
+    if key in _loaded_metadata:
+        return pickle.loads(_loaded_metadata[key])
+
+    cache = cache or FileMetadataCache(logger=logger)
+    metadata = cache.load(key)
+    if metadata is None:
+        logger.info(f"schema cache miss for '{key}' - reflecting database schema")
+        metadata = MetaData()
+        metadata.reflect(bind=engine)
+        cache.save(key, metadata)
+    _loaded_metadata[key] = pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+    return metadata
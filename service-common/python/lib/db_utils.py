@@ -0,0 +1,224 @@
+"""
+created 2026-10-18
+set based helpers shared by the vendor Database (db_client.py) classes
+"""
+import datetime
+import json
+import logging
+from types import SimpleNamespace
+
+from sqlalchemy import String, tuple_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+SELECT_CHUNK_SIZE = 500
+WRITE_CHUNK_SIZE = 500
+# column types truncated by apply_truncation_plan and the max length used when the type has none ( TEXT )
+TRUNCATED_TYPES = ("VARCHAR", "TEXT")
+DEFAULT_MAX_LENGTH = 1000
+
+
+def chunks(items, size):
+    """
+    split a list into consecutive slices of up to size entries
+    :param items:
+    :param size:
+    :return:
+    """
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+def build_truncation_plan(table_class, default=DEFAULT_MAX_LENGTH):
+    """
+    walk the reflected columns of a table once and return the max length of every VARCHAR/TEXT column
+    :param table_class: automap table class
+    :param default: max length used when the column type has no length
+    :return: {column name: max length}
+    """
+    return {
+        column.key: column.type.length or default
+        for column in table_class.__table__.columns
+        if type(column.type).__name__ in TRUNCATED_TYPES
+    }
+
+
+def build_truncation_plans(classes, default=DEFAULT_MAX_LENGTH):
+    """
+    build a truncation plan for every mapped table
+    :param classes: automap base.classes
+    :param default:
+    :return: {table name: {column name: max length}}
+    """
+    return {name: build_truncation_plan(table_class, default=default) for name, table_class in classes.items()}
+
+
+def apply_truncation_plan(bugs, plan):
+    """
+    truncate VARCHAR/TEXT values larger than the table definition in a single pass over the batch
+    :param bugs: list of bug dicts, updated in place
+    :param plan: {column name: max length}
+    :return: bugs
+    """
+    for bug in bugs:
+        for key in plan.keys() & bug.keys():
+            value = bug[key]
+            if value and len(value) > plan[key]:
+                bug[key] = value[:plan[key] - 3] + "..."
+    return bugs
+
+
+def string_key_fields(table_class, key_fields):
+    """
+    return the key fields stored in string columns - bugs.bugId is a utf8mb4_0900_ai_ci VARCHAR, the IN query matches
+    values that differ in case
+    :param table_class:
+    :param key_fields:
+    :return:
+    """
+    return tuple(field for field in key_fields if isinstance(getattr(table_class, field).type, String))
+
+
+def bug_key(bug, key_fields, string_fields=()):
+    """
+    return the identity tuple of a bug dict or a bugs table row, string key values are case folded
+    :param bug:
+    :param key_fields:
+    :param string_fields: key fields compared case insensitively, see string_key_fields
+    :return:
+    """
+    if isinstance(bug, dict):
+        values = [bug[field] for field in key_fields]
+    else:
+        values = [getattr(bug, field) for field in key_fields]
+    return tuple(
+        str(value).casefold() if value is not None and field in string_fields else value
+        for field, value in zip(key_fields, values)
+    )
+
+
+def prefetch_existing_bugs(
+        conn, table_class, bugs, key_fields, compare_fields, chunk_size=SELECT_CHUNK_SIZE):
+    """
+    load the id, createdAt, key and compare columns of the bugs that already exist using chunked IN queries
+    :param conn:
+    :param table_class:
+    :param bugs:
+    :param key_fields:
+    :param compare_fields:
+    :param chunk_size:
+    :return: {(key values): row} keyed by bug_key with the string key values case folded
+    """
+    # createdAt is carried by the update rows, the INSERT half of the upsert needs every NOT NULL column
+    columns = [table_class.id] + [
+        getattr(table_class, field) for field in dict.fromkeys(
+            list(key_fields) + list(compare_fields) + (["createdAt"] if hasattr(table_class, "createdAt") else [])
+        )
+    ]
+    string_fields = string_key_fields(table_class, key_fields)
+    if len(key_fields) == 1:
+        key_column = getattr(table_class, key_fields[0])
+        keys = list(dict.fromkeys(bug[key_fields[0]] for bug in bugs))
+    else:
+        key_column = tuple_(*[getattr(table_class, field) for field in key_fields])
+        keys = list(dict.fromkeys(bug_key(bug, key_fields) for bug in bugs))
+
+    existing = {}
+    for keys_chunk in chunks(keys, chunk_size):
+        rows = conn.query(*columns).filter(key_column.in_(keys_chunk)).all()
+        # keep the first match per key - same behaviour as the previous query(...).first() lookup
+        for row in rows or []:
+            existing.setdefault(bug_key(row, key_fields, string_fields), row)
+    return existing
+
+
+def upsert_rows(conn, table_class, rows, chunk_size=WRITE_CHUNK_SIZE):
+    """
+    write rows with MySQL INSERT ... ON DUPLICATE KEY UPDATE in batches
+    rows that carry the primary key update the existing entry, rows without it are inserted. every row carries
+    createdAt ( NOT NULL without default, strict mode rejects the INSERT half without it ), it is never overwritten
+    on update
+    :param conn:
+    :param table_class:
+    :param rows:
+    :param chunk_size:
+    :return:
+    """
+    # executemany requires every row in a statement to share the same columns
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    for columns, grouped_rows in groups.items():
+        statement = mysql_insert(table_class)
+        statement = statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in columns if column not in ("id", "createdAt")}
+        )
+        for rows_chunk in chunks(grouped_rows, chunk_size):
+            conn.execute(statement, rows_chunk)
+
+
+def bulk_upsert_bugs(
+        conn, table_class, bugs, is_updated, product_name=None, key_fields=("bugId", "managedProductId"),
+        compare_fields=("vendorLastUpdatedDate",), select_chunk_size=SELECT_CHUNK_SIZE,
+        write_chunk_size=WRITE_CHUNK_SIZE, logger=logging.getLogger()):
+    """
+    set based replacement for the select/add per bug loop
+    1. prefetch existing (key_fields + compare_fields) tuples in chunked IN queries
+    2. classify every bug as inserted/updated/skipped using the vendor specific is_updated(bug, existing) check
+    3. write inserts and updates in batches using INSERT ... ON DUPLICATE KEY UPDATE
+    :param conn: sqlalchemy session
+    :param table_class: automap bugs table class
+    :param bugs: list of bug dicts ( already truncated )
+    :param is_updated: callable(bug, existing) -> bool
+    :param product_name: used for logging, defaults to bug.vendorData.vendorProductName
+    :param key_fields: fields identifying an existing bug
+    :param compare_fields: existing fields needed by is_updated
+    :param select_chunk_size:
+    :param write_chunk_size:
+    :param logger:
+    :return: counter dict
+    """
+    counter = {
+        "updated_bugs": 0,
+        "skipped_bugs": 0,
+        "inserted_bugs": 0
+    }
+    if not bugs:
+        return counter
+
+    existing = prefetch_existing_bugs(
+        conn=conn, table_class=table_class, bugs=bugs, key_fields=key_fields, compare_fields=compare_fields,
+        chunk_size=select_chunk_size
+    )
+    # rows to write keyed by bug key - a bug repeated in the batch replaces its pending row
+    string_fields = string_key_fields(table_class, key_fields)
+    pending = {}
+    for bug in bugs:
+        key = bug_key(bug, key_fields, string_fields)
+        label = product_name or (bug.get("vendorData") or {}).get("vendorProductName", "")
+        now_utc = datetime.datetime.utcnow()
+        existing_bug = existing.get(key)
+        if existing_bug:
+            if not is_updated(bug, existing_bug):
+                counter["skipped_bugs"] += 1
+                continue
+            row = {**bug, "updatedAt": now_utc}
+            existing_id = getattr(existing_bug, "id", None)
+            if existing_id is not None:
+                row["id"] = existing_id
+                row["createdAt"] = getattr(existing_bug, "createdAt", None) or now_utc
+            else:
+                # the bug was inserted earlier in this batch
+                row["createdAt"] = pending[key]["createdAt"]
+            counter["updated_bugs"] += 1
+            logger.info(f"'{label}' - updating bug | {json.dumps(bug, default=str)}")
+        else:
+            row = {**bug, "createdAt": now_utc, "updatedAt": now_utc}
+            counter["inserted_bugs"] += 1
+            logger.info(f"'{label}' - inserting bug | {json.dumps(bug, default=str)}")
+        pending[key] = row
+        # later duplicates of the same bug are compared against the pending values
+        existing[key] = SimpleNamespace(**row)
+
+    upsert_rows(conn=conn, table_class=table_class, rows=list(pending.values()), chunk_size=write_chunk_size)
+    return counter
@@ -0,0 +1,240 @@
+"""
+created 2026-10-18
+cooperative deadline scheduler and resumable per vendor checkpoints
+
+the bug services arm a SIGALRM one second before the lambda timeout and the LambdaTimeOutException raised by the
+handler drops all the in flight work, the products without an updated lastExecution restart from scratch on the next
+run. the scheduler stops admitting work before the deadline instead:
+- DeadlineScheduler tracks the remaining time budget and the observed cost of every kind of work ( a product, a page
+  of kb entries ), a new unit is admitted only when its projected cost ( the most expensive unit of that kind seen so
+  far ) fits in the time left before the margin
+- Checkpoint is the resumable cursor of a vendor run - the index of the first product that was not admitted and the
+  offset of the pages crawled for products stopped part way. it is saved when the run stops early and cleared once a
+  run completes, the next scheduled run starts from the cursor instead of the first product
+
+the SIGALRM handler is kept as the last resort for a single request hanging past the deadline. checkpoints are kept
+in the CHECKPOINT_BUCKET S3 store ( the CheckpointBucket resource of the service serverless.yaml ) so the next run
+finds them after a cold start, local runs without CHECKPOINT_BUCKET use a /tmp kv_store.FileStore.
+DEADLINE_MARGIN ( seconds ) / CHECKPOINT_DIR env variables override the defaults
+"""
+import collections
+import contextlib
+import functools
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+
+kv_store = importlib.import_module("service-common.python.lib.kv_store")
+
+# seconds kept free before the lambda deadline for the db updates and the service execution status
+MARGIN = float(os.environ.get("DEADLINE_MARGIN", 90))
+DIRECTORY = os.environ.get("CHECKPOINT_DIR", "/tmp/checkpoints")
+BUCKET = os.environ.get("CHECKPOINT_BUCKET", "")
+
+
+class DeadlineScheduler:
+    """
+    admission control of units of work against the lambda remaining time
+    """
+
+    def __init__(self, remaining_ms, margin=MARGIN, logger=logging.getLogger()):
+        """
+        :param remaining_ms: context.get_remaining_time_in_millis()
+        :param margin: seconds kept free before the lambda deadline
+        :param logger:
+        """
+        self.deadline = time.monotonic() + remaining_ms / 1000 - margin
+        self.logger = logger
+        # most expensive unit seen per kind of work
+        self.costs = {}
+        self.stats = collections.Counter({"admitted": 0, "deferred": 0})
+        self._lock = threading.Lock()
+
+    def time_left(self):
+        """
+        :return: seconds left before the margin
+        """
+        return max(0.0, self.deadline - time.monotonic())
+
+    def projected_cost(self, kind, default=0.0):
+        """
+        :param kind: e.g. product / kb_page
+        :param default: cost of a kind that was not observed yet
+        :return: seconds
+        """
+        return self.costs.get(kind, default)
+
+    def admit(self, kind, default=0.0):
+        """
+        :param kind:
+        :param default: cost of a kind that was not observed yet
+        :return: True when a unit of kind is expected to complete before the margin
+        """
+        time_left = self.time_left()
+        admitted = time_left > 0 and self.projected_cost(kind, default) < time_left
+        with self._lock:
+            self.stats["admitted" if admitted else "deferred"] += 1
+        if not admitted:
+            self.logger.warning(
+                f"deadline scheduler | '{kind}' deferred - projected {self.projected_cost(kind, default):.1f}s / "
+                f"{time_left:.1f}s left"
+            )
+        return admitted
+
+    @contextlib.contextmanager
+    def track(self, kind):
+        """
+        record the duration of an admitted unit of work
+        :param kind:
+        :return:
+        """
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - started
+            with self._lock:
+                self.costs[kind] = max(duration, self.costs.get(kind, 0.0))
+
+    def log_stats(self):
+        """
+        :return:
+        """
+        self.logger.info(f"deadline scheduler stats | {json.dumps(self.stats)} | {self.time_left():.1f}s left")
+
+
+class Checkpoint:
+    """
+    resumable cursor of a vendor run - product index and page offsets
+    """
+
+    def __init__(self, vendor_id, store, cursor=None, logger=logging.getLogger()):
+        """
+        :param vendor_id:
+        :param store: kv_store store
+        :param cursor: {"product_index", "pages": {product name: {"offset", "id"}}} saved by the previous run
+        :param logger:
+        """
+        cursor = cursor or {}
+        self.vendor_id = vendor_id
+        self.store = store
+        self.logger = logger
+        # index where the previous run stopped, the products are processed from there
+        self.start_index = cursor.get("product_index", 0)
+        # index of the first product this run did not admit
+        self.product_index = None
+        # page offsets saved by the previous run, kept until their product is crawled again
+        self.resumed_pages = dict(cursor.get("pages", {}))
+        self.crawled = set()
+        # page offsets of the products this run stopped part way
+        self.pages = {}
+        self._lock = threading.Lock()
+
+    @property
+    def incomplete(self):
+        """
+        :return: True when products or pages were deferred to the next run
+        """
+        return self.product_index is not None or bool(self.pages)
+
+    def order(self, count):
+        """
+        :param count: number of products
+        :return: the product indexes starting at the resumed product
+        """
+        start = self.start_index if 0 <= self.start_index < count else 0
+        return list(range(start, count)) + list(range(start))
+
+    def defer_products(self, index):
+        """
+        :param index: index of the first product that was not admitted
+        :return:
+        """
+        with self._lock:
+            if self.product_index is None:
+                self.product_index = index
+
+    def page_offset(self, name, ids):
+        """
+        offset of the first page item of a product stopped part way by the previous run
+        :param name: product name
+        :param ids: page item ids in the crawl order, the stored offset is moved when items were added or removed
+        :return:
+        """
+        with self._lock:
+            page = self.resumed_pages.get(name)
+            self.crawled.add(name)
+        if not page:
+            return 0
+        if page["offset"] < len(ids) and ids[page["offset"]] == page["id"]:
+            return page["offset"]
+        try:
+            return ids.index(page["id"])
+        except ValueError:
+            # the resumed item is gone, crawl the product from the start
+            return 0
+
+    def defer_page(self, name, offset, item_id):
+        """
+        :param name: product name
+        :param offset: offset of the first page item that was not crawled
+        :param item_id: id of the item at offset
+        :return:
+        """
+        with self._lock:
+            self.pages[name] = {"offset": offset, "id": item_id}
+
+    def complete_pages(self, name):
+        """
+        :param name: product name crawled up to its last page
+        :return:
+        """
+        with self._lock:
+            self.pages.pop(name, None)
+
+    def save(self):
+        """
+        store the cursor of an incomplete run, remove it once a run completes
+        :return:
+        """
+        if not self.incomplete:
+            self.store.delete(self.vendor_id)
+            return
+        pages = {name: page for name, page in self.resumed_pages.items() if name not in self.crawled}
+        pages.update(self.pages)
+        cursor = {"product_index": self.product_index or 0, "pages": pages}
+        self.store.set(self.vendor_id, json.dumps(cursor))
+        self.logger.info(f"'{self.vendor_id}' - run stopped before the deadline | checkpoint {json.dumps(cursor)}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_store():
+    """
+    return the checkpoint store of this container
+    :return:
+    """
+    if BUCKET:
+        return kv_store.S3Store(bucket=BUCKET, prefix="checkpoints/")
+    return kv_store.FileStore(DIRECTORY, max_bytes=1024 * 1024)
+
+
+def load_checkpoint(vendor_id, store=None, logger=logging.getLogger()):
+    """
+    :param vendor_id:
+    :param store: defaults to get_store()
+    :param logger:
+    :return: Checkpoint resuming the cursor saved by the previous run
+    """
+    store = store if store is not None else get_store()
+    cursor = None
+    value = store.get(vendor_id)
+    if value is not None:
+        try:
+            cursor = json.loads(value)
+            logger.info(f"'{vendor_id}' - resuming the previous run | {value}")
+        except json.JSONDecodeError:
+            store.delete(vendor_id)
+    return Checkpoint(vendor_id=vendor_id, store=store, cursor=cursor, logger=logger)
@@ -0,0 +1,152 @@
+"""
+created 2026-10-18
+coordinator / worker fan out of the per managedProduct work
+
+a single bug service invocation processes all the vendor products within the 900s lambda window. in fan out mode the
+scheduled invocation is the coordinator - it runs the shared setup ( settings, secrets, SN CMDB sync ) and publishes
+one work item per product with active CIs, every work item invokes a worker running the per product bug path:
+- work items are published to the service trigger SNS topic with a `service` message attribute matched by the worker
+  function filter policy, the worker concurrency is the function reservedConcurrency
+- work_item(event) returns the work item of a worker invocation and None for a scheduled / triggered run
+- state shared by the products ( e.g. kbs listed by several products and inserted for the first one ) is resolved by
+  the coordinator in the products order, the work item excluded_ids are skipped by its worker
+- the items listed by the coordinator for a product ( e.g. its kb listing ) are passed in its work item and reused by
+  the worker, a work item over the SNS message size is published without them and the worker lists them again
+- without FAN_OUT_TOPIC_ARN the work items are kept in an in process LocalQueue, drain runs a handler for every item
+  the way SNS invokes the workers - the local stand-in used by tests and __main__ runs
+
+FAN_OUT_ENABLED ( default false ) / FAN_OUT_TOPIC_ARN / FAN_OUT_SERVICE_NAME env variables configure the fan out
+"""
+import functools
+import json
+import logging
+import os
+import queue
+
+ENABLED = os.environ.get("FAN_OUT_ENABLED", "false").lower() == "true"
+TOPIC_ARN = os.environ.get("FAN_OUT_TOPIC_ARN", "")
+# `service` message attribute of the work items, matched by the worker function filter policy
+SERVICE_NAME = os.environ.get("FAN_OUT_SERVICE_NAME", "")
+WORK_ITEM_TYPE = "fanOutWorkItem"
+# SNS message size limit, less the room of the message attributes
+MAX_MESSAGE_BYTES = 256 * 1024 - 1024
+
+
+def sns_event(message):
+    """
+    :param message: published str message
+    :return: the lambda event of an SNS delivery
+    """
+    return {"Records": [{"EventSource": "aws:sns", "Sns": {"Subject": WORK_ITEM_TYPE, "Message": message}}]}
+
+
+def work_item(event):
+    """
+    :param event: lambda event
+    :return: the work item of a worker invocation or None
+    """
+    try:
+        record = event["Records"][0]["Sns"]
+    except (KeyError, IndexError, TypeError):
+        return None
+    if record.get("Subject") != WORK_ITEM_TYPE:
+        return None
+    try:
+        item = json.loads(record["Message"])
+    except (KeyError, json.JSONDecodeError):
+        return None
+    return item if isinstance(item, dict) and item.get("type") == WORK_ITEM_TYPE else None
+
+
+def format_work_item(vendor_id, product, excluded_ids=None, items=None):
+    """
+    :param vendor_id:
+    :param product: vendor product processed by the worker
+    :param excluded_ids: ids of the items processed by the workers of the products before ( e.g. kb ids )
+    :param items: items of the product listed by the coordinator ( e.g. kb listing entries ), None when the worker
+                  lists them
+    :return:
+    """
+    item = {"type": WORK_ITEM_TYPE, "vendor_id": vendor_id, "product": product, "excluded_ids": excluded_ids or []}
+    if items is not None:
+        item["items"] = items
+        if len(json.dumps(item).encode("utf-8")) > MAX_MESSAGE_BYTES:
+            del item["items"]
+    return item
+
+
+class SnsQueue:
+    """
+    work items published to an SNS topic
+    """
+
+    def __init__(self, topic_arn, service_name, logger=logging.getLogger()):
+        """
+        :param topic_arn:
+        :param service_name: `service` message attribute
+        :param logger:
+        """
+        import boto3  # pylint: disable=import-outside-toplevel
+        self.client = boto3.client("sns")
+        self.topic_arn = topic_arn
+        self.service_name = service_name
+        self.logger = logger
+
+    def publish(self, items):
+        """
+        :param items: work items
+        :return: number of published items
+        """
+        for item in items:
+            self.client.publish(
+                TopicArn=self.topic_arn, Subject=WORK_ITEM_TYPE, Message=json.dumps(item), MessageAttributes={
+                    "service": {"DataType": "String", "StringValue": self.service_name}
+                }
+            )
+        self.logger.info(f"'{self.service_name}' - {len(items)} work items published")
+        return len(items)
+
+
+class LocalQueue:
+    """
+    in process stand-in of the SNS work item queue
+    """
+
+    def __init__(self, logger=logging.getLogger()):
+        """
+        :param logger:
+        """
+        self.items = queue.Queue()
+        self.logger = logger
+
+    def publish(self, items):
+        """
+        :param items: work items
+        :return: number of published items
+        """
+        for item in items:
+            self.items.put(json.dumps(item))
+        return len(items)
+
+    def drain(self, handler):
+        """
+        invoke handler(event) for every queued work item, items published by the handler are drained as well
+        :param handler: the lambda handler, e.g. lambda event: initiate(event, context)
+        :return: list of the handler results
+        """
+        results = []
+        while True:
+            try:
+                message = self.items.get_nowait()
+            except queue.Empty:
+                return results
+            results.append(handler(sns_event(message)))
+
+
+@functools.lru_cache(maxsize=None)
+def get_queue():
+    """
+    return the work item queue of this container - SNS with FAN_OUT_TOPIC_ARN, the in process queue otherwise
+    :return:
+    """
+    return SnsQueue(topic_arn=TOPIC_ARN, service_name=SERVICE_NAME) if TOPIC_ARN else LocalQueue()
@@ -0,0 +1,223 @@
+"""
+created 2026-10-18
+pooled HTTP client layer shared by the vendor download managers (download_manager.py)
+
+requests.get/requests.request open a new Session - and a new TCP+TLS connection - for every call. the client keeps one
+keep-alive requests.Session per host for the lifetime of the Lambda container, limits the number of in flight requests
+per host and provides exponential backoff with full jitter that honors the Retry-After response header.
+
+configuration ( env variables )
+- HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT - default timeouts in seconds
+- HTTP_HOST_CONCURRENCY - max in flight requests and pooled connections per host
+- HTTP_BACKOFF_BASE / HTTP_BACKOFF_MAX - the delay after n failed attempts is uniform(0, min(max, base * 2 ** (n - 1)))
+- HTTP_RETRY_AFTER_MAX - upper bound of a Retry-After delay
+"""
+import datetime
+import email.utils
+import functools
+import os
+import random
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 30))
+# the crawl engine runs up to 30 downloads of a single host
+HOST_CONCURRENCY = int(os.environ.get("HTTP_HOST_CONCURRENCY", 30))
+BACKOFF_BASE = float(os.environ.get("HTTP_BACKOFF_BASE", 0.5))
+BACKOFF_MAX = float(os.environ.get("HTTP_BACKOFF_MAX", 30))
+RETRY_AFTER_MAX = float(os.environ.get("HTTP_RETRY_AFTER_MAX", 120))
+
+
+def host_key(url):
+    """
+    return the connection pool key of a url
+    :param url:
+    :return:
+    """
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def retry_after(response):
+    """
+    return the Retry-After header of a response in seconds ( delta-seconds or HTTP-date ) or None
+    :param response:
+    :return:
+    """
+    value = (getattr(response, "headers", None) or {}).get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_date - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class HttpClient:
+    """
+    per host keep-alive sessions with bounded concurrency, default timeouts and retry backoff
+    """
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, host_concurrency=HOST_CONCURRENCY,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, retry_after_max=RETRY_AFTER_MAX):
+        """
+        :param connect_timeout:
+        :param read_timeout:
+        :param host_concurrency:
+        :param backoff_base:
+        :param backoff_max:
+        :param retry_after_max:
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.host_concurrency = host_concurrency
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self._sessions = {}
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def session(self, url):
+        """
+        return the pooled keep-alive session of the url host, creating it on the first call
+        sessions do not persist cookies so pooled requests stay as stateless as requests.get
+        :param url:
+        :return:
+        """
+        key = host_key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.host_concurrency)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                self._sessions[key] = session
+            return session
+
+    def semaphore(self, url):
+        """
+        return the semaphore limiting the in flight requests of the url host
+        :param url:
+        :return:
+        """
+        key = host_key(url)
+        with self._lock:
+            if key not in self._semaphores:
+                self._semaphores[key] = threading.BoundedSemaphore(self.host_concurrency)
+            return self._semaphores[key]
+
+    def timeout(self, timeout=None):
+        """
+        return a (connect, read) timeout tuple - a single number is used as the read timeout
+        :param timeout:
+        :return:
+        """
+        if timeout is None:
+            return self.connect_timeout, self.read_timeout
+        if isinstance(timeout, tuple):
+            return timeout
+        return self.connect_timeout, timeout
+
+    def request(self, method, url, session=None, timeout=None, **kwargs):
+        """
+        send a request through the pooled host session or through the session passed by the caller
+        :param method:
+        :param url:
+        :param session: caller owned session ( login cookies etc. ), defaults to the pooled host session
+        :param timeout:
+        :param kwargs: requests.Session.request arguments
+        :return: requests.Response
+        """
+        with self.semaphore(url):
+            return (session or self.session(url)).request(
+                method=method, url=url, timeout=self.timeout(timeout), **kwargs
+            )
+
+    def backoff_delay(self, attempt, response=None):
+        """
+        return the delay before the next attempt - the Retry-After header if present, full jitter otherwise
+        :param attempt: number of failed attempts so far ( 1 based )
+        :param response: failed response, if any
+        :return: seconds
+        """
+        delay = retry_after(response)
+        if delay is not None:
+            return min(delay, self.retry_after_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def backoff(self, attempt, retry=None, response=None, logger=None):
+        """
+        sleep before retrying a failed request - no sleep when the last attempt already failed
+        :param attempt: number of failed attempts so far ( 1 based )
+        :param retry: max number of attempts
+        :param response: failed response, if any
+        :param logger:
+        :return: the delay in seconds
+        """
+        if retry is not None and attempt >= retry:
+            return 0.0
+        delay = self.backoff_delay(attempt=attempt, response=response)
+        if logger:
+            logger.info(f"retrying in {delay:.2f} seconds ( attempt {attempt + 1} )")
+        time.sleep(delay)
+        return delay
+
+    def close(self):
+        """
+        close all pooled sessions
+        :return:
+        """
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def get_client():
+    """
+    return the client shared by all download managers of this container
+    :return:
+    """
+    return HttpClient()
+
+
+def request(method, url, session=None, timeout=None, **kwargs):
+    """
+    send a request with the shared client
+    :param method:
+    :param url:
+    :param session:
+    :param timeout:
+    :param kwargs:
+    :return:
+    """
+    return get_client().request(method=method, url=url, session=session, timeout=timeout, **kwargs)
+
+
+def backoff(attempt, retry=None, response=None, logger=None):
+    """
+    sleep before retrying a failed request using the shared client backoff policy
+    :param attempt:
+    :param retry:
+    :param response:
+    :param logger:
+    :return:
+    """
+    return get_client().backoff(attempt=attempt, retry=retry, response=response, logger=logger)
@@ -0,0 +1,167 @@
+"""
+created 2026-10-18
+KB article cache keyed by KB id - incremental crawls of listed KB articles
+
+the KB crawlers download and parse the html of every article returned by the vendor KB listing on every run, most of
+them unchanged. the cache keeps per KB id the fields parsed from the article html with the Last-Modified / ETag
+validators of the page:
+- cached articles are downloaded with a conditional GET ( If-None-Match / If-Modified-Since ), a 304 reuses the cached
+  fields
+- new and changed articles are parsed and cached
+
+the vendor listings only carry the publish date of an article, not its last modified date, so every article is
+revalidated with the site on every run. only the article html fields are cached, the listing fields ( title,
+products ) and the managed product are read from the current listing so an article listed by several products is
+cached once. entries are kept in a /tmp kv_store.FileStore and, with KB_CACHE_BUCKET, in an S3 store shared by cold
+starts. KB_CACHE_ENABLED ( default false ) / KB_CACHE_DIR / KB_CACHE_MAX_BYTES env variables override the defaults
+"""
+import collections
+import datetime
+import functools
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+
+kv_store = importlib.import_module("service-common.python.lib.kv_store")
+
+ENABLED = os.environ.get("KB_CACHE_ENABLED", "false").lower() == "true"
+DIRECTORY = os.environ.get("KB_CACHE_DIR", "/tmp/kb_cache")
+MAX_BYTES = int(os.environ.get("KB_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+BUCKET = os.environ.get("KB_CACHE_BUCKET", "")
+
+
+def encode(value):
+    """
+    :param value: cached fields, datetime values are kept as tagged iso strings
+    :return:
+    """
+    return json.dumps(
+        value, default=lambda x: {"__datetime__": x.isoformat()} if isinstance(x, datetime.datetime) else str(x)
+    )
+
+
+def decode(value):
+    """
+    :param value: encoded fields
+    :return:
+    """
+    return json.loads(
+        value, object_hook=lambda x: datetime.datetime.fromisoformat(x["__datetime__"]) if "__datetime__" in x else x
+    )
+
+
+class KbCache:
+    """
+    conditional GET cache of the parsed KB article fields
+    """
+
+    def __init__(self, store, name="kb", logger=logging.getLogger()):
+        """
+        :param store: kv_store store
+        :param name: key prefix, e.g. the vendor id
+        :param logger:
+        """
+        self.store = store
+        self.name = name
+        self.logger = logger
+        self.stats = collections.Counter({"not_modified": 0, "parsed": 0, "failed": 0})
+        self._lock = threading.Lock()
+
+    def key(self, kb_id):
+        """
+        :param kb_id:
+        :return:
+        """
+        return hashlib.sha256(f"{self.name}:{kb_id}".encode()).hexdigest()
+
+    def count(self, stat):
+        """
+        :param stat:
+        :return:
+        """
+        with self._lock:
+            self.stats[stat] += 1
+
+    def get(self, kb_id):
+        """
+        :param kb_id:
+        :return: entry {"etag", "last_modified", "downloaded_at", "fields"} or None
+        """
+        value = self.store.get(self.key(kb_id))
+        if value is None:
+            return None
+        try:
+            return decode(value)
+        except (json.JSONDecodeError, ValueError):
+            self.store.delete(self.key(kb_id))
+            return None
+
+    def set(self, kb_id, entry):
+        """
+        :param kb_id:
+        :param entry:
+        :return:
+        """
+        self.store.set(self.key(kb_id), encode(entry))
+
+    def fetch(self, kb_id, url, download, parse):
+        """
+        return the fields of a KB article, unchanged articles are not parsed
+        :param kb_id:
+        :param url: article url
+        :param download: callable(link, extra_headers) - the service download_instance returning 304 responses
+        :param parse: callable(response) returning the article fields or a falsy value when the page can't be parsed
+        :return: the article fields or None
+        """
+        entry = self.get(kb_id)
+        now = datetime.datetime.utcnow()
+        validators = {}
+        if entry and entry.get("etag"):
+            validators["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            validators["If-Modified-Since"] = entry["last_modified"]
+        response = download(link=url, extra_headers=validators)
+        if not response:
+            self.count("failed")
+            return None
+        if getattr(response, "status_code", 200) == 304 and entry:
+            self.count("not_modified")
+            entry["downloaded_at"] = now.isoformat()
+            self.set(kb_id, entry)
+            return entry["fields"]
+
+        fields = parse(response)
+        if not fields:
+            return None
+        self.count("parsed")
+        headers = getattr(response, "headers", None) or {}
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        self.set(kb_id, {
+            "etag": etag if isinstance(etag, str) else None,
+            "last_modified": last_modified if isinstance(last_modified, str) else None,
+            "downloaded_at": now.isoformat(), "fields": fields
+        })
+        return fields
+
+    def log_stats(self, name):
+        """
+        :param name: crawl name used in the log message
+        :return:
+        """
+        self.logger.info(f"'{name}' - kb cache | {json.dumps(self.stats)}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache(name="kb"):
+    """
+    return the KB cache of this container for a key prefix
+    :param name: key prefix, e.g. the vendor id
+    :return:
+    """
+    return KbCache(
+        store=kv_store.S3Store(bucket=BUCKET, prefix="kb-cache/") if BUCKET else
+        kv_store.FileStore(DIRECTORY, MAX_BYTES), name=name
+    )
@@ -0,0 +1,174 @@
+"""
+created 2026-10-18
+KB fingerprint store - incremental crawls of vendor KB pages
+
+the vendor crawlers download and parse every KB page on every run even when nothing changed since the last one. the
+store keeps per KB url the ETag / Last-Modified validators, a sha256 of the page content and the parse_stage result:
+- the next download is a conditional GET ( If-None-Match / If-Modified-Since ), a 304 reuses the stored result
+- servers ignoring the validators answer 200, an unchanged content hash reuses the stored result without parsing
+- changed pages, pages parsed with another spec and new pages are parsed and stored
+
+entries are kept in a /tmp kv_store.FileStore and, with KB_FINGERPRINT_BUCKET, in an S3 store shared by cold starts.
+KB_FINGERPRINT_DIR / KB_FINGERPRINT_MAX_BYTES env variables override the defaults
+"""
+import collections
+import functools
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+
+kv_store = importlib.import_module("service-common.python.lib.kv_store")
+parse_stage = importlib.import_module("service-common.python.lib.parse_stage")
+
+DIRECTORY = os.environ.get("KB_FINGERPRINT_DIR", "/tmp/kb_fingerprints")
+MAX_BYTES = int(os.environ.get("KB_FINGERPRINT_MAX_BYTES", 128 * 1024 * 1024))
+BUCKET = os.environ.get("KB_FINGERPRINT_BUCKET", "")
+
+
+def spec_hash(spec):
+    """
+    :param spec: parse_stage spec or Plan
+    :return: sha256 of the spec, stored results of another spec are not reused
+    """
+    return hashlib.sha256(json.dumps(getattr(spec, "spec", spec), sort_keys=True).encode()).hexdigest()
+
+
+def content_hash(response):
+    """
+    :param response: requests response
+    :return: sha256 of the response body
+    """
+    content = getattr(response, "content", None)
+    if not isinstance(content, bytes):
+        content = (response.text or "").encode()
+    return hashlib.sha256(content).hexdigest()
+
+
+class FingerprintStore:
+    """
+    conditional GET + content hash cache of parsed KB pages
+    """
+
+    def __init__(self, local_store=None, shared_store=None, logger=logging.getLogger()):
+        """
+        :param local_store: defaults to a kv_store.FileStore in KB_FINGERPRINT_DIR
+        :param shared_store: optional store shared between lambdas / cold starts
+        :param logger:
+        """
+        self.local_store = local_store if local_store is not None else kv_store.FileStore(DIRECTORY, MAX_BYTES)
+        self.shared_store = shared_store
+        self.logger = logger
+        self.stats = collections.Counter({"not_modified": 0, "unchanged": 0, "parsed": 0, "failed": 0})
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url):
+        """
+        :param url:
+        :return:
+        """
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def count(self, stat):
+        """
+        :param stat:
+        :return:
+        """
+        with self._lock:
+            self.stats[stat] += 1
+
+    def get(self, url):
+        """
+        :param url:
+        :return: entry {"url", "etag", "last_modified", "hash", "spec", "result"} or None
+        """
+        for store in filter(None, (self.local_store, self.shared_store)):
+            value = store.get(self.key(url))
+            if value is None:
+                continue
+            try:
+                entry = json.loads(value)
+            except json.JSONDecodeError:
+                store.delete(self.key(url))
+                continue
+            if store is self.shared_store:
+                self.local_store.set(self.key(url), value)
+            return entry
+        return None
+
+    def set(self, entry):
+        """
+        :param entry:
+        :return:
+        """
+        value = json.dumps(entry)
+        self.local_store.set(self.key(entry["url"]), value)
+        if self.shared_store is not None:
+            self.shared_store.set(self.key(entry["url"]), value)
+
+    def parse(self, url, spec, download, **download_kwargs):
+        """
+        download a KB page with a conditional GET and return its parse_stage result, unchanged pages are not parsed
+        :param url:
+        :param spec: parse_stage spec or Plan
+        :param download: the service download_instance(link, extra_headers, **download_kwargs) returning 304
+                         responses
+        :param download_kwargs:
+        :return: parsed result or None when the download failed
+        """
+        spec_id = spec_hash(spec)
+        entry = self.get(url)
+        if entry and entry.get("spec") != spec_id:
+            entry = None
+        validators = {}
+        if entry and entry.get("etag"):
+            validators["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            validators["If-Modified-Since"] = entry["last_modified"]
+
+        response = download(link=url, extra_headers=validators, **download_kwargs)
+        if not response:
+            self.count("failed")
+            return None
+        if getattr(response, "status_code", 200) == 304 and entry:
+            self.count("not_modified")
+            return entry["result"]
+
+        headers = getattr(response, "headers", None) or {}
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        updated_entry = {
+            "url": url, "etag": etag if isinstance(etag, str) else None,
+            "last_modified": last_modified if isinstance(last_modified, str) else None,
+            "hash": content_hash(response), "spec": spec_id, "result": None
+        }
+        if entry and entry["hash"] == updated_entry["hash"]:
+            self.count("unchanged")
+            updated_entry["result"] = entry["result"]
+            if updated_entry == entry:
+                return entry["result"]
+        else:
+            self.count("parsed")
+            updated_entry["result"] = parse_stage.parse(html=response.text, spec=spec)
+        self.set(updated_entry)
+        return updated_entry["result"]
+
+    def log_stats(self, name):
+        """
+        :param name: crawl name used in the log message
+        :return:
+        """
+        self.logger.info(f"'{name}' - kb fingerprints | {json.dumps(self.stats)}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_store():
+    """
+    return the fingerprint store shared by all the crawlers of this container
+    :return:
+    """
+    return FingerprintStore(
+        shared_store=kv_store.S3Store(bucket=BUCKET, prefix="kb-fingerprints/") if BUCKET else None
+    )
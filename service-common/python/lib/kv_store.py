@@ -0,0 +1,228 @@
+"""
+created 2026-10-18
+key / value stores shared by the service-common caches ( cmdb_cache, kb_fingerprints )
+
+all the stores keep str values and expose get(key) / set(key, value) / delete(key) and an evictions counter:
+- MemoryStore - in process LRU bounded by max_bytes, the local stand-in of a shared store in tests
+- FileStore - a /tmp directory kept by warm lambda containers, the least recently used files are evicted over max_bytes
+- S3Store - entries shared between lambdas and cold starts, bucket lifecycle rules remove old entries
+"""
+import collections
+import logging
+import os
+import threading
+
+
+class MemoryStore:
+    """
+    in process LRU store bounded by max_bytes
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        :param max_bytes:
+        """
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :param key:
+        :return: stored str or None
+        """
+        with self._lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        """
+        store a value and evict the least recently used entries over max_bytes
+        :param key:
+        :param value: str
+        :return:
+        """
+        with self._lock:
+            self._remove(key)
+            self.entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _key, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def delete(self, key):
+        """
+        :param key:
+        :return:
+        """
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        """
+        remove an entry, called with the lock held
+        :param key:
+        :return:
+        """
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+
+
+class FileStore:
+    """
+    /tmp directory store bounded by max_bytes - entries are files, the least recently used ( mtime ) are evicted
+    """
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        """
+        :param directory:
+        :param max_bytes:
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        # directory size, read from disk on the first write
+        self.size = None
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        """
+        :param key:
+        :return:
+        """
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """
+        :param key:
+        :return: stored str or None
+        """
+        path = self.path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = f.read()
+            # mark the entry as recently used
+            os.utime(path)
+        except OSError:
+            return None
+        return value
+
+    def set(self, key, value):
+        """
+        write the entry atomically and evict the least recently used entries over max_bytes
+        :param key:
+        :param value: str
+        :return:
+        """
+        with self._lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                if self.size is None:
+                    self.size = sum(x[1] for x in self.entries())
+                path = self.path(key)
+                previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.write(value)
+                os.replace(temp_path, path)
+                self.size += os.path.getsize(path) - previous_size
+                if self.size > self.max_bytes:
+                    self.evict(keep=key)
+            except OSError as e:
+                logging.getLogger().warning(f"'{self.directory}' - store write failed | {e}")
+
+    def entries(self):
+        """
+        :return: list of (mtime, size, file name)
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def evict(self, keep):
+        """
+        remove the least recently used entries until the directory fits in max_bytes
+        :param keep: key of the entry just written
+        :return:
+        """
+        entries = self.entries()
+        self.size = sum(x[1] for x in entries)
+        for _mtime, entry_size, name in sorted(entries):
+            if self.size <= self.max_bytes:
+                break
+            if name == f"{keep}.json":
+                continue
+            self.delete(name[:-len(".json")])
+            self.size -= entry_size
+            self.evictions += 1
+
+    def delete(self, key):
+        """
+        :param key:
+        :return:
+        """
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+
+class S3Store:
+    """
+    store shared between lambdas in an S3 bucket
+    """
+
+    def __init__(self, bucket, prefix):
+        """
+        :param bucket:
+        :param prefix: key prefix e.g. cmdb-cache/
+        """
+        import boto3  # pylint: disable=import-outside-toplevel
+        self.client = boto3.Session().client("s3")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        :param key:
+        :return: stored str or None
+        """
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=f"{self.prefix}{key}")["Body"].read().decode()
+        except Exception:  # pylint: disable=broad-except
+            # missing keys and unavailable buckets are misses
+            return None
+
+    def set(self, key, value):
+        """
+        :param key:
+        :param value: str
+        :return:
+        """
+        try:
+            self.client.put_object(Bucket=self.bucket, Key=f"{self.prefix}{key}", Body=value.encode())
+        except Exception as e:  # pylint: disable=broad-except
+            logging.getLogger().warning(f"'{self.bucket}' - shared store write failed | {e}")
+
+    def delete(self, key):
+        """
+        :param key:
+        :return:
+        """
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=f"{self.prefix}{key}")
+        except Exception:  # pylint: disable=broad-except
+            pass
@@ -0,0 +1,218 @@
+"""
+created 2026-10-18
+optional process pool parse stage shared by the vendor crawlers
+
+lxml.html.fromstring and the XPath evaluations of a crawled page hold the GIL, so once downloads run concurrently
+( crawl_engine ) the parsing of all pages is serialized on one core. parse_html takes the raw html of a page and a
+declarative XPath spec and returns plain python values, so it can run in a ProcessPoolExecutor while the crawl threads
+keep downloading.
+
+spec
+    {
+        "remove": [xpath, ...],         # elements removed from the tree before the fields are evaluated
+        "fields": {
+            name: xpath,                # list of str ( text / attribute results ) or html strings ( elements )
+            name: {
+                "xpath": xpath or [xpath, ...],     # alternatives - the first xpath with a result is used
+                "fields": {...}                     # evaluated relative to every matched element, returns a list of
+            }                                       # dicts instead of the matched elements
+        }
+    }
+
+a spec is compiled into a Plan ( xpath alternatives and nested fields normalized once ), the clients keep their plans
+as module level constants. the xpath strings of a plan are compiled into lxml.etree.XPath objects once per thread -
+compiled xpaths are not shared between the crawl threads - instead of being parsed again by element.xpath on every
+page. parse_html accepts a spec or a Plan, a Plan holds only str and tuples so it is sent as is to the worker processes
+
+PARSE_PROCESSES env variable sets the number of worker processes, 0 ( default ) parses in the calling thread. lambda
+environments without /dev/shm can not create the pool, the stage falls back to parsing in the calling thread
+"""
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import lxml.etree
+import lxml.html
+
+PARSE_PROCESSES = int(os.environ.get("PARSE_PROCESSES", 0))
+
+
+_compiled = threading.local()
+
+
+def compile_xpath(expression):
+    """
+    :param expression: xpath str
+    :return: lxml.etree.XPath of the expression, compiled once per thread
+    """
+    xpaths = _compiled.__dict__.setdefault("xpaths", {})
+    xpath = xpaths.get(expression)
+    if xpath is None:
+        xpath = xpaths[expression] = lxml.etree.XPath(expression)
+    return xpath
+
+
+def compile_fields(fields):
+    """
+    :param fields: {name: xpath or {"xpath": xpath or [xpath, ...], "fields": {...}}}
+    :return: ((name, (xpath, ...), compiled sub fields or None), ...)
+    """
+    compiled = []
+    for name, settings in fields.items():
+        if not isinstance(settings, dict):
+            settings = {"xpath": settings}
+        xpaths = settings["xpath"] if isinstance(settings["xpath"], (list, tuple)) else [settings["xpath"]]
+        compiled.append((name, tuple(xpaths), compile_fields(settings["fields"]) if settings.get("fields") else None))
+    return tuple(compiled)
+
+
+class Plan:
+    """
+    spec compiled once, evaluated with the compiled xpaths of the calling thread
+    """
+
+    def __init__(self, spec):
+        """
+        :param spec: {"remove": [xpath, ...], "fields": {...}}
+        """
+        self.spec = spec
+        self.remove = tuple(spec.get("remove", ()))
+        self.fields = compile_fields(spec["fields"])
+
+    def apply(self, root):
+        """
+        remove the plan elements from a parsed tree and evaluate the plan fields
+        :param root: lxml root element, modified in place
+        :return: {name: list of values}
+        """
+        for xpath in self.remove:
+            for element in compile_xpath(xpath)(root):
+                element.getparent().remove(element)
+        return evaluate_plan(root, self.fields)
+
+
+def evaluate_plan(element, fields):
+    """
+    evaluate compiled fields relative to an element
+    :param element: lxml element
+    :param fields: compile_fields result
+    :return: {name: list of values}
+    """
+    values = {}
+    for name, xpaths, sub_fields in fields:
+        container = []
+        for xpath in xpaths:
+            container = compile_xpath(xpath)(element)
+            if container:
+                break
+        if not isinstance(container, list):
+            # count(), boolean() etc. return a single value
+            values[name] = container
+        elif sub_fields:
+            values[name] = [evaluate_plan(x, sub_fields) for x in container]
+        else:
+            values[name] = [
+                str(x) if isinstance(x, str) else lxml.html.tostring(x, encoding="unicode") for x in container
+            ]
+    return values
+
+
+def evaluate_fields(element, fields):
+    """
+    evaluate a fields spec relative to an element
+    :param element: lxml element
+    :param fields: {name: xpath or {"xpath": xpath or [xpath, ...], "fields": {...}}}
+    :return: {name: list of values}
+    """
+    return evaluate_plan(element, compile_fields(fields))
+
+
+def parse_html(html, spec):
+    """
+    parse a html page with a declarative XPath spec
+    :param html: html str or bytes
+    :param spec: {"remove": [xpath, ...], "fields": {...}} or its Plan
+    :return: {name: list of values} containing only picklable python values
+    """
+    plan = spec if isinstance(spec, Plan) else Plan(spec)
+    return plan.apply(lxml.html.fromstring(html))
+
+
+class ParseStage:
+    """
+    parse html pages in worker processes, or in the calling thread when no pool is available
+    """
+
+    def __init__(self, processes=PARSE_PROCESSES, logger=logging.getLogger()):
+        """
+        :param processes: number of worker processes, 0 parses in the calling thread
+        :param logger:
+        """
+        self.processes = processes
+        self.logger = logger
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        """
+        return the process pool, creating it on the first call - None when parsing runs in the calling thread
+        :return:
+        """
+        with self._lock:
+            if self._executor is None and self.processes > 0:
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=self.processes)
+                except (OSError, ImportError, NotImplementedError) as e:
+                    self.logger.warning(f"process pool is not available, parsing in the calling thread | {e}")
+                    self.processes = 0
+            return self._executor
+
+    def parse(self, html, spec):
+        """
+        parse a html page with a declarative XPath spec, blocks the calling thread until the result is available
+        :param html:
+        :param spec: spec or Plan
+        :return: {name: list of values}
+        """
+        executor = self.executor()
+        if executor is None:
+            return parse_html(html, spec)
+        try:
+            return executor.submit(parse_html, html, spec).result()
+        except BrokenProcessPool as e:
+            self.logger.warning(f"process pool failed, parsing in the calling thread | {e}")
+            self.close()
+            self.processes = 0
+            return parse_html(html, spec)
+
+    def close(self):
+        """
+        shut the process pool down
+        :return:
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+@functools.lru_cache(maxsize=None)
+def get_stage():
+    """
+    return the parse stage shared by all crawlers of this container
+    :return:
+    """
+    return ParseStage()
+
+
+def parse(html, spec):
+    """
+    parse a html page with the shared parse stage
+    :param html:
+    :param spec:
+    :return:
+    """
+    return get_stage().parse(html=html, spec=spec)
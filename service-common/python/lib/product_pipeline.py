@@ -0,0 +1,216 @@
+"""
+created 2026-10-18
+per managedProduct pipeline shared by the vendor bug service orchestrators
+
+the bug services process the managed products one after another ( sn_sync, bug retrieval, filtering, db inserts and
+the lastExecution update ) and large tenants reach the lambda timeout before the last products. the pipeline runs
+process(product, db_client, api_client, counter) for independent products on up to `workers` threads:
+- every product gets its own db session ( a copy of the service Database client bound to the same pooled engine ) and
+  a copy of the api client with its own list / dict / set attributes, so per product state and commits never
+  interleave
+- objects loaded by the service session before the pipeline ( e.g. managedProducts ) are bound to the product
+  session with attach, and product objects returned to finalize are bound to the service session the same way
+- every product counts into its own collections.Counter, the counters and the process results are aggregated in the
+  products order once all the products are processed, so the totals and the active managedProduct ids do not depend
+  on the completion order
+- the optional finalize(product, result, db_client, counter) runs on the calling thread with the service db_client, in
+  the products order, as soon as a product and all the products before it are processed - state shared by the
+  products ( e.g. bugs listed by several products ) is resolved there instead of in the concurrent process
+- the first error in the products order is raised after the started products complete, the products that were not
+  started are skipped - as the sequential loop stopped on the first error
+- with a deadline_scheduler.DeadlineScheduler a product starts only when its projected cost fits in the time left,
+  the index of the first product that was not admitted is kept in the deadline_scheduler.Checkpoint and the next run
+  starts from it
+
+with a single worker ( the default ) the products run in order on the service db_client and api_client, exactly as
+the sequential loop. PRODUCT_PIPELINE_WORKERS env variable overrides the default
+"""
+import collections
+import contextlib
+import copy
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import sessionmaker
+
+WORKERS = int(os.environ.get("PRODUCT_PIPELINE_WORKERS", 1))
+
+
+def fork_db_client(db_client):
+    """
+    copy of a service Database client with its own session bound to the same engine ( and connection pool )
+    :param db_client:
+    :return:
+    """
+    forked = copy.copy(db_client)
+    forked.conn = sessionmaker(bind=db_client.conn.get_bind())()
+    forked.parent_conn = db_client.conn
+    return forked
+
+
+def fork_api_client(api_client):
+    """
+    copy of a service api client with its own list / dict / set attributes ( e.g. bug ids, per product bugs )
+    :param api_client:
+    :return:
+    """
+    forked = copy.copy(api_client)
+    for name, value in vars(api_client).items():
+        if isinstance(value, (list, dict, set)):
+            setattr(forked, name, copy.copy(value))
+    return forked
+
+
+def attach(db_client, instance):
+    """
+    return an instance loaded by another session bound to the session of db_client - service instances in process and
+    product instances in finalize
+    :param db_client: db_client passed to process or finalize
+    :param instance: e.g. a managedProduct loaded before the products are processed
+    :return:
+    """
+    state = inspect(instance, raiseerr=False)
+    if state is None or state.session is db_client.conn:
+        return instance
+    return db_client.conn.merge(instance)
+
+
+class ProductPipeline:
+    """
+    bounded concurrency per product processing with deterministic aggregation
+    """
+
+    def __init__(self, db_client, api_client, workers=None, scheduler=None, checkpoint=None,
+                 logger=logging.getLogger()):
+        """
+        :param db_client: the service Database client
+        :param api_client: the service vendor api client
+        :param workers: max products processed concurrently, defaults to WORKERS
+        :param scheduler: optional deadline_scheduler.DeadlineScheduler admitting the products
+        :param checkpoint: optional deadline_scheduler.Checkpoint of the vendor run
+        :param logger:
+        """
+        self.db_client = db_client
+        self.api_client = api_client
+        self.workers = max(1, WORKERS if workers is None else workers)
+        self.scheduler = scheduler
+        self.checkpoint = checkpoint
+        self.logger = logger
+        # indexes of the products that were not started
+        self.deferred = []
+        self._stopped = threading.Event()
+
+    def admit(self):
+        """
+        :return: True when the next product may start
+        """
+        if self._stopped.is_set():
+            return False
+        if self.scheduler is not None and not self.scheduler.admit("product"):
+            # the projected cost only grows and the time left only shrinks, the remaining products are deferred
+            self._stopped.set()
+            return False
+        return True
+
+    def process_product(self, process, product, index, forked):
+        """
+        run process for a single product
+        :param process: callable(product, db_client, api_client, counter)
+        :param product:
+        :param index: product index
+        :param forked: use a product db session and api client copy
+        :return: (counter, result)
+        """
+        counter = collections.Counter()
+        if not self.admit():
+            self.deferred.append(index)
+            return counter, None
+        with self.scheduler.track("product") if self.scheduler is not None else contextlib.nullcontext():
+            if not forked:
+                return counter, process(product, self.db_client, self.api_client, counter)
+            return self.process_forked(process, product, counter)
+
+    def process_forked(self, process, product, counter):
+        """
+        run process for a single product with a product db session and api client copy
+        :param process:
+        :param product:
+        :param counter:
+        :return: (counter, result)
+        """
+        db_client = fork_db_client(self.db_client)
+        try:
+            result = process(product, db_client, fork_api_client(self.api_client), counter)
+            db_client.conn.commit()
+            return counter, result
+        except Exception:
+            db_client.conn.rollback()
+            # products that did not start yet are skipped
+            self._stopped.set()
+            raise
+        finally:
+            db_client.conn.close()
+
+    def finalize_product(self, finalize, product, outcome):
+        """
+        :param finalize: optional callable(product, result, db_client, counter) returning the final product result
+        :param product:
+        :param outcome: (counter, result) of process_product
+        :return: (counter, final result)
+        """
+        counter, result = outcome
+        if finalize is None:
+            return outcome
+        return counter, finalize(product, result, self.db_client, counter)
+
+    def run(self, products, process, finalize=None):
+        """
+        process all the products
+        :param products:
+        :param process: callable(product, db_client, api_client, counter) returning the product result
+        :param finalize: optional callable(product, result, db_client, counter) run in the products order on the
+                         calling thread with the service db_client, returns the final product result
+        :return: (aggregated collections.Counter, list of the product results in the products order)
+        """
+        products = list(products)
+        self._stopped.clear()
+        self.deferred = []
+        # a resumed run starts from the first product deferred by the previous run
+        order = self.checkpoint.order(len(products)) if self.checkpoint is not None else range(len(products))
+        outcomes = {}
+        if self.workers == 1 or len(products) < 2:
+            for index in order:
+                outcomes[index] = self.finalize_product(
+                    finalize, products[index], self.process_product(process, products[index], index, forked=False)
+                )
+        else:
+            self.logger.info(f"processing {len(products)} products with {self.workers} workers")
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+            futures = [
+                (index, executor.submit(self.process_product, process, products[index], index, True))
+                for index in order
+            ]
+            try:
+                for index, future in futures:
+                    error = future.exception()
+                    if error is not None:
+                        # the started products complete before the error is raised
+                        for _index, started in futures:
+                            started.exception()
+                        raise error
+                    outcomes[index] = self.finalize_product(finalize, products[index], future.result())
+            finally:
+                # a lambda timeout raised while waiting stops scheduling the remaining products
+                self._stopped.set()
+                executor.shutdown(wait=False)
+
+        if self.deferred and self.checkpoint is not None:
+            position = {index: n for n, index in enumerate(order)}
+            self.checkpoint.defer_products(min(self.deferred, key=position.get))
+        counter = collections.Counter()
+        for index in range(len(products)):
+            counter.update(outcomes[index][0])
+        return counter, [outcomes[index][1] for index in range(len(products))]
@@ -0,0 +1,193 @@
+"""
+created 2026-10-18
+per product manifest of the harvested release notes versions - version delta crawling
+
+the release notes crawlers download and parse the landing, change log and issues pages of every version listed by
+the vendor docs on every run although published versions almost never change. the manifest keeps per product the
+bugs parsed for every harvested version with a hash of its pages:
+- versions missing from the manifest are crawled
+- the RECENT_VERSIONS highest versions are crawled again to catch edits of the latest release notes, a different
+  pages hash is counted as an edit and replaces the stored bugs
+- versions harvested more than REFRESH_DAYS ago are crawled again
+- the stored bugs of the other listed versions are merged with the crawled ones, versions no longer listed are dropped
+
+manifests are kept in a /tmp kv_store.FileStore and, with VERSION_MANIFEST_BUCKET, in an S3 store shared by cold
+starts. VERSION_MANIFEST_ENABLED ( default false ) / VERSION_MANIFEST_RECENT_VERSIONS /
+VERSION_MANIFEST_REFRESH_DAYS / VERSION_MANIFEST_DIR / VERSION_MANIFEST_MAX_BYTES env variables override the defaults
+"""
+import collections
+import datetime
+import functools
+import hashlib
+import importlib
+import json
+import logging
+import os
+import re
+
+kv_store = importlib.import_module("service-common.python.lib.kv_store")
+
+ENABLED = os.environ.get("VERSION_MANIFEST_ENABLED", "false").lower() == "true"
+RECENT_VERSIONS = int(os.environ.get("VERSION_MANIFEST_RECENT_VERSIONS", 3))
+REFRESH_DAYS = int(os.environ.get("VERSION_MANIFEST_REFRESH_DAYS", 30))
+DIRECTORY = os.environ.get("VERSION_MANIFEST_DIR", "/tmp/version_manifests")
+MAX_BYTES = int(os.environ.get("VERSION_MANIFEST_MAX_BYTES", 256 * 1024 * 1024))
+BUCKET = os.environ.get("VERSION_MANIFEST_BUCKET", "")
+
+
+def version_key(version):
+    """
+    :param version: e.g. 7.0.12
+    :return: sortable tuple of the version numbers
+    """
+    return tuple(int(x) for x in re.findall(r"\d+", version))
+
+
+def encode(value):
+    """
+    :param value: stored bugs, datetime values are kept as tagged iso strings
+    :return:
+    """
+    return json.dumps(
+        value, default=lambda x: {"__datetime__": x.isoformat()} if isinstance(x, datetime.datetime) else str(x)
+    )
+
+
+def decode(value):
+    """
+    :param value: encoded bugs
+    :return:
+    """
+    return json.loads(
+        value, object_hook=lambda x: datetime.datetime.fromisoformat(x["__datetime__"]) if "__datetime__" in x else x
+    )
+
+
+def key(name):
+    """
+    :param name:
+    :return:
+    """
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+def pages_hash(texts):
+    """
+    :param texts: str / bytes of the downloaded pages of a version
+    :return: sha256 of the pages
+    """
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode() if isinstance(text, str) else text or b"")
+    return digest.hexdigest()
+
+
+class VersionManifest:
+    """
+    harvested versions of a product with their bugs and pages hash
+    """
+
+    def __init__(self, name, store, versions=None, recent=RECENT_VERSIONS, refresh_days=REFRESH_DAYS,
+                 logger=logging.getLogger()):
+        """
+        :param name: e.g. fortinet-fortigate
+        :param store: kv_store store
+        :param versions: {version: {"url", "hash", "harvested_at", "bugs"}} stored by the previous run
+        :param recent: highest versions crawled on every run
+        :param refresh_days: max days a harvested version is reused
+        :param logger:
+        """
+        self.name = name
+        self.store = store
+        self.versions = versions or {}
+        self.recent = recent
+        self.refresh_days = refresh_days
+        self.logger = logger
+        # versions listed by the vendor in this run
+        self.listed = set()
+        self.stats = collections.Counter({"new": 0, "recent": 0, "refreshed": 0, "stored": 0, "edited": 0})
+
+    def select(self, entries):
+        """
+        :param entries: listed versions [{"version", "url"}]
+        :return: the entries to crawl
+        """
+        self.listed = {entry["version"] for entry in entries}
+        recent = set(sorted(self.listed, key=version_key, reverse=True)[:self.recent])
+        refresh_before = (datetime.datetime.utcnow() - datetime.timedelta(days=self.refresh_days)).isoformat()
+        selected = []
+        for entry in entries:
+            harvested = self.versions.get(entry["version"])
+            if not harvested or harvested["url"] != entry["url"]:
+                self.stats["new"] += 1
+            elif entry["version"] in recent:
+                self.stats["recent"] += 1
+            elif harvested["harvested_at"] < refresh_before:
+                self.stats["refreshed"] += 1
+            else:
+                self.stats["stored"] += 1
+                continue
+            selected.append(entry)
+        return selected
+
+    def bugs(self, version):
+        """
+        :param version:
+        :return: stored bugs of a harvested version or None
+        """
+        harvested = self.versions.get(version)
+        return decode(harvested["bugs"]) if harvested else None
+
+    def update(self, version, url, version_hash, bugs):
+        """
+        :param version:
+        :param url: release notes url of the version
+        :param version_hash: pages_hash of the version pages
+        :param bugs: parsed bugs of the version
+        :return:
+        """
+        harvested = self.versions.get(version)
+        if harvested and harvested["hash"] != version_hash:
+            self.stats["edited"] += 1
+        self.versions[version] = {
+            "url": url, "hash": version_hash, "harvested_at": datetime.datetime.utcnow().isoformat(),
+            "bugs": encode(list(bugs))
+        }
+
+    def save(self):
+        """
+        store the listed versions
+        :return:
+        """
+        self.versions = {k: v for k, v in self.versions.items() if k in self.listed}
+        self.store.set(key(self.name), json.dumps(self.versions))
+        self.logger.info(f"'{self.name}' - version manifest | {json.dumps(self.stats)}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_store():
+    """
+    return the manifest store of this container
+    :return:
+    """
+    if BUCKET:
+        return kv_store.S3Store(bucket=BUCKET, prefix="version-manifests/")
+    return kv_store.FileStore(DIRECTORY, MAX_BYTES)
+
+
+def load_manifest(name, store=None, logger=logging.getLogger()):
+    """
+    :param name: e.g. fortinet-fortigate
+    :param store: defaults to get_store()
+    :param logger:
+    :return: VersionManifest of the versions harvested by the previous runs
+    """
+    store = store if store is not None else get_store()
+    versions = None
+    value = store.get(key(name))
+    if value is not None:
+        try:
+            versions = json.loads(value)
+        except json.JSONDecodeError:
+            store.delete(key(name))
+    return VersionManifest(name=name, store=store, versions=versions, logger=logger)
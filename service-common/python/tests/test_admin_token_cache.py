@@ -0,0 +1,61 @@
+"""
+unit testing for admin_token_cache
+"""
+import importlib
+import os
+import sys
+import time
+
+import requests
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+admin_token_cache = importlib.import_module("service-common.python.lib.admin_token_cache")
+
+
+########################################################################################################################
+#                                               TokenCache.tokens                                                      #
+########################################################################################################################
+def test_admin_token_cache(*_args):
+    """
+    requirement: admin portal tokens are reused until they expire and refreshed when expired or rejected
+    mock: login flow returning the portal tokens, a requests cookie jar with expiring token cookies
+    description: a second call reuses the tokens, other credentials, expired and invalidated tokens log in again and
+                 the expiry is read from the token cookies
+    :return:
+    """
+    cache = admin_token_cache.TokenCache(ttl=3600, margin=300)
+    logins = []
+
+    def login(username, expires_at=None):
+        logins.append(username)
+        return {"RootAuthToken": "test", "OIDCAuthCookie": "test", "UserIndex": "test"}, expires_at
+
+    def tokens(username="test", password="test", **kwargs):
+        return cache.tokens(
+            key=cache.key(portal="admin.microsoft.com", username=username, password=password),
+            login=lambda: login(username, **kwargs)
+        )
+
+    assert tokens() == {"RootAuthToken": "test", "OIDCAuthCookie": "test", "UserIndex": "test"}
+    assert tokens() == tokens(password="test") and len(logins) == 1
+    tokens(password="changed")
+    assert len(logins) == 2
+
+    assert cache.invalidate({"RootAuthToken": "test"}) and not cache.invalidate({"RootAuthToken": "other"})
+    tokens(username="expiring", expires_at=time.time() + 60)
+    tokens(username="expiring")
+    assert logins[-2:] == ["expiring", "expiring"]
+    assert cache.stats["hits"] == 2 and cache.stats["expired"] == 1 and cache.stats["invalidated"] == 1
+
+    cookies = requests.cookies.RequestsCookieJar()
+    cookies.set("RootAuthToken", "test", expires=2000000000)
+    cookies.set("UserIndex", "test", expires=1900000000)
+    cookies.set("other", "test", expires=1000)
+    assert admin_token_cache.cookie_expiry(cookies) == 1900000000
+    session_cookies = requests.cookies.RequestsCookieJar()
+    session_cookies.set("RootAuthToken", "test")
+    assert admin_token_cache.cookie_expiry(session_cookies) is None
+    assert admin_token_cache.cookie_expiry(type("mockSessionCookies", (object,), {})) is None
+    # the cache is disabled by default
+    assert admin_token_cache.get_cache() is None
@@ -0,0 +1,71 @@
+"""
+unit testing for cmdb_cache
+"""
+import importlib
+import json
+import os
+import sys
+import tempfile
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
+cmdb_reader = importlib.import_module("service-common.python.lib.cmdb_reader")
+
+
+########################################################################################################################
+#                                               CmdbCache                                                              #
+########################################################################################################################
+def test_cmdb_cache_hits_and_eviction(*_args):
+    """
+    requirement: fully read CMDB queries are answered from the /tmp store, then from the shared store, until the TTL
+                 expires
+    mock: download_instance returning 2 CIs, MemoryStore as the shared store, a temporary directory as /tmp
+    description: the same normalized query is downloaded once, a new container gets it from the shared store, expired
+                 entries are misses and the least recently used files are evicted over max_bytes
+    :return:
+    """
+    requested = []
+
+    def download(link, headers):
+        requested.append(link)
+        return type("response", (object,), {
+            "headers": {"x-total-count": "2"}, "text": json.dumps({"result": [{"sys_id": "1"}, {"sys_id": "2"}]})
+        })
+
+    url = "https://sn/api/now/table/cmdb_ci_spkg?sysparm_query=nameSTARTSWITHa^install_status=1&sysparm_fields=a,b"
+    same_url = "https://sn/api/now/table/cmdb_ci_spkg?sysparm_query=install_status=1^nameSTARTSWITHa&sysparm_fields=b,a"
+    shared_store = cmdb_cache.kv_store.MemoryStore()
+    with tempfile.TemporaryDirectory() as directory:
+        cache = cmdb_cache.CmdbCache(
+            ttl=60, local_store=cmdb_cache.kv_store.FileStore(directory), shared_store=shared_store
+        )
+        reader = cmdb_reader.CmdbReader(download=download, headers={}, cache=cache)
+        count, cis = reader.read(url)
+        assert count == 2 and len(list(cis)) == 2
+        count, cis = reader.read(same_url)
+        assert count == 2 and [x["sys_id"] for x in cis] == ["1", "2"]
+        assert len(requested) == 1
+        assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1 and cache.stats["stores"] == 1
+
+        with tempfile.TemporaryDirectory() as new_directory:
+            new_cache = cmdb_cache.CmdbCache(
+                ttl=60, local_store=cmdb_cache.kv_store.FileStore(new_directory), shared_store=shared_store
+            )
+            assert new_cache.get(same_url) == (2, [{"sys_id": "1"}, {"sys_id": "2"}])
+            assert new_cache.stats["shared_hits"] == 1
+
+        expired_cache = cmdb_cache.CmdbCache(ttl=-1, local_store=cmdb_cache.kv_store.FileStore(directory))
+        assert expired_cache.get(url) is None
+        assert expired_cache.stats["expired"] == 1 and expired_cache.stats["misses"] == 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = cmdb_cache.kv_store.FileStore(directory, max_bytes=25)
+        store.set("a", "x" * 10)
+        store.set("b", "x" * 10)
+        # 'a' was used after 'b'
+        os.utime(store.path("b"), (100, 100))
+        os.utime(store.path("a"), (200, 200))
+        store.set("c", "x" * 10)
+        assert store.get("b") is None and store.get("a") and store.get("c")
+        assert store.evictions == 1
@@ -0,0 +1,61 @@
+"""
+unit testing for cmdb_query_planner
+"""
+import importlib
+import os
+import sys
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+cmdb_query_planner = importlib.import_module("service-common.python.lib.cmdb_query_planner")
+
+
+########################################################################################################################
+#                                               run / plan                                                             #
+########################################################################################################################
+def test_cmdb_query_planner_batches(*_args):
+    """
+    requirement: the product queries of a table are joined into one ^NQ request and the CIs are demultiplexed by
+                 evaluating every product query locally
+    mock: reader returning the CIs of the cmdb_ci_computer and cmdb_ci_spkg tables
+    description: 2 requests for 4 products, unsupported queries are not planned, every product gets the CIs matching
+                 its own query with its own fields
+    :return:
+    """
+    requested = []
+    tables = {
+        "cmdb_ci_computer": [
+            {"sys_id": "1", "os": "Windows 2019 Datacenter", "os_version": "10.0.17763", "version": ""},
+            {"sys_id": "2", "os": "Windows 2022", "os_version": "10.0.20348", "version": ""},
+            {"sys_id": "3", "os": "windows 2019", "os_version": "10.0.17763", "version": ""},
+        ],
+        "cmdb_ci_spkg": [{"sys_id": "4", "name": "Microsoft Access", "version": "16.0.1"}],
+    }
+
+    def read(url):
+        requested.append(url)
+        table = url.split("/api/now/table/")[1].split("?")[0]
+        return len(tables[table]), iter(tables[table])
+
+    queries = [
+        ("cmdb_ci_computer", "osLIKEWindows 2019^os_versionSTARTSWITH10.0.17763", "os_version,version,sys_id"),
+        ("cmdb_ci_computer", "osLIKEWindows 2022^ORosLIKEWindows 2025", "os_version,version,sys_id"),
+        ("cmdb_ci_computer", "cpu_manufacturer.nameLIKEintel", "os_version,version,sys_id"),
+        ("cmdb_ci_spkg", "nameSTARTSWITHMicrosoft%20Access^versionSTARTSWITH16.", "os_version,version,sys_id"),
+        ("cmdb_ci_spkg", "nameSTARTSWITHMicrosoft%20Access^versionSTARTSWITH17.", "os_version,version,sys_id"),
+    ]
+    reader = type("reader", (object,), {"read": staticmethod(read)})
+    results = cmdb_query_planner.run(
+        reader=reader, sn_api_url="https://sn", queries=queries, base_query="install_status=1"
+    )
+    assert len(requested) == 2
+    assert "sysparm_query=osLIKEWindows 2019^os_versionSTARTSWITH10.0.17763^install_status=1^NQosLIKEWindows 2022^" \
+           "ORosLIKEWindows 2025^install_status=1&sysparm_fields=os_version,version,sys_id,os" in requested[0]
+    assert [x["sys_id"] for x in results[queries[0][:2]]] == ["1", "3"]
+    assert results[queries[1][:2]] == [{"os_version": "10.0.20348", "version": "", "sys_id": "2"}]
+    assert queries[2][:2] not in results
+    assert [x["sys_id"] for x in results[queries[3][:2]]] == ["4"]
+    assert results[queries[4][:2]] == []
+
+    assert not cmdb_query_planner.plan(queries=queries, base_query="install_status=1^NQinstall_status=2")
+    assert len(cmdb_query_planner.plan(queries=queries[:2], max_queries=1)) == 2
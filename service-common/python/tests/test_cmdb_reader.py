@@ -0,0 +1,55 @@
+"""
+unit testing for cmdb_reader
+"""
+import importlib
+import json
+import os
+import re
+import sys
+
+import pytest
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+cmdb_reader = importlib.import_module("service-common.python.lib.cmdb_reader")
+
+
+########################################################################################################################
+#                                               CmdbReader.read                                                        #
+########################################################################################################################
+def test_cmdb_reader_pages(*_args):
+    """
+    requirement: the reader pages with sysparm_limit / sysparm_offset ordered by sys_id and yields every CI in order
+    mock: download_instance returning 2500 CIs in pages of the requested size
+    description: 3 pages are requested, the CIs are streamed in offset order and a failed page raises the connection
+                 error while iterating
+    :return:
+    """
+    requested = []
+
+    def download(link, headers, failed_offset=None):
+        limit, offset = [int(x) for x in re.findall(r"sysparm_limit=(\d+)&sysparm_offset=(\d+)", link)[0]]
+        requested.append((limit, offset))
+        assert "sysparm_query=version=1^ORDERBYsys_id&" in link and headers
+        if offset == failed_offset:
+            return False
+        records = [{"sys_id": str(x)} for x in range(offset, min(offset + limit, 2500))]
+        return type("response", (object,), {
+            "headers": {"x-total-count": "2500"}, "text": json.dumps({"result": records})
+        })
+
+    reader = cmdb_reader.CmdbReader(
+        download=download, headers={"Authorization": "x"}, page_size=1000, page_concurrency=2
+    )
+    count, cis = reader.read("https://sn/api/now/table/cmdb_ci?sysparm_query=version=1")
+    assert count == 2500
+    assert [int(x["sys_id"]) for x in cis] == list(range(2500))
+    assert sorted(requested) == [(1000, 0), (1000, 1000), (1000, 2000)]
+    assert reader.count("https://sn/api/now/table/cmdb_ci?sysparm_query=version=1") == 2500
+
+    reader = cmdb_reader.CmdbReader(
+        download=download, headers={"Authorization": "x"}, page_size=1000, failed_offset=2000
+    )
+    count, cis = reader.read("https://sn/api/now/table/cmdb_ci?sysparm_query=version=1")
+    with pytest.raises(cmdb_reader.CmdbConnectionError):
+        list(cis)
@@ -0,0 +1,87 @@
+"""
+unit testing for concurrency_controller
+"""
+import importlib
+import os
+import sys
+import threading
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+concurrency_controller = importlib.import_module("service-common.python.lib.concurrency_controller")
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
+
+
+########################################################################################################################
+#                                               AimdController                                                         #
+########################################################################################################################
+def test_concurrency_controller(*_args):
+    """
+    requirement: the limit grows by one per window of fast successes, halves on throttling at most once per cooldown
+                 and only structural failures or failures at the minimum limit abort the crawl
+    mock: observed status codes and latencies
+    description: 3 -> 4 after 3 fast successes, slow successes hold the limit, a 429 burst halves it once, 404s reach
+                 the abort threshold while 503s above the minimum limit do not count
+    :return:
+    """
+    assert [concurrency_controller.classify(x) for x in (200, 302, 404, 429, 503, None)] == [
+        "success", "success", "structural", "transient", "transient", "transient"
+    ]
+    controller = concurrency_controller.AimdController(
+        initial=3, minimum=1, maximum=5, latency_target=1, cooldown=60, abort_threshold=3
+    )
+    for _ in range(3):
+        controller.observe(200, 0.1)
+    assert controller.limit == 4
+    for _ in range(10):
+        controller.observe(200, 2)
+    assert controller.limit == 4
+    for _ in range(5):
+        assert controller.observe(429, 0.1) == "transient"
+    assert controller.limit == 2 and controller.stats["decreased"] == 1
+
+    # throttling above the minimum limit is absorbed, the last attempt of the thread classifies the failure
+    controller.observe(503, 0.1)
+    assert not controller.fail() and controller.failures["transient"] == 0
+    controller.observe(404, 0.1)
+    assert not controller.fail() and not controller.fail("structural")
+    assert controller.fail() and controller.failures["structural"] == 3
+
+    # a site failing at the minimum limit is an outage until it answers again
+    controller = concurrency_controller.AimdController(initial=1, minimum=1, maximum=1, abort_threshold=2)
+    assert not controller.fail("transient")
+    controller.observe(200, 0.1)
+    assert not controller.fail("transient") and controller.fail("transient")
+
+
+########################################################################################################################
+#                                               CrawlEngine with a controller                                          #
+########################################################################################################################
+def test_crawl_engine_adaptive_concurrency(*_args):
+    """
+    requirement: the crawl engine never runs more items than the controller limit and follows its changes
+    mock: blocking handler observing a 429 for the first items and fast successes afterwards
+    description: 30 items with a controller starting at 4, the limit drops to 1 and climbs back, every item completes
+    :return:
+    """
+    controller = concurrency_controller.AimdController(initial=4, minimum=1, maximum=6, latency_target=1, cooldown=0)
+    lock = threading.Lock()
+    in_flight = {"items": 0, "over_limit": 0}
+
+    def handler(item):
+        with lock:
+            in_flight["items"] += 1
+            in_flight["over_limit"] += in_flight["items"] > controller.limit
+        time.sleep(0.01)
+        with lock:
+            in_flight["items"] -= 1
+        controller.observe(429 if item < 3 else 200, 0.01)
+        return item
+
+    engine = crawl_engine.CrawlEngine(controller=controller)
+    assert engine.concurrency == 6
+    crawl_results = list(engine.run(items=range(30), handler=handler))
+    assert sorted(x.result for x in crawl_results) == list(range(30))
+    assert controller.stats["decreased"] >= 1 and controller.stats["increased"] >= 1
+    assert in_flight["over_limit"] <= 4
@@ -0,0 +1,69 @@
+"""
+unit testing for crawl_engine
+"""
+import importlib
+import os
+import sys
+import threading
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
+
+
+########################################################################################################################
+#                                               CrawlEngine.run                                                        #
+########################################################################################################################
+def test_crawl_engine_limits_and_errors(*_args):
+    """
+    requirement: every item is crawled once, handler errors are returned with the item and the global / per host
+                 concurrency limits are never exceeded
+    mock: blocking handler tracking the number of in flight items per host
+    description: 40 items over 2 hosts, every 10th item fails
+    :return:
+    """
+    lock = threading.Lock()
+    in_flight = {"total": 0, "max_total": 0, "a": 0, "b": 0, "max_host": 0}
+
+    def handler(item):
+        host = "a" if item % 2 else "b"
+        with lock:
+            in_flight["total"] += 1
+            in_flight[host] += 1
+            in_flight["max_total"] = max(in_flight["max_total"], in_flight["total"])
+            in_flight["max_host"] = max(in_flight["max_host"], in_flight[host])
+        time.sleep(0.01)
+        with lock:
+            in_flight["total"] -= 1
+            in_flight[host] -= 1
+        if item % 10 == 0:
+            raise ValueError(item)
+        return item * 2
+
+    engine = crawl_engine.CrawlEngine(concurrency=6, host_concurrency=2)
+    crawl_results = list(engine.run(items=range(40), handler=handler, host=lambda item: "a" if item % 2 else "b"))
+    assert sorted(x.item for x in crawl_results) == list(range(40))
+    assert all(x.result == x.item * 2 for x in crawl_results if not x.error)
+    assert sorted(x.item for x in crawl_results if x.error) == [0, 10, 20, 30]
+    assert engine.stats == {"completed": 36, "failed": 4, "cancelled": 0}
+    assert in_flight["max_total"] <= 4
+    assert in_flight["max_host"] <= 2
+
+
+def test_crawl_engine_deadline(*_args):
+    """
+    requirement: items that are not finished before the deadline are cancelled and the crawl returns
+    mock: slow blocking handler, deadline set through set_deadline
+    description: the first results are returned and the remaining items are counted as cancelled
+    :return:
+    """
+    crawl_engine.set_deadline(remaining_ms=300, margin=0)
+    try:
+        engine = crawl_engine.CrawlEngine(concurrency=2)
+        crawl_results = list(engine.run(items=range(20), handler=lambda item: time.sleep(0.1)))
+    finally:
+        crawl_engine.clear_deadline()
+    assert len(crawl_results) < 20
+    assert engine.stats["cancelled"] == 20 - len(crawl_results)
+    assert crawl_engine.CrawlEngine().time_left() is None
@@ -0,0 +1,57 @@
+"""
+unit testing for db_session
+"""
+import importlib
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+db_session = importlib.import_module("service-common.python.lib.db_session")
+
+
+########################################################################################################################
+#                                               get_engine                                                             #
+########################################################################################################################
+def test_get_engine_registry(*_args):
+    """
+    requirement: engines are created once per DSN and reused by later sessions
+    mock: engine factory
+    description: the second lookup of the same DSN is a registry hit and the pool is configured
+    :return:
+    """
+    engine_factory = MagicMock()
+    stats = db_session.get_pool_stats()
+    with patch.object(db_session.event, "listen"):
+        engine = db_session.get_engine("mysql+pymysql://test@registry/test", engine_factory=engine_factory)
+        assert db_session.get_engine("mysql+pymysql://test@registry/test", engine_factory=engine_factory) is engine
+    assert engine_factory.call_count == 1
+    assert engine_factory.call_args.kwargs["pool_pre_ping"]
+    assert db_session.get_pool_stats()["engine_misses"] == stats["engine_misses"] + 1
+    assert db_session.get_pool_stats()["engine_hits"] == stats["engine_hits"] + 1
+    db_session.dispose_engines()
+
+
+########################################################################################################################
+#                                               reflect_metadata                                                       #
+########################################################################################################################
+@patch.dict(os.environ, {"SCHEMA_VERSION": "20220308042906-vmware-rename.js"})
+def test_create_session_schema_cache(*_args):
+    """
+    requirement: the schema is reflected once per schema version marker
+    mock: metadata cache, MetaData.reflect
+    description: a cache miss reflects and saves the MetaData, later sessions reuse it until the marker changes
+    :return:
+    """
+    cache = MagicMock()
+    cache.load.return_value = None
+    with patch.object(db_session.MetaData, "reflect") as reflect:
+        db_session.reflect_metadata(engine=MagicMock(), db_name="test-schema", cache=cache)
+        db_session.reflect_metadata(engine=MagicMock(), db_name="test-schema", cache=cache)
+        assert reflect.call_count == 1
+        assert cache.save.call_count == 1
+        os.environ["SCHEMA_VERSION"] = "20990101000000-new-migration.js"
+        db_session.reflect_metadata(engine=MagicMock(), db_name="test-schema", cache=cache)
+        assert reflect.call_count == 2
+    db_session._loaded_metadata.clear()
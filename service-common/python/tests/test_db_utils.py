@@ -0,0 +1,117 @@
+"""
+unit testing for db_utils
+"""
+import datetime
+import importlib
+import os
+import sys
+from unittest.mock import MagicMock
+
+from sqlalchemy import Column, DATETIME, INTEGER, TEXT, VARCHAR
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import declarative_base
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+db_utils = importlib.import_module("service-common.python.lib.db_utils")
+
+
+def bugs_table():
+    """
+    :return: bugs table class with NOT NULL createdAt / updatedAt
+    """
+    return type("bugs", (declarative_base(),), {
+        "__tablename__": "bugs", "id": Column(INTEGER, primary_key=True, autoincrement=True),
+        "bugId": Column(VARCHAR(255), nullable=False), "managedProductId": Column(INTEGER, nullable=False),
+        "vendorLastUpdatedDate": Column(DATETIME), "createdAt": Column(DATETIME, nullable=False),
+        "updatedAt": Column(DATETIME, nullable=False)
+    })
+
+
+########################################################################################################################
+#                                               truncation plans                                                       #
+########################################################################################################################
+def test_truncation_plan(*_args):
+    """
+    requirement: VARCHAR/TEXT max lengths are collected once per table and applied to the whole batch
+    mock: bugs table class with VARCHAR(8), TEXT and INTEGER columns
+    description: values longer than the column length ( or 1000 for TEXT ) are truncated, other types are ignored
+    :return:
+    """
+    table_class = type("bugs", (declarative_base(),), {
+        "__tablename__": "bugs", "id": Column(INTEGER, primary_key=True), "summary": Column(VARCHAR(8)),
+        "description": Column(TEXT)
+    })
+    plan = db_utils.build_truncation_plan(table_class)
+    assert plan == {"summary": 8, "description": 1000}
+    bugs = db_utils.apply_truncation_plan(
+        bugs=[{"id": 1, "summary": "value" * 2, "description": "a" * 1001}, {"id": 2, "summary": None}],
+        plan=plan
+    )
+    assert bugs[0] == {"id": 1, "summary": "value...", "description": "a" * 997 + "..."}
+    assert bugs[1] == {"id": 2, "summary": None}
+
+
+########################################################################################################################
+#                                               bulk_upsert_bugs                                                       #
+########################################################################################################################
+def test_bulk_upsert_statement(*_args):
+    """
+    requirement: the INSERT half of the upsert of an existing bug carries every NOT NULL column ( strict mode )
+    mock: bugs table with NOT NULL createdAt / updatedAt, session with a single existing bug
+    description: the MySQL statements are compiled for every written row, updated rows keep the stored createdAt
+                 which is not part of the ON DUPLICATE KEY UPDATE clause
+    :return:
+    """
+    table_class = bugs_table()
+    created_at = datetime.datetime(2020, 1, 1)
+    conn = MagicMock()
+    conn.query.return_value.filter.return_value.all.return_value = [type("row", (object,), {
+        "id": 7, "bugId": "1", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2022, 1, 1),
+        "createdAt": created_at
+    })]
+    counter = db_utils.bulk_upsert_bugs(
+        conn=conn, table_class=table_class, bugs=[
+            {"bugId": "1", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2022, 2, 1)},
+            {"bugId": "2", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2022, 2, 1)},
+        ], is_updated=lambda bug, existing: bug["vendorLastUpdatedDate"] > existing.vendorLastUpdatedDate
+    )
+    assert counter == {"updated_bugs": 1, "skipped_bugs": 0, "inserted_bugs": 1}
+    assert "createdAt" in [x.key for x in conn.query.call_args.args]
+    not_null = {x.name for x in table_class.__table__.columns if not x.nullable and x.autoincrement is not True}
+    written_rows = []
+    for call in conn.execute.call_args_list:
+        statement, rows = call.args
+        for row in rows:
+            compiled = statement.values(**row).compile(dialect=mysql.dialect())
+            assert not_null <= {k for k, v in compiled.params.items() if v is not None}
+            assert "ON DUPLICATE KEY UPDATE" in str(compiled)
+            assert "createdAt = VALUES" not in str(compiled)
+            written_rows.append(row)
+    assert [(row.get("id"), row["createdAt"] == created_at) for row in written_rows] == [(7, True), (None, False)]
+
+
+def test_bulk_upsert_case_insensitive_key(*_args):
+    """
+    requirement: the existing bugs returned by the case insensitive IN query ( utf8mb4_0900_ai_ci bugId ) are
+                 updated, not inserted again ( the bugs table has no unique key on bugId, managedProductId )
+    mock: bugs table, session returning a stored bug whose bugId differs only in case
+    description: the incoming bug is an update of the stored row and a repeated bug in another case is written once
+    :return:
+    """
+    conn = MagicMock()
+    conn.query.return_value.filter.return_value.all.return_value = [type("row", (object,), {
+        "id": 7, "bugId": "FG-1234", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2022, 1, 1),
+        "createdAt": datetime.datetime(2020, 1, 1)
+    })]
+    counter = db_utils.bulk_upsert_bugs(
+        conn=conn, table_class=bugs_table(), bugs=[
+            {"bugId": "fg-1234", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2022, 2, 1)},
+            {"bugId": "Fg-1234", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2022, 3, 1)},
+        ], is_updated=lambda bug, existing: bug["vendorLastUpdatedDate"] > existing.vendorLastUpdatedDate
+    )
+    assert counter == {"updated_bugs": 2, "skipped_bugs": 0, "inserted_bugs": 0}
+    written_rows = [row for call in conn.execute.call_args_list for row in call.args[1]]
+    assert [(row["id"], row["vendorLastUpdatedDate"]) for row in written_rows] == [(7, datetime.datetime(2022, 3, 1))]
+    assert db_utils.bug_key({"bugId": "FG-1234", "managedProductId": 1}, ("bugId", "managedProductId"), ("bugId",)) \
+        == ("fg-1234", 1)
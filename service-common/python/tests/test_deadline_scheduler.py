@@ -0,0 +1,82 @@
+"""
+unit testing for deadline_scheduler
+"""
+import importlib
+import os
+import sys
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+deadline_scheduler = importlib.import_module("service-common.python.lib.deadline_scheduler")
+product_pipeline = importlib.import_module("service-common.python.lib.product_pipeline")
+kv_store = importlib.import_module("service-common.python.lib.kv_store")
+
+
+########################################################################################################################
+#                                      DeadlineScheduler / Checkpoint                                                  #
+########################################################################################################################
+def test_deadline_scheduler(*_args):
+    """
+    requirement: products and pages are admitted while their projected cost fits in the time left, the first deferred
+                 product and the page offsets are checkpointed and the next run resumes from them
+    mock: kv_store.MemoryStore checkpoint store, a process raising the projected product cost after 3 products
+    description: the deferred products are skipped, the checkpoint starts the next run at the first deferred product,
+                 page offsets follow their item when items are added and a completed run removes the checkpoint
+    :return:
+    """
+    scheduler = deadline_scheduler.DeadlineScheduler(remaining_ms=10000, margin=0)
+    assert scheduler.admit("product")
+    with scheduler.track("product"):
+        time.sleep(0.01)
+    assert 0.01 <= scheduler.projected_cost("product") < 10
+    assert not scheduler.admit("kb_page", default=20)
+    assert not deadline_scheduler.DeadlineScheduler(remaining_ms=10000, margin=10).admit("product")
+
+    store = kv_store.MemoryStore()
+    processed = []
+
+    def process(product, _db_client, _api_client, counter):
+        processed.append(product)
+        counter["managed_products"] += 1
+        if len(processed) == 3:
+            scheduler.costs["product"] = 1000
+        return product
+
+    checkpoint = deadline_scheduler.load_checkpoint(vendor_id="msft", store=store)
+    scheduler = deadline_scheduler.DeadlineScheduler(remaining_ms=100000, margin=0)
+    pipeline = product_pipeline.ProductPipeline(
+        db_client=None, api_client=None, workers=1, scheduler=scheduler, checkpoint=checkpoint
+    )
+    assert pipeline.run(products=list(range(8)), process=process) == (
+        {"managed_products": 3}, [0, 1, 2, None, None, None, None, None]
+    )
+    checkpoint.defer_page(name="product 2", offset=2, item_id="kb 2")
+    checkpoint.save()
+    assert checkpoint.incomplete and scheduler.stats["deferred"] == 1
+
+    # the next run starts at the first deferred product
+    processed.clear()
+    checkpoint = deadline_scheduler.load_checkpoint(vendor_id="msft", store=store)
+    assert checkpoint.order(8) == [3, 4, 5, 6, 7, 0, 1, 2] and checkpoint.order(2) == [0, 1]
+    assert checkpoint.page_offset(name="product 2", ids=["kb 0", "kb 1", "kb 2"]) == 2
+    assert checkpoint.page_offset(name="product 2", ids=["kb new", "kb 0", "kb 1", "kb 2"]) == 3
+    assert checkpoint.page_offset(name="product 2", ids=["kb 0"]) == 0
+    assert checkpoint.page_offset(name="product 1", ids=["kb 0", "kb 1", "kb 2"]) == 0
+    scheduler = deadline_scheduler.DeadlineScheduler(remaining_ms=100000, margin=0)
+    pipeline = product_pipeline.ProductPipeline(
+        db_client=None, api_client=None, workers=1, scheduler=scheduler, checkpoint=checkpoint
+    )
+    pipeline.run(products=list(range(8)), process=process)
+    assert processed == [3, 4, 5] and checkpoint.product_index == 6
+
+    # a completed run removes the checkpoint
+    checkpoint = deadline_scheduler.load_checkpoint(vendor_id="msft", store=store)
+    checkpoint.complete_pages(name="product 2")
+    pipeline = product_pipeline.ProductPipeline(
+        db_client=None, api_client=None, workers=1, checkpoint=checkpoint,
+        scheduler=deadline_scheduler.DeadlineScheduler(remaining_ms=100000, margin=0)
+    )
+    assert pipeline.run(products=list(range(8)), process=lambda *_args: True)[1] == [True] * 8
+    checkpoint.save()
+    assert not checkpoint.incomplete and store.get("msft") is None
@@ -0,0 +1,64 @@
+"""
+unit testing for fan_out
+"""
+import importlib
+import json
+import os
+import sys
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+fan_out = importlib.import_module("service-common.python.lib.fan_out")
+deadline_scheduler = importlib.import_module("service-common.python.lib.deadline_scheduler")
+kv_store = importlib.import_module("service-common.python.lib.kv_store")
+
+
+########################################################################################################################
+#                                               LocalQueue / work_item                                                 #
+########################################################################################################################
+def test_fan_out(*_args):
+    """
+    requirement: the coordinator work items are delivered to the workers as SNS events and only the work item events
+                 run the worker path
+    mock: fan_out.LocalQueue, a worker handler publishing a follow up work item
+    description: every published item is drained as an SNS event in publish order, scheduled and trigger events are
+                 not work items, checkpoint page offsets of products not crawled again are kept
+    :return:
+    """
+    assert fan_out.work_item("") is None and fan_out.work_item({}) is None
+    assert fan_out.work_item({"Records": [{"Sns": {"Subject": "trigger", "Message": "{}"}}]}) is None
+    assert fan_out.work_item(fan_out.sns_event("not json")) is None
+
+    local_queue = fan_out.LocalQueue()
+    products = [{"name": f"product {i}", "abbr": f"p{i}"} for i in range(3)]
+    assert local_queue.publish([fan_out.format_work_item(vendor_id="veeam", product=x) for x in products]) == 3
+
+    def worker(event):
+        item = fan_out.work_item(event)
+        if item["product"]["abbr"] == "p0":
+            local_queue.publish([fan_out.format_work_item(vendor_id="veeam", product={"name": "retry", "abbr": "r"})])
+        return item["product"]["name"]
+
+    assert local_queue.drain(worker) == ["product 0", "product 1", "product 2", "retry"]
+    assert local_queue.drain(worker) == []
+    assert fan_out.format_work_item(vendor_id="veeam", product={}, excluded_ids=["kb1"])["excluded_ids"] == ["kb1"]
+    assert fan_out.format_work_item(vendor_id="veeam", product={}, items=[{"id": "kb1"}])["items"] == [{"id": "kb1"}]
+    # items over the SNS message size are listed again by the worker
+    assert "items" not in fan_out.format_work_item(
+        vendor_id="veeam", product={}, items=[{"id": "kb"}] * (fan_out.MAX_MESSAGE_BYTES // 10)
+    )
+    assert fan_out.work_item(fan_out.sns_event(json.dumps({"type": "other"}))) is None
+
+    store = kv_store.MemoryStore()
+    store.set("veeam", json.dumps({"product_index": 2, "pages": {"product 0": {"offset": 1, "id": "kb 1"}}}))
+    checkpoint = deadline_scheduler.load_checkpoint(vendor_id="veeam", store=store)
+    checkpoint.defer_products(index=1)
+    checkpoint.defer_page(name="product 1", offset=3, item_id="kb 3")
+    checkpoint.save()
+    assert json.loads(store.get("veeam"))["pages"] == {
+        "product 0": {"offset": 1, "id": "kb 1"}, "product 1": {"offset": 3, "id": "kb 3"}
+    }
+    checkpoint = deadline_scheduler.load_checkpoint(vendor_id="veeam", store=store)
+    assert checkpoint.page_offset(name="product 0", ids=["kb 0", "kb 1"]) == 1
+    checkpoint.save()
+    assert store.get("veeam") is None
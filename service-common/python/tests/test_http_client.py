@@ -0,0 +1,53 @@
+"""
+unit testing for http_client
+"""
+import importlib
+import os
+import sys
+from unittest.mock import patch
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+http_client = importlib.import_module("service-common.python.lib.http_client")
+
+
+########################################################################################################################
+#                                               HttpClient                                                             #
+########################################################################################################################
+def test_http_client_pooled_sessions(*_args):
+    """
+    requirement: requests to the same host share one keep-alive session
+    mock: none
+    description: the host is case insensitive, other hosts get their own session and the read timeout can be
+                 overridden per request
+    :return:
+    """
+    client = http_client.HttpClient(connect_timeout=1, read_timeout=2)
+    session = client.session("https://support.microsoft.com/kb/1")
+    assert client.session("https://SUPPORT.microsoft.com/kb/2") is session
+    assert client.session("https://docs.microsoft.com/") is not session
+    assert client.timeout() == (1, 2)
+    assert client.timeout(10) == (1, 10)
+    client.close()
+
+
+def test_http_client_backoff(*_args):
+    """
+    requirement: backoff delays grow exponentially up to backoff_max and a Retry-After header takes precedence
+    mock: responses with a Retry-After header, time.sleep
+    description: delays stay within the bounds, Retry-After is capped by retry_after_max, dates in the past wait 0s
+                 and the last attempt does not sleep
+    :return:
+    """
+    client = http_client.HttpClient(backoff_base=1, backoff_max=4, retry_after_max=60)
+    assert all(0 <= client.backoff_delay(attempt=1) <= 1 for _ in range(20))
+    assert all(0 <= client.backoff_delay(attempt=10) <= 4 for _ in range(20))
+    retry_after = type("response", (object,), {"headers": {"Retry-After": "7"}})
+    assert client.backoff_delay(attempt=1, response=retry_after) == 7
+    retry_after = type("response", (object,), {"headers": {"Retry-After": "600"}})
+    assert client.backoff_delay(attempt=1, response=retry_after) == 60
+    http_date = {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+    assert client.backoff_delay(attempt=1, response=type("response", (object,), {"headers": http_date})) == 0
+    with patch("time.sleep") as sleep:
+        assert client.backoff(attempt=3, retry=3) == 0
+        sleep.assert_not_called()
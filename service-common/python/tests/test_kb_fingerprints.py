@@ -0,0 +1,51 @@
+"""
+unit testing for kb_fingerprints
+"""
+import importlib
+import os
+import sys
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+kb_fingerprints = importlib.import_module("service-common.python.lib.kb_fingerprints")
+
+
+########################################################################################################################
+#                                               FingerprintStore.parse                                                 #
+########################################################################################################################
+def test_kb_fingerprints_conditional_get(*_args):
+    """
+    requirement: unchanged kb pages are not parsed again - 304 responses and unchanged content reuse the stored result
+    mock: download_instance answering If-None-Match with 304, a server ignoring the validators, MemoryStore
+    description: the page is parsed on the first and the changed download only, the validators of the stored entry
+                 are sent with the next request
+    :return:
+    """
+    spec = {"fields": {"title": "//title/text()"}}
+    page = {"html": "<html><head><title>CU 1</title></head></html>", "etag": '"v1"', "honor_etag": True}
+    sent_headers = []
+
+    def download(link, extra_headers, headers, session):
+        sent_headers.append(extra_headers)
+        if page["honor_etag"] and extra_headers.get("If-None-Match") == page["etag"]:
+            return type("response", (object,), {"status_code": 304, "headers": {}, "text": ""})
+        return type("response", (object,), {
+            "status_code": 200, "headers": {"ETag": page["etag"]}, "text": page["html"],
+            "content": page["html"].encode()
+        })
+
+    store = kb_fingerprints.FingerprintStore(local_store=kb_fingerprints.kv_store.MemoryStore())
+    kwargs = {"url": "https://support.microsoft.com/kb/1", "download": download, "headers": "", "session": False}
+    assert store.parse(spec=spec, **kwargs) == {"title": ["CU 1"]}
+    assert store.parse(spec=spec, **kwargs) == {"title": ["CU 1"]}
+    assert sent_headers == [{}, {"If-None-Match": '"v1"'}]
+    assert store.stats["parsed"] == 1 and store.stats["not_modified"] == 1
+
+    page["honor_etag"] = False
+    assert store.parse(spec=spec, **kwargs) == {"title": ["CU 1"]}
+    assert store.stats["unchanged"] == 1
+
+    page["html"], page["etag"] = "<html><head><title>CU 2</title></head></html>", '"v2"'
+    assert store.parse(spec=spec, **kwargs) == {"title": ["CU 2"]}
+    assert store.parse(spec={"fields": {"title": "//title"}}, **kwargs) == {"title": ["<title>CU 2</title>"]}
+    assert store.stats["parsed"] == 3
@@ -0,0 +1,54 @@
+"""
+unit testing for parse_stage
+"""
+import importlib
+import os
+import pickle
+import sys
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+parse_stage = importlib.import_module("service-common.python.lib.parse_stage")
+
+
+########################################################################################################################
+#                                               ParseStage.parse                                                       #
+########################################################################################################################
+def test_parse_stage_spec(*_args):
+    """
+    requirement: a declarative XPath spec returns plain python values, in the calling thread and in a process pool
+    mock: kb like html page
+    description: removed sections are not parsed, alternatives fall back in order and nested fields are evaluated
+                 relative to every matched element
+    :return:
+    """
+    html = "<html><head><title>KB 1</title><meta name='awa-asst' content='123'></head><body>" \
+           "<div id='ocArticle'><p>fixed</p><section aria-label='See Also'><p>see also</p></section></div>" \
+           "<table><tr><td><p>1</p></td><td><p><a href='/kb/1'>one</a></p></td></tr>" \
+           "<tr><td><p>2</p></td></tr></table></body></html>"
+    spec = {
+        "remove": ["//section[@aria-label='See Also']"],
+        "fields": {
+            "bug_id": '//meta[@name="awa-asst"]/@content',
+            "summary": "//title/text()",
+            "content": {"xpath": ['//main[@id="main"]', '//div[@id="ocArticle"]'], "fields": {"text": ".//text()"}},
+            "rows": {"xpath": "//tr", "fields": {"cells": {"xpath": "./td", "fields": {"href": ".//@href"}}}},
+            "missing": "//h1/text()",
+        }
+    }
+    expected = {
+        "bug_id": ["123"],
+        "summary": ["KB 1"],
+        "content": [{"text": ["fixed"]}],
+        "rows": [{"cells": [{"href": []}, {"href": ["/kb/1"]}]}, {"cells": [{"href": []}]}],
+        "missing": [],
+    }
+    parsed = parse_stage.ParseStage(processes=0).parse(html=html, spec=spec)
+    assert parsed == expected
+    assert pickle.loads(pickle.dumps(parsed)) == expected
+
+    stage = parse_stage.ParseStage(processes=2)
+    try:
+        assert stage.parse(html=html.encode(), spec=spec) == expected
+    finally:
+        stage.close()
@@ -0,0 +1,89 @@
+"""
+unit testing for product_pipeline
+"""
+import datetime
+import importlib
+import os
+import random
+import sys
+import time
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, root_dir)
+product_pipeline = importlib.import_module("service-common.python.lib.product_pipeline")
+
+
+########################################################################################################################
+#                                               ProductPipeline.run                                                    #
+########################################################################################################################
+def test_product_pipeline(tmp_path, *_args):
+    """
+    requirement: managed products are processed concurrently with their own db sessions, counters and results are
+                 aggregated in the products order and the first error stops the pipeline
+    mock: sqlite managedProducts table, a process updating lastExecution with a random delay
+    description: every product lastExecution is committed by its own session, totals and results match a sequential
+                 run and a failing product raises its error
+    :return:
+    """
+    base = declarative_base()
+
+    class ManagedProduct(base):  # pylint: disable=too-few-public-methods
+        __tablename__ = "managedProducts"
+        id = Column(Integer, primary_key=True)
+        name = Column(String(64))
+        lastExecution = Column(DateTime)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'pipeline.db'}", connect_args={"check_same_thread": False})
+    base.metadata.create_all(engine)
+    service_session = sessionmaker(bind=engine)()
+    service_session.add_all([ManagedProduct(id=i, name=f"product {i}") for i in range(8)])
+    service_session.commit()
+    managed_products = {x.name: x for x in service_session.query(ManagedProduct).all()}
+    db_client = type("db_client", (object,), {"conn": service_session})()
+    api_client = type("api_client", (object,), {"bugs": []})()
+    executed_at = datetime.datetime(2026, 10, 18)
+
+    def process(product, db_client, api_client, counter):
+        time.sleep(random.random() / 100)
+        api_client.bugs = [product]
+        if product == "failing":
+            raise ValueError(product)
+        managed_product = product_pipeline.attach(db_client=db_client, instance=managed_products[product])
+        counter["managed_products"] += 1
+        counter["inserted_bugs"] += managed_product.id
+        managed_product.lastExecution = executed_at
+        return managed_product.id
+
+    products = [f"product {i}" for i in range(8)]
+    sequential = product_pipeline.ProductPipeline(db_client=db_client, api_client=api_client, workers=1)
+    assert sequential.run(products=products[:2], process=process) == (
+        {"managed_products": 2, "inserted_bugs": 1}, [0, 1]
+    )
+    # the sequential run uses the service clients
+    assert api_client.bugs == ["product 1"]
+    service_session.rollback()
+
+    pipeline = product_pipeline.ProductPipeline(db_client=db_client, api_client=api_client, workers=4)
+    counter, results = pipeline.run(products=products, process=process)
+    assert counter == {"managed_products": 8, "inserted_bugs": 28} and results == list(range(8))
+    assert api_client.bugs == ["product 1"]
+    service_session.expire_all()
+    assert {x.lastExecution for x in service_session.query(ManagedProduct).all()} == {executed_at}
+
+    finalized = []
+
+    def finalize(product, result, db_client, counter):
+        assert db_client is pipeline.db_client
+        finalized.append(product)
+        counter["finalized"] += 1
+        return result * 10
+
+    counter, results = pipeline.run(products=products, process=process, finalize=finalize)
+    assert finalized == products and counter["finalized"] == 8 and results == [x * 10 for x in range(8)]
+
+    with pytest.raises(ValueError):
+        pipeline.run(products=products[:3] + ["failing"] + products[3:], process=process)
@@ -246,7 +246,10 @@ def test_timestamp_format_scenarios(time_str, expected_value):
 #                                                          sn_sync                                                     #
 ########################################################################################################################
 @patch.dict(os.environ, mock_env())
-@patch('requests.request', lambda **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"})
+)
 def test_sn_sync_api_connection_error(**_kwargs):
     """
     requirement: if serviceNow API request fails a custom ApiConnectionError should be raised
@@ -274,7 +277,7 @@ def test_sn_sync_api_connection_error(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 200, "url": "test", "text": b'non-json-string', "headers": {"x-total-count": 1}})
 )
@@ -306,8 +309,8 @@ def test_sn_sync_api_response_error(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request',
-    lambda **_kwargs: type("request", (object,),
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,),
                            {"status_code": 200, "url": "test", "text": b'non-json-string', "headers": {}})
 )
 def test_sn_sync_api_response_missing_count_header(**_kwargs):
@@ -337,8 +340,8 @@ def test_sn_sync_api_response_missing_count_header(**_kwargs):
 
 
 @patch.dict(os.environ, mock_env())
-@patch('requests.request',
-       lambda **_kwargs: type("request", (object,), {
+@patch('requests.Session.request',
+       lambda *_args, **_kwargs: type("request", (object,), {
            "status_code": 200, "url": "test",
            "text": b'{"result": [{"os_version": 1.1}, {"os_version": 2.2}, {"os_version": 3.3}, {"os_version": 4.4}]}',
            "headers": {"x-total-count": 4}
@@ -367,7 +370,7 @@ def test_sn_sync_api(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 200, "url": "test",  "text": b'{"result": []}', "headers": {"x-total-count": 0}
     })
@@ -392,3 +395,75 @@ def test_sn_sync_api_no_cis_found(**_kwargs):
         self=MockAwsApiClient(), query_product=query_product, sn_auth_token="", sn_api_url=""
     )
     assert not instances
+
+
+########################################################################################################################
+#                                                 HealthClient                                                         #
+########################################################################################################################
+@patch.dict(os.environ, mock_env())
+@patch('vendor_aws_health_client.HealthClient.active_region', lambda *_args, **_kwargs: "us-east-1")
+@patch('boto3.client')
+def test_health_client_batched_event_details(boto3_client):
+    """
+    requirement: event details are requested in batches of 10 eventArns and the active region lookup is reused for
+                 the region TTL
+    mock: boto3 health client with 2 describe_events pages of 12 and 3 events, active_region
+    description: 25 events are detailed with 3 + 3 describe_event_details requests per service, the events order is
+                 kept and the services are described concurrently
+    :return:
+    """
+    from vendor_aws_health_client import HealthClient
+    pages = [
+        {"events": [{"arn": f"arn-{i}"} for i in range(12)]}, {"events": [{"arn": f"arn-{i}"} for i in range(12, 25)]}
+    ]
+    health_api = boto3_client.return_value
+    health_api.get_paginator.return_value.paginate.side_effect = lambda **_kwargs: iter(pages)
+    health_api.describe_event_details.side_effect = lambda eventArns: {
+        "successfulSet": [{"event": {"arn": x}} for x in eventArns if x != "arn-3"],
+        "failedSet": [{"eventArn": "arn-3", "errorName": "test"}] if "arn-3" in eventArns else []
+    }
+    health_client = HealthClient(aws_access_key_id="a", aws_secret_access_key="b", aws_session_token="c")
+    assert [x["event"]["arn"] for x in health_client.describe_events(service="EC2")] == [
+        f"arn-{i}" for i in range(25) if i != 3
+    ]
+    assert [len(x.kwargs["eventArns"]) for x in health_api.describe_event_details.call_args_list] == [10, 2, 10, 3]
+
+    health_api.describe_event_details.reset_mock()
+    with patch.object(HealthClient, "active_region", side_effect=AssertionError("region looked up again")):
+        services_events = health_client.describe_services_events(services=["EC2", "S3", "EC2"])
+    assert list(services_events) == ["EC2", "S3"] and len(services_events["S3"]) == 24
+    assert health_api.describe_event_details.call_count == 8
+
+
+@patch.dict(os.environ, mock_env())
+@patch('vendor_aws_health_client.HealthClient.active_region', lambda *_args, **_kwargs: "us-east-1")
+@patch('boto3.client')
+def test_health_client_sweep_events(boto3_client):
+    """
+    requirement: the events of all the services are described with one describe_events pagination per 10 services
+                 filtered by the lastUpdatedTime watermark and partitioned by service
+    mock: boto3 health client returning 2 events per requested service, active_region
+    description: 12 services are swept with 2 describe_events paginations, every service gets its own events and the
+                 watermark is passed as the lastUpdatedTimes filter
+    :return:
+    """
+    from vendor_aws_health_client import HealthClient
+    health_api = boto3_client.return_value
+    health_api.get_paginator.return_value.paginate.side_effect = lambda **kwargs: iter([{"events": [
+        {"arn": f"{service}-{i}", "service": service} for service in kwargs["filter"]["services"] for i in range(2)
+    ]}])
+    health_api.describe_event_details.side_effect = lambda eventArns: {
+        "successfulSet": [{"event": {"arn": x, "service": x.rsplit("-", 1)[0]}} for x in eventArns]
+    }
+    watermark = datetime.datetime(2026, 10, 1)
+    services = [f"SERVICE{i}" for i in range(12)]
+    # new credentials replace the health client cached by the previous tests
+    services_events = HealthClient(
+        aws_access_key_id="d", aws_secret_access_key="e", aws_session_token="f"
+    ).sweep_events(services=services, last_updated_from=watermark)
+
+    filters = [x.kwargs["filter"] for x in health_api.get_paginator.return_value.paginate.call_args_list]
+    assert sorted(len(x["services"]) for x in filters) == [2, 10]
+    assert all(x["lastUpdatedTimes"] == [{"from": watermark}] for x in filters)
+    assert list(services_events) == services
+    assert [x["event"]["arn"] for x in services_events["SERVICE11"]] == ["SERVICE11-0", "SERVICE11-1"]
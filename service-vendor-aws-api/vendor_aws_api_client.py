@@ -27,6 +27,8 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+cmdb_reader = importlib.import_module("service-common.python.lib.cmdb_reader")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
 
 EVENT_TYPE_MAP = {
     "Issue": "issue",
@@ -284,38 +286,19 @@ class AwsApiClient:
         """
         sn_query = f"?sysparm_query={query_product['sysparm_query']}"
         sn_query_url = f"{sn_api_url}/api/now/table/{query_product['service_now_table']}{sn_query}"
-        response = download_instance(
-            link=sn_query_url,
-            headers={"Authorization": f"Basic {sn_auth_token}"}
+        reader = cmdb_reader.CmdbReader(
+            download=download_instance, headers={"Authorization": f"Basic {sn_auth_token}"},
+            connection_error=ApiConnectionError, response_error=ApiResponseError, logger=self.logger,
+            cache=cmdb_cache.get_cache()
         )
-        if not response:
-            self.logger.error(f"SN API connection error - {sn_query_url}")
-            raise ApiConnectionError(
-                url=sn_query_url, internal_message="SN API connection error",
-                event_message="a connection to ServiceNow could not be established - check ServiceNow settings"
-            )
-        try:
-            count = int(response.headers["x-total-count"])
-        except KeyError as e:
-            raise ApiResponseError(
-                url=sn_query_url, internal_message="missing 'x-total-count' in sn query response",
-                event_message="ServiceNow query returned a malformed response - check ServiceNow settings"
-            ) from e
+        count, instances = reader.read(sn_query_url)
         if count:
             self.logger.info(
                 f"'{query_product['name']}' - {count} SN package(s) found in table "
                 f"'{query_product['service_now_table']}'"
             )
-            try:
-                instances = json.loads(response.text)["result"]
-            except json.JSONDecodeError as e:
-                raise ApiResponseError(
-                    url=sn_query_url, internal_message="error parsing serviceNow response - check url",
-                    event_message="ServiceNow query returned a malformed response - check ServiceNow settings"
-                ) from e
             # populate query url
-            map(lambda x: setattr(x, 'sn_query_url', sn_query_url), instances)
-            return instances
+            return ({**x, "sn_query_url": sn_query_url} for x in instances)
         self.logger.info(
             f"'{query_product['name']}' - No SN package(s) found in table '{query_product['service_now_table']}' | "
             f"{sn_query_url}"
@@ -19,7 +19,7 @@ from sqlalchemy.exc import OperationalError
 
 from db_client import Database
 from vendor_aws_api_client import AwsApiClient
-from vendor_aws_health_client import HealthClient
+from vendor_aws_health_client import HealthClient, SWEEP
 from vendor_aws_supported_products import supported_services
 from vendor_exceptions import VendorDisabled, ServiceNotConfigured, VendorExceptions, \
     LambdaTimeOutException
@@ -28,6 +28,7 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -174,6 +175,8 @@ def initiate(*_args, **_kwargs):
             aws_session_token=assumed_role_object['Credentials']['SessionToken']
         )
         active_managed_product_ids = []
+        # (service, managedProduct, last_execution, active_regions) of the services to get health events for
+        processed_services = []
         aws_service_discovered = aws_api_client.get_service_usage_regions(
             cost_explorer_client=cost_explorer_api, supported_services=supported_services
         )
@@ -226,13 +229,28 @@ def initiate(*_args, **_kwargs):
                 if managed_product:
                     active_managed_product_ids.append(managed_product.id)
 
+            logger.info(f"'{service['service_name']}' - found active regions - {json.dumps(active_regions)}")
+            processed_services.append((service, managed_product, last_execution, active_regions))
+
         # ------------------------------------------------------------------------------------------------------------ #
         #                                              BUG SERVICE                                                     #
         # ------------------------------------------------------------------------------------------------------------ #
-            logger.info(f"'{service['service_name']}' - found active regions - {json.dumps(active_regions)}")
-
-            # get all the health event for a given service
-            service_health_events = health_client.describe_events(service=service["service_id"])
+        if SWEEP and processed_services:
+            # events updated before the earliest processed service last_execution are filtered out by
+            # format_bug_entry - the lastExecution of the services processed by the last successful run is the
+            # lastUpdatedTime watermark of the sweep
+            watermark = min(last_execution for _, _, last_execution, _ in processed_services)
+            services_health_events = health_client.sweep_events(
+                services=[service["service_id"] for service, _, _, _ in processed_services],
+                last_updated_from=watermark
+            )
+        else:
+            # get all the health events of the processed services, the services pages are handled concurrently
+            services_health_events = health_client.describe_services_events(
+                services=[service["service_id"] for service, _, _, _ in processed_services]
+            )
+        for service, managed_product, last_execution, active_regions in processed_services:
+            service_health_events = services_health_events[service["service_id"]]
             # service_health_events = []
             if service_health_events:
                 logger.info(
@@ -280,6 +298,7 @@ def initiate(*_args, **_kwargs):
 
         counter['removed_managed_products'] += removed_managed_products
         logger.info(f"'{vendor_id}' sync completed - {json.dumps(counter)}")
+        cmdb_cache.log_stats()
 
         # on existing bug updates - trigger the bugEventProcessor
         if new_bugs_updates:
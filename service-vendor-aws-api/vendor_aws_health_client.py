@@ -4,12 +4,25 @@ created 2021/12/17
 """
 import datetime
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 import dns.resolver
 
 logger = logging.getLogger()
 
+# seconds the global.health.amazonaws.com active region lookup is reused
+REGION_TTL = int(os.environ.get("HEALTH_REGION_TTL", 60))
+# max eventArns per describe_event_details request
+EVENT_DETAILS_BATCH_SIZE = 10
+# max service codes of a describe_events filter
+SWEEP_SERVICES_LIMIT = 10
+# describe the events of all the services in a single sweep instead of a describe_events pagination per service
+SWEEP = os.environ.get("HEALTH_EVENTS_SWEEP", "false").lower() == "true"
+
 
 class ActiveRegionHasChangedError(Exception):
     """
@@ -28,42 +41,54 @@ class HealthClient:
     client for AWS health API
     """
     __active_region = None
+    # time.monotonic() of the last active region lookup
+    __active_region_checked_at = None
     __client = None
+    __client_credentials = None
+    __lock = threading.Lock()
 
-    def __init__(self, aws_access_key_id, aws_secret_access_key, aws_session_token):
+    def __init__(self, aws_access_key_id, aws_secret_access_key, aws_session_token, region_ttl=REGION_TTL):
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
         self.aws_session_token = aws_session_token
+        self.region_ttl = region_ttl
 
     def client(self):
         """
-
+        health client of the active region - the region is looked up again once the region_ttl expired
         :return:
         """
-        if not HealthClient.__active_region:
-            HealthClient.__active_region = self.active_region()
-        else:
-            current_active_region = self.active_region()
-            if current_active_region != HealthClient.__active_region:
-                old_active_region = HealthClient.__active_region
-                HealthClient.__active_region = current_active_region
-
-                if HealthClient.__client:
-                    HealthClient.__client = None
-
-                raise ActiveRegionHasChangedError(
-                    'Active region has changed from [' + old_active_region + '] to [' + current_active_region + ']'
+        with HealthClient.__lock:
+            checked_at = HealthClient.__active_region_checked_at
+            if not HealthClient.__active_region:
+                HealthClient.__active_region = self.active_region()
+                HealthClient.__active_region_checked_at = time.monotonic()
+            elif checked_at is None or time.monotonic() - checked_at >= self.region_ttl:
+                current_active_region = self.active_region()
+                HealthClient.__active_region_checked_at = time.monotonic()
+                if current_active_region != HealthClient.__active_region:
+                    old_active_region = HealthClient.__active_region
+                    HealthClient.__active_region = current_active_region
+
+                    if HealthClient.__client:
+                        HealthClient.__client = None
+
+                    raise ActiveRegionHasChangedError(
+                        'Active region has changed from [' + old_active_region + '] to [' + current_active_region + ']'
+                    )
+
+            credentials = (self.aws_access_key_id, self.aws_secret_access_key, self.aws_session_token)
+            if not HealthClient.__client or HealthClient.__client_credentials != credentials:
+                # a new assumed role session replaces the client of a warm container
+                HealthClient.__client = boto3.client(
+                    'health', region_name=HealthClient.__active_region,
+                    aws_access_key_id=self.aws_access_key_id,
+                    aws_secret_access_key=self.aws_secret_access_key,
+                    aws_session_token=self.aws_session_token
                 )
+                HealthClient.__client_credentials = credentials
 
-        if not HealthClient.__client:
-            HealthClient.__client = boto3.client(
-                'health', region_name=HealthClient.__active_region,
-                aws_access_key_id=self.aws_access_key_id,
-                aws_secret_access_key=self.aws_secret_access_key,
-                aws_session_token=self.aws_session_token
-            )
-
-        return HealthClient.__client
+            return HealthClient.__client
 
     @staticmethod
     def active_region():
@@ -89,37 +114,98 @@ class HealthClient:
         :param event:
         :return:
         """
-        # NOTE: It is more efficient to call describe_event_details with a batch
-        # of eventArns, but for simplicity of this demo we call it with a
-        # single eventArn
-        event_details_response = self.client().describe_event_details(eventArns=[event['arn']])
-        return event_details_response['successfulSet']
+        return self.events_details([event])
+
+    def events_details(self, events):
+        """
+        describe_event_details of events in batches of EVENT_DETAILS_BATCH_SIZE eventArns
+        :param events:
+        :return: successfulSet entries in the events order
+        """
+        arns = [event['arn'] for event in events]
+        detailed_events = []
+        for i in range(0, len(arns), EVENT_DETAILS_BATCH_SIZE):
+            event_details_response = self.client().describe_event_details(
+                eventArns=arns[i:i + EVENT_DETAILS_BATCH_SIZE]
+            )
+            for failed in event_details_response.get('failedSet', []):
+                logger.warning(
+                    f"'{failed.get('eventArn')}' - event details failed | {failed.get('errorName')} - "
+                    f"{failed.get('errorMessage')}"
+                )
+            detailed_events.extend(event_details_response['successfulSet'])
+        return detailed_events
 
-    def describe_events(self, service):
+    def describe_services_events(self, services, threads=4):
+        """
+        describe_events of several services with concurrent page handling
+        :param services: service codes
+        :param threads: max services described concurrently
+        :return: {service: detailed events}
+        """
+        services = list(dict.fromkeys(services))
+        if len(services) < 2 or threads < 2:
+            return {service: self.describe_events(service=service) for service in services}
+        # resolve the active region and create the shared client once before the workers use it
+        self.client()
+        with ThreadPoolExecutor(max_workers=min(threads, len(services))) as executor:
+            return dict(zip(services, executor.map(lambda service: self.describe_events(service=service), services)))
+
+    def sweep_events(self, services, last_updated_from=None, threads=4):
+        """
+        describe the events of all the services with a single describe_events pagination per SWEEP_SERVICES_LIMIT
+        services and partition them by service
+        :param services: service codes
+        :param last_updated_from: watermark - only the events updated since are requested
+        :param threads: max sweeps running concurrently
+        :return: {service: detailed events}
+        """
+        services = list(dict.fromkeys(services))
+        sweeps = [services[i:i + SWEEP_SERVICES_LIMIT] for i in range(0, len(services), SWEEP_SERVICES_LIMIT)]
+        services_events = {service: [] for service in services}
+        if not sweeps:
+            return services_events
+        # resolve the active region and create the shared client once before the workers use it
+        self.client()
+        with ThreadPoolExecutor(max_workers=max(1, min(threads, len(sweeps)))) as executor:
+            sweeps_events = executor.map(
+                lambda sweep: self.describe_events(services=sweep, last_updated_from=last_updated_from), sweeps
+            )
+            for detailed_events in sweeps_events:
+                for detailed_event in detailed_events:
+                    services_events.setdefault(detailed_event['event']['service'], []).append(detailed_event)
+        logger.info(
+            f"health events sweep | {len(services)} services / {len(sweeps)} sweeps | "
+            f"{sum(len(x) for x in services_events.values())} events updated since {last_updated_from}"
+        )
+        return services_events
+
+    def describe_events(self, service=None, services=None, last_updated_from=None):
         """
         Describe events using the same default filters as the Personal Health
         Return all open or upcoming events which started in the last 90 days ordered by event lastUpdatedTime
         :param service:
+        :param services: service codes described together, up to SWEEP_SERVICES_LIMIT
+        :param last_updated_from: only return the events updated since
         :return:
         """
-        events_paginator = self.client().get_paginator('describe_events')
-        events_pages = events_paginator.paginate(filter={
+        event_filter = {
             'startTimes': [
                 {
                     'from': datetime.datetime.now() - datetime.timedelta(days=90)
                 }
             ],
             'eventStatusCodes': ['open', 'upcoming', "closed"],
-            'services': [service],
-        })
+            'services': services or [service],
+        }
+        if last_updated_from:
+            event_filter['lastUpdatedTimes'] = [{'from': last_updated_from}]
+        events_paginator = self.client().get_paginator('describe_events')
+        events_pages = events_paginator.paginate(filter=event_filter)
 
-        number_of_matching_events = 0
         detailed_events = []
         for events_page in events_pages:
-            for event in events_page['events']:
-                number_of_matching_events += 1
-                event_details = self.event_details(event)
-                for ev in event_details:
-                    detailed_events.append(ev)
+            # one describe_event_details request per EVENT_DETAILS_BATCH_SIZE events instead of one per event
+            detailed_events.extend(self.events_details(events_page['events']))
 
         return detailed_events
@@ -3,6 +3,7 @@ unit tests for db_client.py
 """
 import os
 from unittest import TestCase
+from unittest.mock import MagicMock
 from unittest.mock import patch
 
 from tests.external_dependencies import mock_env, mock_varchar_table
@@ -34,7 +35,7 @@ class Test(TestCase):
     @patch('sqlalchemy.create_engine', lambda *_args, **_kwargs: True)
     @patch(
         'sqlalchemy.ext.automap.automap_base', lambda *_args, **_kwargs:
-        type('', (object,), {"prepare": lambda *_args, **_kwargs: True})
+        type('', (object,), {"prepare": lambda *_args, **_kwargs: True, "classes": {}})
     )
     @patch(
         'sqlalchemy.ext.automap.AutomapBase.prepare', lambda *_args, **_kwargs:
@@ -51,11 +52,13 @@ class Test(TestCase):
         :param _args:
         :return:
         """
-        from db_client import Database
+        from db_client import Database, db_session
         db_client = Database(
             db_host="", db_user="", db_password="", db_port="3360", db_name=""
         )
-        db_client.create_session()
+        with patch.object(db_session, "get_engine", MagicMock()), \
+                patch.object(db_session, "reflect_metadata", MagicMock()):
+            db_client.create_session()
         assert db_client.conn
 
 ########################################################################################################################
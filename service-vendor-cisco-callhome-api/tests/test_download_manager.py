@@ -15,7 +15,10 @@ class Test(TestCase):
 ########################################################################################################################
 #                                         download_instance                                                            #
 ########################################################################################################################
-    @patch('requests.request', lambda **_kwargs: type("request", (object,), {"status_code": 200, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 200, "url": "test"})
+    )
     def test_download_instance_status_200(*_args):
         """
         test a successful response with status_code 200
@@ -25,7 +28,11 @@ class Test(TestCase):
         from download_manager import download_instance
         assert download_instance(link="test", headers="").status_code == 200
 
-    @patch('requests.request', lambda **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"})
+    )
+    @patch('time.sleep', lambda *_args: None)
     def test_download_instance_status_400(*_args):
         """
         test post response with status_code 400 that should return false
@@ -35,7 +42,11 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", headers="")
 
-    @patch('requests.request', lambda **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"})
+    )
+    @patch('time.sleep', lambda *_args: None)
     def test_download_instance_status_500(*_args):
         """
         test post response with status_code 400 that should return false
@@ -47,7 +58,7 @@ class Test(TestCase):
 
 
     @patch(
-        'requests.request', lambda **_kwargs:
+        'requests.Session.request', lambda *_args, **_kwargs:
         type("request", (object,), {"status_code": 401, "url": "test", "text": "error"})
     )
     def test_download_instance_status_401(*_args):
@@ -59,7 +70,7 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", headers="")
 
-    @patch('requests.request', mock_requests_read_timeout)
+    @patch('requests.Session.request', mock_requests_read_timeout)
     def test_request_instance_handle_read_timeout(*_args):
         """
         force readTimeout and test handling exception that should return false to the caller
@@ -69,7 +80,7 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", retry=1, headers="")
 
-    @patch('requests.request', mock_requests_connection_timeout)
+    @patch('requests.Session.request', mock_requests_connection_timeout)
     def test_request_instance_handle_connection_timeout(*_args):
         """
         force connectionTimeout and test handling exception that should return false to the caller
@@ -79,7 +90,7 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", retry=1, headers="")
 
-    @patch('requests.request', mock_requests_connection_error)
+    @patch('requests.Session.request', mock_requests_connection_error)
     def test_request_instance_handle_connection_error(*_args):
         """
         force ConnectionError and test handling exception that should return false to the caller
@@ -4,11 +4,13 @@ created 2021-04-27
 
 import base64
 import datetime
+import functools
+import importlib
+import inspect
 import json
 import logging.config
-import queue
+import os
 import sys
-import threading
 
 import boto3
 from botocore.exceptions import ClientError
@@ -17,6 +19,11 @@ from requests.packages import urllib3
 from download_manager import download_instance
 from vendor_exceptions import ApiConnectionError, ApiResponseError
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
+
 urllib3.disable_warnings()
 logger = logging.getLogger()
 
@@ -120,21 +127,26 @@ class CiscoApiClient:
                     )
                     pagination_urls.append(api_url)
 
-        # process existing pagination_urls in the multi-threaded manager
+        # process existing pagination_urls with the shared crawl engine
         if pagination_urls:
-            q = queue.Queue()
-            for i, _url in enumerate(pagination_urls):
-                q.put((i, pagination_urls[i], product_family_name))
-
-            # 7 threads has been tested to be ideal
-            num_threads = 7
-            for i in range(num_threads):
-                t = threading.Thread(
-                    target=self.multi_threaded_manager, args=(q, headers)
-                )
-                t.start()
+            # 7 concurrent requests has been tested to be ideal
+            engine = crawl_engine.CrawlEngine(concurrency=7, logger=self.logger)
+            crawl_results = engine.run(
+                items=[(i, url, product_family_name) for i, url in enumerate(pagination_urls)],
+                handler=functools.partial(self.multi_threaded_manager, headers=headers),
+                host=lambda entry: crawl_engine.url_host(entry[1])
+            )
+            for crawl_result in crawl_results:
+                if crawl_result.error or crawl_result.result is None:
+                    self.thread_error_tracker += 1
+                    continue
+                for bug in crawl_result.result:
+                    if bug["bug_id"] in self.bug_ids:
+                        self.dedup_count += 1
+                        self.bug_ids.add(bug["bug_id"])
 
-            q.join()
+                    bug["priority"] = bug['severity']
+                    self.bugs[bug["bug_id"]] = bug
 
         if self.thread_error_tracker:
             internal_message = f"'{product_family_name}' - API connection error | {pagination_urls[0]}"
@@ -423,41 +435,29 @@ class CiscoApiClient:
                 url=api_url, internal_message=internal_message, event_message=event_message
             ) from e
 
-    def multi_threaded_manager(self, q, headers):
+    def multi_threaded_manager(self, entry, headers):
         """
-        multi-threaded download manager
-        :return:
+        download a bugs pagination page
+        :param entry: (page index, url, product family name)
+        :param headers:
+        :return: the page bugs or None when the download failed
         """
-
-        def api_request(entry):
-            self.logger.info(f"'{entry[-1]}' - getting bug updates | {entry[1]}")
-            response = download_instance(link=entry[1], headers=headers)
-            if response:
-                results = json.loads(response.text)
-                if not results["pagination_response_record"]["total_records"]:
-                    return
-                for bug in results["bugs"]:
-                    if bug["bug_id"] in self.bug_ids:
-                        self.dedup_count += 1
-                        self.bug_ids.add(bug["bug_id"])
-
-                    bug["priority"] = bug['severity']
-                    self.bugs[bug["bug_id"]] = bug
-            else:
-                self.thread_error_tracker += 1
-                error = {
-                    "url": {entry[1]},
-                    "errorType": "connection error",
-                    "errorMsg": "download failed with max retires",
-                    "source": "Cisco Support - Bug API V3.0",
-                    "service": f"vendor_cisco_api_client.py - line 560",
-                }
-                self.logger.error(f"download error - {json.dumps(error, default=str)}")
-
-        while not q.empty():
-            queue_object = q.get()
-            api_request(entry=queue_object)
-            q.task_done()
+        self.logger.info(f"'{entry[-1]}' - getting bug updates | {entry[1]}")
+        response = download_instance(link=entry[1], headers=headers)
+        if not response:
+            error = {
+                "url": {entry[1]},
+                "errorType": "connection error",
+                "errorMsg": "download failed with max retires",
+                "source": "Cisco Support - Bug API V3.0",
+                "service": f"vendor_cisco_api_client.py - line 560",
+            }
+            self.logger.error(f"download error - {json.dumps(error, default=str)}")
+            return None
+        results = json.loads(response.text)
+        if not results["pagination_response_record"]["total_records"]:
+            return []
+        return results["bugs"]
 
     def bug_zero_vendor_status_update(
             self, db_client, started_at, services_table, service_execution_table, service_status, vendor_id,
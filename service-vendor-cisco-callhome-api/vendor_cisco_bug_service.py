@@ -23,6 +23,7 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -61,6 +62,8 @@ def initiate(*_args, **_kwargs):
     # use a signal handler to set an alarm that will invoke
     signal.signal(signal.SIGALRM, timeout_handler)
     signal.alarm((int(_args[1].get_remaining_time_in_millis() / 1000)) - 1)
+    # stop scheduling crawls before the lambda timeout
+    crawl_engine.set_deadline(remaining_ms=_args[1].get_remaining_time_in_millis())
 
     # setup an boto3 SNS client to be used for events or to trigger the bugEventProcessor
     sns_client = boto3.client('sns')
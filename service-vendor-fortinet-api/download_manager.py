@@ -1,18 +1,31 @@
 """
 updated 2021-08-23
  add 'method' option to requests
+
+updated 2026-10-18
+ send requests through the pooled service-common http_client with backoff between retries
+ optional observer called with the status code and latency of every attempt ( concurrency_controller )
 """
+import importlib
+import inspect
 import logging
-from math import ceil
-from time import sleep
+import os
+import sys
+from time import monotonic, sleep
 
 import requests
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+http_client = importlib.import_module("service-common.python.lib.http_client")
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
-def download_instance(link, headers, json=False, method='GET', retry=10, timeout=10, rate_limit_sleep=30):
+def download_instance(link, headers, json=False, method='GET', retry=10, timeout=10, rate_limit_sleep=30,
+                      observer=None):
     """
     simple http downloader
     :param link:
@@ -22,15 +35,20 @@ def download_instance(link, headers, json=False, method='GET', retry=10, timeout
     :param timeout:
     :param rate_limit_sleep:
     :param headers
+    :param observer: optional callable(status_code, seconds) called after every attempt, status_code is None for
+                     timeouts and connection errors
     :return:
     """
     tries = 0
     while tries < retry:
+        started = monotonic()
         try:
             if json:
-                request = requests.request(method=method, url=link, timeout=timeout, headers=headers, json=json)
+                request = http_client.request(method=method, url=link, timeout=timeout, headers=headers, json=json)
             else:
-                request = requests.request(method=method, url=link, timeout=timeout, headers=headers)
+                request = http_client.request(method=method, url=link, timeout=timeout, headers=headers)
+            if observer:
+                observer(request.status_code, monotonic() - started)
 
             if request.status_code in [404, 401, 403]:
                 logger.error(
@@ -42,9 +60,8 @@ def download_instance(link, headers, json=False, method='GET', retry=10, timeout
                 continue
 
             if request.status_code == 429:
-                try:
-                    retry_after = ceil(float(request.headers.get('Retry-After')))
-                except (KeyError, ValueError):
+                retry_after = http_client.retry_after(request)
+                if retry_after is None:
                     retry_after = rate_limit_sleep
 
                 logger.error(
@@ -62,18 +79,28 @@ def download_instance(link, headers, json=False, method='GET', retry=10, timeout
                     )
                 )
                 tries += 1
+                http_client.backoff(attempt=tries, retry=retry, response=request, logger=logger)
                 continue
 
             return request
 
         except requests.exceptions.ReadTimeout:
+            if observer:
+                observer(None, monotonic() - started)
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectTimeout:
+            if observer:
+                observer(None, monotonic() - started)
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectionError:
+            if observer:
+                observer(None, monotonic() - started)
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.TooManyRedirects:
             break
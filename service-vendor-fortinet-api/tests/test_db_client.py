@@ -37,7 +37,7 @@ class Test(TestCase):
     @patch('sqlalchemy.create_engine', lambda *_args, **_kwargs: True)
     @patch(
         'sqlalchemy.ext.automap.automap_base', lambda *_args, **_kwargs:
-        type('', (object,), {"prepare": lambda *_args, **_kwargs: True})
+        type('', (object,), {"prepare": lambda *_args, **_kwargs: True, "classes": {}})
     )
     @patch(
         'sqlalchemy.ext.automap.AutomapBase.prepare', lambda *_args, **_kwargs:
@@ -54,11 +54,13 @@ class Test(TestCase):
         :param _args:
         :return:
         """
-        from db_client import Database
+        from db_client import Database, db_session
         db_client = Database(
             db_host="", db_user="", db_password="", db_port="", db_name=""
         )
-        db_client.create_session()
+        with patch.object(db_session, "get_engine", MagicMock()), \
+                patch.object(db_session, "reflect_metadata", MagicMock()):
+            db_client.create_session()
         assert db_client.conn
         del sys.modules['db_client']
 
@@ -220,7 +222,7 @@ class Test(TestCase):
         :param _args:
         :return:
         """
-        from db_client import Database
+        from db_client import Database, db_utils
         instance = type(
             "mockDbClient",
             (object,), {
@@ -236,17 +238,20 @@ class Test(TestCase):
                                                                         })
                                                                     }),
                              "add": lambda *args: True,
+                             "execute": lambda *args: True,
                              "commit": lambda *args: True,
                              "refresh": lambda *args: True,
                          },
 
                          ),
-                "base": MagicMock()
+                "base": MagicMock(),
+                "truncation_plans": {"": {}}
             }
         )
         instance.return_value = False
-        execution = Database.insert_bug_updates(
-            self=instance, bugs=mock_formatted_bugs, bugs_table=""
-        )
+        with patch.object(db_utils, "mysql_insert", MagicMock()):
+            execution = Database.insert_bug_updates(
+                self=instance, bugs=mock_formatted_bugs, bugs_table=""
+            )
         assert execution["inserted_bugs"] == 5
         del sys.modules['db_client']
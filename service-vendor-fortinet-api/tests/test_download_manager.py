@@ -16,8 +16,8 @@ class Test(TestCase):
 #                                         request_instance                                                             #
 ########################################################################################################################
     @patch(
-        'requests.request',
-        lambda **_kwargs: type("request", (object,), {"status_code": 401, "url": "test", "text": "error test"})
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 401, "url": "test", "text": "error test"})
     )
     def test_download_instance_status_400(*_args):
         """
@@ -29,8 +29,8 @@ class Test(TestCase):
         assert not download_instance(link="test", headers="")
 
     @patch(
-        'requests.request',
-        lambda **_kwargs: type("request", (object,), {"status_code": 401, "url": "test", "text": "error test"})
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 401, "url": "test", "text": "error test"})
     )
     def test_download_instance_post_json_status_400(*_args):
         """
@@ -41,7 +41,11 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", headers="", json={"test": "test"})
 
-    @patch('requests.request', lambda **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"})
+    )
+    @patch('time.sleep', lambda *_args: None)
     def test_download_instance_status_500(*_args):
         """
         testing a post response with status_code 400 that should return false
@@ -51,7 +55,7 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", headers="")
 
-    @patch('requests.request', mock_requests_read_timeout)
+    @patch('requests.Session.request', mock_requests_read_timeout)
     def test_request_instance_handle_read_timeout(*_args):
         """
         force readTimeout and handling exception that should return false to the caller
@@ -61,7 +65,7 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", retry=1, headers="")
 
-    @patch('requests.request', mock_requests_connection_timeout)
+    @patch('requests.Session.request', mock_requests_connection_timeout)
     def test_request_instance_handle_connection_timeout(*_args):
         """
         force connectionTimeout and handling exception that should return false to the caller
@@ -72,7 +76,7 @@ class Test(TestCase):
         assert not download_instance(link="test", retry=1, headers="")\
 
 
-    @patch('requests.request', mock_requests_connection_error)
+    @patch('requests.Session.request', mock_requests_connection_error)
     def test_request_instance_handle_connection_error(*_args):
         """
         force ConnectionError and handling exception that should return false to the caller
@@ -81,3 +85,17 @@ class Test(TestCase):
         """
         from download_manager import download_instance
         assert not download_instance(link="test", retry=1, headers="")
+
+    @patch('requests.Session.request', mock_requests_connection_error)
+    def test_request_instance_observer(*_args):
+        """
+        every attempt is reported to the observer, connection errors without a status code
+        :param _args:
+        :return:
+        """
+        from download_manager import download_instance
+        observed = []
+        assert not download_instance(
+            link="test", retry=2, headers="", observer=lambda status, latency: observed.append(status)
+        )
+        assert observed == [None, None]
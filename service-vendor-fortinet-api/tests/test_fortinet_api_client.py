@@ -99,7 +99,10 @@ def test_bug_zero_vendor_status_update(*_args):
 #                                                          sn_sync                                                     #
 ########################################################################################################################
 @patch.dict(os.environ, mock_env())
-@patch('requests.request', lambda **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"})
+)
 def test_sn_sync_api_connection_error(**_kwargs):
     """
     requirement: if serviceNow API request fails a custom ApiConnectionError should be raised
@@ -122,7 +125,7 @@ def test_sn_sync_api_connection_error(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 200, "url": "test", "text": b'non-json-string', "headers": {"x-total-count": 1}})
 )
@@ -149,8 +152,8 @@ def test_sn_sync_api_response_error(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request',
-    lambda **_kwargs: type("request", (object,),
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,),
                            {"status_code": 200, "url": "test", "text": b'non-json-string', "headers": {}})
 )
 def test_sn_sync_api_response_missing_count_header(**_kwargs):
@@ -175,8 +178,8 @@ def test_sn_sync_api_response_missing_count_header(**_kwargs):
 
 
 @patch.dict(os.environ, mock_env())
-@patch('requests.request',
-       lambda **_kwargs: type("request", (object,), {
+@patch('requests.Session.request',
+       lambda *_args, **_kwargs: type("request", (object,), {
            "status_code": 200, "url": "test",
            "text": b'{"result": [{"os_version": 1.1}, {"os_version": 2.2}, {"os_version": 3.3}, {"os_version": 4.4}]}',
            "headers": {"x-total-count": 5}
@@ -200,7 +203,7 @@ def test_sn_sync_api(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 200, "url": "test",  "text": b'{"result": []}', "headers": {"x-total-count": 0}
     })
@@ -262,8 +265,10 @@ def test_timestamp_format_scenarios(time_str, expected_value):
 ########################################################################################################################
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"})
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"})
 )
+@patch('time.sleep', lambda *_args: None)
 def test_generate_release_notes_urls_download_error(**_kwargs):
     """
     requirement: 1.download a given product documentation landing page
@@ -284,8 +289,8 @@ def test_generate_release_notes_urls_download_error(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request',
-    lambda **_kwargs: type("request", (object,), {"status_code": 200, "url": "test", "text": "test"})
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 200, "url": "test", "text": "test"})
 )
 def test_generate_release_notes_urls_missing_release_notes(**_kwargs):
     """
@@ -304,8 +309,8 @@ def test_generate_release_notes_urls_missing_release_notes(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request',
-    lambda **_kwargs:
+    'requests.Session.request',
+    lambda *_args, **_kwargs:
     type("request", (object,),
          {
              "status_code": 200,
@@ -334,7 +339,10 @@ def test_generate_release_notes_urls(**_kwargs):
 #                                               get_bugs                                                              #
 #######################################################################################################################
 @patch.dict(os.environ, mock_env())
-@patch('requests.request', lambda **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"})
+)
 def test_get_bugs_connection_error(**_kwargs):
     """
     requirement: if a product release note html request fails, a custom VendorConnectionError should be raised
@@ -355,8 +363,8 @@ def test_get_bugs_connection_error(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request',
-    lambda **_kwargs: type("request", (object,), {"status_code": 200, "url": "test", "text": b'<html></html>'})
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 200, "url": "test", "text": b'<html></html>'})
 )
 def test_get_bugs_api_missing_data_pages(**_kwargs):
     """
@@ -376,8 +384,8 @@ def test_get_bugs_api_missing_data_pages(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-        'requests.request',
-        lambda **_kwargs:
+        'requests.Session.request',
+        lambda *_args, **_kwargs:
         type("request", (object,),
              {
                  "status_code": 200,
@@ -408,8 +416,8 @@ def test_get_bugs_api_missing_timestamp_and_bug_rows(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request',
-    lambda **_kwargs:
+    'requests.Session.request',
+    lambda *_args, **_kwargs:
     type("request", (object,),
          {
              "status_code": 200,
@@ -442,8 +450,8 @@ def test_get_bugs_api_missing_bug_ids(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request',
-    lambda **_kwargs:
+    'requests.Session.request',
+    lambda *_args, **_kwargs:
     type("request", (object,),
          {
              "status_code": 200,
@@ -476,8 +484,8 @@ def test_get_bugs_bug_id_format_unknown(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request',
-    lambda **_kwargs:
+    'requests.Session.request',
+    lambda *_args, **_kwargs:
     type("request", (object,),
          {
              "status_code": 200,
@@ -501,3 +509,170 @@ def test_get_bugs_successful(**_kwargs):
             release_notes_url="test-url", product_name="Test Product", product_version="1.0.0"
         )
     assert len(bugs) == 2
+
+
+########################################################################################################################
+#                                              consolidate_bugs                                                        #
+########################################################################################################################
+@patch.dict(os.environ, mock_env())
+def test_consolidate_bugs(**_kwargs):
+    """
+    requirement: the release notes rows of a bug are consolidated in the release notes order whatever the rows order
+    mock: MockFortinetApiClient
+    description: a bug known in 7.0.0 and 7.0.1 and resolved in 7.0.2 and a bug known in 7.0.2 only are consolidated
+                 into two bugs, highest bugId first
+    :return:
+    """
+    from vendor_fortinet_api_client import FortinetApiClient
+
+    def row(bug_id, version, day, status="Open"):
+        return {
+            "bugId": bug_id, "description": f"Description {version}", "summary": f"Summary {version}",
+            "bugUrl": f"https://docs.fortinet.com/{version}", "status": status, "product_name": "FortiGate",
+            "knownFixedReleases" if status == "Fixed" else "knownAffectedReleases": version,
+            "release_note_timestamp": datetime.datetime(2026, 1, day)
+        }
+
+    client = MockFortinetApiClient()
+    client.vendor_id = "fortinet"
+    bugs = FortinetApiClient.consolidate_bugs(self=client, bugs=[
+        row("700001", "7.0.1", 2), row("700001", "7.0.2", 3, status="Fixed"), row("800001", "7.0.2", 3),
+        row("700001", "7.0.0", 1)
+    ])
+    assert [x["bugId"] for x in bugs] == ["800001", "700001"]
+    assert bugs[1]["knownAffectedReleases"] == ["7.0.1", "7.0.0"] and bugs[1]["knownFixedReleases"] == ["7.0.2"]
+    assert bugs[1]["status"] == "Fixed" and bugs[1]["summary"] == "Summary 7.0.0"
+    assert bugs[1]["vendorLastUpdatedDate"] == datetime.datetime(2026, 1, 2)
+    assert bugs[1]["description"] == (
+        "\nInformation from FortiGate v7.0.1 release notes:\nDescription 7.0.1\n"
+        "\nInformation from FortiGate v7.0.0 release notes:\nDescription 7.0.0\n"
+        "\nThe earliest recollection of this bug is traced back to FortiGate v7.0.0 released on January 01, 2026.\n"
+        "\nThis bug is fixed in versions 7.0.2 released on January 03, 2026:\nDescription 7.0.2"
+        "\n\nFor more information:\nhttps://docs.fortinet.com/7.0.0\nhttps://docs.fortinet.com/7.0.1\n"
+        "https://docs.fortinet.com/7.0.2"
+    )
+    assert "vendorLastUpdatedDate" not in bugs[0]
+    assert bugs[0]["description"].startswith("\nInformation from FortiGate v7.0.2 release notes:\nDescription 7.0.2\n"
+                                             "\nThe earliest recollection of this bug is unknown.")
+
+    # rows of the same release notes keep the parsing order, the latest row is not an earliest recollection
+    bugs = FortinetApiClient.consolidate_bugs(self=client, bugs=[
+        row("900001", "7.0.1", 2), row("900001", "7.0.0", 2), row("900001", "7.0.3", 4, status="Fixed"),
+        row("900001", "7.0.2", 4)
+    ])
+    assert bugs[0]["knownAffectedReleases"] == ["7.0.2", "7.0.1", "7.0.0"] and bugs[0]["status"] == "Fixed"
+    assert bugs[0]["summary"] == "Summary 7.0.0" and bugs[0]["vendorLastUpdatedDate"] == datetime.datetime(2026, 1, 4)
+    assert "traced back to FortiGate v7.0.1 released on January 02, 2026." in bugs[0]["description"]
+    assert bugs[0]["bug_urls"]["https://docs.fortinet.com/7.0.3"] == datetime.datetime(2026, 1, 4)
+
+
+########################################################################################################################
+#                                        release_notes_download_manager                                                #
+########################################################################################################################
+@patch.dict(os.environ, mock_env())
+def test_release_notes_download_manager_version_manifest(**_kwargs):
+    """
+    requirement: only the new and the recent release notes versions are crawled once harvested, the stored bugs of
+                 the other versions and of the failed or partial downloads are merged with the crawled bugs
+    mock: MockFortinetApiClient with a parse_release_notes stub, kv_store.MemoryStore manifest store
+    description: the first run crawls the 6 versions, the second run crawls the new 7.2.0 and the 3 highest versions
+                 and returns the bugs of all the 7 versions with their release note timestamps
+    :return:
+    """
+    import importlib
+    from vendor_fortinet_api_client import FortinetApiClient
+    version_manifest = importlib.import_module("service-common.python.lib.version_manifest")
+    kv_store = importlib.import_module("service-common.python.lib.kv_store")
+    client = MockFortinetApiClient()
+    client.release_notes_hashes = {}
+    crawled = []
+    failing = set()
+    partial = set()
+
+    def parse_release_notes(entry, product_name):
+        version = entry[-1]["version"]
+        crawled.append(version)
+        if version in failing:
+            return {}.values()
+        if version not in partial:
+            client.release_notes_hashes[entry[-1]["url"]] = f"hash {version}"
+        return {version: {
+            "bugId": version.replace(".", ""), "knownAffectedReleases": version, "product_name": product_name,
+            "release_note_timestamp": datetime.datetime(2026, 1, int(version.replace(".", "")) % 28 + 1),
+            "partial": version in partial
+        }}.values()
+
+    client.parse_release_notes = parse_release_notes
+    versions = ["7.0.2", "7.0.1", "7.0.0", "6.4.1", "6.4.0", "6.2.0"]
+    urls = [{"version": x, "url": f"https://docs.fortinet.com/{x}"} for x in versions]
+    store = kv_store.MemoryStore()
+
+    bugs = FortinetApiClient.release_notes_download_manager(
+        self=client, release_notes_urls=urls, product_name="FortiGate",
+        manifest=version_manifest.load_manifest(name="fortinet-fortigate", store=store)
+    )
+    assert sorted(crawled) == sorted(versions) and len(bugs) == 6
+
+    crawled.clear()
+    failing.add("7.0.1")
+    # the change log or an issues page of 7.0.2 is unreachable, its stored bugs are kept
+    partial.add("7.0.2")
+    urls.insert(0, {"version": "7.2.0", "url": "https://docs.fortinet.com/7.2.0"})
+    manifest = version_manifest.load_manifest(name="fortinet-fortigate", store=store)
+    bugs = FortinetApiClient.release_notes_download_manager(
+        self=client, release_notes_urls=urls, product_name="FortiGate", manifest=manifest
+    )
+    assert sorted(crawled) == ["7.0.1", "7.0.2", "7.2.0"]
+    assert sorted(x["knownAffectedReleases"] for x in bugs) == sorted(versions + ["7.2.0"])
+    assert not [x for x in bugs if x["partial"]] and manifest.versions["7.0.2"]["hash"] == "hash 7.0.2"
+    assert {x["knownAffectedReleases"]: x["release_note_timestamp"] for x in bugs}["6.2.0"] == \
+        datetime.datetime(2026, 1, 620 % 28 + 1)
+    assert manifest.stats["new"] == 1 and manifest.stats["recent"] == 2 and manifest.stats["stored"] == 4
+
+    # versions no longer listed are dropped from the manifest
+    manifest = version_manifest.load_manifest(name="fortinet-fortigate", store=store)
+    assert manifest.select(urls[:2]) == urls[:2]
+    manifest.save()
+    assert set(version_manifest.load_manifest(name="fortinet-fortigate", store=store).versions) == {"7.2.0", "7.0.2"}
+    assert version_manifest.version_key("7.0.12") > version_manifest.version_key("7.0.2")
+
+
+@patch.dict(os.environ, mock_env())
+def test_parse_release_notes_partial_version(**_kwargs):
+    """
+    requirement: the pages hash of a version is recorded only when every page of the version was downloaded
+    mock: MockFortinetApiClient, download_instance returning the landing, change log and issues pages
+    description: an unreachable change log page parses the issues without a pages hash, once reachable the version
+                 gets its pages hash
+    :return:
+    """
+    import importlib
+    from vendor_fortinet_api_client import FortinetApiClient
+    concurrency_controller = importlib.import_module("service-common.python.lib.concurrency_controller")
+    client = MockFortinetApiClient()
+    client.release_notes_hashes = {}
+    client.forti_os_bug_categories = set()
+    client.concurrency = concurrency_controller.AimdController()
+    pages = {
+        "https://docs.fortinet.com/7.0.1": '<html><body><a href="/known">Known issues</a>'
+                                           '<a href="/changelog">Change log</a></body></html>',
+        "https://docs.fortinet.com/known": '<html><body><div id="content"><h2>Category</h2><table><th>Bug ID</th>'
+                                           '<tbody><tr><td>666666</td><td>description</td></tr></tbody></table>'
+                                           '</div></body></html>',
+        "https://docs.fortinet.com/changelog": '<html><body><div id="content"><table><tbody><tr><td>2021-01-01</td>'
+                                               '</tr></tbody></table></div></body></html>',
+    }
+    unreachable = {"https://docs.fortinet.com/changelog"}
+
+    def download(link, headers, observer=None):
+        if link in unreachable:
+            return None
+        return type("request", (object,), {"status_code": 200, "text": pages[link], "history": []})
+
+    entry = (0, {"version": "7.0.1", "url": "https://docs.fortinet.com/7.0.1"})
+    with patch("vendor_fortinet_api_client.download_instance", download):
+        bugs = list(FortinetApiClient.parse_release_notes(self=client, entry=entry, product_name="FortiGate"))
+        assert [x["bugId"] for x in bugs] == ["666666"] and not client.release_notes_hashes
+        unreachable.clear()
+        FortinetApiClient.parse_release_notes(self=client, entry=entry, product_name="FortiGate")
+    assert list(client.release_notes_hashes) == ["https://docs.fortinet.com/7.0.1"]
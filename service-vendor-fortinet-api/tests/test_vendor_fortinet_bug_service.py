@@ -2,6 +2,7 @@
 unit testing for vendor_fortinet_bug_service
 """
 import os
+import sys
 from unittest.mock import patch
 
 from tests.external_dependencies import mock_env, mock_operational_error, mock_sn_ci_query_response_json, \
@@ -370,3 +371,47 @@ def test_initiate_ci_successful(*_args):
              )
     )
     assert execution_message["message"] == '1 new bugs published'
+# -------------------------------------------------------------------------------------------------------------------- #
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@patch.dict(os.environ, mock_env())
+@patch('db_client.Database.__init__', new=mock_database_init)
+@patch('db_client.Database.create_session', lambda *args, **kwargs: True)
+@patch('db_client.Database.remove_non_active_managed_products', lambda *args, **kwargs: 0)
+@patch(
+    'db_client.Database.get_service_config',
+    lambda *args, **kwargs: type("mockConfig", (object,), {"value": {"snApiUrl": True, "secretId": True}})
+)
+@patch('db_client.Database.get_vendor_settings', lambda *args, **kwargs: True)
+@patch(
+    'vendor_fortinet_api_client.FortinetApiClient.get_aws_secret_value',
+    lambda *args, **kwargs: {"user": "", "pass": ""}
+)
+@patch('vendor_fortinet_api_client.FortinetApiClient.sn_sync', lambda *args, **kwargs: [])
+@patch('vendor_fortinet_api_client.FortinetApiClient.bug_zero_vendor_status_update')
+@patch('boto3.client')
+def test_initiate_crawl_deadline(*_args):
+    """
+    requirement: the release notes crawls stop scheduling downloads before the lambda timeout
+    mock: lambda context with 15 minutes left, vendor_fortinet_api_client.sn_sync returning no CIs
+    description: initiate sets the default crawl deadline of the crawl engine from the lambda remaining time minus the
+                 crawl engine margin
+    :return:
+    """
+    import vendor_fortinet_bug_service
+    crawl_engine = vendor_fortinet_bug_service.crawl_engine
+    try:
+        execution_message = vendor_fortinet_bug_service.initiate("", type("MockContext", (object,), {
+            "log_stream_name": "test", "function_name": "dev-vendor-fortinet-bug-service",
+            "log_group_name": "dev-vendor-fortinet-bug-service",
+            "get_remaining_time_in_millis": lambda *_args, **_kwargs: 900000
+        }))
+        time_left = crawl_engine.CrawlEngine().time_left()
+    finally:
+        crawl_engine.clear_deadline()
+    assert execution_message["message"] == 'no active SN CIs matching enabled managed products were found'
+    assert 900 - crawl_engine.DEADLINE_MARGIN - 5 < time_left <= 900 - crawl_engine.DEADLINE_MARGIN
+    # remove mocks import to prevent interference with other tests
+    del sys.modules['vendor_fortinet_bug_service']
+    del sys.modules['vendor_fortinet_api_client']
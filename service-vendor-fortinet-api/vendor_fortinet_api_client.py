@@ -5,15 +5,14 @@ created 2021-10-14
 import base64
 import copy
 import datetime
+import functools
 import importlib
 import inspect
 import json
 import logging.config
 import os
-import queue
 import re
 import sys
-import threading
 
 import boto3
 import lxml.html
@@ -31,6 +30,217 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
+parse_stage = importlib.import_module("service-common.python.lib.parse_stage")
+cmdb_reader = importlib.import_module("service-common.python.lib.cmdb_reader")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
+version_manifest = importlib.import_module("service-common.python.lib.version_manifest")
+concurrency_controller = importlib.import_module("service-common.python.lib.concurrency_controller")
+
+# parse_stage plans of the release notes pages, compiled once per process
+RELEASE_NOTES_SPEC = {
+    "fields": {
+        "known_issues_url":
+            "//a[contains(text(),'Known issues') or contains(text(),'Known Issues') or contains(text(),"
+            "'known issues') or contains(text(),'known Issues')]/@href",
+        "resolved_issues_url":
+            "//a[contains(text(),'Resolved issues') or contains(text(),'Resolved Issues') or contains(text(),"
+            "'resolved issues') or contains(text(),'resolved Issues')]/@href",
+        "change_log_url":
+            "//a[contains(text(),'Change log') or contains(text(),'Change Log') or contains(text(),"
+            "'change log') or contains(text(),'change Log')]/@href"
+    }
+}
+CHANGE_LOG_SPEC = {
+    "fields": {
+        "first_timestamp": "(//*[@id='content'])[1]//tbody/tr[1]//td[1]//text()",
+        "last_timestamp": "(//*[@id='content'])[1]//tbody/tr[last()]//td[1]//text()"
+    }
+}
+BUG_ROWS_XPATHS = ["(//*[@id='content'])[1]//*[text()='Bug ID']/ancestor::table/tbody/tr"]
+BUG_ID_XPATHS = ['./td[1]/p/text()', './td[1]/text()']
+ISSUES_SPEC = {
+    "fields": {
+        "rows": {
+            "xpath": BUG_ROWS_XPATHS,
+            "fields": {
+                "bug_category": '(./ancestor::table/preceding-sibling::h2/text())[last()]',
+                "bug_id": {"xpath": BUG_ID_XPATHS},
+                "description": "./td[2]//text()"
+            }
+        }
+    }
+}
+RELEASE_NOTES_PLAN = parse_stage.Plan(RELEASE_NOTES_SPEC)
+CHANGE_LOG_PLAN = parse_stage.Plan(CHANGE_LOG_SPEC)
+ISSUES_PLAN = parse_stage.Plan(ISSUES_SPEC)
+BUG_ID_REGEX = re.compile(r"\d{6,}")
+SPACES_REGEX = re.compile(r' {2,}')
+
+
+@functools.lru_cache(maxsize=1024)
+def release_date(timestamp):
+    """
+    :param timestamp: release notes timestamp
+    :return: e.g. July 14, 2021
+    """
+    return timestamp.strftime('%B %d, %Y')
+
+
+class BugAccumulator:
+    """
+    release notes rows of a single bug folded by FortinetApiClient.consolidate_bugs as they arrive - the consolidated
+    bug follows the release notes order ( latest release notes first, rows of the same release notes in the parsing
+    order ) whatever the rows order, the rows themselves are not kept
+    """
+    __slots__ = (
+        "bug_id", "count", "latest", "summary", "earliest", "last_updated", "bug_urls", "known_affected_releases",
+        "known_fixed_releases", "descriptions", "fixed_descriptions"
+    )
+
+    def __init__(self, bug_id):
+        """
+        :param bug_id:
+        """
+        self.bug_id = bug_id
+        # number of folded rows, the parsing order of a row
+        self.count = 0
+        # (order timestamp, status, summary, timestamp, version, product name) of the latest row
+        self.latest = None
+        # (order timestamp, summary) of the earliest known issue row
+        self.summary = None
+        # (timestamp, version, product name) of the earliest row other than the latest one
+        self.earliest = None
+        # latest timestamp of the rows other than the latest one - the vendorLastUpdatedDate
+        self.last_updated = None
+        # {url: latest order timestamp}
+        self.bug_urls = {}
+        # {version: (latest order timestamp, parsing order)}
+        self.known_affected_releases = {}
+        self.known_fixed_releases = {}
+        # (order timestamp, product name, version, description) of the known issue rows
+        self.descriptions = []
+        # (order timestamp, version, timestamp, description) of the resolved issue rows
+        self.fixed_descriptions = []
+
+    def add(self, bug):
+        """
+        fold a parsed release notes row
+        :param bug:
+        :return:
+        """
+        n = self.count
+        self.count += 1
+        release_note_timestamp = bug.get('release_note_timestamp')
+        # rows without a release notes timestamp are ordered after the others
+        order_timestamp = release_note_timestamp or datetime.datetime.min
+        known_fixed_release = bug.get('knownFixedReleases')
+        known_affected_release = bug.get('knownAffectedReleases')
+        version = bug.get("knownFixedReleases", known_affected_release)
+        if self.latest is None or order_timestamp > self.latest[0]:
+            if self.latest is not None:
+                # the previous latest row was parsed before every folded row of the same timestamp
+                self.add_timestamp(*self.latest[3:], parsed_before=True)
+            self.latest = (
+                order_timestamp, bug["status"], bug["summary"], release_note_timestamp, version, bug['product_name']
+            )
+        elif release_note_timestamp:
+            self.add_timestamp(release_note_timestamp, version, bug['product_name'], parsed_before=False)
+        bug_url = bug["bugUrl"]
+        if bug_url not in self.bug_urls or order_timestamp > self.bug_urls[bug_url]:
+            self.bug_urls[bug_url] = order_timestamp
+
+        # for resolved issues - the bug's knownFixedReleases and the fixed release description
+        if known_fixed_release:
+            if known_fixed_release not in self.known_fixed_releases or \
+                    order_timestamp > self.known_fixed_releases[known_fixed_release][0]:
+                self.known_fixed_releases[known_fixed_release] = (order_timestamp, n)
+            self.fixed_descriptions.append(
+                (order_timestamp, known_fixed_release, release_note_timestamp, bug['description'])
+            )
+        # for known issues - the bug's knownAffectedReleases, the description list and the summary field
+        elif known_affected_release:
+            if known_affected_release not in self.known_affected_releases or \
+                    order_timestamp > self.known_affected_releases[known_affected_release][0]:
+                self.known_affected_releases[known_affected_release] = (order_timestamp, n)
+            self.descriptions.append((order_timestamp, bug['product_name'], known_affected_release, bug['description']))
+            if self.summary is None or order_timestamp <= self.summary[0]:
+                self.summary = (order_timestamp, bug['summary'])
+
+    def add_timestamp(self, release_note_timestamp, version, product_name, parsed_before):
+        """
+        fold the timestamp of a row other than the latest one
+        :param release_note_timestamp:
+        :param version:
+        :param product_name:
+        :param parsed_before: the row was parsed before the folded rows
+        :return:
+        """
+        if not release_note_timestamp:
+            return
+        if self.last_updated is None or release_note_timestamp > self.last_updated:
+            self.last_updated = release_note_timestamp
+        if self.earliest is None or release_note_timestamp < self.earliest[0] or (
+                parsed_before and release_note_timestamp == self.earliest[0]
+        ):
+            self.earliest = (release_note_timestamp, version, product_name)
+
+    def consolidate(self):
+        """
+        consolidated bug entry - the earliest recollection of the bug, the vendorLastUpdatedDate and the statement
+        about the bug being fixed if relevant
+        :return:
+        """
+        # latest release notes first, the sort is stable - rows of the same release notes keep the parsing order
+        self.descriptions.sort(key=lambda x: x[0], reverse=True)
+        self.fixed_descriptions.sort(key=lambda x: x[0], reverse=True)
+        description_list = [
+            f"\nInformation from {product_name} v{version} release notes:\n{description}"
+            for _order_timestamp, product_name, version, description in self.descriptions
+        ]
+        if self.earliest:
+            earliest_release_note_date, version, product_name = self.earliest
+            description_list.append(
+                f"\nThe earliest recollection of this bug is traced back to {product_name} v{version} released on "
+                f"{release_date(earliest_release_note_date)}."
+            )
+        else:
+            description_list.append("\nThe earliest recollection of this bug is unknown.")
+        description = "\n".join(description_list)
+        if self.fixed_descriptions:
+            fixed_description_list = []
+            for _order_timestamp, version, release_note_timestamp, fixed_description in self.fixed_descriptions:
+                fixed_description_list.append(
+                    f"\nThis bug is fixed in versions {version}" +
+                    (f" released on {release_date(release_note_timestamp)}:" if release_note_timestamp else ":")
+                )
+                fixed_description_list.append(fixed_description)
+            description += "\n" + "\n".join(fixed_description_list)
+        description += "\n\nFor more information:\n" + "\n".join(sorted(self.bug_urls))
+
+        consolidated_bug = {
+            "bugId": self.bug_id,
+            "bug_urls": {
+                url: datetime.datetime(1900, 1, 1, 0, 00, 0) if timestamp == datetime.datetime.min else timestamp
+                for url, timestamp in sorted(self.bug_urls.items(), key=lambda x: x[1], reverse=True)
+            },
+            "summary": self.summary[1] if self.summary else self.latest[2],
+            "knownAffectedReleases": self.releases(self.known_affected_releases),
+            "knownFixedReleases": self.releases(self.known_fixed_releases),
+            "status": self.latest[1],
+            "description": description
+        }
+        if self.earliest:
+            consolidated_bug["vendorLastUpdatedDate"] = self.last_updated
+        return consolidated_bug
+
+    @staticmethod
+    def releases(releases):
+        """
+        :param releases: {version: (latest order timestamp, parsing order)}
+        :return: versions in the release notes order
+        """
+        return sorted(releases, key=lambda x: (releases[x][0], -releases[x][1]), reverse=True)
 
 
 class FortinetApiClient:
@@ -53,9 +263,11 @@ class FortinetApiClient:
         self.logger = logger
         self.sn_versions = []
         self.vendor_id = vendor_id
-        self.html_error_count = 0
-        self.html_error_count_threshold = 10
+        # adaptive concurrency of the release notes crawl, one per release_notes_download_manager run
+        self.concurrency = concurrency_controller.AimdController(logger=logger)
         self.forti_os_bug_categories = set()
+        # version_manifest.pages_hash of the pages of every parsed release notes url
+        self.release_notes_hashes = {}
         self.secret_manager_client = boto3.Session().client("secretsmanager")
 
     def bug_zero_vendor_status_update(
@@ -191,372 +403,284 @@ class FortinetApiClient:
             ) from e
         return json.loads(response.text)
 
-    def parse_release_notes(self, q, product_name):
+    def parse_release_notes(self, entry, product_name):
         """
-
-        :return:
+        download a release notes page, follow its known and resolved issues urls and parse the bugs
+        :param entry: (url index, release notes entry)
+        :param product_name:
+        :return: bugs of the release notes version
         """
-        def process_entry(entry):
-            """
-
-            :param entry:
-            :return:
-            """
-            version_bugs = {}
-            entry_url = entry[-1]["url"]
-            entry_version = entry[-1]["version"]
-            response = download_instance(link=entry_url, headers="")
-            if not response:
-                self.html_error_count += 1
-                self.logger.error(f"'{product_name} v{entry_version}' - download failed | {entry_url}")
-                # if more errors than the allowed threshold have been tracked raise an exception ( creates a sn event )
-                if self.html_error_count >= self.html_error_count_threshold:
-                    self.logger.error(f"'{product_name} v{entry_version}' - download failed | {entry_url}")
-                    raise VendorConnectionError(
-                        url=entry_url, internal_message="vendor connection error - check url",
-                        event_message="connection to vendor web page failed"
-                    )
-                return version_bugs.values()
+        version_bugs = {}
+        entry_url = entry[-1]["url"]
+        entry_version = entry[-1]["version"]
+        response = download_instance(link=entry_url, headers="", observer=self.concurrency.observe)
+        if not response:
+            self.logger.error(f"'{product_name} v{entry_version}' - download failed | {entry_url}")
+            # throttling is absorbed by the concurrency controller, missing pages and a site failing at the lowest
+            # concurrency past the threshold raise an exception ( creates a sn event )
+            if self.concurrency.fail():
+                raise VendorConnectionError(
+                    url=entry_url, internal_message="vendor connection error - check url",
+                    event_message="connection to vendor web page failed"
+                )
+            return version_bugs.values()
+        # downloaded pages of the version, a version with an unreachable page is not a complete harvest
+        pages = [response.text]
+        complete = True
 
-            html_root = lxml.html.fromstring(response.text)
+        parsed = parse_stage.parse(html=response.text, spec=RELEASE_NOTES_PLAN)
 
-            # find known issues urls
-            known_issues_url = html_root.xpath(
-                "//a[contains(text(),'Known issues') or contains(text(),'Known Issues') or contains(text(),"
-                "'known issues') or contains(text(),'known Issues')]/@href"
+        # find known issues urls
+        known_issues_url = parsed["known_issues_url"]
+        if not known_issues_url:
+            self.logger.warning(
+                f"'{product_name} v{entry_version}' - can't locate known issues href in html | {entry_url}"
             )
-            if not known_issues_url:
-                self.logger.warning(
-                    f"'{product_name} v{entry_version}' - can't locate known issues href in html | {entry_url}"
-                )
 
-            # find known issues urls
-            resolved_issues_url = html_root.xpath(
-                "//a[contains(text(),'Resolved issues') or contains(text(),'Resolved Issues') or contains(text(),"
-                "'resolved issues') or contains(text(),'resolved Issues')]/@href"
+        # find known issues urls
+        resolved_issues_url = parsed["resolved_issues_url"]
+        if not resolved_issues_url:
+            self.logger.warning(
+                f"'{product_name} v{entry_version}' - can't locate resolved issues href in html | {entry_url}"
             )
-            if not resolved_issues_url:
-                self.logger.warning(
-                    f"'{product_name} v{entry_version}' - can't locate resolved issues href in html | {entry_url}"
-                )
 
-            # find change issues urls
-            change_log_url = html_root.xpath(
-                "//a[contains(text(),'Change log') or contains(text(),'Change Log') or contains(text(),"
-                "'change log') or contains(text(),'change Log')]/@href"
+        # find change issues urls
+        change_log_url = parsed["change_log_url"]
+        if not change_log_url:
+            self.logger.warning(
+                f"'{product_name} v{entry_version}'- can't locate change log in html | {entry_url}"
             )
-            if not change_log_url:
+
+        change_log_url = f"https://docs.fortinet.com{change_log_url[0]}" if change_log_url else ""
+        issues_urls = []
+        known_issues_url = f"https://docs.fortinet.com{known_issues_url[0]}" if known_issues_url else ""
+        resolved_issues_url = f"https://docs.fortinet.com{resolved_issues_url[0]}" if resolved_issues_url else ""
+        if known_issues_url:
+            issues_urls.append(known_issues_url)
+        if resolved_issues_url:
+            issues_urls.append(resolved_issues_url)
+
+        release_note_timestamp = ""
+        if issues_urls and change_log_url:
+            response = download_instance(link=change_log_url, headers="", observer=self.concurrency.observe)
+            if not response:
                 self.logger.warning(
-                    f"'{product_name} v{entry_version}'- can't locate change log in html | {entry_url}"
+                    f"'{product_name} v{entry_version}' - product change log page is unreachable | {change_log_url}"
                 )
-
-            change_log_url = f"https://docs.fortinet.com{change_log_url[0]}" if change_log_url else ""
-            issues_urls = []
-            known_issues_url = f"https://docs.fortinet.com{known_issues_url[0]}" if known_issues_url else ""
-            resolved_issues_url = f"https://docs.fortinet.com{resolved_issues_url[0]}" if resolved_issues_url else ""
-            if known_issues_url:
-                issues_urls.append(known_issues_url)
-            if resolved_issues_url:
-                issues_urls.append(resolved_issues_url)
-
-            release_note_timestamp = ""
-            if issues_urls and change_log_url:
-                response = download_instance(link=change_log_url, headers="")
-                if not response:
+                complete = False
+            else:
+                pages.append(response.text)
+                # grab top and bottom change log entries and compare their timestamps to determine which represents
+                # the first ever entry on the change log
+                parsed = parse_stage.parse(html=response.text, spec=CHANGE_LOG_PLAN)
+                first_timestamp_container = parsed["first_timestamp"]
+                last_timestamp_container = parsed["last_timestamp"]
+                if not first_timestamp_container or not last_timestamp_container:
                     self.logger.warning(
-                        f"'{product_name} v{entry_version}' - product change log page is unreachable | {change_log_url}"
+                        f"'{product_name} v{entry_version}' - can't locate initial release note timestamp | "
+                        f"{change_log_url}"
                     )
                 else:
-                    html_root = lxml.html.fromstring(response.text)
+                    first_timestamp = [x for x in first_timestamp_container if x.strip()]
+                    last_timestamp = [x for x in last_timestamp_container if x.strip()]
+                    timestamps = []
+                    first_timestamp = self.timestamp_format(first_timestamp[0]) if first_timestamp else None
+                    last_timestamp = self.timestamp_format(last_timestamp[0]) if last_timestamp else None
+                    if not isinstance(first_timestamp, str):
+                        if first_timestamp:
+                            timestamps.append(first_timestamp)
+                    if not isinstance(last_timestamp, str):
+                        if last_timestamp:
+                            timestamps.append(last_timestamp)
+                    if timestamps:
+                        # grab earliest timestamp
+                        release_note_timestamp = min(timestamps)
+
+        # get bugs ( issues ) from both the known and the resolved issues pages
+        for i, url in enumerate(issues_urls, start=1):
+            if not url:
+                continue
 
-                    # grab top and bottom change log entries and compare their timestamps to determine which represents
-                    # the first ever entry on the change log
-                    first_timestamp_container = html_root.xpath(
-                        "(//*[@id='content'])[1]//tbody/tr[1]//td[1]//text()"
-                    )
-                    last_timestamp_container = html_root.xpath(
-                        "(//*[@id='content'])[1]//tbody/tr[last()]//td[1]//text()"
-                    )
-                    if not first_timestamp_container or not last_timestamp_container:
-                        self.logger.warning(
-                            f"'{product_name} v{entry_version}' - can't locate initial release note timestamp | "
-                            f"{change_log_url}"
-                        )
-                    else:
-                        first_timestamp = [x for x in first_timestamp_container if x.strip()]
-                        last_timestamp = [x for x in last_timestamp_container if x.strip()]
-                        timestamps = []
-                        first_timestamp = self.timestamp_format(first_timestamp[0]) if first_timestamp else None
-                        last_timestamp = self.timestamp_format(last_timestamp[0]) if last_timestamp else None
-                        if not isinstance(first_timestamp, str):
-                            if first_timestamp:
-                                timestamps.append(first_timestamp)
-                        if not isinstance(last_timestamp, str):
-                            if last_timestamp:
-                                timestamps.append(last_timestamp)
-                        if timestamps:
-                            # grab earliest timestamp
-                            release_note_timestamp = min(timestamps)
-
-            # get bugs ( issues ) from both the known and the resolved issues pages
-            for i, url in enumerate(issues_urls, start=1):
-                if not url:
-                    continue
-
-                response = download_instance(link=url, headers="")
-                if not response:
-                    self.logger.warning(
-                        f"'{product_name} v{entry_version}' - product issues page is unreachable | {url}"
-                    )
-                    continue
+            response = download_instance(link=url, headers="", observer=self.concurrency.observe)
+            if not response:
+                self.logger.warning(
+                    f"'{product_name} v{entry_version}' - product issues page is unreachable | {url}"
+                )
+                complete = False
+                continue
 
-                if response.history:
-                    self.logger.warning(
-                        f"'{product_name} v{entry_version}' - product issues page does not yet exist | {url}"
-                    )
-                    continue
-
-                # e.g. https://docs.fortinet.com/document/fortigate/7.0.1/fortios-release-notes/236526/known-issues
-                html_root = lxml.html.fromstring(response.text)
-                # find bug rows
-                bug_rows_xpaths = [
-                    "(//*[@id='content'])[1]//*[text()='Bug ID']/ancestor::table/tbody/tr"
-                ]
-                bug_rows = []
-                for path in bug_rows_xpaths:
-                    bug_rows = html_root.xpath(path)
-                    if bug_rows:
-                        break
-
-                if not bug_rows:
-                    self.logger.error(f"'{product_name} v{entry_version}' - cant locate issue in html | "
+            if response.history:
+                self.logger.warning(
+                    f"'{product_name} v{entry_version}' - product issues page does not yet exist | {url}"
+                )
+                continue
+            pages.append(response.text)
+
+            # e.g. https://docs.fortinet.com/document/fortigate/7.0.1/fortios-release-notes/236526/known-issues
+            # find bug rows
+            bug_rows = parse_stage.parse(html=response.text, spec=ISSUES_PLAN)["rows"]
+
+            if not bug_rows:
+                self.logger.error(f"'{product_name} v{entry_version}' - cant locate issue in html | "
+                                  f"{url} ")
+                internal_message = f"failed locating issue rows using xpath '{json.dumps(BUG_ROWS_XPATHS)}'"
+                event_message = "error occurred while trying to retrieve bugs from vendor, we are actively " \
+                                "working on a fix "
+                raise VendorResponseError(internal_message=internal_message, event_message=event_message, url=url)
+
+            # iterate rows find BugID and Description
+            for row in bug_rows:
+                bug_category_container = row["bug_category"]
+                if bug_category_container:
+                    bug_category = bug_category_container[0].strip()
+                    self.forti_os_bug_categories.add(bug_category)
+                else:
+                    bug_category = "Model Specific"
+                bug_id_container = row["bug_id"]
+                if not bug_id_container:
+                    self.logger.error(f"'{product_name} v{entry_version}' - cant locate bugIDs in html | "
                                       f"{url} ")
-                    internal_message = f"failed locating issue rows using xpath '{json.dumps(bug_rows_xpaths)}'"
+                    internal_message = f"failed locating bug IDs using xpaths - '{json.dumps(BUG_ID_XPATHS)}'"
                     event_message = "error occurred while trying to retrieve bugs from vendor, we are actively " \
                                     "working on a fix "
-                    raise VendorResponseError(internal_message=internal_message, event_message=event_message, url=url)
-
-                # iterate rows find BugID and Description
-                for row in bug_rows:
-                    bug_category_container = row.xpath('(./ancestor::table/preceding-sibling::h2/text())[last()]')
-                    if bug_category_container:
-                        bug_category = bug_category_container[0].strip()
-                        self.forti_os_bug_categories.add(bug_category)
-                    else:
-                        bug_category = "Model Specific"
-                    bug_id_container = ""
-                    bug_id_xpaths = ['./td[1]/p/text()', './td[1]/text()']
-                    for path in bug_id_xpaths:
-                        bug_id_container = row.xpath(path)
-                        if bug_id_container:
-                            break
-
-                    if not bug_id_container:
-                        self.logger.error(f"'{product_name} v{entry_version}' - cant locate bugIDs in html | "
-                                          f"{url} ")
-                        internal_message = f"failed locating bug IDs using xpaths - '{json.dumps(bug_id_xpaths)}'"
-                        event_message = "error occurred while trying to retrieve bugs from vendor, we are actively " \
-                                        "working on a fix "
-                        raise VendorResponseError(
-                            internal_message=internal_message, event_message=event_message, url=url
-                        )
-
-                    bug_ids = re.findall(r"\d{6,}", bug_id_container[0].strip())
-                    if not bug_ids:
-                        internal_message = f"'{product_name} v{entry_version}' - skipping unknown bug ID " \
-                                           f"'{json.dumps(bug_id_container)}'| {url} "
-                        self.logger.error(internal_message)
-
-                    for bug_id in bug_ids:
-                        bug_description = row.xpath("./td[2]//text()")
-                        bug_description = [
-                            entry.strip("\r\n").strip('\n').replace('\r\n', "") for entry in bug_description
-                            if entry.strip()
-                        ]
-                        bug_summary = copy.deepcopy(bug_description)
-                        if bug_category:
-                            bug_description.insert(0, f"Product Element: {bug_category}\n")
-                            bug_summary.insert(0, f"Product Element: {bug_category} | ")
-
-                        if not release_note_timestamp:
-                            release_note_timestamp = datetime.datetime(1900, 1, 1, 0, 00, 0)
-
-                        # i = 2 for resolved issues urls
-                        if i == 2:
-                            if bug_id in version_bugs:
-                                version_bugs[bug_id]["knownFixedReleases"] = entry_version
-                                version_bugs[bug_id]["status"] = "Fixed"
-                            else:
-                                bug = {
-                                    "bugId":  bug_id if bug_id else "",
-                                    "description": "".join(bug_description).strip(),
-                                    "summary": "".join(bug_summary).strip(),
-                                    "bugUrl":  url,
-                                    "status": "Fixed",
-                                    "knownFixedReleases": entry_version,
-                                    "release_note_timestamp": release_note_timestamp
-                                    if release_note_timestamp else None,
-                                    "product_name": product_name
-                                }
-                                version_bugs[bug_id] = bug
+                    raise VendorResponseError(
+                        internal_message=internal_message, event_message=event_message, url=url
+                    )
+
+                bug_ids = BUG_ID_REGEX.findall(bug_id_container[0].strip())
+                if not bug_ids:
+                    internal_message = f"'{product_name} v{entry_version}' - skipping unknown bug ID " \
+                                       f"'{json.dumps(bug_id_container)}'| {url} "
+                    self.logger.error(internal_message)
+
+                for bug_id in bug_ids:
+                    bug_description = list(row["description"])
+                    bug_description = [
+                        entry.strip("\r\n").strip('\n').replace('\r\n', "") for entry in bug_description
+                        if entry.strip()
+                    ]
+                    bug_summary = copy.deepcopy(bug_description)
+                    if bug_category:
+                        bug_description.insert(0, f"Product Element: {bug_category}\n")
+                        bug_summary.insert(0, f"Product Element: {bug_category} | ")
+
+                    if not release_note_timestamp:
+                        release_note_timestamp = datetime.datetime(1900, 1, 1, 0, 00, 0)
+                    # whitespace is normalized once per row, consolidate_bugs joins the descriptions as is
+                    description = SPACES_REGEX.sub(r' ', "".join(bug_description).strip())
+
+                    # i = 2 for resolved issues urls
+                    if i == 2:
+                        if bug_id in version_bugs:
+                            version_bugs[bug_id]["knownFixedReleases"] = entry_version
+                            version_bugs[bug_id]["status"] = "Fixed"
                         else:
                             bug = {
                                 "bugId":  bug_id if bug_id else "",
-                                "description": "".join(bug_description).strip(),
+                                "description": description,
                                 "summary": "".join(bug_summary).strip(),
                                 "bugUrl":  url,
-                                "status": "Open",
-                                "knownAffectedReleases": entry_version,
-                                "release_note_timestamp": release_note_timestamp if release_note_timestamp else None,
+                                "status": "Fixed",
+                                "knownFixedReleases": entry_version,
+                                "release_note_timestamp": release_note_timestamp
+                                if release_note_timestamp else None,
                                 "product_name": product_name
                             }
                             version_bugs[bug_id] = bug
-            return version_bugs.values()
-
-        while not q.empty():
-            queue_object = q.get()
-            self.bugs.extend(process_entry(entry=queue_object))
-            q.task_done()
-
-    def release_notes_download_manager(self, release_notes_urls, product_name, threads=3):
+                    else:
+                        bug = {
+                            "bugId":  bug_id if bug_id else "",
+                            "description": description,
+                            "summary": "".join(bug_summary).strip(),
+                            "bugUrl":  url,
+                            "status": "Open",
+                            "knownAffectedReleases": entry_version,
+                            "release_note_timestamp": release_note_timestamp if release_note_timestamp else None,
+                            "product_name": product_name
+                        }
+                        version_bugs[bug_id] = bug
+        if complete:
+            self.release_notes_hashes[entry_url] = version_manifest.pages_hash(pages)
+        return version_bugs.values()
+
+    def release_notes_download_manager(self, release_notes_urls, product_name, manifest=None, controller=None):
         """
         1. download release notes html
         2. parse and follow known and resolved issues urls
         3. populate bugs
         :param release_notes_urls:
         :param product_name:
-        :param threads:
+        :param manifest: optional version_manifest.VersionManifest of the product, only the new and recent versions
+                         are crawled and the stored bugs of the other versions are merged
+        :param controller: concurrency_controller.AimdController of the release notes downloads, defaults to a new
+                           controller starting at 3 concurrent downloads
         :return:
         """
         self.bugs = list()
-        self.logger.info(f"'{product_name} - downloading release notes pages  | {json.dumps(release_notes_urls)}")
-
-        q = queue.Queue()
-        for i, entry in enumerate(release_notes_urls):
-            q.put((i, entry))
-
-        for i in range(threads):
-            t = threading.Thread(
-                target=self.parse_release_notes, args=(q, product_name)
-            )
-            t.start()
-
-        q.join()
-
+        self.concurrency = controller or concurrency_controller.AimdController(logger=self.logger)
+        crawl_urls = release_notes_urls if manifest is None else manifest.select(release_notes_urls)
+        self.logger.info(f"'{product_name} - downloading release notes pages  | {json.dumps(crawl_urls)}")
+
+        engine = crawl_engine.CrawlEngine(controller=self.concurrency, logger=self.logger)
+        crawled_versions = set()
+        crawl_results = engine.run(
+            items=enumerate(crawl_urls),
+            handler=functools.partial(self.parse_release_notes, product_name=product_name),
+            host=lambda entry: crawl_engine.url_host(entry[-1]["url"])
+        )
+        for crawl_result in crawl_results:
+            if isinstance(crawl_result.error, VendorConnectionError):
+                # download failures threshold reached ( creates a sn event )
+                raise crawl_result.error
+            if crawl_result.error:
+                self.logger.error(
+                    f"'{product_name} v{crawl_result.item[-1]['version']}' - release notes parsing failed | "
+                    f"{crawl_result.item[-1]['url']} | {crawl_result.error}"
+                )
+                continue
+            version_bugs = list(crawl_result.result)
+            entry = crawl_result.item[-1]
+            # versions without a pages hash have a page that failed to download
+            version_hash = self.release_notes_hashes.pop(entry["url"], None)
+            if manifest is not None and version_hash is not None:
+                manifest.update(
+                    version=entry["version"], url=entry["url"], version_hash=version_hash, bugs=version_bugs
+                )
+                crawled_versions.add(entry["version"])
+            elif manifest is not None and manifest.bugs(entry["version"]) is not None:
+                # the stored bugs of a partially downloaded version are kept and merged below
+                continue
+            self.bugs.extend(version_bugs)
+        self.concurrency.log_stats(name=product_name)
+
+        if manifest is not None:
+            # merge the stored bugs of the versions that were not crawled or failed
+            for entry in release_notes_urls:
+                if entry["version"] not in crawled_versions:
+                    self.bugs.extend(manifest.bugs(entry["version"]) or [])
+            manifest.save()
         return self.bugs
 
     def consolidate_bugs(self, bugs):
         """
         consolidate bug description, knownAffectedReleases, knownFixedReleases
         filter out bugs not matching vendor_statuses configured for the managed product
-        :param bugs:
-        :param product_name:
+        the rows are folded into their bug in a single pass, a row is not referenced once folded
+        :param bugs: parsed release notes rows ( any iterable ), descriptions are whitespace normalized by
+                     parse_release_notes
         :return:
         """
         self.logger.info(f"'{self.vendor_id}' - consolidating bugs")
-        consolidated_bugs = dict()
-        bugs = sorted(bugs, key=lambda x: (int(x["bugId"]), x['release_note_timestamp']), reverse=True)
+        accumulators = dict()
         for bug in bugs:
-            bug_id = bug["bugId"]
-            bug_description = bug['description']
-            version = bug.get("knownFixedReleases", bug.get("knownAffectedReleases"))
-            product_name = bug['product_name']
-
-            # create the initial bug entry
-            if bug_id not in consolidated_bugs:
-                release_note_timestamp = bug.get('release_note_timestamp')
-                if not release_note_timestamp:
-                    release_note_timestamp = datetime.datetime(1900, 1, 1, 0, 00, 0)
-                consolidated_bugs[bug_id] = {
-                    "bugId": bug_id,
-                    "bug_urls": {bug["bugUrl"]: release_note_timestamp},
-                    "description_list": [],
-                    "fixed_description_list": [],
-                    "summary": bug['summary'],
-                    "knownAffectedReleases": [],
-                    "knownFixedReleases": [],
-                    "release_notes_timestamps": {
-                        bug['release_note_timestamp']: (version, product_name)
-                    } if bug.get('release_notes_timestamp') else {},
-                    "status": bug["status"]
-                }
-
-            # update the release note timestamp and url for existing bugs
-            else:
-                if bug.get('release_note_timestamp') and bug["release_note_timestamp"] not in \
-                        consolidated_bugs[bug_id]["release_notes_timestamps"]:
-                    consolidated_bugs[bug_id]["release_notes_timestamps"][bug["release_note_timestamp"]] = \
-                        (version, product_name)
-
-                if bug["bugUrl"] not in consolidated_bugs[bug_id]["bug_urls"]:
-                    release_note_timestamp = bug.get('release_note_timestamp')
-                    if not release_note_timestamp:
-                        release_note_timestamp = datetime.datetime(1900, 1, 1, 00, 00, 0)
-                    consolidated_bugs[bug_id]["bug_urls"][bug["bugUrl"]] = release_note_timestamp
-
-            # for resolved issues - update the bug's knownFixedReleases and the fixed release description
-            if bug.get('knownFixedReleases'):
-                if bug['knownFixedReleases'] not in consolidated_bugs[bug_id]['knownFixedReleases']:
-                    consolidated_bugs[bug_id]['knownFixedReleases'].append(bug['knownFixedReleases'])
-
-                fixed_in_version_description = f"\nThis bug is fixed in versions {bug['knownFixedReleases']}"
-
-                if bug['release_note_timestamp']:
-                    fixed_in_version_description += f" released on " \
-                                                    f"{bug['release_note_timestamp'].strftime('%B %d, %Y')}:"
-                else:
-                    fixed_in_version_description += ":"
-
-                consolidated_bugs[bug_id]["fixed_description_list"].append(
-                    fixed_in_version_description
-                )
-                consolidated_bugs[bug_id]["fixed_description_list"].append(
-                    bug_description
-                )
-            # for known issues - update the bug's knownAffectedReleases, the description list and the summary field
-            elif bug.get('knownAffectedReleases'):
-                if bug['knownAffectedReleases'] not in consolidated_bugs[bug_id]['knownAffectedReleases']:
-                    consolidated_bugs[bug_id]['knownAffectedReleases'].append(bug.get('knownAffectedReleases'))
-                release_notes_description = f"\nInformation from {product_name} v{bug['knownAffectedReleases']} " \
-                                            f"release notes:\n{bug_description}"
-                consolidated_bugs[bug_id]['description_list'].append(release_notes_description)
-                consolidated_bugs[bug_id]['summary'] = bug['summary']
-
-        # clean the consolidated bug entry, setting the earliest recollection of the bug, the vendorLastUpdatedDate
-        # and the statement about the bug being fixed if relevant
-        for bug_id, bug_data in consolidated_bugs.items():
-            try:
-                earliest_release_note_date = min(bug_data['release_notes_timestamps'])
-                earliest_release_note_version = bug_data['release_notes_timestamps'][earliest_release_note_date][0]
-                earliest_release_note_product_name = bug_data['release_notes_timestamps'][earliest_release_note_date][1]
-                bug_data["description_list"].append(
-                    f"\nThe earliest recollection of this bug is traced back to {earliest_release_note_product_name} "
-                    f"v{earliest_release_note_version} released on {earliest_release_note_date.strftime('%B %d, %Y')}."
-                )
-            # if there are no release_notes_timestamps
-            except ValueError:
-                bug_data["description_list"].append(
-                    f"\nThe earliest recollection of this bug is unknown."
-                )
-
-            bug_data["description"] = "\n".join(bug_data["description_list"])
-            if bug_data["fixed_description_list"]:
-                bug_data["description"] += "\n" + "\n".join(bug_data["fixed_description_list"])
-            known_bug_urls = "\n\nFor more information:\n" + "\n".join(
-                list(sorted(list(bug_data['bug_urls'].keys())))
-            )
-            bug_data['description'] += known_bug_urls
-            # replace more than one white space
-            bug_data['description'] = re.sub(r' {2,}', r' ', bug_data["description"])
-            try:
-                bug_data["vendorLastUpdatedDate"] = max(bug_data['release_notes_timestamps'])
-            except ValueError:
-                pass
-
-            del bug_data["description_list"]
-            del bug_data["fixed_description_list"]
-            del bug_data["release_notes_timestamps"]
-        return list(consolidated_bugs.values())
+            accumulator = accumulators.get(bug["bugId"])
+            if accumulator is None:
+                accumulator = accumulators[bug["bugId"]] = BugAccumulator(bug["bugId"])
+            accumulator.add(bug)
+        # an accumulator is released once its bug is consolidated
+        return [
+            accumulators.pop(bug_id).consolidate() for bug_id in sorted(accumulators, key=int, reverse=True)
+        ]
 
     def format_bug_entry(self, bugs, managed_product, sn_ci_filter, sn_ci_table):
         """
@@ -662,37 +786,17 @@ class FortinetApiClient:
 
         sn_ci_query_base = f"?sysparm_query={sn_ci_query_base}"
         sn_query_url = f"{sn_api_url}/api/now/table/{product_type['service_now_ci_table']}{sn_ci_query_base}"
-        response = download_instance(
-            link=sn_query_url,
-            headers={"Authorization": f"Basic {sn_auth_token}"}
+        reader = cmdb_reader.CmdbReader(
+            download=download_instance, headers={"Authorization": f"Basic {sn_auth_token}"},
+            connection_error=ApiConnectionError, response_error=ApiResponseError, logger=self.logger,
+            cache=cmdb_cache.get_cache()
         )
-        if not response:
-            self.logger.error(f"SN API connection error - {sn_query_url}")
-            raise ApiConnectionError(
-                url=sn_query_url, internal_message="SN API connection error",
-                event_message="a connection to ServiceNow could not be established - check ServiceNow settings"
-            )
-        try:
-            count = int(response.headers["x-total-count"])
-        except KeyError as e:
-            raise ApiResponseError(
-                url=sn_query_url, internal_message="missing 'x-total-count' in sn query response",
-                event_message="ServiceNow query returned a malformed response - check ServiceNow settings"
-            ) from e
+        count, instances = reader.read(sn_query_url)
         if count:
             self.logger.info(
                 f"'{product_type['type']}' '{product_type['service_now_ci_table']}' - {count} SN CI(s) found")
-            try:
-                instances = json.loads(response.text)["result"]
-            except json.JSONDecodeError as e:
-                raise ApiResponseError(
-                    url=sn_query_url, internal_message="error parsing serviceNow response - check url",
-                    event_message="ServiceNow query returned a malformed response - check ServiceNow settings"
-                ) from e
             # populate query url
-            for x in instances:
-                x['sn_query_url'] = sn_query_url
-            return instances
+            return ({**x, "sn_query_url": sn_query_url} for x in instances)
         self.logger.info(
             f"'{product_type['type']}' '{product_type['service_now_ci_table']}' - No SN CIs found")
         return []
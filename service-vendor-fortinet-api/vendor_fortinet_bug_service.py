@@ -29,6 +29,9 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
+version_manifest = importlib.import_module("service-common.python.lib.version_manifest")
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -74,6 +77,8 @@ def initiate(*_args, **_kwargs):
     # use a signal handler to set an alarm that will invoke
     signal.signal(signal.SIGALRM, timeout_handler)
     signal.alarm((int(_args[1].get_remaining_time_in_millis() / 1000)) - 1)
+    # stop scheduling crawls before the lambda timeout
+    crawl_engine.set_deadline(remaining_ms=_args[1].get_remaining_time_in_millis())
 
     # service configuration
     vendor_id = "fortinet"
@@ -294,8 +299,12 @@ def initiate(*_args, **_kwargs):
                     product_name=product['name'], product_slug_name=product["slug"]
                 )
                 if release_notes_urls:
+                    # only the new and recent versions are crawled, the other versions bugs are read from the manifest
+                    manifest = version_manifest.load_manifest(
+                        name=f"{vendor_id}-{product['slug']}", logger=logger
+                    ) if version_manifest.ENABLED else None
                     version_bugs = fortinet_api_client.release_notes_download_manager(
-                        release_notes_urls=release_notes_urls, product_name=product["name"]
+                        release_notes_urls=release_notes_urls, product_name=product["name"], manifest=manifest
                     )
 
                     if not version_bugs:
@@ -368,6 +377,7 @@ def initiate(*_args, **_kwargs):
 
         counter['removed_managed_products'] += removed_managed_products
         logger.info(f"'{vendor_id}' sync completed - {json.dumps(counter)}")
+        cmdb_cache.log_stats()
 
         # on existing bug updates - trigger the bugEventProcessor
         if new_bugs_updates:
@@ -1,12 +1,21 @@
 """
 created 2021-06-27
 """
+import importlib
+import inspect
 import logging.config
+import os
+import sys
 
-from sqlalchemy import create_engine
 from sqlalchemy.ext.automap import automap_base, name_for_collection_relationship
 from sqlalchemy.orm import sessionmaker
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+db_utils = importlib.import_module("service-common.python.lib.db_utils")
+db_session = importlib.import_module("service-common.python.lib.db_session")
+
 logger = logging.getLogger()
 sql_logger = logging.getLogger('sqlalchemy.engine')
 
@@ -30,16 +39,18 @@ class Database:
         self.dbname = db_name
         self.base = None
         self.conn = None
+        self.truncation_plans = {}
 
     def create_session(self):
         """
         Connect to MySQL Database
+        the engine ( and its connection pool ) is reused by warm invocations
         :return:
         """
-        engine = create_engine(
+        engine = db_session.get_engine(
             f"mysql+pymysql://{self.username}:{self.password}@{self.host}/{self.dbname}"
         )
-        self.base = automap_base()
+        self.base = automap_base(metadata=db_session.reflect_metadata(engine=engine, db_name=self.dbname))
 
         def _name_for_collection_relationship(base, local_cls, referred_cls, constraint):
             if constraint.name:
@@ -47,25 +58,27 @@ class Database:
             # if this didn't work, revert to the default behavior
             return name_for_collection_relationship(base, local_cls, referred_cls, constraint)
 
-        self.base.prepare(engine, reflect=True, name_for_collection_relationship=_name_for_collection_relationship)
+        self.base.prepare(name_for_collection_relationship=_name_for_collection_relationship)
+        self.truncation_plans = db_utils.build_truncation_plans(self.base.classes)
         session_factory = sessionmaker()
         session_factory.configure(bind=engine)
         self.conn = session_factory()
+        logger.info(f"database pool stats | {db_session.get_pool_stats()}")
 
-    @staticmethod
-    def truncate_text_fields(table_class, key, value, default=1000):
+    def insert_bug_updates(self, bugs, bugs_table, product_name):
         """
-        truncate varchar/text values based on model definition or default value provided
-        :param key:
-        :param value:
-        :param table_class:
-        :param default:
+        1. prefetch existing bugs using chunked IN queries
+        2. insert new bugs and update existing bugs in batches ( INSERT ... ON DUPLICATE KEY UPDATE )
+        :param bugs:
+        :param bugs_table:
+        :param product_name:
         :return:
         """
-        max_len = getattr(table_class, key).prop.columns[0].type.length
-        # if max len is not defined use default
-        if not max_len:
-            max_len = default
-        if value and len(value) > max_len:
-            return value[:max_len - 3] + "..."
-        return value
+        db_utils.apply_truncation_plan(bugs=bugs, plan=self.truncation_plans[bugs_table])
+
+        counter = db_utils.bulk_upsert_bugs(
+            conn=self.conn, table_class=self.base.classes[bugs_table], bugs=bugs, product_name=product_name,
+            is_updated=lambda bug, existing_bug: bug["vendorLastUpdatedDate"] != existing_bug.vendorLastUpdatedDate,
+            logger=logger
+        )
+        return counter
@@ -1,11 +1,23 @@
 """
 updated 2021-08-23
  improved download variables and methods
+
+updated 2026-10-18
+ send requests through the pooled service-common http_client with backoff between retries
 """
+import importlib
+import inspect
 import logging.config
+import os
+import sys
 
 import requests
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+http_client = importlib.import_module("service-common.python.lib.http_client")
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
@@ -27,16 +39,16 @@ def download_instance(link, headers=None, method='GET', post_form="", json="", r
         try:
             if headers:
                 if json:
-                    request = requests.request(method=method, url=link, timeout=timeout, headers=headers, json=json)
+                    request = http_client.request(method=method, url=link, timeout=timeout, headers=headers, json=json)
                 else:
-                    request = requests.request(
+                    request = http_client.request(
                         method=method, url=link, timeout=timeout, headers=headers, data=post_form
                     )
             else:
                 if json:
-                    request = requests.request(method=method, timeout=timeout, url=link, json=json)
+                    request = http_client.request(method=method, timeout=timeout, url=link, json=json)
                 else:
-                    request = requests.request(method=method, timeout=timeout, url=link, data=post_form)
+                    request = http_client.request(method=method, timeout=timeout, url=link, data=post_form)
 
             if request.status_code in [404, 401, 403]:
                 logger.error(
@@ -53,18 +65,22 @@ def download_instance(link, headers=None, method='GET', post_form="", json="", r
                     )
                 )
                 tries += 1
+                http_client.backoff(attempt=tries, retry=retry, response=request, logger=logger)
                 continue
 
             return request
 
         except requests.exceptions.ReadTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectionError:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
 
     logger.error(f"{link}: Download failed with with max retires")
@@ -5,25 +5,48 @@ updated 2021-06-28
 
 updated 2021-08-28
 - added bug_zero_vendor_status_update(func) to update service/serviceExecution entries
+
+updated 2026-10-18
+- document details are parsed with the shared parse stage
 """
 
 import datetime
+import importlib
+import inspect
 import json
 import logging.config
 import math
+import os
 import re
 import sys
 
-import lxml.html
 import requests
 from requests.packages import urllib3
 
 from download_manager import download_instance
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+parse_stage = importlib.import_module("service-common.python.lib.parse_stage")
+
 urllib3.disable_warnings()
 
 logger = logging.getLogger()
 
+# parse_stage spec of the document html sections
+DOCUMENT_SPEC = {
+    "fields": {
+        "affected_hardware": '//*[@class="product_group_names"]//text()',
+        "affected_software": '//*[@class="software_group_names"]//text()',
+        "affected_operating_system": '//*[@class="operating_system_groups"]//text()',
+        "description": '//*[@class="content.description"]//text()',
+        "scope": '//*[@class="scope"]//text()',
+        "resolution": '//*[@class="resolution"]//text()',
+    }
+}
+DOCUMENT_PLAN = parse_stage.Plan(DOCUMENT_SPEC)
+
 
 class HpeApiClient:
     """
@@ -441,26 +464,17 @@ class HpeApiClient:
         :param doc_id:
         :return:
         """
-        xpaths = {
-            "affected_hardware": '//*[@class="product_group_names"]//text()',
-            "affected_software": '//*[@class="software_group_names"]//text()',
-            "affected_operating_system": '//*[@class="operating_system_groups"]//text()',
-            "description": '//*[@class="content.description"]//text()',
-            "scope": '//*[@class="scope"]//text()',
-            "resolution": '//*[@class="resolution"]//text()',
-        }
         url = f"https://support.hpe.com/hpesc/public/api/document/{doc_id}?docLocale=en_US&ignorePayload=true"
         request_details = {"doc_id": doc_id, "url": url}
         self.logger.info(f"downloading document html - {json.dumps(request_details, default=str)}")
         response = download_instance(link=url, headers=[])
-        data_fields = {k: "" for k in xpaths}
+        data_fields = {k: "" for k in DOCUMENT_SPEC["fields"]}
         if not response:
             self.logger.error("cant download/parse document html data")
             return data_fields
-        root = lxml.html.fromstring(response.text)
+        parsed = parse_stage.parse(html=response.text, spec=DOCUMENT_PLAN)
 
-        for section, xpath in xpaths.items():
-            container = root.xpath(xpath)
+        for section, container in parsed.items():
             container = [x.strip() for x in container if x.strip()]
             if container:
                 data_fields[section] = "\n".join(container[1:])
@@ -42,48 +42,7 @@ VENDOR_PRIORITY_MAP = {
 }
 
 
-def insert_bug(bug, db_client, bugs_table):
-    """
-
-    :param bug:
-    :param db_client:
-    :param bugs_table:
-    :return:
-    """
-    updated_bug = 0
-    skipped_bug = 0
-    inserted_bug = 0
-    existing_bug = db_client.conn.query(db_client.base.classes[bugs_table]).filter(
-        db_client.base.classes[bugs_table].bugId == bug["bugId"],
-        db_client.base.classes[bugs_table].managedProductId == bug["managedProductId"]
-
-    ).first()
-
-    # update existing entries if any of the values have changed ( excluding 'managedProductId' )
-    if existing_bug:
-        updated = False
-        if bug["vendorLastUpdatedDate"] != existing_bug.vendorLastUpdatedDate:
-            for key, value in bug.items():
-                setattr(existing_bug, key, value)
-                updated = True
-        if updated:
-            existing_bug.updatedAt = datetime.datetime.utcnow()
-            updated_bug += 1
-        else:
-            skipped_bug += 1
-    else:
-        now_utc = datetime.datetime.utcnow()
-        bug = db_client.base.classes[bugs_table](**bug)
-        bug.createdAt = now_utc
-        bug.updatedAt = now_utc
-
-        db_client.conn.add(bug)
-        inserted_bug += 1
-
-    return inserted_bug, updated_bug, skipped_bug
-
-
-def bugs_discovery(hpe_api_client, product, bugs_date_back, db_client, vendors_products_table, bugs_table):
+def bugs_discovery(hpe_api_client, product, bugs_date_back, db_client, vendors_products_table):
     """
     get bugs from hpe public api
     :param hpe_api_client:
@@ -91,7 +50,6 @@ def bugs_discovery(hpe_api_client, product, bugs_date_back, db_client, vendors_p
     :param bugs_date_back:
     :param db_client:
     :param vendors_products_table:
-    :param bugs_table:
     :return:
     """
     # ---------------------------------------------------------------------------------------------------------------- #
@@ -135,18 +93,6 @@ def bugs_discovery(hpe_api_client, product, bugs_date_back, db_client, vendors_p
         earliest_bug_date=earliest_bug_date,
         managed_product_name=product.name
     )
-
-    for bug in product_bugs + product_software:
-        # truncate VARCHAR values that are too long
-        for key, value in bug.items():
-            if type(
-                    getattr(db_client.base.classes[bugs_table], key).prop.columns[0].type
-            ).__name__ in ["VARCHAR", "TEXT"]:
-                bug[key] = Database.truncate_text_fields(
-                    table_class=db_client.base.classes[bugs_table],
-                    key=key,
-                    value=value
-                )
     return product_bugs, product_software
 
 
@@ -292,17 +238,17 @@ def initiate(*_args, **_kwargs):
 
                 product_bugs, product_software = bugs_discovery(
                     hpe_api_client=hpe_api_client, db_client=db_client, bugs_date_back=bugs_date_back,
-                    vendors_products_table=vendors_products_table, product=product, bugs_table=bugs_table)
+                    vendors_products_table=vendors_products_table, product=product)
 
                 # insert bugs
                 bugs_count += len(product_software)
                 bugs_count += len(product_bugs)
-                for bug in product_bugs + product_software:
-                    inserted_bug, updated_bug, skipped_bug = insert_bug(
-                        bug=bug, bugs_table=bugs_table, db_client=db_client)
-                    inserted_bugs += inserted_bug
-                    updated_bugs += updated_bug
-                    skipped_bugs += skipped_bug
+                inserts = db_client.insert_bug_updates(
+                    bugs=product_bugs + product_software, bugs_table=bugs_table, product_name=product.name
+                )
+                inserted_bugs += inserts["inserted_bugs"]
+                updated_bugs += inserts["updated_bugs"]
+                skipped_bugs += inserts["skipped_bugs"]
 
                 total_bugs_count += bugs_count
                 total_inserted_bugs += inserted_bugs
@@ -1,11 +1,23 @@
 """
 updated 2021-08-23
  add 'method' option to requests
+
+updated 2026-10-18
+ send requests through the pooled service-common http_client with backoff between retries
 """
+import importlib
+import inspect
 import logging
+import os
+import sys
 
 import requests
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+http_client = importlib.import_module("service-common.python.lib.http_client")
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
@@ -23,7 +35,7 @@ def download_instance(link, headers, method='GET', retry=10, timeout=20):
     tries = 0
     while tries < retry:
         try:
-            request = requests.request(method=method, url=link, timeout=timeout, headers=headers)
+            request = http_client.request(method=method, url=link, timeout=timeout, headers=headers)
             if request.status_code in [404, 401, 403]:
                 logger.error(
                     "{}: Download failed with status code {} - {}".format(
@@ -39,18 +51,22 @@ def download_instance(link, headers, method='GET', retry=10, timeout=20):
                     )
                 )
                 tries += 1
+                http_client.backoff(attempt=tries, retry=retry, response=request, logger=logger)
                 continue
 
             return request
 
         except requests.exceptions.ReadTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectionError:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
 
     logger.error(f"{link}: Download failed with with max retires")
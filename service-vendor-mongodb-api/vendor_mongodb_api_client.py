@@ -31,6 +31,8 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+cmdb_reader = importlib.import_module("service-common.python.lib.cmdb_reader")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
 
 
 class MongoApiClient:
@@ -57,7 +59,6 @@ class MongoApiClient:
         self.bugs = dict()
         self.logger = logger
         self.service_now_ci_table = service_now_ci_table
-        self.sn_query_cache = {}
         self.sn_versions = []
         self.vendor_id = vendor_id
         self.thread_error_tracker = 0
@@ -496,46 +497,24 @@ class MongoApiClient:
         sn_query = f"{self.service_now_ci_table}?" \
                    f"sysparm_query={sn_ci_query_base}&" \
                    f"sysparm_fields=version"
-        if sn_query in self.sn_query_cache:
-            self.sn_query_cache[sn_query] += 1
-            logger.info(
-                f"'{self.vendor_id}' - skipping cached query url: {sn_query} | count: {self.sn_query_cache[sn_query]}")
-            return False
-        self.sn_query_cache[sn_query] = 1
-
+        # repeated queries are answered by the CMDB cache ( CMDB_CACHE_TTL )
         sn_query_url = f"{sn_api_url}/api/now/table/{sn_query}"
-        response = download_instance(
-            link=sn_query_url,
-            headers={"Authorization": f"Basic {sn_auth_token}"}
+        reader = cmdb_reader.CmdbReader(
+            download=download_instance, headers={"Authorization": f"Basic {sn_auth_token}"},
+            connection_error=ApiConnectionError, response_error=ApiResponseError, logger=self.logger,
+            cache=cmdb_cache.get_cache()
         )
-        if not response:
-            self.logger.error(f"'{self.vendor_id}' - SN API connection error | {sn_query_url}")
-            raise ApiConnectionError(
-                url=sn_query_url, internal_message="SN API connection error",
-                event_message="a connection to ServiceNow could not be established - check ServiceNow settings"
-            )
-
-        count = int(response.headers["x-total-count"])
-        self.sn_query_cache[sn_query] += count
+        count, instances = reader.read(sn_query_url)
         if count:
             logger.info(f"'{self.vendor_id}' - {count} SN CI(s) found")
-            try:
-                instances = json.loads(response.text)["result"]
-            except json.JSONDecodeError as e:
-                raise ApiResponseError(
-                    url=sn_query_url, internal_message="error parsing serviceNow response - check url",
-                    event_message="ServiceNow query returned a malformed response - check ServiceNow settings"
-                ) from e
-
             versions = set()
 
-            if not instances:
-                return False
-
             for item in instances:
                 if item["version"]:
                     versions.add(item["version"])
 
+            if not versions:
+                return False
             return sorted(list(versions))
         return False
 
@@ -24,6 +24,7 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -252,6 +253,7 @@ def initiate(*_args, **_kwargs):
 
         counter['removed_managed_products'] += removed_managed_products
         logger.info(f"'{vendor_id}' sync completed - {json.dumps(counter)}")
+        cmdb_cache.log_stats()
 
         # on existing bug updates - trigger the bugEventProcessor
         if new_bugs_updates:
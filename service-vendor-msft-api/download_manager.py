@@ -3,20 +3,34 @@ created 2021-06-29
 
 updated 2021-08-31
 - added support for passed headers
+
+updated 2026-10-18
+- send session-less requests through the pooled service-common http_client with backoff between retries, requests
+  on a caller session use the http_client timeouts
+- extra_headers are added to the default headers, 304 responses to conditional GETs are returned
 """
+import importlib
+import inspect
 import logging
-import random
-import time
+import os
+import sys
 
 import requests
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+http_client = importlib.import_module("service-common.python.lib.http_client")
+
 
 def download_instance(
-        link, session, retry=5, logger=logging.getLogger(__name__), headers=None, method='GET', payload=None, json=None
+        link, session, retry=5, logger=logging.getLogger(__name__), headers=None, method='GET', payload=None, json=None,
+        extra_headers=None
 ):
     """
     simple http downloader
     :param link:
+    :param extra_headers: added to the headers e.g. If-None-Match for conditional GETs
     :param retry:
     :param headers:
     :param payload:
@@ -43,18 +57,25 @@ def download_instance(
             "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_4) AppleWebKit/537.36 (KHTML, like Gecko) "
                           "Chrome/84.0.4147.89 Safari/537.36"
         }
+    if extra_headers:
+        headers = {**headers, **extra_headers}
     while tries < retry:
         try:
             if method == "POST":
                 if session:
-                    request = session.post(url=link, data=payload, json=json, timeout=3)
+                    request = http_client.request(method="POST", url=link, session=session, data=payload, json=json)
                 else:
-                    request = requests.post(headers=headers, url=link, data=payload)
+                    request = http_client.request(method="POST", url=link, headers=headers, data=payload)
             else:
                 if session:
-                    request = session.get(url=link, timeout=3, headers=headers, verify=False)
+                    request = http_client.request(
+                        method="GET", url=link, session=session, headers=headers, verify=False
+                    )
                 else:
-                    request = requests.get(url=link, timeout=3, headers=headers, verify=False)
+                    request = http_client.request(method="GET", url=link, headers=headers, verify=False)
+
+            if request.status_code == 304 and extra_headers:
+                return request
 
             if request.status_code in [404, 401, 410, 411, 500]:
                 if logger:
@@ -65,22 +86,22 @@ def download_instance(
                 if logger:
                     logger.warning("{}: Download failed with status code {}".format(request.url, request.status_code))
                 tries += 1
-                time.sleep(random.uniform(1.0, 3.0))
+                http_client.backoff(attempt=tries, retry=retry, response=request, logger=logger)
                 continue
 
             return request
 
         except requests.exceptions.ReadTimeout:
             tries += 1
-            time.sleep(random.uniform(1.0, 3.0))
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectTimeout:
             tries += 1
-            time.sleep(random.uniform(1.0, 3.0))
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectionError:
             tries += 1
-            time.sleep(random.uniform(1.0, 3.0))
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
     if logger:
         logger.error("{}: Download failed with with max retires".format(link))
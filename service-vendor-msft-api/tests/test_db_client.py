@@ -1,6 +1,7 @@
 """
 unit tests for db_client.py
 """
+import datetime
 import os
 import sys
 from unittest import TestCase
@@ -38,7 +39,7 @@ class Test(TestCase):
     @patch('sqlalchemy.create_engine', lambda *_args, **_kwargs: True)
     @patch(
         'sqlalchemy.ext.automap.automap_base', lambda *_args, **_kwargs:
-        type('', (object,), {"prepare": lambda *_args, **_kwargs: True})
+        type('', (object,), {"prepare": lambda *_args, **_kwargs: True, "classes": {}})
     )
     @patch(
         'sqlalchemy.ext.automap.AutomapBase.prepare', lambda *_args, **_kwargs:
@@ -55,11 +56,13 @@ class Test(TestCase):
         :param _args:
         :return:
         """
-        from db_client import Database
+        from db_client import Database, db_session
         db_client = Database(
             db_host="", db_user="", db_password="", db_port=3306, db_name=""
         )
-        db_client.create_session()
+        with patch.object(db_session, "get_engine", MagicMock()), \
+                patch.object(db_session, "reflect_metadata", MagicMock()):
+            db_client.create_session()
         assert db_client.conn
         del sys.modules['db_client']
 
@@ -199,7 +202,7 @@ class Test(TestCase):
         :param _args:
         :return:
         """
-        from db_client import Database
+        from db_client import Database, db_utils
         instance = type(
             "mockDbClient",
             (object,), {
@@ -215,21 +218,61 @@ class Test(TestCase):
                                                                         })
                                                                     }),
                              "add": lambda *args: True,
+                             "execute": lambda *args: True,
                              "commit": lambda *args: True,
                              "refresh": lambda *args: True,
                          },
 
                          ),
-                "base": MagicMock()
+                "base": MagicMock(),
+                "truncation_plans": {"": {}}
             }
         )
         instance.return_value = False
-        execution = Database.insert_bug_updates(
-            self=instance, bugs=mock_formatted_bugs, bugs_table="", product_name="test"
-        )
+        with patch.object(db_utils, "mysql_insert", MagicMock()):
+            execution = Database.insert_bug_updates(
+                self=instance, bugs=mock_formatted_bugs, bugs_table="", product_name="test"
+            )
         assert execution["inserted_bugs"] == 5
         del sys.modules['db_client']
 
+    @patch.dict(os.environ, mock_env())
+    def test_insert_bug_updates_existing_bugs(*_args):
+        """
+        requirement: existing bugs are prefetched once and classified as updated/skipped, a bug repeated within the
+        batch is written once
+        description: the execution should return the same counters as the per bug implementation and upsert 2 rows
+        mock: bugs list with 4 entries, db_client with a single existing bug
+        :param _args:
+        :return:
+        """
+        from db_client import Database, db_utils
+        existing_bugs = [
+            type("mockBug", (object,), {
+                "id": 1, "bugId": "1", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2022, 1, 1)
+            }),
+            type("mockBug", (object,), {
+                "id": 2, "bugId": "2", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2022, 1, 1)
+            })
+        ]
+        instance = MagicMock()
+        instance.truncation_plans = {"": {}}
+        instance.conn.query.return_value.filter.return_value.all.return_value = existing_bugs
+        bugs = [
+            {"bugId": "1", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2022, 2, 1)},
+            {"bugId": "2", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2021, 2, 1)},
+            {"bugId": "3", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2022, 2, 1)},
+            {"bugId": "3", "managedProductId": 1, "vendorLastUpdatedDate": datetime.datetime(2022, 3, 1)},
+        ]
+        with patch.object(db_utils, "mysql_insert", MagicMock()):
+            execution = Database.insert_bug_updates(self=instance, bugs=bugs, bugs_table="", product_name="test")
+        assert execution == {"updated_bugs": 2, "skipped_bugs": 1, "inserted_bugs": 1}
+        assert instance.conn.query.return_value.filter.call_count == 1
+        written_rows = [row for call in instance.conn.execute.call_args_list for row in call.args[1]]
+        assert [row.get("id") for row in written_rows] == [1, None]
+        assert written_rows[1]["vendorLastUpdatedDate"] == datetime.datetime(2022, 3, 1)
+        del sys.modules['db_client']
+
     ####################################################################################################################
     #                                             remove_bugs_by_managed_product_id                                    #
     ####################################################################################################################
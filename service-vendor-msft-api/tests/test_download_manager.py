@@ -15,7 +15,10 @@ class Test(TestCase):
 ########################################################################################################################
 #                                         request_instance                                                             #
 ########################################################################################################################
-    @patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 404, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 404, "url": "test"})
+    )
     def test_download_instance_status_404(*_args):
         """
         testing post response with status_code 400 that should return false
@@ -25,7 +28,11 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", headers="", session=False)
 
-    @patch('requests.post', lambda **_kwargs: type("request", (object,), {"status_code": 503, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 503, "url": "test"})
+    )
+    @patch('time.sleep', lambda *_args: None)
     def test_download_instance_status_503(*_args):
         """
         testing post response with status_code 400 that should return false
@@ -35,7 +42,7 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", headers="", method='POST', session=False)
 
-    @patch('requests.get', mock_requests_read_timeout)
+    @patch('requests.Session.request', mock_requests_read_timeout)
     def test_request_instance_handle_read_timeout(*_args):
         """
         force readTimeout and testing handling exception that should return false to the caller
@@ -45,7 +52,7 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", retry=1, headers="", session=False)
 
-    @patch('requests.get', mock_requests_connection_timeout)
+    @patch('requests.Session.request', mock_requests_connection_timeout)
     def test_request_instance_handle_connection_timeout(*_args):
         """
         force connectionTimeout and testing handling exception that should return false to the caller
@@ -55,7 +62,7 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", retry=1, headers="", session=False)
 
-    @patch('requests.get', mock_requests_connection_error)
+    @patch('requests.Session.request', mock_requests_connection_error)
     def test_request_instance_handle_connection_error(*_args):
         """
         force ConnectionError and testing handling exception that should return false to the caller
@@ -65,7 +72,10 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", retry=1, headers="", session=False)
 
-    @patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 200, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 200, "url": "test"})
+    )
     def test_successful_session_request(*_args):
         """
         return a status 200 request for a successful session
@@ -74,3 +84,19 @@ class Test(TestCase):
         """
         from download_manager import download_instance
         assert download_instance(link="test", retry=1, headers="", session=False)
+
+    def test_caller_session_timeout(*_args):
+        """
+        requests sent on a caller owned session ( admin portal login ) use the http_client timeouts
+        :param _args:
+        :return:
+        """
+        import requests
+        from download_manager import download_instance, http_client
+        session = requests.Session()
+        response = type("request", (object,), {"status_code": 200, "url": "test"})
+        with patch.object(session, "request", return_value=response) as request:
+            assert download_instance(link="https://admin.microsoft.com", session=session, method="POST", json={})
+            assert download_instance(link="https://admin.microsoft.com", session=session)
+        assert [x.kwargs["timeout"] for x in request.call_args_list] == [http_client.get_client().timeout()] * 2
+        assert [x.kwargs["method"] for x in request.call_args_list] == ["POST", "GET"]
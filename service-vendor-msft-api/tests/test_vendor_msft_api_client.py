@@ -9,8 +9,8 @@ from unittest.mock import patch
 import pytest
 from vendor_msft_supported_products import sql_server_products
 
-from tests.external_dependencies import mock_env, MockDbClientExistingServiceEntry, mock_sql_bugs, MockQueueManager, \
-    MockQueueObject, MockSecretManagerClient, mock_request_session_w_auth_tokens, \
+from tests.external_dependencies import mock_env, MockDbClientExistingServiceEntry, mock_sql_bugs, \
+    MockSecretManagerClient, mock_request_session_w_auth_tokens, \
     mock_to_execute_sql_server_managed_product, cu_kb_html_example, cu_kb_html_example_no_bug_ids, \
     cu_kb_html_example_invalid_bug_ids, cu_build_html_example, mock_request_session_missing_auth_tokens
 from vendor_exceptions import ApiConnectionError, ApiResponseError, VendorResponseError, VendorConnectionError
@@ -121,12 +121,14 @@ def test_crawl_bug_kbs_non_kb_bug(*_args, **_kwargs):
     from vendor_msft_api_client import MsftApiClient
     self = MsftApiClient()
     bug = {"hasKb": False, "id": 1}
-    queue_object = MockQueueObject(entry=bug)
-    MsftApiClient.crawl_bug_kbs(self=self, q=queue_object, product_name="test")
+    MsftApiClient.bug_kbs_crawling_manager(self=self, bugs=[bug], product_name="test")
     assert self.kb_bugs[0]['id'] == 1
 
 
-@patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"})
+)
 @patch.dict(os.environ, mock_env())
 def test_crawl_bug_kbs_response_error(*_args, **_kwargs):
     """
@@ -139,14 +141,14 @@ def test_crawl_bug_kbs_response_error(*_args, **_kwargs):
     from vendor_msft_api_client import MsftApiClient
     self = MsftApiClient()
     bug = {"hasKb": True, "id": 1, "bugUrl": "test"}
-    queue_object = MockQueueObject(entry=bug)
-    MsftApiClient.crawl_bug_kbs(self=self, q=queue_object, product_name="test")
+    MsftApiClient.bug_kbs_crawling_manager(self=self, bugs=[bug], product_name="test")
     assert self.kb_bugs[0]['id'] == 1
 
 
-@patch('requests.get',
-       lambda **_kwargs: type("request", (object,), {"status_code": 200, "url": "test", "text": "<html></html>"})
-       )
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 200, "url": "test", "text": "<html></html>"})
+)
 @patch.dict(os.environ, mock_env())
 def test_crawl_bug_kbs_missing_bug_id(*_args, **_kwargs):
     """
@@ -159,13 +161,12 @@ def test_crawl_bug_kbs_missing_bug_id(*_args, **_kwargs):
     from vendor_msft_api_client import MsftApiClient
     self = MsftApiClient()
     bug = {"hasKb": True, "id": 1, "bugUrl": "test", "bugId": ""}
-    queue_object = MockQueueObject(entry=bug)
-    MsftApiClient.crawl_bug_kbs(self=self, q=queue_object, product_name="test")
+    MsftApiClient.bug_kbs_crawling_manager(self=self, bugs=[bug], product_name="test")
     assert not self.kb_bugs
 
 
-@patch('requests.get',
-       lambda **_kwargs: type("request", (object,),
+@patch('requests.Session.request',
+       lambda *_args, **_kwargs: type("request", (object,),
                               {"status_code": 200, "url": "test",
                                "text": "<html><meta name='awa-asst' content='test'></meta></html>"}
                               )
@@ -182,13 +183,12 @@ def test_crawl_bug_kbs_missing_kb_content(*_args, **_kwargs):
     from vendor_msft_api_client import MsftApiClient
     self = MsftApiClient()
     bug = {"hasKb": True, "id": 1, "bugUrl": "test", "bugId": ""}
-    queue_object = MockQueueObject(entry=bug)
-    MsftApiClient.crawl_bug_kbs(self=self, q=queue_object, product_name="test")
+    MsftApiClient.bug_kbs_crawling_manager(self=self, bugs=[bug], product_name="test")
     assert not self.kb_bugs[0].get('description')
 
 
-@patch('requests.get',
-       lambda **_kwargs:
+@patch('requests.Session.request',
+       lambda *_args, **_kwargs:
        type("request", (object,),
             {
                 "status_code": 200, "url": "test",
@@ -211,15 +211,17 @@ def test_crawl_bug_kbs(*_args, **_kwargs):
     from vendor_msft_api_client import MsftApiClient
     self = MsftApiClient()
     bug = {"hasKb": True, "id": 1, "bugUrl": "test", "bugId": ""}
-    queue_object = MockQueueObject(entry=bug)
-    MsftApiClient.crawl_bug_kbs(self=self, q=queue_object, product_name="test")
+    MsftApiClient.bug_kbs_crawling_manager(self=self, bugs=[bug], product_name="test")
     assert self.kb_bugs[0].get('vendorLastUpdatedDate')
 
 
 ########################################################################################################################
 #                                               crawl_cu_kbs                                                          #
 ########################################################################################################################
-@patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"})
+)
 @patch.dict(os.environ, mock_env())
 def test_crawl_cu_kbs_response_error(*_args, **_kwargs):
     """
@@ -233,16 +235,15 @@ def test_crawl_cu_kbs_response_error(*_args, **_kwargs):
     from vendor_msft_api_client import MsftApiClient
     self = MsftApiClient()
     bug = {"kb": {"kb_url": "test", "kb_id": 1}, "id": 1}
-    queue_object = MockQueueObject(entry=bug)
-    MsftApiClient.crawl_cu_kbs(
-        self=self, q=queue_object, managed_product=mock_to_execute_sql_server_managed_product[0], service_now_table=""
+    assert not MsftApiClient.crawl_cu_kbs(
+        self=self, kb_data=bug, managed_product=mock_to_execute_sql_server_managed_product[0], service_now_table=""
     )
-    assert not self.pre_formatted_sql_bugs
 
 
-@patch('requests.get',
-       lambda **_kwargs: type("request", (object,), {"status_code": 200, "url": "test", "text": "<html></html>"})
-       )
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 200, "url": "test", "text": "<html></html>"})
+)
 @patch.dict(os.environ, mock_env())
 def test_crawl_cu_kbs_missing_bug_rows(*_args, **_kwargs):
     """
@@ -257,15 +258,13 @@ def test_crawl_cu_kbs_missing_bug_rows(*_args, **_kwargs):
     from vendor_msft_api_client import MsftApiClient
     self = MsftApiClient()
     bug = {"kb": {"kb_url": "test", "kb_id": 1}, "id": 1}
-    queue_object = MockQueueObject(entry=bug)
-    MsftApiClient.crawl_cu_kbs(
-        self=self, q=queue_object, managed_product=mock_to_execute_sql_server_managed_product[0], service_now_table=""
+    assert not MsftApiClient.crawl_cu_kbs(
+        self=self, kb_data=bug, managed_product=mock_to_execute_sql_server_managed_product[0], service_now_table=""
     )
-    assert not self.pre_formatted_sql_bugs
 
 
-@patch('requests.get',
-       lambda **_kwargs:
+@patch('requests.Session.request',
+       lambda *_args, **_kwargs:
        type(
            "request", (object,),
            {
@@ -287,15 +286,13 @@ def test_crawl_cu_kbs_bug_ids_missing(*_args, **_kwargs):
     from vendor_msft_api_client import MsftApiClient
     self = MsftApiClient()
     bug = {"kb": {"kb_url": "test", "kb_id": 1}, "id": 1}
-    queue_object = MockQueueObject(entry=bug)
-    MsftApiClient.crawl_cu_kbs(
-        self=self, q=queue_object, managed_product=mock_to_execute_sql_server_managed_product[0], service_now_table=""
+    assert not MsftApiClient.crawl_cu_kbs(
+        self=self, kb_data=bug, managed_product=mock_to_execute_sql_server_managed_product[0], service_now_table=""
     )
-    assert not self.pre_formatted_sql_bugs
 
 
-@patch('requests.get',
-       lambda **_kwargs:
+@patch('requests.Session.request',
+       lambda *_args, **_kwargs:
        type(
            "request", (object,),
            {
@@ -317,15 +314,13 @@ def test_crawl_cu_kbs_invalid_bug_ids(*_args, **_kwargs):
     from vendor_msft_api_client import MsftApiClient
     self = MsftApiClient()
     bug = {"kb": {"kb_url": "test", "kb_id": 1}, "id": 1}
-    queue_object = MockQueueObject(entry=bug)
-    MsftApiClient.crawl_cu_kbs(
-        self=self, q=queue_object, managed_product=mock_to_execute_sql_server_managed_product[0], service_now_table=""
+    assert not MsftApiClient.crawl_cu_kbs(
+        self=self, kb_data=bug, managed_product=mock_to_execute_sql_server_managed_product[0], service_now_table=""
     )
-    assert not self.pre_formatted_sql_bugs
 
 
-@patch('requests.get',
-       lambda **_kwargs:
+@patch('requests.Session.request',
+       lambda *_args, **_kwargs:
        type("request", (object,), {"status_code": 200, "url": "test", "text": f"<html>{cu_kb_html_example}</html>"})
        )
 @patch.dict(os.environ, mock_env())
@@ -344,17 +339,15 @@ def test_crawl_cu_kbs(*_args, **_kwargs):
                "release_date": "", "": ""},
         "id": 1, "affected_ci": []
     }
-    queue_object = MockQueueObject(entry=bug)
-    MsftApiClient.crawl_cu_kbs(
-        self=self, q=queue_object, managed_product=mock_to_execute_sql_server_managed_product[0], service_now_table=""
+    assert MsftApiClient.crawl_cu_kbs(
+        self=self, kb_data=bug, managed_product=mock_to_execute_sql_server_managed_product[0], service_now_table=""
     )
-    assert self.pre_formatted_sql_bugs
 
 
 ########################################################################################################################
 #                                               parse_cu_releases                                                      #
 ########################################################################################################################
-@patch('requests.get', lambda **_kwargs:
+@patch('requests.Session.request', lambda *_args, **_kwargs:
        type("request", (object,), {"status_code": 200, "url": "test", "text": f"<html>{cu_kb_html_example}</html>"})
        )
 @patch.dict(os.environ, mock_env())
@@ -400,7 +393,7 @@ def test_parse_cu_releases_missing_release_date(*_args, **_kwargs):
         assert True
 
 
-@patch('requests.get', lambda **_kwargs:
+@patch('requests.Session.request', lambda *_args, **_kwargs:
        type("request", (object,), {"status_code": 200, "url": "test", "text": f"<html>{cu_kb_html_example}</html>"})
        )
 @patch.dict(os.environ, mock_env())
@@ -445,7 +438,7 @@ def test_parse_cu_releases_missing_build_version(*_args, **_kwargs):
 
 
 @patch(
-    'requests.get', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {"status_code": 200, "url": "test", "text": f"<html>{cu_kb_html_example}</html>"})
        )
 @patch.dict(os.environ, mock_env())
@@ -492,7 +485,10 @@ def test_parse_cu_releases_out_of_scope(*_args, **_kwargs):
 #                                                     sn_sync                                                          #
 ########################################################################################################################
 @patch.dict(os.environ, mock_env())
-@patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"})
+)
 def test_sn_sync_api_connection_error(*_args, **_kwargs):
     """
     requirement: query SN for affected CIs
@@ -512,7 +508,10 @@ def test_sn_sync_api_connection_error(*_args, **_kwargs):
 
 
 @patch.dict(os.environ, mock_env())
-@patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 200, "headers": {}}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 200, "headers": {}})
+)
 def test_sn_sync_api_response_error(*_args, **_kwargs):
     """
     requirement: query SN for affected CIs
@@ -533,8 +532,10 @@ def test_sn_sync_api_response_error(*_args, **_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.get', lambda **_kwargs:
-    type("request", (object,), {"status_code": 200, "headers": {"x-total-count": 1}, "text": '{"result": true}'})
+    'requests.Session.request', lambda *_args, **_kwargs:
+    type("request", (object,), {
+        "status_code": 200, "headers": {"x-total-count": 1}, "text": '{"result": [{"sys_id": "1", "version": "1"}]}'
+    })
 )
 def test_sn_sync_success(*_args, **_kwargs):
     """
@@ -637,10 +638,43 @@ def test_gen_admin_dashboard_tokens(*_args):
     del sys.modules['vendor_msft_api_client']
 
 
+@patch.dict(os.environ, mock_env())
+@patch(
+    'vendor_msft_api_client.MsftApiClient.process_login_step',
+    lambda *args, **kwargs: [{}, mock_request_session_w_auth_tokens]
+)
+def test_gen_admin_dashboard_tokens_cached(*_args):
+    """
+    requirement: warm containers reuse the admin dashboard tokens of a previous login, credentials validation always
+                 logs in
+    mock: MsftApiClient, session cookies, the admin token cache of the container
+    description: the second call is answered by the cache, cached=False and invalidated tokens log in again
+    :return:
+    """
+    from vendor_msft_api_client import MsftApiClient, admin_token_cache
+    self = MsftApiClient(vendor_id="msft")
+    cache = admin_token_cache.TokenCache(ttl=3600, margin=300)
+    with patch.object(admin_token_cache, "get_cache", lambda: cache):
+        tokens = MsftApiClient.gen_admin_dashboard_tokens(self=self, username="test", password="test")
+        assert tokens == {"RootAuthToken": "test", "OIDCAuthCookie": "test", "UserIndex": "test"}
+        assert MsftApiClient.gen_admin_dashboard_tokens(self=self, username="test", password="test") == tokens
+        assert cache.stats["hits"] == 1 and cache.stats["logins"] == 1
+        MsftApiClient.gen_admin_dashboard_tokens(self=self, username="test", password="test", cached=False)
+        assert cache.stats["hits"] == 1 and cache.stats["logins"] == 1
+        assert cache.invalidate(tokens)
+        MsftApiClient.gen_admin_dashboard_tokens(self=self, username="test", password="test")
+        assert cache.stats["logins"] == 2
+    # remove mocks import to prevent interference with other tests
+    del sys.modules['vendor_msft_api_client']
+
+
 ########################################################################################################################
 #                                                process_login_step                                                   #
 ########################################################################################################################
-@patch('requests.post', lambda **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"})
+)
 @patch.dict(os.environ, mock_env())
 def test_process_login_step_post_json_step_error(*_args):
     """
@@ -674,7 +708,10 @@ def test_process_login_step_post_json_step_error(*_args):
     del sys.modules['vendor_msft_api_client']
 
 
-@patch('requests.post', lambda **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"})
+)
 @patch.dict(os.environ, mock_env())
 def test_process_login_step_post_step_error(*_args):
     """
@@ -708,7 +745,10 @@ def test_process_login_step_post_step_error(*_args):
     del sys.modules['vendor_msft_api_client']
 
 
-@patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"})
+)
 @patch.dict(os.environ, mock_env())
 def test_process_login_step_get_step_error(*_args):
     """
@@ -743,7 +783,7 @@ def test_process_login_step_get_step_error(*_args):
 
 
 @patch(
-    'requests.get', lambda **_kwargs: type("request", (object,),
+    'requests.Session.request', lambda *_args, **_kwargs: type("request", (object,),
                                            {"status_code": 200, "url": "test", "text": "invalid text"})
 )
 @patch.dict(os.environ, mock_env())
@@ -780,7 +820,7 @@ def test_process_login_step_get_step_parse_regex_error(*_args):
 
 
 @patch(
-    'requests.get', lambda **_kwargs: type("request", (object,),
+    'requests.Session.request', lambda *_args, **_kwargs: type("request", (object,),
                                            {"status_code": 200, "url": "test", "text": "invalid text"})
 )
 @patch.dict(os.environ, mock_env())
@@ -817,7 +857,7 @@ def test_process_login_step_get_step_decode_json_error(*_args):
 
 
 @patch(
-    'requests.get', lambda **_kwargs: type("request", (object,),
+    'requests.Session.request', lambda *_args, **_kwargs: type("request", (object,),
                                            {"status_code": 200, "url": "test", "text": '{"FlowToken": "test"}'})
 )
 @patch.dict(os.environ, mock_env())
@@ -852,7 +892,7 @@ def test_process_login_step_get_json(*_args):
 
 
 @patch(
-    'requests.get', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,),
          {"status_code": 200, "url": "test", "text": '<html><input name="id_token" value="test"></input></html>'}
          )
@@ -891,7 +931,10 @@ def test_process_login_step_get_parse_html(*_args):
 ########################################################################################################################
 #                                                get_sql_release_bugs                                                  #
 ########################################################################################################################
-@patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 401, "url": "test"})
+)
 @patch.dict(os.environ, mock_env())
 def test_get_sql_release_bugs_connection_error(*_args):
     """
@@ -915,7 +958,10 @@ def test_get_sql_release_bugs_connection_error(*_args):
     del sys.modules['vendor_msft_api_client']
 
 
-@patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 200, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 200, "url": "test"})
+)
 @patch(
     'vendor_msft_api_client.MsftApiClient.parse_cu_releases', lambda *args, **kwargs: [[], [], []]
 )
@@ -938,17 +984,17 @@ def test_get_sql_release_bugs_no_kbs_found(*_args):
     del sys.modules['vendor_msft_api_client']
 
 
-@patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 200, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 200, "url": "test"})
+)
 @patch(
     'vendor_msft_api_client.MsftApiClient.parse_cu_releases',
     lambda *args, **kwargs: [[], [{"build_version_number": 2, "build_version": 2, "kb_id": "test"}], []]
 )
 @patch(
     'vendor_msft_api_client.MsftApiClient.crawl_cu_kbs',
-    lambda *args, **kwargs: True
-)
-@patch(
-    'queue.Queue', MockQueueManager
+    lambda *args, **kwargs: []
 )
 @patch.dict(os.environ, mock_env())
 def test_get_sql_release_bugs_kbs(*_args):
@@ -969,3 +1015,171 @@ def test_get_sql_release_bugs_kbs(*_args):
     )
 
     del sys.modules['vendor_msft_api_client']
+
+
+########################################################################################################################
+#                                               parse_stage                                                            #
+########################################################################################################################
+def test_parse_stage_plan(*_args):
+    """
+    requirement: a spec compiled into a Plan returns the values of the spec, its xpaths are compiled once per thread
+    mock: cu kb html page
+    description: the CU kb plan and its spec return the same rows, the plan pickles for the process pool and is
+                 fingerprinted as its spec, a compiled xpath is reused by its thread and not shared with another one
+    :return:
+    """
+    import pickle
+    import threading
+    from vendor_msft_api_client import kb_fingerprints, CU_KB_SPEC, CU_KB_PLAN
+    parse_stage = kb_fingerprints.parse_stage
+
+    parsed = parse_stage.parse_html(html=cu_kb_html_example, spec=CU_KB_PLAN)
+    assert parsed["rows"] and parsed == parse_stage.parse_html(html=cu_kb_html_example, spec=CU_KB_SPEC)
+    assert pickle.loads(pickle.dumps(CU_KB_PLAN)).fields == CU_KB_PLAN.fields
+    assert kb_fingerprints.spec_hash(CU_KB_PLAN) == kb_fingerprints.spec_hash(CU_KB_SPEC)
+
+    xpath = "//tr/td[1]//text()"
+    compiled = [parse_stage.compile_xpath(xpath)]
+    assert parse_stage.compile_xpath(xpath) is compiled[0]
+    thread = threading.Thread(target=lambda: compiled.append(parse_stage.compile_xpath(xpath)))
+    thread.start()
+    thread.join()
+    assert compiled[1] is not compiled[0]
+
+    del sys.modules['vendor_msft_api_client']
+
+
+########################################################################################################################
+#                                               match_cu_kbs                                                           #
+########################################################################################################################
+def test_match_cu_kbs(*_args):
+    """
+    requirement: every CU kb released after a CI build is mapped to the CI versions it applies to
+    mock: 3 CU kbs and 4 CIs on 3 distinct builds
+    description: kbs are keyed by kb id in CI / build_version order, the first matching CI is the affected CI and
+                 newer builds do not get older kbs
+    :return:
+    """
+    from vendor_msft_api_client import MsftApiClient
+    kbs = [
+        {"kb_id": "KB1", "build_version": "15.0.4100.1", "build_version_number": 15041001},
+        {"kb_id": "KB2", "build_version": "15.0.4200.2", "build_version_number": 15042002},
+        {"kb_id": "KB3", "build_version": "15.0.4300.3", "build_version_number": 15043003},
+    ]
+    cis = [
+        {"version": "15.0.4200.2", "sys_id": "a"},
+        {"version": "15.0.4000.1", "sys_id": "b"},
+        {"version": "15.0.4200.2", "sys_id": "c"},
+        {"version": "15.0.4300.3", "sys_id": "d"},
+    ]
+    filtered_kbs = MsftApiClient.match_cu_kbs(cumulative_update_kbs=kbs, active_cis=cis)
+    assert list(filtered_kbs) == ["KB3", "KB1", "KB2"]
+    assert filtered_kbs["KB3"]["affected_ci_versions"] == {"15.0.4200.2", "15.0.4000.1"}
+    assert filtered_kbs["KB3"]["affected_ci"] == [{"version": "15.0.4200.2", "sys_id": "a"}]
+    assert filtered_kbs["KB1"]["affected_ci"] == [{"version": "15.0.4000.1", "sys_id": "b"}]
+    assert filtered_kbs["KB2"]["kb"] is kbs[1]
+
+    del sys.modules['vendor_msft_api_client']
+
+
+########################################################################################################################
+#                                               SqlBugConsolidator                                                     #
+########################################################################################################################
+@patch.dict(os.environ, mock_env())
+@patch('vendor_msft_api_client.MsftApiClient.fetch_bug_kb', side_effect=AssertionError("kb page downloaded twice"))
+def test_sql_bug_consolidator(*_args):
+    """
+    requirement: release bugs are merged as they arrive and the bug kb pages of new bugs are prefetched
+    mock: 3 release entries of 2 bugs received from 2 SQL products, a prefetched bug kb page
+    description: entries are consolidated per bugId with the release list ordered by creation date, every bug kb url
+                 is prefetched once and crawl_bug_kbs uses the prefetched page
+    :return:
+    """
+    from concurrent.futures import Future
+    from vendor_msft_api_client import MsftApiClient, SqlBugConsolidator
+
+    def release_bug(bug_id, created, release, bug_kb_url, ci):
+        return {
+            "bugId": bug_id, "bugKbUrl": bug_kb_url, "description": f"notes {release}", "summary": f"summary {release}",
+            "bugUrl": f"https://support.microsoft.com/{release}",
+            "releaseUrl": f"https://support.microsoft.com/{release}",
+            "knownFixedReleases": release, "knownAffectedOs": "Windows", "vendorData": {"bugCategory": "Engine"},
+            "managedProductId": release, "vendorLastUpdatedDate": created, "vendorCreatedDate": created,
+            "ciSysIds": [ci]
+        }
+
+    prefetched_urls = []
+    consolidator = SqlBugConsolidator(vendor_id="msft", on_bug_kb_url=prefetched_urls.append)
+    consolidator.extend([
+        release_bug("200", datetime.datetime(2022, 3, 1), "CU3", "https://support.microsoft.com/kb/200", "a"),
+        release_bug("100", datetime.datetime(2022, 2, 1), "CU2", "", "a"),
+    ])
+    consolidator.extend([
+        release_bug("200", datetime.datetime(2022, 1, 1), "CU1", "https://support.microsoft.com/kb/200", "b"),
+    ])
+    assert len(consolidator) == 3
+    assert prefetched_urls == ["https://support.microsoft.com/kb/200"]
+
+    bugs = consolidator.bugs()
+    assert [x["bugId"] for x in bugs] == ["100", "200"]
+    assert bugs[0]["hasKb"] is False and bugs[0]["bugUrl"] == "https://support.microsoft.com/CU2"
+    assert bugs[0]["description"] == \
+        "\nNotes from the latest release:\nnotes CU2\nfor more information: https://support.microsoft.com/CU2\n"
+    assert bugs[1]["knownFixedReleases"] == "CU1, CU3"
+    assert bugs[1]["summary"] == "summary CU3" and bugs[1]["managedProductId"] == "CU3"
+    assert bugs[1]["releaseUrl"] == "https://support.microsoft.com/CU1"
+    assert bugs[1]["vendorCreatedDate"] == datetime.datetime(2022, 3, 1)
+    assert bugs[1]["ciSysIds"] == ["a", "b"]
+    assert bugs[1]["description"] == (
+        "Bug 200 is addressed in 2 releases:\n1. CU1 - https://support.microsoft.com/CU1\n"
+        "2. CU3 - https://support.microsoft.com/CU3\n\nNotes from the latest release:\nnotes CU1\n\n"
+    )
+
+    self = MsftApiClient()
+    page = Future()
+    page.set_result({
+        "bug_id": ["200"], "summary": ["kb summary"], "content": [{"text": ["kb ", "content"]}], "product_name": [],
+        "applies_to_items": [], "last_published_date": [], "first_published_date": []
+    })
+    self.bug_kb_pages["https://support.microsoft.com/kb/200"] = page
+    bug_entry = self.crawl_bug_kbs(bug_entry=bugs[1], product_name="SQL Server")
+    assert bug_entry["summary"] == "kb summary" and bug_entry["description"] == "kb\ncontent"
+    assert not self.bug_kb_pages
+
+    del sys.modules['vendor_msft_api_client']
+
+
+########################################################################################################################
+#                                               index_windows_issues                                                   #
+########################################################################################################################
+def test_index_windows_issues(*_args):
+    """
+    requirement: a product is matched to the same windows health issues as the
+                 'managed_product.name.lower() in x["Version"].lower()' scan - the first matching issue
+    mock: windows health issues of the admin dashboard versions, the supported product names
+    description: for every supported product name and every whole token run of the versions the index lookup returns
+                 the issues of the first scan match, names missing from all the versions are not found
+    :return:
+    """
+    from vendor_msft_api_client import MsftApiClient
+    from vendor_msft_supported_products import windows_server_products, access_products
+    versions = [
+        "Windows Server 2012 R2", "Windows Server 2022", "Windows Server, version 20H2", "Windows Server 2019",
+        "Windows Server 2016", "Windows Server 2012", "Windows Server 2008 R2 SP1", "Windows Server 2008 SP2",
+        "Windows 10, version 21H2", "Windows 11 (original release)", "Windows  Server  2019"
+    ]
+    windows_health_issues = [{"Version": x, "KnownIssues": [{"version": x}]} for x in versions]
+    index = MsftApiClient.index_windows_issues(windows_health_issues=windows_health_issues)
+
+    names = [x["name"] for x in windows_server_products + sql_server_products + access_products]
+    names += [x["id"] for x in windows_server_products]
+    names += [" ".join(x.split(" ")[i:j]) for x in versions for i in range(4) for j in range(i + 1, 5)]
+    names += ["server, version", "(original release)", "Windows Server 2000", "Windows Server", "  ", ""]
+    for name in names:
+        scan = [x["KnownIssues"] for x in windows_health_issues if name.lower() in x['Version'].lower()]
+        assert index.get(name.lower()) == (scan[0] if scan else None), name
+    # partial words are not indexed
+    assert "2012 r" not in index and "windows server 20" not in index
+    assert index["windows server 2012"] == [{"version": "Windows Server 2012 R2"}]
+
+    del sys.modules['vendor_msft_api_client']
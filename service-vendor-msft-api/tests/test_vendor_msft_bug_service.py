@@ -136,6 +136,7 @@ def test_initiate_missing_sn_config_variables(*_args):
 @patch('vendor_msft_api_client.MsftApiClient.gen_admin_dashboard_tokens')
 @patch('vendor_msft_api_client.MsftApiClient.get_windows_issues', lambda *args, **kwargs: mock_api_response_error())
 @patch('vendor_msft_api_client.MsftApiClient.sn_sync', lambda *args, **kwargs: False)
+@patch('vendor_msft_api_client.MsftApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('db_client.Database.__init__', new=mock_database_init)
 @patch('db_client.Database.create_session', lambda *args, **kwargs: True)
 @patch('db_client.Database.get_managed_products')
@@ -177,6 +178,7 @@ def test_admin_dashboard_response_error(*_args):
 @patch('vendor_msft_api_client.MsftApiClient.gen_admin_dashboard_tokens')
 @patch('vendor_msft_api_client.MsftApiClient.get_windows_issues', lambda *args, **kwargs: [])
 @patch('vendor_msft_api_client.MsftApiClient.sn_sync', lambda *args, **kwargs: 1)
+@patch('vendor_msft_api_client.MsftApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('db_client.Database.__init__', new=mock_database_init)
 @patch('db_client.Database.create_session', lambda *args, **kwargs: True)
 @patch('db_client.Database.get_managed_products')
@@ -218,6 +220,7 @@ def test_all_managed_products_are_disabled(*_args):
 @patch('vendor_msft_api_client.MsftApiClient.gen_admin_dashboard_tokens')
 @patch('vendor_msft_api_client.MsftApiClient.get_windows_issues', lambda *args, **kwargs: [])
 @patch('vendor_msft_api_client.MsftApiClient.sn_sync', lambda *args, **kwargs: 1)
+@patch('vendor_msft_api_client.MsftApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('db_client.Database.__init__', new=mock_database_init)
 @patch('db_client.Database.create_session', lambda *args, **kwargs: True)
 @patch('db_client.Database.get_managed_products')
@@ -264,6 +267,7 @@ def test_all_managed_products_have_been_processed(*_args):
 @patch('vendor_msft_api_client.MsftApiClient.gen_admin_dashboard_tokens')
 @patch('vendor_msft_api_client.MsftApiClient.get_windows_issues', lambda *args, **kwargs: [])
 @patch('vendor_msft_api_client.MsftApiClient.sn_sync', lambda *args, **kwargs: 1)
+@patch('vendor_msft_api_client.MsftApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('db_client.Database.__init__', new=mock_database_init)
 @patch('db_client.Database.create_session', lambda *args, **kwargs: True)
 @patch('db_client.Database.get_managed_products', lambda *args, **kwargs: mock_disabled_managed_products)
@@ -312,6 +316,7 @@ def test_all_managed_products_exist_and_disabled(*_args):
     [{"KnownIssues": [1], "Version": "Windows Server 2022"}]
 )
 @patch('vendor_msft_api_client.MsftApiClient.sn_sync', lambda *args, **kwargs: 1)
+@patch('vendor_msft_api_client.MsftApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('db_client.Database.__init__', new=mock_database_init)
 @patch('db_client.Database.create_session', lambda *args, **kwargs: True)
 @patch(
@@ -368,6 +373,7 @@ def test_windows_server_managed_products_not_executed(*_args):
 @patch('vendor_msft_api_client.MsftApiClient.format_sql_bugs', lambda *args, **kwargs: [1])
 @patch('vendor_msft_api_client.MsftApiClient.get_windows_issues', lambda *args, **kwargs: [])
 @patch('vendor_msft_api_client.MsftApiClient.sn_sync', lambda *args, **kwargs: 1)
+@patch('vendor_msft_api_client.MsftApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('db_client.Database.__init__', new=mock_database_init)
 @patch('db_client.Database.create_session', lambda *args, **kwargs: True)
 @patch(
@@ -421,6 +427,7 @@ def test_sql_server_managed_products_not_executed(*_args):
 @patch('vendor_msft_api_client.MsftApiClient.format_access_bugs', lambda *args, **kwargs: [])
 @patch('vendor_msft_api_client.MsftApiClient.get_windows_issues', lambda *args, **kwargs: [])
 @patch('vendor_msft_api_client.MsftApiClient.sn_sync', lambda *args, **kwargs: [{}])
+@patch('vendor_msft_api_client.MsftApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('db_client.Database.__init__', new=mock_database_init)
 @patch('db_client.Database.create_session', lambda *args, **kwargs: True)
 @patch(
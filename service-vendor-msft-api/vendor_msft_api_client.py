@@ -3,14 +3,18 @@
 created 2021-12-25
 """
 import base64
+import bisect
 import copy
 import datetime
+import functools
+import importlib
+import inspect
 import json
 import logging.config
+import os
 import re
 import sys
-import threading
-from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 import lxml.html
@@ -21,9 +25,180 @@ from requests.packages import urllib3
 from download_manager import download_instance
 from vendor_exceptions import ApiResponseError, ApiConnectionError, VendorConnectionError, VendorResponseError
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
+cmdb_reader = importlib.import_module("service-common.python.lib.cmdb_reader")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
+cmdb_query_planner = importlib.import_module("service-common.python.lib.cmdb_query_planner")
+parse_stage = importlib.import_module("service-common.python.lib.parse_stage")
+kb_fingerprints = importlib.import_module("service-common.python.lib.kb_fingerprints")
+admin_token_cache = importlib.import_module("service-common.python.lib.admin_token_cache")
+
 urllib3.disable_warnings()
 logger = logging.getLogger()
 
+# parse_stage specs of the kb pages - headers, footers and non-relevant sections are removed before parsing bug kbs
+BUG_KB_SPEC = {
+    "remove": [
+        "//section[@aria-label='References']", "//div[contains(@class, 'ArticleFooter')]",
+        "//div[contains(@class, 'page-metadata-container')]", "//section[@aria-label='More Resources']",
+        "//section[@aria-label='See Also']",
+    ],
+    "fields": {
+        "bug_id": '//meta[@name="awa-asst"]/@content',
+        "summary": '//title/text()',
+        "content": {"xpath": ['//main[@id="main"]', '//div[@id="ocArticle"]'], "fields": {"text": ".//text()"}},
+        "product_name": '//meta[@name="ms.productName"]/@content',
+        "applies_to_items": "//span[contains(@class, 'appliesToItem')]//text()",
+        "last_published_date": '//meta[@name="lastPublishedDate"]/@content',
+        "first_published_date": '//meta[@name="firstPublishedDate"]/@content',
+    }
+}
+CU_KB_SPEC = {
+    "fields": {
+        "rows": {
+            "xpath": "//th//*[contains(text(), 'KB article') or contains(text(), 'KB Article')]//"
+                     "ancestor::table/tbody//tr",
+            "fields": {"cells": {"xpath": "./td", "fields": {"text": "./p//text()", "href": "./p//@href"}}}
+        },
+        "headers": {
+            "xpath": "//th//*[contains(text(), 'KB article') or contains(text(), 'KB Article')]//"
+                     "ancestor::table//th",
+            "fields": {"text": "./p/text()"}
+        }
+    }
+}
+BUG_KB_PLAN = parse_stage.Plan(BUG_KB_SPEC)
+CU_KB_PLAN = parse_stage.Plan(CU_KB_SPEC)
+
+
+class SqlBugConsolidator:
+    """
+    incremental consolidation of the SQL Server release bugs - every CU kb result is merged into a per bugId
+    accumulator as soon as it is crawled instead of keeping every per release copy of the bug until all the SQL
+    products have been processed. the bug kb url of a new bug is passed to on_bug_kb_url so its page can be downloaded
+    while the remaining CU kbs are crawled
+    """
+
+    def __init__(self, vendor_id, on_bug_kb_url=None):
+        """
+        :param vendor_id:
+        :param on_bug_kb_url: optional callable(url) called once per new bug kb url
+        """
+        self.vendor_id = vendor_id
+        self.on_bug_kb_url = on_bug_kb_url
+        self.accumulators = dict()
+        self.bug_kb_urls = set()
+        self.entries = 0
+
+    def __len__(self):
+        """
+        :return: number of merged release bug entries
+        """
+        return self.entries
+
+    def extend(self, bugs):
+        """
+        merge release bug entries ( crawl_cu_kbs results )
+        :param bugs:
+        :return:
+        """
+        for bug in bugs:
+            self.add(bug)
+
+    def add(self, bug):
+        """
+        merge a single release bug entry into its bugId accumulator
+        :param bug:
+        :return:
+        """
+        self.entries += 1
+        accumulator = self.accumulators.get(bug["bugId"])
+        if accumulator is None:
+            accumulator = self.accumulators[bug["bugId"]] = {
+                # the first received entry sets summary and managedProductId
+                "summary": bug["summary"], "managedProductId": bug["managedProductId"],
+                # the earliest created entry sets the release notes, releaseUrl and the bugUrl of bugs without a kb
+                "earliest": bug, "releases": [], "vendorLastUpdatedDate": bug["vendorLastUpdatedDate"],
+                "vendorCreatedDate": bug["vendorCreatedDate"], "bugKbUrls": dict(), "knownAffectedOs": dict(),
+                "bugCategories": dict(), "ciSysIds": dict()
+            }
+        else:
+            if bug["vendorCreatedDate"] < accumulator["earliest"]["vendorCreatedDate"]:
+                accumulator["earliest"] = bug
+            accumulator["vendorLastUpdatedDate"] = max(
+                accumulator["vendorLastUpdatedDate"], bug["vendorLastUpdatedDate"]
+            )
+            accumulator["vendorCreatedDate"] = max(accumulator["vendorCreatedDate"], bug["vendorCreatedDate"])
+        accumulator["releases"].append((bug["vendorCreatedDate"], bug["knownFixedReleases"], bug["releaseUrl"]))
+        if bug["bugKbUrl"]:
+            accumulator["bugKbUrls"][bug["bugKbUrl"]] = None
+            if bug["bugKbUrl"] not in self.bug_kb_urls:
+                self.bug_kb_urls.add(bug["bugKbUrl"])
+                if self.on_bug_kb_url:
+                    self.on_bug_kb_url(bug["bugKbUrl"])
+        if bug["knownAffectedOs"]:
+            accumulator["knownAffectedOs"][bug["knownAffectedOs"]] = None
+        if bug["vendorData"].get("bugCategory", "").strip():
+            accumulator["bugCategories"][bug["vendorData"]["bugCategory"]] = None
+        accumulator["ciSysIds"].update(dict.fromkeys(bug["ciSysIds"]))
+
+    def bug_entry(self, bug_id, accumulator):
+        """
+        build the consolidated bug entry of an accumulator
+        :param bug_id:
+        :param accumulator:
+        :return:
+        """
+        earliest = accumulator["earliest"]
+        # stable sort - entries created at the same time keep their arrival order
+        releases = sorted(accumulator["releases"], key=lambda x: x[0])
+        bug_categories = list(accumulator["bugCategories"])
+        bug_kb_urls = list(accumulator["bugKbUrls"])
+        bug_entry = {
+            "priority": "Unspecified",
+            "status": "Fixed",
+            "bugId": bug_id,
+            "vendorData": {"bugCategory": bug_categories[0] if bug_categories else "",
+                           "releaseUrl": earliest["releaseUrl"]},
+            "vendorId": self.vendor_id,
+            "knownFixedReleases": ", ".join(sorted(x[1] for x in releases)),
+            "vendorLastUpdatedDate": accumulator["vendorLastUpdatedDate"],
+            "vendorCreatedDate": accumulator["vendorCreatedDate"],
+            "releaseUrl": earliest["releaseUrl"],
+            "knownAffectedOs": ",".join(accumulator["knownAffectedOs"]),
+            "ciSysIds": list(accumulator["ciSysIds"]),
+            "managedProductId": accumulator["managedProductId"],
+            "hasKb": bool(bug_kb_urls),
+            "bugUrl": bug_kb_urls[0] if bug_kb_urls else earliest["bugUrl"],
+            "summary": accumulator["summary"]
+        }
+        # if a kb does not for the bug, create a description from the release data
+        if len(releases) > 1:
+            bug_entry["description"] = "\n".join(
+                [f"Bug {bug_id} is addressed in {len(releases)} releases:"] +
+                [f"{i}. {known_fixed_releases} - {release_url}"
+                 for i, (_, known_fixed_releases, release_url) in enumerate(releases, 1)] +
+                ["", "Notes from the latest release:", earliest["description"], "", ""]
+            )
+        else:
+            bug_entry["description"] = "\n".join(
+                ["", "Notes from the latest release:", earliest["description"],
+                 f"for more information: {earliest['releaseUrl']}", ""]
+            )
+        return bug_entry
+
+    def bugs(self):
+        """
+        :return: consolidated bug entries sorted by bugId
+        """
+        return [
+            self.bug_entry(bug_id=bug_id, accumulator=self.accumulators[bug_id])
+            for bug_id in sorted(self.accumulators, key=int)
+        ]
+
 
 class MsftApiClient:
     """
@@ -43,7 +218,12 @@ class MsftApiClient:
         self.kb_bugs = list()
         self.formatted_bugs = list()
         self.pre_formatted_sql_bugs = list()
+        # bug kb pages prefetched by the SQL bug consolidation by url
+        self.bug_kb_pages = dict()
+        self.bug_kb_prefetch_executor = None
         self.bug_kb_counter = 0
+        # CIs of the batched product queries by (table, sysparm_query)
+        self.planned_cis = dict()
 
         # settings
         self.secret_manager_client = boto3.Session().client("secretsmanager")
@@ -147,199 +327,199 @@ class MsftApiClient:
             return fmt_time
         return None
 
+    def sql_bug_consolidator(self, vendor_id, threads=30):
+        """
+        start an incremental SQL bug consolidation - the kb pages of new bugs are downloaded in the background while
+        the CU kbs of the remaining SQL products are crawled, crawl_bug_kbs uses the prefetched pages
+        :param vendor_id:
+        :param threads: max concurrent bug kb prefetches
+        :return: SqlBugConsolidator passed to get_sql_release_bugs and consolidate_bugs
+        """
+        self.bug_kb_prefetch_executor = ThreadPoolExecutor(max_workers=threads)
+        return SqlBugConsolidator(vendor_id=vendor_id, on_bug_kb_url=self.prefetch_bug_kb)
+
+    def prefetch_bug_kb(self, url):
+        """
+        start the download and parsing of a bug kb page
+        :param url:
+        :return:
+        """
+        self.bug_kb_pages[url] = self.bug_kb_prefetch_executor.submit(self.fetch_bug_kb, url)
+
+    @staticmethod
+    def fetch_bug_kb(url):
+        """
+        :param url:
+        :return: parse_stage result of the bug kb page or None when the page could not be downloaded
+        """
+        # unchanged kb pages reuse the result parsed by a previous run
+        return kb_fingerprints.get_store().parse(
+            url=url, spec=BUG_KB_PLAN, download=download_instance, headers="", session=False
+        )
+
     def consolidate_bugs(self, bugs, vendor_id):
         """
         consolidate bugs and merge description, knownFixedReleases, release urls
-        :param bugs:
+        :param bugs: list of release bugs or the SqlBugConsolidator the bugs were merged into
         :param vendor_id:
         :return:
         """
         self.kb_bugs = []
-        formatted_bugs = []
-        consolidated_bugs = dict()
-        bugs = sorted(bugs, key=lambda x: int(x["bugId"]))
-        for bug in bugs:
-            if bug["bugId"] not in consolidated_bugs:
-                consolidated_bugs[bug["bugId"]] = [bug]
-            else:
-                consolidated_bugs[bug["bugId"]].append(bug)
-
-        for bug_id, bug_entries in consolidated_bugs.items():
-            bug_entry = {
-                "priority": "Unspecified",
-                "status": "Fixed",
-                "bugId": bug_id,
-                'vendorData': {"bugCategory": ""},
-                "vendorId": vendor_id
-            }
-
-            sorted_entries = sorted(bug_entries, key=lambda x: x["vendorCreatedDate"])
-            bug_category = list(
-                {x['vendorData']['bugCategory'] for x in sorted_entries
-                 if x['vendorData'].get('bugCategory', "").strip()}
-            )
-            bug_entry["knownFixedReleases"] = ", ".join(sorted([x["knownFixedReleases"] for x in sorted_entries]))
-            bug_entry["vendorLastUpdatedDate"] = max([x['vendorLastUpdatedDate'] for x in sorted_entries])
-            bug_entry["vendorCreatedDate"] = max([x['vendorCreatedDate'] for x in sorted_entries])
-            bug_entry["bugUrl"] = list({x["bugKbUrl"] for x in sorted_entries if x["bugKbUrl"]})
-            bug_entry['releaseUrl'] = sorted_entries[0]['releaseUrl']
-            bug_entry['knownAffectedOs'] = ",".join(
-                list({x['knownAffectedOs'] for x in sorted_entries if x['knownAffectedOs']})
-            )
-            bug_entry['vendorData']["bugCategory"] = bug_category[0] if bug_category else ""
-            bug_entry['vendorData']["releaseUrl"] = bug_entry['releaseUrl']
-            bug_entry['ciSysIds'] = [list(x['ciSysIds']) for x in sorted_entries]
-            bug_entry['ciSysIds'] = list({x for y in bug_entry['ciSysIds'] for x in y})
-            bug_entry["managedProductId"] = bug_entries[0]["managedProductId"]
-            bug_entry["hasKb"] = True
-            if not bug_entry["bugUrl"]:
-                bug_entry["hasKb"] = False
-                bug_entry["bugUrl"] = sorted_entries[0]["bugUrl"]
-            else:
-                bug_entry["bugUrl"] = bug_entry["bugUrl"][0]
-            bug_entry["summary"] = bug_entries[0]["summary"]
-            # if a kb does not for the bug, create a description from the release data
-            bug_entry["description"] = ""
-            if len(sorted_entries) > 1:
-                bug_entry["description"] = f"Bug {bug_id} is addressed in {len(sorted_entries)} releases:\n"
-                for i, entry in enumerate(sorted_entries, 1):
-                    bug_entry["description"] += f"{i}. {entry['knownFixedReleases']} - {entry['releaseUrl']}\n"
-
-                bug_entry["description"] += \
-                    f"\nNotes from the latest release:\n{sorted_entries[0]['description']}\n\n"
-            else:
-                bug_entry["description"] += \
-                    f"\nNotes from the latest release:\n{sorted_entries[0]['description']}\n" \
-                    f"for more information: {sorted_entries[0]['releaseUrl']}\n"
-
-            # bug has a kb - crawl html and enrich the bug entry
-            formatted_bugs.append(bug_entry)
+        consolidator = bugs
+        if not isinstance(consolidator, SqlBugConsolidator):
+            consolidator = SqlBugConsolidator(vendor_id=vendor_id)
+            consolidator.extend(bugs)
+        formatted_bugs = consolidator.bugs()
         if formatted_bugs:
             self.formatted_bugs = formatted_bugs
             self.logger.info(
-                f"'SQL Server' - {len(bugs)} kb bugs consolidated for all existing CIs | "
+                f"'SQL Server' - {len(consolidator)} kb bugs consolidated for all existing CIs | "
                 f"initiating multi-process crawl"
             )
+            # bug has a kb - crawl html and enrich the bug entry
             self.bug_kbs_crawling_manager(bugs=formatted_bugs, product_name='SQL Server')
             self.logger.info(
                 f"'SQL Server' - {len(self.kb_bugs)}/{self.bug_kb_counter} kb bugs crawled"
             )
+            kb_fingerprints.get_store().log_stats("SQL Server")
+        self.stop_bug_kb_prefetch()
         return self.kb_bugs
 
-    def bug_kbs_crawling_manager(self, bugs, product_name, threads=30): # pragma: no cover
+    def stop_bug_kb_prefetch(self):
         """
-        multi processing crawl manager
+        drop the unused prefetched bug kb pages and stop the prefetch threads
         :return:
         """
-        self.bug_kb_counter = len(bugs)
-        q = Queue()
-        for bug in bugs:
-            q.put(bug)
-
-        for _ in range(threads):
-            t = threading.Thread(target=self.crawl_bug_kbs, args=(q, product_name))
-            t.start()
-
-        q.join()
-
-    def crawl_bug_kbs(self, q, product_name):
-
+        for future in self.bug_kb_pages.values():
+            future.cancel()
+        self.bug_kb_pages = {}
+        if self.bug_kb_prefetch_executor is not None:
+            self.bug_kb_prefetch_executor.shutdown(wait=False)
+            self.bug_kb_prefetch_executor = None
+
+    def bug_kbs_crawling_manager(self, bugs, product_name, threads=30):
         """
-        crawl bug kb pages and enrich the bug_entry object
-        :param q:
+        crawl bug kb pages with the shared crawl engine and collect the enriched bugs in self.kb_bugs
+        :param bugs:
         :param product_name:
+        :param threads: max concurrent kb downloads
         :return:
         """
-        def crawl_instance(bug_entry):
-            # insert bugs with KB as is
-            if not bug_entry["hasKb"]:
-                self.kb_bugs.append(bug_entry)
-                return
-
-            response = download_instance(link=bug_entry['bugUrl'], headers="", session=False)
-            # insert bugs as is if kb is not reachable
-            if not response:
-                self.kb_bugs.append(bug_entry)
-                return
-            root = lxml.html.fromstring(response.text)
-
-            if not bug_entry.get("bugId"):
-                bug_id_container = root.xpath('//meta[@name="awa-asst"]/@content')
-                if not bug_id_container:
-                    self.logger.error(
-                        f"'{product_name}' - failed to find a bug id using xpath '//meta[@name='awa-asst']/@content' | "
-                        f"{bug_entry['bugUrl']}"
-                    )
-                    return
-                bug_entry['bugId'] = bug_id_container[0]
-
-            kb_summary = root.xpath('//title/text()')
-            if not kb_summary:
+        self.bug_kb_counter = len(bugs)
+        # every kb page is on the microsoft support host
+        engine = crawl_engine.CrawlEngine(concurrency=threads, host_concurrency=threads, logger=self.logger)
+        crawl_results = engine.run(
+            items=bugs, handler=functools.partial(self.crawl_bug_kbs, product_name=product_name),
+            host=lambda bug: crawl_engine.url_host(bug.get("bugUrl") or "")
+        )
+        for crawl_result in crawl_results:
+            if crawl_result.error:
                 self.logger.error(
-                    f"'{product_name}' - kb summary was not found | {bug_entry['bugUrl']}"
+                    f"'{product_name}' - kb crawl failed | {crawl_result.item.get('bugUrl')} | {crawl_result.error}"
+                )
+                continue
+            if not crawl_result.result:
+                continue
+            self.kb_bugs.append(crawl_result.result)
+            if len(self.kb_bugs) % 100 == 0:
+                self.logger.info(
+                    f"'{product_name}' - {len(self.kb_bugs)}/{self.bug_kb_counter} kb bugs crawled"
                 )
-            else:
-                bug_entry['summary'] = kb_summary[0]
-
-            kb_content = ""
-            kb_contents_xpaths = ['//main[@id="main"]', '//div[@id="ocArticle"]']
-            for xpath in kb_contents_xpaths:
-                kb_content = root.xpath(xpath)
-                if not kb_content:
-                    continue
-                break
 
-            # insert bug as is if kb content is missing
-            if not kb_content:
+    def crawl_bug_kbs(self, bug_entry, product_name):
+        """
+        crawl a bug kb page and enrich the bug_entry object
+        :param bug_entry:
+        :param product_name:
+        :return: the bug entry or None when the kb page has no bug id
+        """
+        # insert bugs with KB as is
+        if not bug_entry["hasKb"]:
+            return bug_entry
+
+        # pages of the consolidated SQL bugs were prefetched while the CU kbs were crawled
+        prefetched = self.bug_kb_pages.pop(bug_entry['bugUrl'], None)
+        parsed = prefetched.result() if prefetched else self.fetch_bug_kb(bug_entry['bugUrl'])
+        # insert bugs as is if kb is not reachable
+        if parsed is None:
+            return bug_entry
+
+        if not bug_entry.get("bugId"):
+            bug_id_container = parsed["bug_id"]
+            if not bug_id_container:
                 self.logger.error(
-                    f"'{product_name}' - kb content was not found | {bug_entry['bugUrl']}"
+                    f"'{product_name}' - failed to find a bug id using xpath '//meta[@name='awa-asst']/@content' | "
+                    f"{bug_entry['bugUrl']}"
                 )
-                self.kb_bugs.append(bug_entry)
-                return
-
-            # remove headers, footers and non-relevant sections
-            article_header_footer_xpaths = [
-                "//section[@aria-label='References']", "//div[contains(@class, 'ArticleFooter')]",
-                "//div[contains(@class, 'page-metadata-container')]", "//section[@aria-label='More Resources']",
-                "//section[@aria-label='See Also']",
-            ]
-            for xpath in article_header_footer_xpaths:
-                for element in root.xpath(xpath):
-                    element.getparent().remove(element)
+                return None
+            bug_entry['bugId'] = bug_id_container[0]
+
+        kb_summary = parsed["summary"]
+        if not kb_summary:
+            self.logger.error(
+                f"'{product_name}' - kb summary was not found | {bug_entry['bugUrl']}"
+            )
+        else:
+            bug_entry['summary'] = kb_summary[0]
 
-            bug_entry['description'] = "\n".join([x.strip() for x in kb_content[0].xpath(".//text()") if x.strip()])
+        kb_content = parsed["content"]
+        # insert bug as is if kb content is missing
+        if not kb_content:
+            self.logger.error(
+                f"'{product_name}' - kb content was not found | {bug_entry['bugUrl']}"
+            )
+            return bug_entry
 
-            known_affected_releases = root.xpath('//meta[@name="ms.productName"]/@content')
-            if known_affected_releases:
-                bug_entry['knownAffectedReleases'] = ", ".join(known_affected_releases[0].split(','))
+        bug_entry['description'] = "\n".join([x.strip() for x in kb_content[0]["text"] if x.strip()])
 
-            # for microsoft access kbs
-            known_affected_items = root.xpath("//span[contains(@class, 'appliesToItem')]//text()")
-            if known_affected_items:
-                bug_entry['knownAffectedReleases'] = ", ".join(list(known_affected_items))
-                bug_entry['knownAffectedItems'] = list(known_affected_items)
-            else:
-                bug_entry['knownAffectedReleases'] = ""
-                bug_entry['knownAffectedItems'] = ""
+        known_affected_releases = parsed["product_name"]
+        if known_affected_releases:
+            bug_entry['knownAffectedReleases'] = ", ".join(known_affected_releases[0].split(','))
 
-            last_updated_container = root.xpath('//meta[@name="lastPublishedDate"]/@content')
-            if last_updated_container:
-                bug_entry['vendorLastUpdatedDate'] = self.timestamp_format(last_updated_container[0])
+        # for microsoft access kbs
+        known_affected_items = parsed["applies_to_items"]
+        if known_affected_items:
+            bug_entry['knownAffectedReleases'] = ", ".join(list(known_affected_items))
+            bug_entry['knownAffectedItems'] = list(known_affected_items)
+        else:
+            bug_entry['knownAffectedReleases'] = ""
+            bug_entry['knownAffectedItems'] = ""
 
-            published_container = root.xpath('//meta[@name="firstPublishedDate"]/@content')
-            if published_container:
-                bug_entry['vendorCreatedDate'] = self.timestamp_format(published_container[0])
+        last_updated_container = parsed["last_published_date"]
+        if last_updated_container:
+            bug_entry['vendorLastUpdatedDate'] = self.timestamp_format(last_updated_container[0])
 
-            self.kb_bugs.append(bug_entry)
-            if len(self.kb_bugs) % 100 == 0:
-                self.logger.info(
-                    f"'{product_name}' - {len(self.kb_bugs)}/{self.bug_kb_counter} kb bugs crawled"
-                )
+        published_container = parsed["first_published_date"]
+        if published_container:
+            bug_entry['vendorCreatedDate'] = self.timestamp_format(published_container[0])
 
-        while not q.empty():
-            queue = q.get()
-            crawl_instance(bug_entry=queue)
-            q.task_done()
+        return bug_entry
+
+    def plan_sn_queries(self, products, sn_api_url, sn_auth_token, affected_ci_query_base):
+        """
+        run the sn_sync queries of all the products with one ^NQ query per SN table, sn_sync uses the planned CIs
+        instead of a request per product. products with queries that can not be batched and failed batches fall back
+        to the per product query
+        :param products:
+        :param sn_api_url:
+        :param sn_auth_token:
+        :param affected_ci_query_base:
+        :return:
+        """
+        reader = cmdb_reader.CmdbReader(
+            download=download_instance, headers={"Authorization": f"Basic {sn_auth_token}"},
+            connection_error=ApiConnectionError, response_error=ApiResponseError, logger=self.logger, session=False,
+            cache=cmdb_cache.get_cache()
+        )
+        queries = [(x["service_now_table"], x["sysparm_query"], "os_version,version,sys_id") for x in products]
+        try:
+            self.planned_cis = cmdb_query_planner.run(
+                reader=reader, sn_api_url=sn_api_url, queries=queries, base_query=affected_ci_query_base,
+                logger=self.logger
+            )
+        except (ApiConnectionError, ApiResponseError) as e:
+            self.logger.warning(f"batched SN queries failed, querying every product | {e}")
+            self.planned_cis = dict()
 
     def sn_sync(self, product, sn_api_url, sn_auth_token, affected_ci_query_base):
         """
@@ -351,211 +531,196 @@ class MsftApiClient:
         :param product:
         :return:
         """
+        planned = self.planned_cis.get((product["service_now_table"], product["sysparm_query"]))
+        if planned is not None:
+            if planned:
+                logger.info(f"'{product['name']}' - {len(planned)} CI(s) found for product version")
+                return planned
+            return False
+
         if affected_ci_query_base:
             affected_ci_query_base = f"{affected_ci_query_base}^"
         sn_query = f"?sysparm_query={affected_ci_query_base}{product['sysparm_query']}" \
                    f"&sysparm_fields=os_version,version,sys_id"
         sn_query_url = f"{sn_api_url}/api/now/table/{product['service_now_table']}{sn_query}"
-        response = download_instance(
-            link=sn_query_url,
-            headers={"Authorization": f"Basic {sn_auth_token}"}, session=False
+        reader = cmdb_reader.CmdbReader(
+            download=download_instance, headers={"Authorization": f"Basic {sn_auth_token}"},
+            connection_error=ApiConnectionError, response_error=ApiResponseError, logger=self.logger, session=False,
+            cache=cmdb_cache.get_cache()
         )
-        if not response:
-            self.logger.error(f"SN API connection error - {sn_query_url}")
-            raise ApiConnectionError(
-                url=sn_query_url, internal_message="SN API connection error",
-                event_message="a connection to ServiceNow could not be established - check ServiceNow settings"
-            )
-        try:
-            count = int(response.headers["x-total-count"])
-        except KeyError as e:
-            raise ApiResponseError(
-                url=sn_query_url, internal_message="missing 'x-total-count' in sn query response",
-                event_message="ServiceNow query returned a malformed response - check ServiceNow settings"
-            ) from e
+        count, cis = reader.read(sn_query_url)
         if count:
             logger.info(
                 f"'{product['name']}' - {count} CI(s) found for product version"
             )
-            cis = json.loads(response.text)["result"]
-            return cis
+            # the CIs are iterated more than once by the bug service
+            return list(cis)
         return False
 
-    def crawl_cu_kbs(self, q, managed_product, service_now_table):
+    def crawl_cu_kbs(self, kb_data, managed_product, service_now_table):
         """
         1. crawl CU kbs e.g. https://support.microsoft.com/en-us/topic/cumulative-update-7-for-sql-server-2019-
           87ea390d-0def-6173-efd2-f6be8549d77d
         2a. parse bugs from html
         2b. follow bug kb urls
         3.  format bug entry
-        :param q:
+        :param kb_data:
         :param managed_product:
         :param service_now_table:
-        :return:
+        :return: list of bugs parsed from the kb page
         """
-        def instance(kb_data):
-            """
+        bugs = []
+        # unchanged kb pages reuse the result parsed by a previous run
+        parsed = kb_fingerprints.get_store().parse(
+            url=kb_data["kb"]["kb_url"], spec=CU_KB_PLAN, download=download_instance, headers="", session=False
+        )
+        if parsed is None:
+            self.logger.warning(
+                f"'{managed_product.name}' - {kb_data['kb']['kb_id']} download failed | "
+                f"{kb_data['kb']['kb_url']}"
+            )
+            return bugs
+        bug_row_elements = parsed["rows"]
+        if not bug_row_elements:
+            self.logger.warning(
+                f"'{managed_product.name}' - {kb_data['kb']['kb_id']} missing bug entries | "
+                f"{kb_data['kb']['kb_url']}"
+            )
+            return bugs
+
+        # use bugs table header row to determine the location of the bug columns
+        bug_rows_headers = parsed["headers"]
+        bug_td_map = {
+            "bug_id": {
+                "mandatory": True,
+                "kw": ["bug"],
+                "td_index": "",
+                "value": "",
+                "href": ""
+            },
+            "kb_id": {
+                "kw": ["kb article"],
+                "td_index": "",
+                "mandatory": False,
+                "value": "",
+                "href": ""
+            },
+            "description": {
+                "kw": ["description"],
+                "td_index": "",
+                "mandatory": True,
+                "value": "",
+                "href": ""
+            },
+            "bug_category": {
+                "kw": ["area path", "fix area"],
+                "td_index": "",
+                "mandatory": False,
+                "value": "",
+                "href": ""
+            },
+            "platform": {
+                "kw": ["platform"],
+                "td_index": "",
+                "mandatory": False,
+                "value": "",
+                "href": ""
+            }
+        }
 
-            :param kb_data:
-            :return:
-            """
-            response = download_instance(link=kb_data["kb"]["kb_url"], headers="", session=False)
-            if not response:
+        for _key, item in bug_td_map.items():
+            found = False
+            for kw in item["kw"]:
+                if not found:
+                    for i, x in enumerate(bug_rows_headers, 1):
+                        header = x["text"]
+                        if header and kw in header[0].lower():
+                            item["td_index"] = str(i)
+                            found = True
+                            break
+
+        for i, entry in enumerate(bug_row_elements, 1):
+            bug_data = copy.deepcopy(bug_td_map)
+            for item in bug_data.keys():
+                td_index = bug_data[item]['td_index']
+                if td_index and int(td_index) <= len(entry["cells"]):
+                    value_container = entry["cells"][int(td_index) - 1]["text"]
+                    href_container = entry["cells"][int(td_index) - 1]["href"]
+                    value = [x.strip() for x in value_container if x.strip()]
+                    href = [x.strip() for x in href_container if x.strip()]
+                    bug_data[item]["value"] = value[0] if value else ""
+                    bug_data[item]["href"] = href[0] if href else ""
+
+            if not bug_data["bug_id"]["value"] and not bug_data["kb_id"]["value"]:
                 self.logger.warning(
-                    f"'{managed_product.name}' - {kb_data['kb']['kb_id']} download failed | "
-                    f"{kb_data['kb']['kb_url']}"
+                    f"'{managed_product.name}' - bugId parsing failed (row {i}) | {kb_data['kb']['kb_url']}"
                 )
-                return
+                continue
 
-            root = lxml.html.fromstring(response.text)
-            bug_rows_xpath = "//th//*[contains(text(), 'KB article') or contains(text(), 'KB Article')]//" \
-                             "ancestor::table/tbody//tr"
-            bug_row_elements = root.xpath(bug_rows_xpath)
-            if not bug_row_elements:
+            if not bug_data["bug_id"]["value"]:
+                bug_data["bug_id"]["value"] = bug_data["kb_id"]["value"]
+
+            summary = "".join(bug_data["description"]["value"]).strip()
+            description = summary
+            bug_kb_url = ""
+            if bug_data["kb_id"]["href"]:
+                bug_kb_url = bug_data["kb_id"]["href"]
+            elif bug_data["description"]["href"]:
+                bug_kb_url = bug_data["description"]["href"]
+            if bug_kb_url and not re.findall("^http", bug_kb_url):
+                bug_kb_url = f"https://support.microsoft.com{bug_kb_url}"
+
+            # get the first bugId for entries that include to bugIds
+            if ";" in bug_data['bug_id']['value']:
+                bug_data['bug_id']['value'] = bug_data['bug_id']['value'].split(";")[0]
+            else:
+                bug_data['bug_id']['value'] = bug_data['bug_id']['value'].split(",")[0]
+            try:
+                int(bug_data['bug_id']['value'])
+            except ValueError:
+                bug_data['bug_id']['value'] = ""
+
+            if not bug_data['bug_id']['value']:
                 self.logger.warning(
-                    f"'{managed_product.name}' - {kb_data['kb']['kb_id']} missing bug entries | "
-                    f"{kb_data['kb']['kb_url']}"
+                    f"'{managed_product.name}' - bugId parsing failed (row {i}) | {kb_data['kb']['kb_url']}"
                 )
-                return
-
-            # use bugs table header row to determine the location of the bug columns
-            bug_rows_header_xpath = "//th//*[contains(text(), 'KB article') or contains(text(), 'KB Article')]//" \
-                                    "ancestor::table//th"
-            bug_rows_headers = root.xpath(bug_rows_header_xpath)
-            bug_td_map = {
-                "bug_id": {
-                    "mandatory": True,
-                    "kw": ["bug"],
-                    "td_index": "",
-                    "value": "",
-                    "href": ""
-                },
-                "kb_id": {
-                    "kw": ["kb article"],
-                    "td_index": "",
-                    "mandatory": False,
-                    "value": "",
-                    "href": ""
-                },
-                "description": {
-                    "kw": ["description"],
-                    "td_index": "",
-                    "mandatory": True,
-                    "value": "",
-                    "href": ""
-                },
-                "bug_category": {
-                    "kw": ["area path", "fix area"],
-                    "td_index": "",
-                    "mandatory": False,
-                    "value": "",
-                    "href": ""
-                },
-                "platform": {
-                    "kw": ["platform"],
-                    "td_index": "",
-                    "mandatory": False,
-                    "value": "",
-                    "href": ""
-                }
+                continue
+
+            self.sql_bugs_dedup.add(bug_data['bug_id']['value'])
+
+            sn_ci_filter = [f"sys_idSTARTSWITH{x['sys_id']}" for x in kb_data['affected_ci']]
+            sn_ci_filter = "^OR".join(sn_ci_filter)
+
+            build_version = kb_data['kb']['build_version']
+            known_fixed_releases = f"{managed_product.name} {build_version}"
+            bug = {
+                "bugId": bug_data['bug_id']['value'],
+                "bugKbUrl": bug_kb_url,
+                "description": description,
+                "bugUrl": bug_kb_url if bug_kb_url else kb_data['kb']['kb_url'],
+                "releaseUrl": kb_data['kb']['kb_url'],
+                "releaseName": kb_data['kb']["build_name"],
+                "buildVersion": kb_data['kb']['build_version'],
+                "buildVersionNumber": kb_data['kb']['build_version_number'],
+                "priority": "Unspecified",
+                "status": "Fixed",
+                "knownFixedReleases": known_fixed_releases,
+                "knownAffectedOs": bug_data['platform'].get('value', ""),
+                "vendorData":
+                    {"bugCategory": bug_data['bug_category'].get('value')},
+                "managedProductId": managed_product.id,
+                "vendorId": self.vendor_id,
+                "summary": summary,
+                "snCiTable": service_now_table,
+                "snCiFilter": sn_ci_filter,
+                "vendorLastUpdatedDate": kb_data['kb']['release_date'],
+                "vendorCreatedDate": kb_data['kb']['release_date'],
+                "ciSysIds": [x['sys_id'] for x in kb_data['affected_ci']]
             }
 
-            for _key, item in bug_td_map.items():
-                found = False
-                for kw in item["kw"]:
-                    if not found:
-                        for i, x in enumerate(bug_rows_headers, 1):
-                            header = x.xpath("./p/text()")
-                            if header and kw in header[0].lower():
-                                item["td_index"] = str(i)
-                                found = True
-                                break
-
-            for i, entry in enumerate(bug_row_elements, 1):
-                bug_data = copy.deepcopy(bug_td_map)
-                for item in bug_data.keys():
-                    td_index = bug_data[item]['td_index']
-                    if td_index:
-                        value_container = entry.xpath(f"./td[{td_index}]/p//text()")
-                        href_container = entry.xpath(f"./td[{td_index}]/p//@href")
-                        value = [x.strip() for x in value_container if x.strip()]
-                        href = [x.strip() for x in href_container if x.strip()]
-                        bug_data[item]["value"] = value[0] if value else ""
-                        bug_data[item]["href"] = href[0] if href else ""
-
-                if not bug_data["bug_id"]["value"] and not bug_data["kb_id"]["value"]:
-                    self.logger.warning(
-                        f"'{managed_product.name}' - bugId parsing failed (row {i}) | {kb_data['kb']['kb_url']}"
-                    )
-                    continue
-
-                if not bug_data["bug_id"]["value"]:
-                    bug_data["bug_id"]["value"] = bug_data["kb_id"]["value"]
-
-                summary = "".join(bug_data["description"]["value"]).strip()
-                description = summary
-                bug_kb_url = ""
-                if bug_data["kb_id"]["href"]:
-                    bug_kb_url = bug_data["kb_id"]["href"]
-                elif bug_data["description"]["href"]:
-                    bug_kb_url = bug_data["description"]["href"]
-                if bug_kb_url and not re.findall("^http", bug_kb_url):
-                    bug_kb_url = f"https://support.microsoft.com{bug_kb_url}"
-
-                # get the first bugId for entries that include to bugIds
-                if ";" in bug_data['bug_id']['value']:
-                    bug_data['bug_id']['value'] = bug_data['bug_id']['value'].split(";")[0]
-                else:
-                    bug_data['bug_id']['value'] = bug_data['bug_id']['value'].split(",")[0]
-                try:
-                    int(bug_data['bug_id']['value'])
-                except ValueError:
-                    bug_data['bug_id']['value'] = ""
-
-                if not bug_data['bug_id']['value']:
-                    self.logger.warning(
-                        f"'{managed_product.name}' - bugId parsing failed (row {i}) | {kb_data['kb']['kb_url']}"
-                    )
-                    continue
-
-                self.sql_bugs_dedup.add(bug_data['bug_id']['value'])
-
-                sn_ci_filter = [f"sys_idSTARTSWITH{x['sys_id']}" for x in kb_data['affected_ci']]
-                sn_ci_filter = "^OR".join(sn_ci_filter)
-
-                build_version = kb_data['kb']['build_version']
-                known_fixed_releases = f"{managed_product.name} {build_version}"
-                bug = {
-                    "bugId": bug_data['bug_id']['value'],
-                    "bugKbUrl": bug_kb_url,
-                    "description": description,
-                    "bugUrl": bug_kb_url if bug_kb_url else kb_data['kb']['kb_url'],
-                    "releaseUrl": kb_data['kb']['kb_url'],
-                    "releaseName": kb_data['kb']["build_name"],
-                    "buildVersion": kb_data['kb']['build_version'],
-                    "buildVersionNumber": kb_data['kb']['build_version_number'],
-                    "priority": "Unspecified",
-                    "status": "Fixed",
-                    "knownFixedReleases": known_fixed_releases,
-                    "knownAffectedOs": bug_data['platform'].get('value', ""),
-                    "vendorData":
-                        {"bugCategory": bug_data['bug_category'].get('value')},
-                    "managedProductId": managed_product.id,
-                    "vendorId": self.vendor_id,
-                    "summary": summary,
-                    "snCiTable": service_now_table,
-                    "snCiFilter": sn_ci_filter,
-                    "vendorLastUpdatedDate": kb_data['kb']['release_date'],
-                    "vendorCreatedDate": kb_data['kb']['release_date'],
-                    "ciSysIds": [x['sys_id'] for x in kb_data['affected_ci']]
-                }
-
-                self.pre_formatted_sql_bugs.append(bug)
-
-        while not q.empty():
-            queue = q.get()
-            instance(kb_data=queue)
-            q.task_done()
+            bugs.append(bug)
+
+        return bugs
 
     def parse_cu_releases(self, html_string, product, source_url, bugs_days_back_date):
         """
@@ -619,7 +784,47 @@ class MsftApiClient:
             })
         return out_of_scope_releases, cumulative_update_kbs, inside_scope_releases
 
-    def get_sql_release_bugs(self, managed_product, product, active_cis, bugs_days_back, threads=30):
+    @staticmethod
+    def match_cu_kbs(cumulative_update_kbs, active_cis):
+        """
+        map every CU kb released after the build of an active CI to the CIs it applies to
+        the kbs are indexed by build number - every distinct CI build is resolved once with a bisect and gets the kbs
+        after it, instead of filtering all the kbs for every CI
+        :param cumulative_update_kbs: kbs sorted by build_version
+        :param active_cis:
+        :return: {kb_id: {"kb", "affected_ci_versions", "affected_ci"}} - affected_ci holds the first matching CI
+        """
+        filtered_kbs = {}
+        # kb position in the build_version order keeps the insertion order of the kbs added for a CI
+        kb_order = {id(kb): i for i, kb in enumerate(cumulative_update_kbs)}
+        kbs_by_build = sorted(cumulative_update_kbs, key=lambda x: x["build_version_number"])
+        build_numbers = [x["build_version_number"] for x in kbs_by_build]
+
+        # the first CI of every distinct build, in CI order
+        builds = {}
+        for ci in active_cis:
+            if ci['version'] not in builds:
+                builds[ci['version']] = ci
+        for version, ci in builds.items():
+            ci_build_version = int(version.replace(".", ""))
+            ci_filtered_kbs = kbs_by_build[bisect.bisect_right(build_numbers, ci_build_version):]
+            for kb in ci_filtered_kbs:
+                if kb["kb_id"] in filtered_kbs:
+                    filtered_kbs[kb["kb_id"]]["affected_ci_versions"].add(version)
+            new_kbs = sorted(
+                (x for x in ci_filtered_kbs if x["kb_id"] not in filtered_kbs), key=lambda x: kb_order[id(x)]
+            )
+            for kb in new_kbs:
+                if kb["kb_id"] not in filtered_kbs:
+                    filtered_kbs[kb["kb_id"]] = {
+                        "kb": kb, "affected_ci_versions": {version}, "affected_ci": [
+                            {"version": version, "sys_id": ci['sys_id']}
+                        ]
+                    }
+        return filtered_kbs
+
+    def get_sql_release_bugs(self, managed_product, product, active_cis, bugs_days_back, threads=30,
+                             consolidator=None):
         """
         1. crawl sql Cumulative Update (CU) builds index page
         2. follow KBs for all the releases post the product release build
@@ -630,13 +835,14 @@ class MsftApiClient:
         :param active_cis:
         :param threads:
         :param bugs_days_back:
+        :param consolidator: optional SqlBugConsolidator - the bugs of every CU kb are merged into it as soon as the
+                             kb is crawled instead of being returned
         :return:
         """
         # get the Cumulative Update (CU) builds index page for the product
         self.pre_formatted_sql_bugs = []
         bugs_days_back_date = datetime.datetime.utcnow() - datetime.timedelta(days=bugs_days_back-2)
         cumulative_update_kbs = []
-        filtered_kbs = {}
         out_of_scope_releases = []
         inside_scope_releases = []
         for url in product["build_urls"]:
@@ -657,19 +863,8 @@ class MsftApiClient:
 
         cumulative_update_kbs = sorted(cumulative_update_kbs, key=lambda x: x['build_version'])
         # add kbs for build versions released after the CI version
-        for ci in active_cis:
-            ci_build_version = int(ci['version'].replace(".", ""))
-            ci_filtered_kbs = [x for x in cumulative_update_kbs if x["build_version_number"] > ci_build_version]
-            for kb in ci_filtered_kbs:
-                if kb["kb_id"] not in filtered_kbs:
-                    filtered_kbs[kb["kb_id"]] = {
-                        "kb": kb, "affected_ci_versions": {ci['version']}, "affected_ci": [
-                            {"version": ci['version'], "sys_id": ci['sys_id']}
-                        ]
-                    }
-                else:
-                    filtered_kbs[kb["kb_id"]]["affected_ci_versions"].add(ci['version'])
-        # crawl all cu kbs in a multi-processing queue
+        filtered_kbs = self.match_cu_kbs(cumulative_update_kbs=cumulative_update_kbs, active_cis=active_cis)
+        # crawl all cu kbs with the shared crawl engine
         if out_of_scope_releases:
             self.logger.info(
                 f"'{managed_product.name}' - {len(out_of_scope_releases)} older releases skipped | "
@@ -687,24 +882,60 @@ class MsftApiClient:
             f"{json.dumps(inside_scope_releases, default=str)}"
         )
 
-        q = Queue()
-        for _kb_id, cu_kb_data in filtered_kbs.items():
-            q.put(cu_kb_data)
-
-        for _ in range(threads):
-            t = threading.Thread(
-                target=self.crawl_cu_kbs, args=(
-                    q, managed_product, product['service_now_table'])
-            )
-            t.start()
-
-        q.join()
+        # every kb page is on the microsoft support host
+        engine = crawl_engine.CrawlEngine(concurrency=threads, host_concurrency=threads, logger=self.logger)
+        crawl_results = engine.run(
+            items=filtered_kbs.values(),
+            handler=functools.partial(
+                self.crawl_cu_kbs, managed_product=managed_product, service_now_table=product['service_now_table']
+            ),
+            host=lambda cu_kb_data: crawl_engine.url_host(cu_kb_data["kb"].get("kb_url") or "")
+        )
+        bug_ids = 0
+        for crawl_result in crawl_results:
+            if crawl_result.error:
+                self.logger.error(
+                    f"'{managed_product.name}' - {crawl_result.item['kb']['kb_id']} crawl failed | "
+                    f"{crawl_result.item['kb']['kb_url']} | {crawl_result.error}"
+                )
+                continue
+            bug_ids += len(crawl_result.result)
+            if consolidator is not None:
+                consolidator.extend(crawl_result.result)
+            else:
+                self.pre_formatted_sql_bugs.extend(crawl_result.result)
 
         self.logger.info(
-            f"'{managed_product.name}' - {len(self.pre_formatted_sql_bugs)} bugIds retrieved"
+            f"'{managed_product.name}' - {bug_ids} bugIds retrieved"
         )
+        kb_fingerprints.get_store().log_stats(managed_product.name)
         return self.pre_formatted_sql_bugs
 
+    @staticmethod
+    def index_windows_issues(windows_health_issues):
+        """
+        index the windows health issues by the lowercase version text once per run - every run of whole version
+        tokens ( words, numbers, spaces and separators ) is a key, so a product name found in a Version by the
+        'name.lower() in version.lower()' scan is a single dict lookup. the first issue of each key is kept, as the
+        scan returned the first matching issue. names ending inside a word ( 'server 20' ) are not keys, product names
+        are whole words
+        :param windows_health_issues: get_windows_issues result
+        :return: {lowercase version substring: KnownIssues}
+        """
+        index = {}
+        for issue in windows_health_issues:
+            version = issue['Version'].lower()
+            # token boundaries - every position that does not split a word or a number
+            boundaries = [
+                i for i in range(len(version) + 1)
+                if i in (0, len(version)) or not (version[i - 1].isalnum() and version[i].isalnum())
+            ]
+            for start_index, start in enumerate(boundaries):
+                # the empty name is found in every version, as in the scan
+                for end in boundaries[start_index:]:
+                    index.setdefault(version[start:end], issue["KnownIssues"])
+        return index
+
     def filter_product_issues(self, managed_product, last_execution, product_issues, affected_ci_query_base):
         """
         filter service issues based on:
@@ -955,13 +1186,30 @@ class MsftApiClient:
                 stored_data[path["title"]] = value
         return stored_data, session
 
-    def gen_admin_dashboard_tokens(self, username, password):
+    def gen_admin_dashboard_tokens(self, username, password, cached=True):
         """
-        generate auth tokens for the msft admin dashboard
+        generate auth tokens for the msft admin dashboard - warm containers reuse the tokens of a previous login until
+        they expire
         :param username:
         :param password:
+        :param cached: False to always log in e.g. when validating credentials
         :return:
         """
+        login = functools.partial(self.login_admin_dashboard, username=username, password=password)
+        cache = admin_token_cache.get_cache() if cached else None
+        if cache is None:
+            return login()[0]
+        return cache.tokens(
+            key=cache.key(portal="admin.microsoft.com", username=username, password=password), login=login
+        )
+
+    def login_admin_dashboard(self, username, password):
+        """
+        follow the admin dashboard login flow
+        :param username:
+        :param password:
+        :return: (tokens, tokens expiry or None)
+        """
         credentials_form = {
             "username": username, "isOtherIdpSupported": True, "checkPhones": False, "isRemoteNGCSupported": True,
             "isCookieBannerShown": False, "isFidoSupported": True, "originalRequest": "", "country": "US",
@@ -1057,7 +1305,7 @@ class MsftApiClient:
                 url="https://admin.microsoft.com/landing"
             ) from e
 
-        return tokens
+        return tokens, admin_token_cache.cookie_expiry(session.cookies)
 
     @staticmethod
     def format_sql_bugs(bugs, sn_ci_table):
@@ -1151,6 +1399,8 @@ class MsftApiClient:
         )
         response = download_instance(link=url, headers=headers, session=False)
         if not response:
+            # expired or revoked tokens are rejected - the next login must not reuse them
+            admin_token_cache.invalidate(tokens)
             internal_error = f"{self.vendor_id}' - vendor API connection error | {url}"
             event_message = f"vendor API connection error - we are actively working on fix"
             self.logger.error(internal_error)
@@ -1170,6 +1420,8 @@ class MsftApiClient:
                 )
             return services['VersionsKnownIssues']
         except json.JSONDecodeError as e:
+            # rejected tokens are redirected to the login page
+            admin_token_cache.invalidate(tokens)
             internal_message = f"'{self.vendor_id}' - API response error | failed to generate auth tokens"
             event_message = f"{self.vendor_id} - API connection error, we are actively working on a fix"
             self.logger.error(internal_message)
@@ -27,6 +27,8 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -48,6 +50,8 @@ def initiate(*_args, **_kwargs):
     # use a signal handler to set an alarm that will invoke timeout_handler
     signal.signal(signal.SIGALRM, timeout_handler)
     signal.alarm((int(_args[1].get_remaining_time_in_millis() / 1000)) - 1)
+    # stop scheduling crawls before the lambda timeout
+    crawl_engine.set_deadline(remaining_ms=_args[1].get_remaining_time_in_millis())
     sql_sn_ci_table = "cmdb_ci_db_mssql_instance"
 
     vendor_id = "msft"
@@ -210,13 +214,21 @@ def initiate(*_args, **_kwargs):
             sns_client.publish(
                 TopicArn=os.environ["SNS_TOPIC"], Subject="test", MessageStructure="json", Message=event_string
             )
+        # windows products are matched to their health issues with a lookup instead of a scan per product
+        windows_issues_index = msft_api_client.index_windows_issues(windows_health_issues=windows_health_issues)
 
         # stores managedProduct IDs for managedProducts with active CIs in SN CMDB
         active_managed_product_ids = []
 
-        # sql bugs are shared among SQL versions an must be consolidated after all the product have been processed
-        sql_bugs = []
+        # sql bugs are shared among SQL versions an must be consolidated after all the product have been processed,
+        # the bugs are merged as their CU kbs are crawled and their bug kb pages are downloaded in the background
+        sql_bugs = msft_api_client.sql_bug_consolidator(vendor_id=vendor_id)
         access_cis = []
+        # one batched SN query per CI table instead of a query per product version
+        msft_api_client.plan_sn_queries(
+            products=sql_server_products + windows_server_products + access_products, sn_api_url=sn_api_url,
+            sn_auth_token=sn_auth_token, affected_ci_query_base=sn_ci_query_base
+        )
         # iterate over product families and look for active SN CIs for each product version
         for product in sql_server_products + windows_server_products + access_products:
             logger.info(f"'{product['name']}' - syncing product versions")
@@ -271,14 +283,11 @@ def initiate(*_args, **_kwargs):
             managed_product_last_execution = utc_now - datetime.timedelta(days=bugs_days_back)
             # bug service for Windows Servers
             if product["type"] == "Windows Server":
-                product_issues = [
-                    x["KnownIssues"] for x in windows_health_issues
-                    if managed_product.name.lower() in x['Version'].lower()
-                ]
-                if product_issues:
+                product_issues = windows_issues_index.get(managed_product.name.lower())
+                if product_issues is not None:
                     product_bugs = msft_api_client.filter_product_issues(
                         managed_product=managed_product, last_execution=managed_product_last_execution,
-                        product_issues=product_issues[0], affected_ci_query_base=sn_ci_query_base
+                        product_issues=product_issues, affected_ci_query_base=sn_ci_query_base
                     )
                     # if product_bugs:
                     inserts = db_client.insert_bug_updates(
@@ -301,7 +310,7 @@ def initiate(*_args, **_kwargs):
                 # scrape bugs from KBs for every cu released after the current version
                 bugs = msft_api_client.get_sql_release_bugs(
                     product=product, managed_product=managed_product, active_cis=active_cis,
-                    bugs_days_back=bugs_days_back
+                    bugs_days_back=bugs_days_back, consolidator=sql_bugs
                 )
                 sql_bugs.extend(bugs)
 
@@ -358,6 +367,7 @@ def initiate(*_args, **_kwargs):
         counter['removed_managed_products'] += removed_managed_products
 
         logger.info(f"'{vendor_id}' - sync completed | {json.dumps(counter)}")
+        cmdb_cache.log_stats()
 
         # on existing bug updates - trigger the bugEventProcessor
         if new_bugs_updates:
@@ -3,11 +3,24 @@ created 2021-06-29
 
 updated 2021-08-31
 - added support for passed headers
+
+updated 2026-10-18
+- send session-less requests through the pooled service-common http_client with backoff between retries, requests
+  on a caller session use the http_client timeouts
 """
+import importlib
+import inspect
 import logging
+import os
+import sys
 
 import requests
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+http_client = importlib.import_module("service-common.python.lib.http_client")
+
 
 def download_instance(
         link, session, retry=3, logger=logging.getLogger(__name__), headers=None, method='GET', payload=None, json=None
@@ -46,16 +59,20 @@ def download_instance(
             if method == "POST":
                 if session:
                     if headers:
-                        request = session.post(url=link, data=payload, json=json, headers=headers, timeout=3)
+                        request = http_client.request(
+                            method="POST", url=link, session=session, data=payload, json=json, headers=headers
+                        )
                     else:
-                        request = session.post(url=link, data=payload, json=json)
+                        request = http_client.request(method="POST", url=link, session=session, data=payload, json=json)
                 else:
-                    request = requests.post(headers=headers, url=link, data=payload)
+                    request = http_client.request(method="POST", url=link, headers=headers, data=payload)
             else:
                 if session:
-                    request = session.get(url=link, timeout=3, headers=headers, verify=False)
+                    request = http_client.request(
+                        method="GET", url=link, session=session, headers=headers, verify=False
+                    )
                 else:
-                    request = requests.get(url=link, timeout=3, headers=headers, verify=False)
+                    request = http_client.request(method="GET", url=link, headers=headers, verify=False)
 
             if request.status_code in [404, 401, 410, 411, 500]:
                 if logger:
@@ -66,18 +83,22 @@ def download_instance(
                 if logger:
                     logger.warning("{}: Download failed with status code {}".format(request.url, request.status_code))
                 tries += 1
+                http_client.backoff(attempt=tries, retry=retry, response=request, logger=logger)
                 continue
 
             return request
 
         except requests.exceptions.ReadTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectionError:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
     if logger:
         logger.error("{}: Download failed with with max retires".format(link))
@@ -4,8 +4,12 @@ created 2021-08-29
 """
 import base64
 import datetime
+import functools
+import importlib
+import inspect
 import json
 import logging.config
+import os
 import re
 import sys
 
@@ -18,6 +22,12 @@ from requests.packages import urllib3
 from download_manager import download_instance
 from vendor_exceptions import ApiResponseError, ApiConnectionError
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+cmdb_reader = importlib.import_module("service-common.python.lib.cmdb_reader")
+admin_token_cache = importlib.import_module("service-common.python.lib.admin_token_cache")
+
 urllib3.disable_warnings()
 logger = logging.getLogger()
 
@@ -161,23 +171,12 @@ class Msft365ApiClient:
         """
         sn_query = f"?sysparm_query={query_product.snCiFilter}&sysparm_fields=os_version,version"
         sn_query_url = f"{sn_api_url}/api/now/table/{query_product.snCiTable}{sn_query}"
-        response = download_instance(
-            link=sn_query_url,
-            headers={"Authorization": f"Basic {sn_auth_token}"}, session=False
+        reader = cmdb_reader.CmdbReader(
+            download=download_instance, headers={"Authorization": f"Basic {sn_auth_token}"},
+            connection_error=ApiConnectionError, response_error=ApiResponseError, logger=self.logger, session=False
         )
-        if not response:
-            self.logger.error(f"SN API connection error - {sn_query_url}")
-            raise ApiConnectionError(
-                url=sn_query_url, internal_message="SN API connection error",
-                event_message="a connection to ServiceNow could not be established - check ServiceNow settings"
-            )
-        try:
-            count = int(response.headers["x-total-count"])
-        except KeyError as e:
-            raise ApiResponseError(
-                url=sn_query_url, internal_message="missing 'x-total-count' in sn query response",
-                event_message="ServiceNow query returned a malformed response - check ServiceNow settings"
-            ) from e
+        # only the number of matching CIs is needed - request a single record page
+        count = reader.count(sn_query_url)
         if count:
             logger.info(
                 f"'{product_family.name}' '{query_product.name}' - {count} CI(s) found for product version"
@@ -185,13 +184,30 @@ class Msft365ApiClient:
             return True
         return False
 
-    def gen_admin_dashboard_tokens(self, username, password):
+    def gen_admin_dashboard_tokens(self, username, password, cached=True):
         """
-        generate auth tokens for the msft admin dashboard
+        generate auth tokens for the msft admin dashboard - warm containers reuse the tokens of a previous login until
+        they expire
         :param username:
         :param password:
+        :param cached: False to always log in e.g. when validating credentials
         :return:
         """
+        login = functools.partial(self.login_admin_dashboard, username=username, password=password)
+        cache = admin_token_cache.get_cache() if cached else None
+        if cache is None:
+            return login()[0]
+        return cache.tokens(
+            key=cache.key(portal="admin.microsoft.com", username=username, password=password), login=login
+        )
+
+    def login_admin_dashboard(self, username, password):
+        """
+        follow the admin dashboard login flow
+        :param username:
+        :param password:
+        :return: (tokens, tokens expiry or None)
+        """
         headers = {
             "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/"
                       "apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
@@ -403,7 +419,7 @@ class Msft365ApiClient:
                 url="https://admin.microsoft.com/landing"
             ) from e
 
-        return tokens
+        return tokens, admin_token_cache.cookie_expiry(s.cookies)
 
     def get_aws_secret_value(self, secret_name):
         """
@@ -540,6 +556,8 @@ class Msft365ApiClient:
         )
         response = download_instance(link=url, headers=headers, session=False)
         if not response:
+            # expired or revoked tokens are rejected - the next login must not reuse them
+            admin_token_cache.invalidate(tokens)
             internal_error = f"{self.vendor_id}' - vendor API connection error | {url}"
             event_message = f"vendor API connection error - we are actively working on fix"
             self.logger.error(internal_error)
@@ -559,6 +577,8 @@ class Msft365ApiClient:
                 )
             return services['ServiceStatus']
         except json.JSONDecodeError as e:
+            # rejected tokens are redirected to the login page
+            admin_token_cache.invalidate(tokens)
             internal_message = f"'{self.vendor_id}' - API response error | failed to generate auth tokens"
             event_message = f"{self.vendor_id} - API connection error, we are actively working on a fix"
             self.logger.error(internal_message)
@@ -146,13 +146,18 @@ def initiate(*_args, **_kwargs):
 
         # stores managedProduct IDs for managedProducts with active CIs in SN CMDB
         active_managed_product_ids = []
+        # services are matched to their managedProducts with a lookup instead of a scan per service, the first
+        # managedProduct of a name is kept as the scan did
+        managed_products_by_name = {}
+        for managed_product in managed_products:
+            managed_products_by_name.setdefault(managed_product.name, managed_product)
 
         for product in msft_365_services:
             logger.info(f"'{product['Name']}' - syncing cloud service")
 
             # search for an existing managedProducts
-            managed_product = [x for x in managed_products if product['Name'] == x.name]
-            if not managed_product:
+            managed_product = managed_products_by_name.get(product['Name'])
+            if managed_product is None:
                 counter["new_managed_products"] += 1
 
                 # create a new managedProduct
@@ -164,7 +169,6 @@ def initiate(*_args, **_kwargs):
                 active_managed_product_ids.append(managed_product.id)
             else:
                 counter["managed_products"] += 1
-                managed_product = managed_product[0]
                 # store the managedProduct ID to skip it's removal
                 active_managed_product_ids.append(managed_product.id)
 
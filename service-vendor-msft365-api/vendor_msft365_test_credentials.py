@@ -62,6 +62,8 @@ def initiate(*_args, **_kwargs):
         msft_api_client.gen_admin_dashboard_tokens(
             username=event["username"],
             password=event["password"],
+            # always log in - cached tokens do not validate the credentials
+            cached=False
         )
         message = f"'{vendor_id}' - validation completed successfully"
         logger.info(message)
@@ -1,18 +1,30 @@
 """
 updated 2021-08-23
  add 'method' option to requests
+
+updated 2026-10-18
+ send session-less requests through the pooled service-common http_client with backoff between retries
 """
+import importlib
+import inspect
 import logging
+import os
+import sys
 from time import sleep
 
 import requests
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+http_client = importlib.import_module("service-common.python.lib.http_client")
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
 def download_instance(
-        link, headers, session=requests.session(), data="", json=False, method='GET', retry=10, timeout=10,
+        link, headers, session=None, data="", json=False, method='GET', retry=10, timeout=10,
         rate_limit_sleep=30
 ):
     """
@@ -22,7 +34,7 @@ def download_instance(
     :param data:
     :param method:
     :param json:
-    :param session:
+    :param session: caller owned session, defaults to the pooled http_client session of the link host
     :param timeout:
     :param rate_limit_sleep:
     :param headers
@@ -40,9 +52,9 @@ def download_instance(
                     request = session.request(method=method, url=link, timeout=timeout, headers=headers)
             else:
                 if json:
-                    request = requests.request(method=method, url=link, timeout=timeout, headers=headers, json=json)
+                    request = http_client.request(method=method, url=link, timeout=timeout, headers=headers, json=json)
                 else:
-                    request = requests.request(method=method, url=link, timeout=timeout, headers=headers)
+                    request = http_client.request(method=method, url=link, timeout=timeout, headers=headers)
 
             if request.status_code in [404, 401, 403]:
                 logger.error(
@@ -54,12 +66,17 @@ def download_instance(
                 continue
 
             if request.status_code == 429:
+                retry_after = http_client.retry_after(request)
+                if retry_after is None:
+                    retry_after = rate_limit_sleep
                 logger.error(
                     "{}: Download failed with status code {} - sleeping for {} seconds".format(
-                        request.url, request.status_code, rate_limit_sleep
+                        request.url, request.status_code, retry_after
                     )
                 )
-                sleep(rate_limit_sleep)
+                sleep(retry_after)
+                tries += 1
+                continue
 
             if request.status_code != 200:
                 logger.error(
@@ -68,18 +85,22 @@ def download_instance(
                     )
                 )
                 tries += 1
+                http_client.backoff(attempt=tries, retry=retry, response=request, logger=logger)
                 continue
 
             return request
 
         except requests.exceptions.ReadTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectionError:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
 
     logger.error(f"{link}: Download failed with with max retires")
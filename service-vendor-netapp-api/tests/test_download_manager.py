@@ -17,11 +17,9 @@ class Test1(TestCase):
     testing a post response with status_code 400 that should return false
     """
     @patch(
-        'requests.session',
-        lambda **_kwargs: type("request", (object,),
-                               {"request": lambda *_args, **_kwargs:
-                               type("response", (object,), {"status_code": 401, "url": "test", "text": "error test"})}
-                               )
+        'requests.Session.request',
+        lambda *_args, **_kwargs:
+        type("response", (object,), {"status_code": 401, "url": "test", "text": "error test"})
     )
     def test_download_instance_status_400(*_args):
         """
@@ -41,11 +39,9 @@ class Test2(TestCase):
     testing a post response with json payload and a status_code 400 that should return false
     """
     @patch(
-        'requests.session',
-        lambda **_kwargs: type("request", (object,),
-                               {"request": lambda *_args, **_kwargs:
-                               type("response", (object,), {"status_code": 401, "url": "test", "text": "error test"})}
-                               )
+        'requests.Session.request',
+        lambda *_args, **_kwargs:
+        type("response", (object,), {"status_code": 401, "url": "test", "text": "error test"})
     )
     def test_download_instance_post_json_status_400(*_args):
         """
@@ -65,11 +61,9 @@ class Test3(TestCase):
     testing a post response with status_code 500 that should return false
     """
     @patch(
-        'requests.session',
-        lambda **_kwargs: type("request", (object,),
-                               {"request": lambda *_args, **_kwargs:
-                               type("response", (object,), {"status_code": 500, "url": "test", "text": "error test"})}
-                               )
+        'requests.Session.request',
+        lambda *_args, **_kwargs:
+        type("response", (object,), {"status_code": 500, "url": "test", "text": "error test"})
     )
     def test_download_instance_status_500(*_args):
         """
@@ -89,11 +83,9 @@ class Test4(TestCase):
     testing a post response with status_code 429 that should return false
     """
     @patch(
-        'requests.session',
-        lambda **_kwargs: type("request", (object,),
-                               {"request": lambda *_args, **_kwargs:
-                               type("response", (object,), {"status_code": 429, "url": "test", "text": "error test"})}
-                               )
+        'requests.Session.request',
+        lambda *_args, **_kwargs:
+        type("response", (object,), {"status_code": 429, "url": "test", "text": "error test"})
     )
     def test_download_instance_status_429(*_args):
         """
@@ -113,11 +105,8 @@ class Test5(TestCase):
     testing a post response with read timeout that should return false
     """
     @patch(
-        'requests.session',
-        lambda **_kwargs: type("request", (object,),
-                               {"request": lambda *_args, **_kwargs:
-                               mock_requests_read_timeout()}
-                               )
+        'requests.Session.request',
+        mock_requests_read_timeout
     )
     def test_request_instance_handle_read_timeout(*_args):
         """
@@ -137,11 +126,8 @@ class Test6(TestCase):
     testing a post response with connection timeout that should return false
     """
     @patch(
-        'requests.session',
-        lambda **_kwargs: type("request", (object,),
-                               {"request": lambda *_args, **_kwargs:
-                               mock_requests_connection_timeout()}
-                               )
+        'requests.Session.request',
+        mock_requests_connection_timeout
     )
     def test_request_instance_handle_connection_timeout(*_args):
         """
@@ -161,11 +147,8 @@ class Test7(TestCase):
     testing a post response with connection error that should return false
     """
     @patch(
-        'requests.session',
-        lambda **_kwargs: type("request", (object,),
-                               {"request": lambda *_args, **_kwargs:
-                               mock_requests_connection_error()}
-                               )
+        'requests.Session.request',
+        mock_requests_connection_error
     )
     def test_request_instance_handle_connection_error(*_args):
         """
@@ -185,8 +168,8 @@ class Test8(TestCase):
     testing a non-session post response with json payload a status_code 400 that should return false
     """
     @patch(
-        'requests.request',
-        lambda **_kwargs: type("response", (object,), {"status_code": 401, "url": "test", "text": "error test"})
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("response", (object,), {"status_code": 401, "url": "test", "text": "error test"})
     )
     def test_download_instance_no_session_post_json_status_400(*_args):
         """
@@ -83,6 +83,7 @@ def test_timestamp_format_scenarios(time_str, expected_value):
 @patch(
     "requests.session"
 )
+@patch('time.sleep', lambda *_args: None)
 def test_generate_api_tokens_api_authentication_error(*_args, **_kwargs):
     """
     requirement: of any of the login steps result in a connection error, a ApiAuthenticationError should be raised
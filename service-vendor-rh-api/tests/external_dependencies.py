@@ -230,6 +230,7 @@ class MockRhApiClient:
         self.bugs = []
         self.logger = logger
         self.sn_query_cache = {}
+        self.planned_cis = {}
         self.sn_versions = []
         self.vendor_id = vendor_id
 
@@ -15,7 +15,11 @@ class Test(TestCase):
 ########################################################################################################################
 #                                         request_instance                                                             #
 ########################################################################################################################
-    @patch('requests.request', lambda **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"})
+    )
+    @patch('time.sleep', lambda *_args: None)
     def test_download_instance_status_400(*_args):
         """
         post response with status_code 400 that should return false
@@ -26,8 +30,8 @@ class Test(TestCase):
         assert not download_instance(link="test", headers="")
 
     @patch(
-        'requests.request',
-        lambda **_kwargs: type("request", (object,), {"status_code": 401, "url": "test", "text": ""})
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 401, "url": "test", "text": ""})
     )
     def test_download_instance_status_401(*_args):
         """
@@ -38,7 +42,11 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", headers="", retry=1, timeout=1)
 
-    @patch('requests.request', lambda **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"})
+    )
+    @patch('time.sleep', lambda *_args: None)
     def test_download_instance_status_500(*_args):
         """
         post response with status_code 400 that should return false
@@ -48,7 +56,7 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", headers="")
 
-    @patch('requests.request', mock_requests_read_timeout)
+    @patch('requests.Session.request', mock_requests_read_timeout)
     def test_request_instance_handle_read_timeout(*_args):
         """
         force readTimeout for handling exception that should return false to the caller
@@ -58,7 +66,7 @@ class Test(TestCase):
         from download_manager import download_instance
         assert not download_instance(link="test", retry=1, headers="")
 
-    @patch('requests.request', mock_requests_connection_timeout)
+    @patch('requests.Session.request', mock_requests_connection_timeout)
     def test_request_instance_handle_connection_timeout(*_args):
         """
         force connectionTimeout for handling exception that should return false to the caller
@@ -69,7 +77,7 @@ class Test(TestCase):
         assert not download_instance(link="test", retry=1, headers="")\
 
 
-    @patch('requests.request', mock_requests_connection_error)
+    @patch('requests.Session.request', mock_requests_connection_error)
     def test_request_instance_handle_connection_error(*_args):
         """
         force ConnectionError for handling exception that should return false to the caller
@@ -80,8 +88,8 @@ class Test(TestCase):
         assert not download_instance(link="test", retry=1, headers="")
 
     @patch(
-        'requests.request',
-        lambda **_kwargs: type("request", (object,), {"status_code": 401, "url": "test", "text": ""})
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 401, "url": "test", "text": ""})
            )
     def test_request_instance_w_json_error(*_args):
         """
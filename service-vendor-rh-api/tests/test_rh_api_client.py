@@ -441,3 +441,31 @@ def test_generate_api_search_url(
     )
     assert search_url == expected_search_url
     del sys.modules['vendor_rh_api_client']
+
+
+########################################################################################################################
+#                                                fork_api_client                                                       #
+########################################################################################################################
+@patch.dict(os.environ, mock_env())
+@patch('boto3.Session')
+def test_fork_api_client(*_args):
+    """
+    requirement: products processed concurrently by the product pipeline do not share the mutable client state
+    mock: boto3 session
+    description: the forked clients have their own bug ids, bugs and planned CIs and share the other attributes
+    :return:
+    """
+    import importlib
+    from vendor_rh_api_client import RedHatApiClient
+    product_pipeline = importlib.import_module("service-common.python.lib.product_pipeline")
+    api_client = RedHatApiClient(vendor_id="rh")
+    api_client.planned_cis = {"cmdb_ci_spkg": []}
+    forks = [product_pipeline.fork_api_client(api_client) for _ in range(2)]
+    forks[0].bug_ids.add("1")
+    forks[0].bugs.append({"bugId": "1"})
+    forks[0].planned_cis["cmdb_ci_spkg"] = [{"sys_id": "1"}]
+    assert api_client.bug_ids == forks[1].bug_ids == set() and api_client.bugs == forks[1].bugs == []
+    assert api_client.planned_cis == forks[1].planned_cis == {"cmdb_ci_spkg": []}
+    assert all(x.secret_manager_client is api_client.secret_manager_client and x.logger is api_client.logger
+               for x in forks)
+    del sys.modules['vendor_rh_api_client']
@@ -1,8 +1,12 @@
 """
 unit testing for vendor_rh_bug_service
 """
+import contextlib
+import datetime
+import json
 import os
 import sys
+import time
 from unittest.mock import patch
 
 from tests.external_dependencies import mock_env, mock_operational_error
@@ -16,6 +20,7 @@ from tests.external_dependencies import mock_env, mock_operational_error
 @patch('db_client.Database.create_session', lambda *args, **kwargs: mock_operational_error())
 @patch('db_client.Database.get_vendor_config', lambda **kwargs: mock_operational_error())
 @patch('vendor_rh_api_client.RedHatApiClient.sn_sync')
+@patch('vendor_rh_api_client.RedHatApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('vendor_rh_api_client.RedHatApiClient.bug_zero_vendor_status_update')
 @patch('boto3.client')
 def test_initiate_operation_error(*_args):
@@ -41,6 +46,7 @@ def test_initiate_operation_error(*_args):
 @patch('db_client.Database.create_session', lambda *args, **kwargs: True)
 @patch('db_client.Database.get_vendor_config', lambda *args, **kwargs: False)
 @patch('vendor_rh_api_client.RedHatApiClient.sn_sync')
+@patch('vendor_rh_api_client.RedHatApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('vendor_rh_api_client.RedHatApiClient.bug_zero_vendor_status_update')
 @patch('boto3.client')
 def test_initiate_vendor_config_missing(*_args):
@@ -64,6 +70,7 @@ def test_initiate_vendor_config_missing(*_args):
 
 @patch.dict(os.environ, mock_env())
 @patch('vendor_rh_api_client.RedHatApiClient.sn_sync')
+@patch('vendor_rh_api_client.RedHatApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('vendor_rh_api_client.RedHatApiClient.bug_zero_vendor_status_update')
 @patch('db_client.Database.create_session', lambda *args, **kwargs: True)
 @patch('db_client.Database.get_vendor_config', lambda *args, **kwargs: True)
@@ -90,6 +97,7 @@ def test_initiate_vendor_vendor_disabled(*_args):
 
 @patch.dict(os.environ, mock_env())
 @patch('vendor_rh_api_client.RedHatApiClient.sn_sync')
+@patch('vendor_rh_api_client.RedHatApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('vendor_rh_api_client.RedHatApiClient.bug_zero_vendor_status_update')
 @patch('db_client.Database.create_session', lambda *args, **kwargs: True)
 @patch(
@@ -122,6 +130,7 @@ def test_initiate_missing_sn_config_variables(*_args):
 @patch('db_client.Database.get_vendor_status', lambda *args, **kwargs: True)
 @patch('db_client.Database.get_managed_products', lambda *args, **kwargs: [])
 @patch('vendor_rh_api_client.RedHatApiClient.sn_sync', lambda *args, **kwargs: {})
+@patch('vendor_rh_api_client.RedHatApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('vendor_rh_api_client.RedHatApiClient.bug_zero_vendor_status_update')
 @patch('boto3.client')
 def test_initiate_sync_empty(*_args):
@@ -144,3 +153,207 @@ def test_initiate_sync_empty(*_args):
     assert execution_message["message"] == 'no active SN CIs matching enabled managed products were found'
     # remove mocks import to prevent interference with other tests
     del sys.modules['vendor_rh_api_client']
+
+
+
+@contextlib.contextmanager
+def mock_rh_products(on_get_bugs=None):
+    """
+    run initiate on 4 products with a sqlite managedProducts table - the first product has no SN CIs, every other
+    product gets a single bug named after the product
+    :param on_get_bugs: optional callable(product name) called by get_bugs
+    :return: (initiate, {bug id: managedProduct id}, remove_non_active_managed_products kwargs, managedProducts query)
+    """
+    import tempfile
+    from sqlalchemy import Boolean, Column, DateTime, Integer, JSON, String, create_engine
+    from sqlalchemy.orm import declarative_base, sessionmaker
+    import vendor_rh_bug_service
+    from vendor_rh_supported_products import supported_products
+
+    base = declarative_base()
+
+    class ManagedProduct(base):  # pylint: disable=too-few-public-methods
+        __tablename__ = "managedProducts"
+        id = Column(Integer, primary_key=True)
+        name = Column(String(64))
+        isDisabled = Column(Boolean, default=False)
+        lastExecution = Column(DateTime)
+        vendorPriorities = Column(JSON, default=[])
+        vendorStatuses = Column(JSON, default=[])
+        vendorData = Column(JSON, default={"vendorResolutions": []})
+
+    products = [x for x in supported_products if x["majorVersion"] == 2][:1] + \
+               [x for x in supported_products if x["majorVersion"] != 2][:3]
+    inserted = {}
+    removed = {}
+
+    def get_bugs(_self, product_name, **_kwargs):
+        if on_get_bugs is not None:
+            on_get_bugs(product_name)
+        return [{"bugId": product_name}]
+
+    def insert_bug_updates(_self, bugs, **_kwargs):
+        inserted.update({x["bugId"]: x["managedProductId"] for x in bugs})
+        return {"updated_bugs": 0, "inserted_bugs": len(bugs), "skipped_bugs": 0}
+
+    def remove_non_active_managed_products(_self, **kwargs):
+        removed.update(kwargs)
+        return 0
+
+    def initiate(event=""):
+        return vendor_rh_bug_service.initiate(event, type("MockContext", (object,), {
+            "log_stream_name": "test", "function_name": "dev-vendor-rh-bug-service",
+            "log_group_name": "dev-vendor-rh-bug-service",
+            "get_remaining_time_in_millis": lambda *_args, **_kwargs: 900000
+        }))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{tmp_dir}/rh.db", connect_args={"check_same_thread": False})
+        base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        session.add_all([ManagedProduct(id=i + 10, name=x["value"]) for i, x in enumerate(products)])
+        session.commit()
+
+        def database_init(self, *_args, **_kwargs):
+            self.conn = sessionmaker(bind=engine)()
+
+        with patch('db_client.Database.__init__', new=database_init), \
+                patch('db_client.Database.get_managed_products',
+                      lambda self, **kwargs: self.conn.query(ManagedProduct).all()), \
+                patch('db_client.Database.insert_bug_updates', new=insert_bug_updates), \
+                patch(
+                    'db_client.Database.remove_non_active_managed_products', new=remove_non_active_managed_products
+                ), \
+                patch('vendor_rh_api_client.RedHatApiClient.get_bugs', new=get_bugs), \
+                patch.object(vendor_rh_bug_service, "supported_products", products):
+            yield initiate, inserted, removed, session.query(ManagedProduct)
+        session.close()
+        engine.dispose()
+
+
+@patch.dict(os.environ, {**mock_env(), "BUG_EVENT_PROCESSOR_SERVICE_NAME": "test", "SERVICE_SNS_TOPIC_ARN": "test"})
+@patch('db_client.Database.create_session', lambda *args, **kwargs: True)
+@patch(
+    'db_client.Database.get_vendor_config',
+    lambda *args, **kwargs: type("mockConfig", (object,), {"value": {
+        "daysBack": 10, "vendorPriorities": [], "vendorStatuses": [], "vendorResolutions": [], "snApiUrl": True,
+        "secretId": True
+    }})
+)
+@patch('db_client.Database.get_vendor_status', lambda *args, **kwargs: True)
+@patch('db_client.Database.update_managed_product_versions', lambda *args, **kwargs: True)
+@patch('vendor_rh_api_client.RedHatApiClient.get_aws_secret_value', lambda *args, **kwargs: {"user": "", "pass": ""})
+@patch('vendor_rh_api_client.RedHatApiClient.plan_sn_queries', lambda *args, **kwargs: None)
+@patch(
+    'vendor_rh_api_client.RedHatApiClient.sn_sync',
+    lambda self, query_product, **kwargs: {
+        **query_product, "sn_ci_versions": [] if query_product["majorVersion"] == 2 else ["7.1.1"]
+    }
+)
+@patch('vendor_rh_api_client.RedHatApiClient.generate_api_search_url', lambda self, name, **kwargs: name)
+@patch(
+    'vendor_rh_api_client.RedHatApiClient.format_bug_entry',
+    lambda self, bugs, managed_product, **kwargs: [{**x, "managedProductId": managed_product.id} for x in bugs]
+)
+@patch('vendor_rh_api_client.RedHatApiClient.bug_description_multi_processing', lambda self, bugs, **kwargs: bugs)
+@patch('vendor_rh_api_client.RedHatApiClient.bug_zero_vendor_status_update')
+@patch('boto3.client')
+def test_initiate_concurrent_products(*_args):
+    """
+    requirement: managed products are processed concurrently, each with its own db session and api client copy, and
+                 the counters and active managedProduct ids are the ones of a sequential run
+    mock: mock_rh_products, 4 pipeline workers, the first product with SN CIs is slower than the others
+    description: the bugs of every product are inserted with its own managedProduct, the lastExecution of the products
+                 with CIs is committed and the active managedProduct ids are in the products order
+    :return:
+    """
+    import vendor_rh_bug_service
+
+    def on_get_bugs(product_name):
+        if product_name == "Red Hat Enterprise Linux 3":
+            time.sleep(0.2)
+
+    with mock_rh_products(on_get_bugs=on_get_bugs) as (initiate, inserted, removed, managed_products), \
+            patch.object(vendor_rh_bug_service.product_pipeline, "WORKERS", 4):
+        assert initiate()["message"] == '3 new bugs published'
+        assert inserted == {
+            "Red Hat Enterprise Linux 3": 11, "Red Hat Enterprise Linux 4": 12, "Red Hat Enterprise Linux 5": 13
+        }
+        assert removed["active_managed_product_ids"] == [11, 12, 13]
+        assert {x.id for x in managed_products if x.lastExecution} == {11, 12, 13}
+        assert all(
+            x.lastExecution > datetime.datetime.utcnow() - datetime.timedelta(minutes=1)
+            for x in managed_products if x.lastExecution
+        )
+    # remove mocks import to prevent interference with other tests
+    del sys.modules['vendor_rh_bug_service']
+    del sys.modules['vendor_rh_api_client']
+
+
+@patch.dict(os.environ, {**mock_env(), "BUG_EVENT_PROCESSOR_SERVICE_NAME": "test", "SERVICE_SNS_TOPIC_ARN": "test"})
+@patch('db_client.Database.create_session', lambda *args, **kwargs: True)
+@patch(
+    'db_client.Database.get_vendor_config',
+    lambda *args, **kwargs: type("mockConfig", (object,), {"value": {
+        "daysBack": 10, "vendorPriorities": [], "vendorStatuses": [], "vendorResolutions": [], "snApiUrl": True,
+        "secretId": True
+    }})
+)
+@patch('db_client.Database.get_vendor_status', lambda *args, **kwargs: True)
+@patch('db_client.Database.update_managed_product_versions', lambda *args, **kwargs: True)
+@patch('vendor_rh_api_client.RedHatApiClient.get_aws_secret_value', lambda *args, **kwargs: {"user": "", "pass": ""})
+@patch('vendor_rh_api_client.RedHatApiClient.plan_sn_queries', lambda *args, **kwargs: None)
+@patch(
+    'vendor_rh_api_client.RedHatApiClient.sn_sync',
+    lambda self, query_product, **kwargs: {
+        **query_product, "sn_ci_versions": [] if query_product["majorVersion"] == 2 else ["7.1.1"]
+    }
+)
+@patch('vendor_rh_api_client.RedHatApiClient.generate_api_search_url', lambda self, name, **kwargs: name)
+@patch(
+    'vendor_rh_api_client.RedHatApiClient.format_bug_entry',
+    lambda self, bugs, managed_product, **kwargs: [{**x, "managedProductId": managed_product.id} for x in bugs]
+)
+@patch('vendor_rh_api_client.RedHatApiClient.bug_description_multi_processing', lambda self, bugs, **kwargs: bugs)
+@patch('vendor_rh_api_client.RedHatApiClient.bug_zero_vendor_status_update')
+@patch('boto3.client')
+def test_initiate_deferred_products_resume(*_args):
+    """
+    requirement: products whose projected cost does not fit in the lambda time left are deferred to the next run, the
+                 next run starts from the first deferred product
+    mock: mock_rh_products, a memory checkpoint store, the first product with SN CIs raising the projected product cost
+          of the first run
+    description: the first run inserts the bugs of one product, keeps the managedProducts and checkpoints the first
+                 deferred product, the second run processes the deferred products first and removes the checkpoint
+    :return:
+    """
+    import vendor_rh_bug_service
+    deadline_scheduler = vendor_rh_bug_service.deadline_scheduler
+    store = deadline_scheduler.kv_store.MemoryStore()
+    schedulers = []
+
+    class RecordedScheduler(deadline_scheduler.DeadlineScheduler):  # pylint: disable=too-few-public-methods
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            schedulers.append(self)
+
+    def on_get_bugs(_product_name):
+        if len(schedulers) == 1:
+            schedulers[0].costs["product"] = 1000000
+
+    with mock_rh_products(on_get_bugs=on_get_bugs) as (initiate, inserted, removed, managed_products), \
+            patch.object(deadline_scheduler, "DeadlineScheduler", RecordedScheduler), \
+            patch.object(deadline_scheduler, "get_store", lambda: store):
+        assert initiate()["message"] == '1 new bugs published'
+        assert inserted == {"Red Hat Enterprise Linux 3": 11}
+        assert not removed and json.loads(store.get("rh"))["product_index"] == 2
+
+        inserted.clear()
+        assert initiate()["message"] == '2 new bugs published'
+        assert inserted == {"Red Hat Enterprise Linux 4": 12, "Red Hat Enterprise Linux 5": 13}
+        assert removed["active_managed_product_ids"] == [11, 12, 13]
+        assert store.get("rh") is None
+        assert {x.id for x in managed_products if x.lastExecution} == {11, 12, 13}
+    # remove mocks import to prevent interference with other tests
+    del sys.modules['vendor_rh_bug_service']
+    del sys.modules['vendor_rh_api_client']
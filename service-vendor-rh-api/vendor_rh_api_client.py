@@ -11,8 +11,6 @@ import logging.config
 import math
 import os
 import sys
-import threading
-from queue import Queue
 
 import boto3
 import lxml.html
@@ -31,6 +29,10 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
+cmdb_reader = importlib.import_module("service-common.python.lib.cmdb_reader")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
+cmdb_query_planner = importlib.import_module("service-common.python.lib.cmdb_query_planner")
 
 
 class RedHatApiClient:
@@ -52,6 +54,8 @@ class RedHatApiClient:
         self.bugs = []
         self.logger = logger
         self.sn_versions = []
+        # CIs of the batched product queries by (table, sysparm_query)
+        self.planned_cis = {}
         self.vendor_id = vendor_id
         self.secret_manager_client = boto3.Session().client("secretsmanager")
 
@@ -308,65 +312,56 @@ class RedHatApiClient:
 
         return formatted_bugs
 
-    def get_bug_description_from_html(self, q):  # pragma: no cover => function not used
+    def get_bug_description_from_html(self, bug):  # pragma: no cover => function not used
         """
-
-        :param q:
-        :return:
+        download HTML and parse out the first comment as the description field
+        :param bug:
+        :return: the bug entry
         """
-        def download_description(bug):
-            """
-            download HTML and parse out the first comment as the description field
-            :param bug:
-            :return:
-            """
-            self.logger.info(
-                f"'{bug['vendorData']['vendorProductName']}' - bug '{bug['bugUrl']}' description retrieved"
-            )
-            response = download_instance(link=bug['bugUrl'], headers=False)
-            if not response:
-                self.logger.error(f"'{bug['vendorData']['vendorProductName']}' - bug '{bug['bugId']}' download failed")
-                return
-
-            root = lxml.html.fromstring(response.text)
-            description_container = root.xpath('//div[@id="c0"]/*[@class="bz_comment_text"]')
-            first_comment_container = root.xpath('//div[@id="c1"]/*[@class="bz_comment_text"]')
+        self.logger.info(
+            f"'{bug['vendorData']['vendorProductName']}' - bug '{bug['bugUrl']}' description retrieved"
+        )
+        response = download_instance(link=bug['bugUrl'], headers=False)
+        if not response:
+            self.logger.error(f"'{bug['vendorData']['vendorProductName']}' - bug '{bug['bugId']}' download failed")
+            return bug
 
-            if not description_container and not first_comment_container:
-                self.logger.error(
-                    f"'{bug['vendorData']['vendorProductName']}' - bug '{bug['bugUrl']}' description parse error"
-                )
-                description = f"For more details please visit: {bug['bugUrl']}"
-            elif description_container:
-                description = etree.tostring(description_container[0], pretty_print=True).decode("utf-8")
-            else:
-                description = etree.tostring(first_comment_container[0], pretty_print=True).decode("utf-8")
-            bug["description"] = description
+        root = lxml.html.fromstring(response.text)
+        description_container = root.xpath('//div[@id="c0"]/*[@class="bz_comment_text"]')
+        first_comment_container = root.xpath('//div[@id="c1"]/*[@class="bz_comment_text"]')
 
-        while not q.empty():
-            queue = q.get()
-            download_description(bug=queue)
-            q.task_done()
+        if not description_container and not first_comment_container:
+            self.logger.error(
+                f"'{bug['vendorData']['vendorProductName']}' - bug '{bug['bugUrl']}' description parse error"
+            )
+            description = f"For more details please visit: {bug['bugUrl']}"
+        elif description_container:
+            description = etree.tostring(description_container[0], pretty_print=True).decode("utf-8")
+        else:
+            description = etree.tostring(first_comment_container[0], pretty_print=True).decode("utf-8")
+        bug["description"] = description
+        return bug
 
     @pytest.mark.skip(reason="nothing to test here")
     def bug_description_multi_processing(self, bugs, num_threads=30):  # pragma: no cover
         """
-        multi-processing manager to retrieve bugs_description
+        retrieve the bugs description with the shared crawl engine
         :param bugs:
-        :param num_threads:
+        :param num_threads: max concurrent bug page downloads
         :return:
         """
-        # self.bugs = []
-        q = Queue()
-
-        for bug in bugs:
-            q.put(bug)
-
-        for _ in range(num_threads):
-            t = threading.Thread(target=self.get_bug_description_from_html, args=(q,))
-            t.start()
-
-        q.join()
+        # every bug page is on the bugzilla host
+        engine = crawl_engine.CrawlEngine(concurrency=num_threads, host_concurrency=num_threads, logger=self.logger)
+        crawl_results = engine.run(
+            items=bugs, handler=self.get_bug_description_from_html,
+            host=lambda bug: crawl_engine.url_host(bug["bugUrl"])
+        )
+        for crawl_result in crawl_results:
+            if crawl_result.error:
+                self.logger.error(
+                    f"'{crawl_result.item['vendorData']['vendorProductName']}' - bug '{crawl_result.item['bugId']}' "
+                    f"description crawl failed | {crawl_result.error}"
+                )
         return bugs
 
     @staticmethod
@@ -394,6 +389,34 @@ class RedHatApiClient:
             return fmt_time
         return time_str
 
+    def plan_sn_queries(self, query_products, sn_api_url, sn_auth_token, sn_ci_query_base):
+        """
+        run the sn_sync queries of all the products with one ^NQ query per SN table, sn_sync uses the planned CIs
+        instead of a request per product. products with queries that can not be batched and failed batches fall back
+        to the per product query
+        :param query_products:
+        :param sn_api_url:
+        :param sn_auth_token:
+        :param sn_ci_query_base:
+        :return:
+        """
+        reader = cmdb_reader.CmdbReader(
+            download=download_instance, headers={"Authorization": f"Basic {sn_auth_token}"},
+            connection_error=ApiConnectionError, response_error=ApiResponseError, logger=self.logger,
+            cache=cmdb_cache.get_cache()
+        )
+        queries = [
+            (x["service_now_ci_table"], x["sysparm_query"], x["sysparm_fields"]) for x in query_products
+        ]
+        try:
+            self.planned_cis = cmdb_query_planner.run(
+                reader=reader, sn_api_url=sn_api_url, queries=queries, base_query=sn_ci_query_base,
+                logger=self.logger
+            )
+        except (ApiConnectionError, ApiResponseError) as e:
+            self.logger.warning(f"batched SN queries failed, querying every product | {e}")
+            self.planned_cis = {}
+
     def sn_sync(self, query_product, sn_api_url, sn_auth_token, sn_ci_query_base, version_field="os_version"):
         """
         keep managed products software version up to date with the correlating instances in the SN instance
@@ -405,39 +428,25 @@ class RedHatApiClient:
         :param sn_ci_query_base:
         :return:
         """
-        if sn_ci_query_base:
-            sn_ci_query_base = f"^{sn_ci_query_base}"
-        sn_query = f"?sysparm_fields={query_product['sysparm_fields']}&sysparm_query={query_product['sysparm_query']}" \
-                   f"{sn_ci_query_base}"
         query_product["sn_ci_versions"] = []
-        sn_query_url = f"{sn_api_url}/api/now/table/{query_product['service_now_ci_table']}{sn_query}"
-        response = download_instance(
-            link=sn_query_url,
-            headers={"Authorization": f"Basic {sn_auth_token}"}
-        )
-        if not response:
-            self.logger.error(f"SN API connection error - {sn_query_url}")
-            raise ApiConnectionError(
-                url=sn_query_url, internal_message="SN API connection error",
-                event_message="a connection to ServiceNow could not be established - check ServiceNow settings"
+        planned = self.planned_cis.get((query_product["service_now_ci_table"], query_product["sysparm_query"]))
+        if planned is not None:
+            count, instances = len(planned), planned
+        else:
+            if sn_ci_query_base:
+                sn_ci_query_base = f"^{sn_ci_query_base}"
+            sn_query = f"?sysparm_fields={query_product['sysparm_fields']}" \
+                       f"&sysparm_query={query_product['sysparm_query']}{sn_ci_query_base}"
+            sn_query_url = f"{sn_api_url}/api/now/table/{query_product['service_now_ci_table']}{sn_query}"
+            reader = cmdb_reader.CmdbReader(
+                download=download_instance, headers={"Authorization": f"Basic {sn_auth_token}"},
+                connection_error=ApiConnectionError, response_error=ApiResponseError, logger=self.logger,
+                cache=cmdb_cache.get_cache()
             )
-        try:
-            count = int(response.headers["x-total-count"])
-        except KeyError as e:
-            raise ApiResponseError(
-                url=sn_query_url, internal_message="missing 'x-total-count' in sn query response",
-                event_message="ServiceNow query returned a malformed response - check ServiceNow settings"
-            ) from e
+            count, instances = reader.read(sn_query_url)
         if count:
             self.logger.info(
                 f"'{query_product['value']}' - {count} SN CI(s) found")
-            try:
-                instances = json.loads(response.text)["result"]
-            except json.JSONDecodeError as e:
-                raise ApiResponseError(
-                    url=sn_query_url, internal_message="error parsing serviceNow response - check url",
-                    event_message="ServiceNow query returned a malformed response - check ServiceNow settings"
-                ) from e
             versions = set()
 
             for item in instances:
@@ -26,6 +26,10 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
+product_pipeline = importlib.import_module("service-common.python.lib.product_pipeline")
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
+deadline_scheduler = importlib.import_module("service-common.python.lib.deadline_scheduler")
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -54,6 +58,12 @@ def initiate(*_args, **_kwargs):
     # use a signal handler to set an alarm that will invoke
     signal.signal(signal.SIGALRM, timeout_handler)
     signal.alarm((int(_args[1].get_remaining_time_in_millis() / 1000)) - 1)
+    # stop scheduling crawls before the lambda timeout
+    crawl_engine.set_deadline(remaining_ms=_args[1].get_remaining_time_in_millis())
+    # admit products only while their projected cost fits in the time left
+    scheduler = deadline_scheduler.DeadlineScheduler(
+        remaining_ms=_args[1].get_remaining_time_in_millis(), logger=logger
+    )
 
     # service configuration
     vendor_id = "rh"
@@ -163,8 +173,10 @@ def initiate(*_args, **_kwargs):
             vendor_id=vendor_id, managed_products_table=managed_products_table)
         vendor_products = supported_products
 
-        # stores managedProduct IDs for managedProducts with active CIs in SN CMDB
-        active_managed_product_ids = []
+        # the first managedProduct of every name
+        managed_products_by_name = {}
+        for managed_product in managed_products:
+            managed_products_by_name.setdefault(managed_product.name, managed_product)
 
         # global search variables
         rh_config = rh_config.value
@@ -172,22 +184,42 @@ def initiate(*_args, **_kwargs):
         vendor_priorities = rh_config['vendorPriorities']
         vendor_statuses = rh_config['vendorStatuses']
         vendor_resolutions = rh_config['vendorResolutions']
-        for product in vendor_products:
+        # products deferred by the previous run
+        checkpoint = deadline_scheduler.load_checkpoint(vendor_id=vendor_id, logger=logger)
+        # one batched SN query per CI table instead of a query per product
+        rh_api_client.plan_sn_queries(
+            query_products=vendor_products, sn_api_url=sn_api_url, sn_auth_token=sn_auth_token,
+            sn_ci_query_base=sn_ci_query_base
+        )
+        def process_product(product, db_client, rh_api_client, counter):  # pylint: disable=redefined-outer-name
+            """
+            sync a single vendor product and insert its bug updates
+            :param product:
+            :param db_client: product db session
+            :param rh_api_client: product api client
+            :param counter: product counter
+            :return: the managedProduct ID of a product with active CIs or None
+            """
+            # every product starts from the global search variables
+            product_last_execution = last_execution
+            product_vendor_priorities = vendor_priorities
+            product_vendor_statuses = vendor_statuses
+            product_vendor_resolutions = vendor_resolutions
             product = rh_api_client.sn_sync(
                 sn_api_url=sn_api_url, sn_auth_token=sn_auth_token, query_product=product,
                 sn_ci_query_base=sn_ci_query_base
             )
             if not product.get("sn_ci_versions"):
-                continue
+                return None
 
-            managed_product = [x for x in managed_products if product["value"] == x.name]
+            managed_product = managed_products_by_name.get(product["value"])
             if managed_product:
-                managed_product = managed_product[0]
-                active_managed_product_ids.append(managed_product.id)
+                # the managedProducts were loaded by the service session
+                managed_product = product_pipeline.attach(db_client=db_client, instance=managed_product)
                 counter["managed_products"] += 1
                 if managed_product.isDisabled:
                     logger.info(f"'{managed_product.name}' - skipping disabled product")
-                    continue
+                    return managed_product.id
                 if managed_product.lastExecution:
                     if managed_product.lastExecution > last_executed_gap:
                         delta = utc_now - managed_product.lastExecution
@@ -195,20 +227,19 @@ def initiate(*_args, **_kwargs):
                         logger.info(
                             f"'{managed_product.name}' - skipping managedProduct processed {delta_hours} hours ago"
                         )
-                        continue
-                    last_execution = managed_product.lastExecution - datetime.timedelta(days=2)
-                vendor_priorities = managed_product.vendorPriorities
-                vendor_statuses = managed_product.vendorStatuses
-                vendor_resolutions = managed_product.vendorData["vendorResolutions"]
+                        return managed_product.id
+                    product_last_execution = managed_product.lastExecution - datetime.timedelta(days=2)
+                product_vendor_priorities = managed_product.vendorPriorities
+                product_vendor_statuses = managed_product.vendorStatuses
+                product_vendor_resolutions = managed_product.vendorData["vendorResolutions"]
 
             else:
                 managed_product = db_client.create_managed_product(
-                    name=product["value"], vendor_id=vendor_id, vendor_priorities=vendor_priorities,
-                    vendor_resolutions=vendor_resolutions, vendor_statuses=vendor_statuses,
+                    name=product["value"], vendor_id=vendor_id, vendor_priorities=product_vendor_priorities,
+                    vendor_resolutions=product_vendor_resolutions, vendor_statuses=product_vendor_statuses,
                     versions=product["sn_ci_versions"], managed_products_table=managed_products_table
                 )
                 counter["new_managed_products"] += 1
-                active_managed_product_ids.append(managed_product.id)
 
             # ensure that minor versions are converted to major versions
             # 3.3.4 ==> 3.3
@@ -224,10 +255,10 @@ def initiate(*_args, **_kwargs):
         #                                              BUG SERVICE                                                     #
         # ------------------------------------------------------------------------------------------------------------ #
             search_url = rh_api_client.generate_api_search_url(
-                start_date=last_execution.strftime("%Y-%m-%d"),
+                start_date=product_last_execution.strftime("%Y-%m-%d"),
                 end_date=datetime.datetime.utcnow().strftime("%Y-%m-%d"), name=product["value"],
-                vendor_priorities=vendor_priorities, vendor_statuses=vendor_statuses,
-                vendor_resolutions=vendor_resolutions, versions=product["sn_ci_versions"]
+                vendor_priorities=product_vendor_priorities, vendor_statuses=product_vendor_statuses,
+                vendor_resolutions=product_vendor_resolutions, versions=product["sn_ci_versions"]
             )
             product_bugs = rh_api_client.get_bugs(search_url=search_url, product_name=product["value"])
             if product_bugs:
@@ -240,8 +271,6 @@ def initiate(*_args, **_kwargs):
                 # get bug description with a multi-processing manager
                 formatted_bugs = rh_api_client.bug_description_multi_processing(bugs=formatted_bugs)
                 inserts = db_client.insert_bug_updates(bugs=formatted_bugs, bugs_table=bugs_table)
-                if inserts['updated_bugs'] or inserts['inserted_bugs']:
-                    new_bugs_updates = True
                 counter["updated_bugs"] += inserts["updated_bugs"]
                 counter["inserted_bugs"] += inserts["inserted_bugs"]
                 logger.info(f"'{managed_product.name}' - sync completed | {json.dumps(inserts)}")  # pragma: no cover
@@ -250,15 +279,34 @@ def initiate(*_args, **_kwargs):
 
             setattr(managed_product, 'lastExecution', datetime.datetime.utcnow())
             db_client.conn.commit()
+            return managed_product.id
 
-        # remove managedProduct and linked bugs that don't have an active CMDB CI
-        removed_managed_products = db_client.remove_non_active_managed_products(
-            bugs_table=bugs_table, managed_products_table=managed_products_table,
-            active_managed_product_ids=active_managed_product_ids, vendor_id=vendor_id
+        # independent products are processed concurrently, each with its own db session
+        pipeline = product_pipeline.ProductPipeline(
+            db_client=db_client, api_client=rh_api_client, scheduler=scheduler, checkpoint=checkpoint, logger=logger
         )
-
-        counter['removed_managed_products'] += removed_managed_products
+        product_counter, managed_product_ids = pipeline.run(products=vendor_products, process=process_product)
+        for key, value in product_counter.items():
+            counter[key] += value
+        active_managed_product_ids = [x for x in managed_product_ids if x is not None]
+        if counter["updated_bugs"] or counter["inserted_bugs"]:
+            new_bugs_updates = True
+
+        checkpoint.save()
+        scheduler.log_stats()
+
+        if checkpoint.incomplete:
+            # deferred products are not in the active managedProduct IDs
+            logger.info(f"'{vendor_id}' - products deferred to the next run | skipping managedProducts removal")
+        else:
+            # remove managedProduct and linked bugs that don't have an active CMDB CI
+            removed_managed_products = db_client.remove_non_active_managed_products(
+                bugs_table=bugs_table, managed_products_table=managed_products_table,
+                active_managed_product_ids=active_managed_product_ids, vendor_id=vendor_id
+            )
+            counter['removed_managed_products'] += removed_managed_products
         logger.info(f"'{vendor_id}' sync completed - {json.dumps(counter)}")
+        cmdb_cache.log_stats()
 
         # on existing bug updates - trigger the bugEventProcessor
         if new_bugs_updates:
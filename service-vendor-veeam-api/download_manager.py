@@ -1,19 +1,33 @@
 """
 updated 2021-08-23
  add 'method' option to requests
+
+updated 2026-10-18
+ send requests through the pooled service-common http_client with backoff between retries
+ extra_headers are added to the headers, 304 responses to conditional GETs are returned
 """
+import importlib
+import inspect
 import logging
+import os
+import sys
 
 import requests
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+http_client = importlib.import_module("service-common.python.lib.http_client")
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
-def download_instance(link, headers, json=False, method='GET', retry=10, timeout=10):
+def download_instance(link, headers, json=False, method='GET', retry=10, timeout=10, extra_headers=None):
     """
     simple http downloader
     :param link:
+    :param extra_headers: added to the headers e.g. If-None-Match for conditional GETs
     :param retry:
     :param method:
     :param json:
@@ -22,12 +36,17 @@ def download_instance(link, headers, json=False, method='GET', retry=10, timeout
     :return:
     """
     tries = 0
+    if extra_headers:
+        headers = {**(headers or {}), **extra_headers}
     while tries < retry:
         try:
             if json:
-                request = requests.request(method=method, url=link, timeout=timeout, headers=headers, json=json)
+                request = http_client.request(method=method, url=link, timeout=timeout, headers=headers, json=json)
             else:
-                request = requests.request(method=method, url=link, timeout=timeout, headers=headers)
+                request = http_client.request(method=method, url=link, timeout=timeout, headers=headers)
+
+            if request.status_code == 304 and extra_headers:
+                return request
 
             if request.status_code in [404, 401, 403]:
                 logger.error(
@@ -45,18 +64,22 @@ def download_instance(link, headers, json=False, method='GET', retry=10, timeout
                     )
                 )
                 tries += 1
+                http_client.backoff(attempt=tries, retry=retry, response=request, logger=logger)
                 continue
 
             return request
 
         except requests.exceptions.ReadTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectionError:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
 
     logger.error(f"{link}: Download failed with with max retires")
@@ -767,6 +767,7 @@ class MockVeeamApiClient:
         self.logger = logger
         self.service_now_ci_table = ""
         self.sn_query_cache = {}
+        self.planned_cis = {}
         self.sn_versions = []
         self.vendor_id = vendor_id
         self.thread_error_tracker = 0
@@ -787,6 +788,10 @@ class MockVeeamApiClient:
     def timestamp_format(_time_str):
         return datetime.datetime.now()
 
+    def kb_listing_entry(self, kb, managed_product):
+        from vendor_veeam_api_client import VeeamApiClient
+        return VeeamApiClient.kb_listing_entry(self, kb=kb, managed_product=managed_product)
+
 
 class MockDbClient:
     """
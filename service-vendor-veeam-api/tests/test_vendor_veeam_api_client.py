@@ -98,7 +98,10 @@ def test_bug_zero_vendor_status_update(*_args):
 #                                                          sn_sync                                                     #
 ########################################################################################################################
 @patch.dict(os.environ, mock_env())
-@patch('requests.request', lambda **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"}))
+@patch(
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,), {"status_code": 500, "url": "test"})
+)
 def test_sn_sync_api_connection_error(**_kwargs):
     """
     requirement: if serviceNow API request fails a custom ApiConnectionError should be raised
@@ -126,7 +129,7 @@ def test_sn_sync_api_connection_error(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 200, "url": "test", "text": b'non-json-string', "headers": {"x-total-count": 1}})
 )
@@ -158,8 +161,8 @@ def test_sn_sync_api_response_error(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request',
-    lambda **_kwargs: type("request", (object,),
+    'requests.Session.request',
+    lambda *_args, **_kwargs: type("request", (object,),
                            {"status_code": 200, "url": "test", "text": b'non-json-string', "headers": {}})
 )
 def test_sn_sync_api_response_missing_count_header(**_kwargs):
@@ -189,8 +192,8 @@ def test_sn_sync_api_response_missing_count_header(**_kwargs):
 
 
 @patch.dict(os.environ, mock_env())
-@patch('requests.request',
-       lambda **_kwargs: type("request", (object,), {
+@patch('requests.Session.request',
+       lambda *_args, **_kwargs: type("request", (object,), {
            "status_code": 200, "url": "test",
            "text": b'{"result": [{"os_version": 1.1}, {"os_version": 2.2}, {"os_version": 3.3}, {"os_version": 4.4}]}',
            "headers": {"x-total-count": 4}
@@ -219,7 +222,7 @@ def test_sn_sync_api(**_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 200, "url": "test",  "text": b'{"result": []}', "headers": {"x-total-count": 0}
     })
@@ -285,11 +288,12 @@ def test_timestamp_format_scenarios(time_str, expected_value):
 ########################################################################################################################
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 400, "url": "test",  "text": b'{"result": []}'
     })
 )
+@patch('time.sleep', lambda *_args: None)
 def test_get_kb_article_links_api_connection_error(*_args, **_kwargs):
     """
     requirement: retrieve all kb article for a given product from https://www.veeam.com/services/kb-articles
@@ -317,7 +321,7 @@ def test_get_kb_article_links_api_connection_error(*_args, **_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 200, "url": "test",  "text": b'non json'
     })
@@ -349,7 +353,7 @@ def test_get_kb_article_links_api_response_error(*_args, **_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 200, "url": "test", "text": b'{"result": []}'
     })
@@ -381,7 +385,7 @@ def test_get_kb_article_links_api_response_missing_field(*_args, **_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 200, "url": "test",
         "text": '{"articles": ' + f"{list(range(10))}" + ', "totalSize": 20}'})
@@ -413,11 +417,12 @@ def test_get_kb_article_link_pagination(*_args, **_kwargs):
 ########################################################################################################################
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 400, "url": "test", "text": ''}
          )
 )
+@patch('time.sleep', lambda *_args: None)
 def test_crawl_vendor_products_connection_error(*_args, **_kwargs):
     """
     requirement: retrieve all vendor products from https://www.veeam.com/knowledge-base.html
@@ -437,7 +442,7 @@ def test_crawl_vendor_products_connection_error(*_args, **_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 200, "url": "test", "text": '<html><body><div>nothing here</div></body></html>'}
          )
@@ -461,7 +466,7 @@ def test_crawl_vendor_products_response_error(*_args, **_kwargs):
 
 @patch.dict(os.environ, mock_env())
 @patch(
-    'requests.request', lambda **_kwargs:
+    'requests.Session.request', lambda *_args, **_kwargs:
     type("request", (object,), {
         "status_code": 200, "url": "test",
         "text": '<html><body><select name="product"><option value="prod_1">product_1</option></select></body></html>'}
@@ -595,3 +600,50 @@ def test_parse_kb_html(*_args, **_kwargs):
     kb_data = VeeamApiClient.parse_kb_html(
         self=MockVeeamApiClient(), managed_product=mock_just_processed_managed_product[0], kb=kb, html=mock_kb_html)
     assert kb_data.get("description", None)
+
+
+########################################################################################################################
+#                                                kb_html_scraper                                                       #
+########################################################################################################################
+@patch.dict(os.environ, mock_env())
+def test_kb_html_scraper_kb_cache(*_args, **_kwargs):
+    """
+    requirement: cached kb articles are downloaded with a conditional GET on every scrape, the listing date ( a
+                 publish date ) does not reuse the cached fields without a download
+    mock: kb entry, kb html, download_instance, kv_store.MemoryStore kb cache, managed_product
+    description: the first scrape downloads and parses the kb, the next scrapes send If-Modified-Since and reuse the
+                 cached fields on 304, a changed page is parsed again
+    :return:
+    """
+    import importlib
+    from vendor_veeam_api_client import VeeamApiClient
+    kb_cache = importlib.import_module("service-common.python.lib.kb_cache")
+    kv_store = importlib.import_module("service-common.python.lib.kv_store")
+    client = VeeamApiClient.__new__(VeeamApiClient)
+    client.__dict__.update(MockVeeamApiClient().__dict__)
+    kb = {
+        "id": "kb4234", "title": "Veeam ONE version 10/10a impact on VMware vSAN", "url": "/kb4234",
+        "product": [{"name": "Veeam ONE", "version": 116, "versionName": "Veeam ONE 10"}], "date": "2/11/2021"
+    }
+    downloads = []
+    modified = {"page": False}
+
+    def download(link, headers, extra_headers=None):
+        downloads.append(extra_headers)
+        status_code = 304 if extra_headers and not modified["page"] else 200
+        return type("request", (object,), {
+            "status_code": status_code, "text": mock_kb_html, "headers": {"Last-Modified": "Thu, 11 Feb 2021"}
+        })
+
+    cache = kb_cache.KbCache(store=kv_store.MemoryStore())
+    managed_product = mock_just_processed_managed_product[0]
+    with patch("vendor_veeam_api_client.download_instance", download):
+        bug = VeeamApiClient.kb_html_scraper(self=client, kb=kb, managed_product=managed_product, cache=cache)
+        assert bug["description"] and bug["bugId"] == "kb4234" and downloads == [{}]
+        assert VeeamApiClient.kb_html_scraper(self=client, kb=kb, managed_product=managed_product, cache=cache) == bug
+        assert downloads[-1] == {"If-Modified-Since": "Thu, 11 Feb 2021"}
+
+        modified["page"] = True
+        assert VeeamApiClient.kb_html_scraper(self=client, kb=kb, managed_product=managed_product, cache=cache) == bug
+        assert len(downloads) == 3
+    assert cache.stats == {"not_modified": 1, "parsed": 2, "failed": 0}
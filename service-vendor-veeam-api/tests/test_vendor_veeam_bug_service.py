@@ -1,7 +1,11 @@
 """
 unit testing for vendor_veeam_bug_service
 """
+import contextlib
+import datetime
+import json
 import os
+import time
 from unittest.mock import patch
 
 from tests.external_dependencies import mock_env, mock_operational_error, \
@@ -140,6 +144,7 @@ def test_initiate_missing_sn_config_variables(*_args):
         "sysparm_query": f"install_status=1^operational_status=1^nameSTARTSWITHtest%20product"
     }]
 )
+@patch('vendor_veeam_api_client.VeeamApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('vendor_veeam_api_client.VeeamApiClient.sn_sync', lambda *args, **kwargs: mock_sn_ci_query_response_json_empty)
 @patch('vendor_veeam_api_client.VeeamApiClient.bug_zero_vendor_status_update')
 @patch('boto3.client')
@@ -173,6 +178,7 @@ def test_initiate_sn_no_cis(*_args):
 )
 @patch('db_client.Database.get_vendor_settings', lambda *args, **kwargs: True)
 @patch('db_client.Database.get_managed_products', lambda *args, **kwargs: mock_just_processed_managed_product)
+@patch('vendor_veeam_api_client.VeeamApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch('vendor_veeam_api_client.VeeamApiClient.sn_sync', lambda *args, **kwargs: mock_sn_ci_query_response_json)
 @patch(
     'vendor_veeam_api_client.VeeamApiClient.crawl_vendor_products',
@@ -228,6 +234,7 @@ def test_initiate_processed_managed_product(*_args):
 )
 @patch('db_client.Database.get_vendor_settings', lambda *args, **kwargs: True)
 @patch('db_client.Database.get_managed_products', lambda *args, **kwargs: True)
+@patch('vendor_veeam_api_client.VeeamApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch(
     'vendor_veeam_api_client.VeeamApiClient.sn_sync',
     lambda *args, **kwargs: mock_sn_ci_query_response_no_version
@@ -275,6 +282,7 @@ def test_initiate_ci_product_missing_version_field(*_args):
 @patch('db_client.Database.get_vendor_settings', lambda *args, **kwargs: True)
 @patch('db_client.Database.update_managed_product_versions', lambda *args, **kwargs: True)
 @patch('db_client.Database.get_managed_products', lambda *args, **kwargs: mock_managed_product)
+@patch('vendor_veeam_api_client.VeeamApiClient.plan_sn_queries', lambda *args, **kwargs: None)
 @patch(
     'vendor_veeam_api_client.VeeamApiClient.sn_sync',
     lambda *args, **kwargs: mock_sn_ci_query_response_json
@@ -298,3 +306,171 @@ def test_initiate_no_bugs_found(*_args):
              )
     )
     assert execution_message["message"] == '0 new bugs published'
+# -------------------------------------------------------------------------------------------------------------------- #
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@contextlib.contextmanager
+def mock_shared_kb_products(last_executions):
+    """
+    run initiate on 3 products listing shared kbs, with a sqlite managedProducts table
+    product a lists kb1 and kb2, product b lists kb2 and kb3, product c lists kb1, kb3 and kb4 - get_bugs skips the kb
+    ids already examined by the client and the first product is slower than the others
+    :param last_executions: {product name: lastExecution}
+    :return: (initiate, {product name: inserted bug ids}, managedProducts query)
+    """
+    import tempfile
+    from sqlalchemy import Boolean, Column, DateTime, Integer, String, create_engine
+    from sqlalchemy.orm import declarative_base, sessionmaker
+    import vendor_veeam_bug_service
+
+    base = declarative_base()
+
+    class ManagedProduct(base):  # pylint: disable=too-few-public-methods
+        __tablename__ = "managedProducts"
+        id = Column(Integer, primary_key=True)
+        name = Column(String(64))
+        isDisabled = Column(Boolean, default=False)
+        lastExecution = Column(DateTime)
+
+    inserted = {}
+
+    def get_bugs(self, kb_entries, managed_product, **_kwargs):
+        if managed_product.name == "product a":
+            time.sleep(0.2)
+        bugs = [{"bugId": x["id"]} for x in kb_entries if x["id"] not in self.bug_ids]
+        self.bug_ids.update(x["id"] for x in kb_entries)
+        return bugs
+
+    def insert_bug_updates(_self, bugs, product_name, **_kwargs):
+        inserted[product_name] = [x["bugId"] for x in bugs]
+        return {"updated_bugs": 0, "inserted_bugs": len(bugs), "skipped_bugs": 0}
+
+    def initiate(event=""):
+        return vendor_veeam_bug_service.initiate(event, type("MockContext", (object,), {
+            "log_stream_name": "test", "function_name": "dev-vendor-veeam-bug-service",
+            "log_group_name": "dev-vendor-veeam-bug-service",
+            "get_remaining_time_in_millis": lambda *_args, **_kwargs: 900000
+        }))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{tmp_dir}/veeam.db", connect_args={"check_same_thread": False})
+        base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        session.add_all([
+            ManagedProduct(id=i, name=f"product {x}", lastExecution=last_executions.get(f"product {x}"))
+            for i, x in enumerate("abc")
+        ])
+        session.commit()
+
+        def database_init(self, *_args, **_kwargs):
+            self.conn = sessionmaker(bind=engine)()
+
+        with patch('db_client.Database.__init__', new=database_init), \
+                patch('db_client.Database.get_managed_products', lambda self, product_name, **kwargs:
+                      self.conn.query(ManagedProduct).filter_by(name=product_name).all()), \
+                patch('db_client.Database.insert_bug_updates', new=insert_bug_updates), \
+                patch('vendor_veeam_api_client.VeeamApiClient.get_bugs', new=get_bugs):
+            yield initiate, inserted, session.query(ManagedProduct)
+        session.close()
+        engine.dispose()
+
+
+@patch.dict(os.environ, {**mock_env(), "BUG_EVENT_PROCESSOR_SERVICE_NAME": "test", "SERVICE_SNS_TOPIC_ARN": "test"})
+@patch('db_client.Database.create_session', lambda *args, **kwargs: True)
+@patch(
+    'db_client.Database.get_service_config',
+    lambda *args, **kwargs: type("mockConfig", (object,),
+                                 {"value": {"daysBack": 100, "snApiUrl": True, "secretId": True}})
+)
+@patch(
+    'vendor_veeam_api_client.VeeamApiClient.crawl_vendor_products',
+    lambda *args, **kwargs: [{"name": f"product {x}", "abbr": x} for x in "abc"]
+)
+@patch('db_client.Database.get_vendor_settings', lambda *args, **kwargs: True)
+@patch('db_client.Database.update_managed_product_versions', lambda *args, **kwargs: True)
+@patch('db_client.Database.remove_non_active_managed_products', lambda *args, **kwargs: 0)
+@patch(
+    'vendor_veeam_api_client.VeeamApiClient.get_aws_secret_value', lambda *args, **kwargs: {"user": "", "pass": ""}
+)
+@patch('vendor_veeam_api_client.VeeamApiClient.plan_sn_queries', lambda *args, **kwargs: None)
+@patch('vendor_veeam_api_client.VeeamApiClient.sn_sync', lambda *args, **kwargs: mock_sn_ci_query_response_json)
+@patch(
+    'vendor_veeam_api_client.VeeamApiClient.get_kb_article_links',
+    lambda self, product, **kwargs: [
+        {"id": x} for x in {"a": ["kb1", "kb2"], "b": ["kb2", "kb3"], "c": ["kb1", "kb3", "kb4"]}[product["abbr"]]
+    ]
+)
+@patch('vendor_veeam_api_client.VeeamApiClient.bug_zero_vendor_status_update')
+@patch('boto3.client')
+def test_initiate_concurrent_products_shared_kbs(*_args):
+    """
+    requirement: products processed concurrently get their own kb ids, a kb listed by several products is inserted
+                 for the first product of the products order only, whatever the order the products complete in
+    mock: sqlite managedProducts table, 4 pipeline workers, mock_shared_kb_products
+    description: every product inserts the kbs not examined by the products before it and its lastExecution is updated
+    :return:
+    """
+    import vendor_veeam_bug_service
+    with mock_shared_kb_products(last_executions={}) as (initiate, inserted, managed_products), \
+            patch.object(vendor_veeam_bug_service.product_pipeline, "WORKERS", 4):
+        assert initiate()["message"] == '4 new bugs published'
+        assert inserted == {"product a": ["kb1", "kb2"], "product b": ["kb3"], "product c": ["kb4"]}
+        assert all(
+            x.lastExecution > datetime.datetime.utcnow() - datetime.timedelta(minutes=1) for x in managed_products
+        )
+# -------------------------------------------------------------------------------------------------------------------- #
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@patch.dict(os.environ, {**mock_env(), "BUG_EVENT_PROCESSOR_SERVICE_NAME": "test", "SERVICE_SNS_TOPIC_ARN": "test"})
+@patch('db_client.Database.create_session', lambda *args, **kwargs: True)
+@patch(
+    'db_client.Database.get_service_config',
+    lambda *args, **kwargs: type("mockConfig", (object,),
+                                 {"value": {"daysBack": 100, "snApiUrl": True, "secretId": True}})
+)
+@patch(
+    'vendor_veeam_api_client.VeeamApiClient.crawl_vendor_products',
+    lambda *args, **kwargs: [{"name": f"product {x}", "abbr": x} for x in "abc"]
+)
+@patch('db_client.Database.get_vendor_settings', lambda *args, **kwargs: True)
+@patch('db_client.Database.update_managed_product_versions', lambda *args, **kwargs: True)
+@patch('db_client.Database.remove_non_active_managed_products', lambda *args, **kwargs: 0)
+@patch(
+    'vendor_veeam_api_client.VeeamApiClient.get_aws_secret_value', lambda *args, **kwargs: {"user": "", "pass": ""}
+)
+@patch('vendor_veeam_api_client.VeeamApiClient.plan_sn_queries', lambda *args, **kwargs: None)
+@patch('vendor_veeam_api_client.VeeamApiClient.sn_sync', lambda *args, **kwargs: mock_sn_ci_query_response_json)
+@patch('vendor_veeam_api_client.VeeamApiClient.bug_zero_vendor_status_update')
+@patch('boto3.client')
+def test_initiate_fan_out_shared_kbs(*_args):
+    """
+    requirement: fan out workers have their own api client, the coordinator resolves the kbs listed by several products
+                 in the products order
+    mock: sqlite managedProducts table with a recently processed first product, fan_out.LocalQueue,
+          mock_shared_kb_products
+    description: the coordinator publishes the kb listing of every product and the kbs of the products crawled before
+                 it as excluded ids, the recently processed product does not exclude its kbs and every worker inserts
+                 the kbs of its product that were not crawled by a worker before it without listing them again
+    :return:
+    """
+    import vendor_veeam_bug_service
+    fan_out = vendor_veeam_bug_service.fan_out
+    local_queue = fan_out.LocalQueue()
+    last_executions = {"product a": datetime.datetime.utcnow() - datetime.timedelta(hours=1)}
+    kb_ids = {"a": ["kb1", "kb2"], "b": ["kb2", "kb3"], "c": ["kb1", "kb3", "kb4"]}
+    with mock_shared_kb_products(last_executions=last_executions) as (initiate, inserted, _managed_products), \
+            patch.object(fan_out, "ENABLED", True), patch.object(fan_out, "get_queue", lambda: local_queue), \
+            patch('vendor_veeam_api_client.VeeamApiClient.get_kb_article_links', autospec=True, side_effect=lambda
+                  self, product, **kwargs: [
+                      {"id": x, "title": x, "url": x, "product": [], "content": "..."} for x in kb_ids[product["abbr"]]
+                  ]) as get_kb_article_links:
+        assert initiate()["message"] == '3 products sent to the bug service workers'
+        work_items = [json.loads(x) for x in list(local_queue.items.queue)]
+        assert [x["excluded_ids"] for x in work_items] == [[], [], ["kb3"]]
+        assert [[y["id"] for y in x["items"]] for x in work_items] == list(kb_ids.values())
+        assert "content" not in work_items[0]["items"][0]
+        local_queue.drain(initiate)
+        assert get_kb_article_links.call_count == 3
+        assert inserted == {"product b": ["kb2", "kb3"], "product c": ["kb1", "kb4"]}
@@ -4,6 +4,7 @@ created 2021-10-14
 """
 import base64
 import datetime
+import functools
 import importlib
 import inspect
 import json
@@ -12,10 +13,8 @@ import math
 import os
 import re
 import sys
-import threading
 import urllib.parse
 from collections import OrderedDict
-from queue import Queue
 
 import boto3
 import lxml.html
@@ -33,6 +32,48 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
+parse_stage = importlib.import_module("service-common.python.lib.parse_stage")
+cmdb_reader = importlib.import_module("service-common.python.lib.cmdb_reader")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
+cmdb_query_planner = importlib.import_module("service-common.python.lib.cmdb_query_planner")
+kb_cache = importlib.import_module("service-common.python.lib.kb_cache")
+
+# kb page plan - elements removed from the tree and the field xpaths, compiled once by parse_stage
+KB_REMOVE_ELEMENTS_XPATH = OrderedDict({
+    "kb_header": {
+        "xpath": "//h1",
+    },
+    "veeam_feedback": {
+        "xpath": '//*[@class="veeam-text__open-universal-form"]/..',
+    },
+})
+KB_FIELDS_XPATH = OrderedDict({
+    "description": {
+        "is_mandatory": True, "xpath": '//div[contains(@class, "aem-GridColumn--default--9")]//text()',
+        "multiple_elements": True, "delimiter": "", "is_date_value": False
+    },
+    "vendorCreatedDate": {
+        "is_mandatory": True,
+        "xpath": '//td[contains(text(),"Published:")]/following-sibling::td[contains(@class, "value")]//'
+                 'text()',
+        "multiple_elements": False, "delimiter": None, "is_date_value": True
+    },
+    "vendorLastUpdatedDate": {
+        "is_mandatory": True,
+        "xpath": '//td[contains(text(),"Last Modified:")]/following-sibling::td[contains(@class, "value")]//'
+                 'text()',
+        "multiple_elements": False, "delimiter": None, "is_date_value": True
+    }
+})
+KB_PLAN = parse_stage.Plan({
+    "remove": [settings["xpath"] for settings in KB_REMOVE_ELEMENTS_XPATH.values()],
+    "fields": {field: settings["xpath"] for field, settings in KB_FIELDS_XPATH.items()}
+})
+# precompiled regexes of the kb text cleanup
+TAG_REGEX = re.compile('<.*?>')
+SPACES_REGEX = re.compile(r" {2,}")
+NEW_LINES_REGEX = re.compile(r"\n{2,}")
 
 
 class VeeamApiClient:
@@ -63,6 +104,8 @@ class VeeamApiClient:
         self.vendor_id = vendor_id
         self.kb_base_url = "https://www.veeam.com{}"
         self.sn_table = "cmdb_ci_spkg"
+        # CIs of the batched product queries by (table, sysparm_query)
+        self.planned_cis = {}
         self.secret_manager_client = boto3.Session().client("secretsmanager")
 
     def bug_zero_vendor_status_update(
@@ -179,43 +222,13 @@ class VeeamApiClient:
                 event_message=event_message, internal_message=internal_messages, url=""
             ) from e
 
-    def parse_kb_html(self, kb, html, managed_product):
+    def kb_listing_entry(self, kb, managed_product):
         """
-        parse bug data fields from a kb html page
-        :param html:
+        bug data fields of a kb listing entry
         :param kb:
         :param managed_product:
         :return:
         """
-        # remove from tree
-        remove_elements_xpath = OrderedDict({
-            "kb_header": {
-                "xpath": "//h1",
-            },
-            "veeam_feedback": {
-                "xpath": '//*[@class="veeam-text__open-universal-form"]/..',
-            },
-        })
-        fields_xpath = OrderedDict({
-            "description": {
-                "is_mandatory": True, "xpath": '//div[contains(@class, "aem-GridColumn--default--9")]//text()',
-                "multiple_elements": True, "delimiter": "", "is_date_value": False
-            },
-            "vendorCreatedDate": {
-                "is_mandatory": True,
-                "xpath": '//td[contains(text(),"Published:")]/following-sibling::td[contains(@class, "value")]//text()',
-                "multiple_elements": False, "delimiter": None, "is_date_value": True
-            },
-            "vendorLastUpdatedDate": {
-                "is_mandatory": True,
-                "xpath": '//td[contains(text(),"Last Modified:")]/following-sibling::td[contains(@class, "value")]//'
-                         'text()',
-                "multiple_elements": False, "delimiter": None, "is_date_value": True
-            }
-        })
-
-        # create an lxml parser object
-        root = lxml.html.fromstring(html)
         product_affected_releases = [
             x["versionName"].replace(x["name"], "").strip() for x in kb["product"]
             if x.get('versionName') and x["name"] in x["versionName"]
@@ -230,7 +243,7 @@ class VeeamApiClient:
                     f'{x["versionName"].replace(product_name, "")}'.strip()
                 )
 
-        kb_entry = {
+        return {
             "bugId": kb["id"],
             "summary": kb["title"],
             "bugUrl": self.kb_base_url.format(kb["url"]),
@@ -241,13 +254,21 @@ class VeeamApiClient:
             'managedProduct': managed_product.id,
         }
 
-        # remove elements from the html tree:
-        for _fields, settings in remove_elements_xpath.items():
-            for kb_row in root.xpath(settings["xpath"]):
-                kb_row.getparent().remove(kb_row)
+    def parse_kb_html(self, kb, html, managed_product):
+        """
+        parse bug data fields from a kb html page
+        :param html:
+        :param kb:
+        :param managed_product:
+        :return:
+        """
+        kb_entry = self.kb_listing_entry(kb=kb, managed_product=managed_product)
 
-        for field, settings in fields_xpath.items():
-            value_container = root.xpath(settings["xpath"])
+        # remove elements from the html tree and evaluate the field xpaths in the parse stage
+        parsed = parse_stage.parse(html=html, spec=KB_PLAN)
+
+        for field, settings in KB_FIELDS_XPATH.items():
+            value_container = parsed[field]
             if not value_container and settings["is_mandatory"]:
                 # keep count for parse error
                 self.kb_info_parse_errors += 1
@@ -258,9 +279,9 @@ class VeeamApiClient:
             if settings["multiple_elements"]:
                 value = ""
                 for x in value_container:
-                    text = re.sub(r" {2,}", r"", x)
+                    text = SPACES_REGEX.sub(r"", x)
                     value += text
-                value = re.sub(r"\n{2,}", r"\n", value).strip()
+                value = NEW_LINES_REGEX.sub(r"\n", value).strip()
             else:
                 value = value_container[0].strip()
                 if settings["is_date_value"]:
@@ -434,6 +455,32 @@ class VeeamApiClient:
             return fmt_time
         return time_str
 
+    def plan_sn_queries(self, query_products, sn_api_url, sn_auth_token, sn_ci_query_base):
+        """
+        run the sn_sync queries of all the products with one ^NQ query per SN table, sn_sync uses the planned CIs
+        instead of a request per product. products with queries that can not be batched and failed batches fall back
+        to the per product query
+        :param query_products:
+        :param sn_api_url:
+        :param sn_auth_token:
+        :param sn_ci_query_base:
+        :return:
+        """
+        reader = cmdb_reader.CmdbReader(
+            download=download_instance, headers={"Authorization": f"Basic {sn_auth_token}"},
+            connection_error=ApiConnectionError, response_error=ApiResponseError, logger=self.logger,
+            cache=cmdb_cache.get_cache()
+        )
+        queries = [(x["service_now_table"], x["sysparm_query"], None) for x in query_products]
+        try:
+            self.planned_cis = cmdb_query_planner.run(
+                reader=reader, sn_api_url=sn_api_url, queries=queries, base_query=sn_ci_query_base,
+                logger=self.logger
+            )
+        except (ApiConnectionError, ApiResponseError) as e:
+            self.logger.warning(f"batched SN queries failed, querying every product | {e}")
+            self.planned_cis = {}
+
     def sn_sync(self, query_product, sn_api_url, sn_auth_token, sn_ci_query_base):
         """
         keep managed products software version up to date with the correlating instances in the SN instance
@@ -448,38 +495,23 @@ class VeeamApiClient:
             sn_ci_query_base = f"^{sn_ci_query_base}"
         sn_query = f"?sysparm_query={query_product['sysparm_query']}{sn_ci_query_base}"
         sn_query_url = f"{sn_api_url}/api/now/table/{query_product['service_now_table']}{sn_query}"
-        response = download_instance(
-            link=sn_query_url,
-            headers={"Authorization": f"Basic {sn_auth_token}"}
-        )
-        if not response:
-            self.logger.error(f"SN API connection error - {sn_query_url}")
-            raise ApiConnectionError(
-                url=sn_query_url, internal_message="SN API connection error",
-                event_message="a connection to ServiceNow could not be established - check ServiceNow settings"
+        planned = self.planned_cis.get((query_product["service_now_table"], query_product["sysparm_query"]))
+        if planned is not None:
+            count, instances = len(planned), planned
+        else:
+            reader = cmdb_reader.CmdbReader(
+                download=download_instance, headers={"Authorization": f"Basic {sn_auth_token}"},
+                connection_error=ApiConnectionError, response_error=ApiResponseError, logger=self.logger,
+                cache=cmdb_cache.get_cache()
             )
-        try:
-            count = int(response.headers["x-total-count"])
-        except KeyError as e:
-            raise ApiResponseError(
-                url=sn_query_url, internal_message="missing 'x-total-count' in sn query response",
-                event_message="ServiceNow query returned a malformed response - check ServiceNow settings"
-            ) from e
+            count, instances = reader.read(sn_query_url)
         if count:
             self.logger.info(
                 f"'{query_product['name']}' - {count} SN package(s) found in table "
                 f"'{query_product['service_now_table']}'"
             )
-            try:
-                instances = json.loads(response.text)["result"]
-            except json.JSONDecodeError as e:
-                raise ApiResponseError(
-                    url=sn_query_url, internal_message="error parsing serviceNow response - check url",
-                    event_message="ServiceNow query returned a malformed response - check ServiceNow settings"
-                ) from e
             # populate query url
-            map(lambda x: setattr(x, 'sn_query_url', sn_query_url), instances)
-            return instances
+            return ({**x, "sn_query_url": sn_query_url} for x in instances)
         self.logger.info(
             f"'{query_product['name']}' - No SN package(s) found in table '{query_product['service_now_table']}' | "
             f"{sn_query_url}"
@@ -539,28 +571,54 @@ class VeeamApiClient:
                 ) from e
         return kb_articles
 
-    def get_bugs(self, kb_entries, managed_product, bugs_days_back, sn_ci_query_base, threads=30):
+    @staticmethod
+    def kb_listing_fields(kb):
+        """
+        kb listing entry fields read by kb_listing_entry and kb_html_scraper, passed in the fan out work items
+        :param kb: kb listing entry
+        :return:
+        """
+        return {
+            "id": kb["id"], "title": kb["title"], "url": kb["url"],
+            "product": [{"name": x["name"], "versionName": x.get("versionName")} for x in kb["product"]]
+        }
+
+    def get_bugs(self, kb_entries, managed_product, bugs_days_back, sn_ci_query_base, threads=30, cache=None):
         """
         crawl kb html pages and parse bug data
         :param kb_entries: kb entries for a given product
-        :param threads: default value for num of multi-processing threads
+        :param threads: max concurrent kb downloads
         :param managed_product: supported product related to the kb entries
         :param bugs_days_back: bugs date threshold
         :param sn_ci_query_base:
+        :param cache: optional kb_cache.KbCache, unchanged kb pages are not parsed
         :return:
         """
         self.kb_entries_retrieved = 0
-        self.total_kb_entries = len(kb_entries)
         self.bugs = []
-        q = Queue()
-        for kb in kb_entries:
-            q.put((kb, managed_product))
-
-        for _ in range(threads):
-            t = threading.Thread(target=self.kb_html_scraper, args=(q,))
-            t.start()
-
-        q.join()
+        self.total_kb_entries = len(kb_entries)
+        # every kb page is on the veeam host
+        engine = crawl_engine.CrawlEngine(concurrency=threads, host_concurrency=threads, logger=self.logger)
+        crawl_results = engine.run(
+            items=kb_entries,
+            handler=functools.partial(self.kb_html_scraper, managed_product=managed_product, cache=cache),
+            host=lambda kb: crawl_engine.url_host(self.kb_base_url.format(kb["url"]))
+        )
+        for crawl_result in crawl_results:
+            if crawl_result.error:
+                self.logger.error(
+                    f"'{managed_product.name}' - {crawl_result.item.get('id')} kb crawl failed | {crawl_result.error}"
+                )
+                continue
+            if not crawl_result.result:
+                continue
+            self.bugs.append(crawl_result.result)
+            self.kb_entries_retrieved += 1
+            if self.kb_entries_retrieved % 100 == 0:
+                self.logger.info(
+                    f"'{managed_product.name}' - {self.kb_entries_retrieved}/{self.total_kb_entries}"
+                    f" KB entries retrieved"
+                )
 
         # check for abnormal amount of parse errors:
         if self.kb_info_parse_errors > 5:
@@ -571,6 +629,8 @@ class VeeamApiClient:
         self.logger.info(
             f"'{managed_product.name}' - {self.kb_entries_retrieved}/{self.total_kb_entries} KB entries retrieved"
         )
+        if cache is not None:
+            cache.log_stats(name=managed_product.name)
 
         bugs = self.filter_bugs(
             managed_product=managed_product, bugs=self.bugs, bugs_days_back=bugs_days_back,
@@ -621,42 +681,51 @@ class VeeamApiClient:
         )
         return vendor_products
 
-    def kb_html_scraper(self, q):
+    def kb_html_scraper(self, kb, managed_product, cache=None):
         """
-
-        :param q:
-        :return:
+        download and parse a kb html page
+        :param kb:
+        :param managed_product:
+        :param cache: optional kb_cache.KbCache of the parsed kb html fields
+        :return: the formatted bug entry or None
         """
-        def request(kb, managed_product):
-            """
-            download and parse a kb html page
-            :param kb:
-            :param managed_product:
-            :return:
-            """
-            base_url = self.kb_base_url.format(kb["url"])
-            response = download_instance(link=base_url, headers=None)
+        base_url = self.kb_base_url.format(kb["url"])
+        if cache is not None:
+            fields = cache.fetch(
+                kb_id=kb["id"], url=base_url,
+                download=functools.partial(download_instance, headers=None),
+                parse=functools.partial(self.parse_kb_fields, kb=kb, managed_product=managed_product)
+            )
+            if not fields:
+                return None
+            # the listing fields are read from the current listing, only the kb html fields are cached
+            kb_entry = {**self.kb_listing_entry(kb=kb, managed_product=managed_product), **fields}
+            return self.format_bug_entry(kb_entry=kb_entry, managed_product=managed_product)
 
-            if not response:
-                self.logger.error(f"'{managed_product.name}' - {kb['id']} html page is unreachable | {base_url}")
-                return
-
-            kb_entry = self.parse_kb_html(html=response.text, managed_product=managed_product, kb=kb)
-            if not kb_entry:
-                return
-            bug_entry = self.format_bug_entry(kb_entry=kb_entry, managed_product=managed_product)
-            self.bugs.append(bug_entry)
-            self.kb_entries_retrieved += 1
-            if self.kb_entries_retrieved % 100 == 0:
-                self.logger.info(
-                    f"'{managed_product.name}' - {self.kb_entries_retrieved}/{self.total_kb_entries}"
-                    f" KB entries retrieved"
-                )
+        response = download_instance(link=base_url, headers=None)
+
+        if not response:
+            self.logger.error(f"'{managed_product.name}' - {kb['id']} html page is unreachable | {base_url}")
+            return None
+
+        kb_entry = self.parse_kb_html(html=response.text, managed_product=managed_product, kb=kb)
+        if not kb_entry:
+            return None
+        return self.format_bug_entry(kb_entry=kb_entry, managed_product=managed_product)
 
-        while not q.empty():
-            queue = q.get()
-            request(kb=queue[0], managed_product=queue[1])
-            q.task_done()
+    def parse_kb_fields(self, response, kb, managed_product):
+        """
+        parse the kb html fields cached by kb_cache
+        :param response: kb html page response
+        :param kb:
+        :param managed_product:
+        :return: the kb html fields or None
+        """
+        kb_entry = self.parse_kb_html(html=response.text, managed_product=managed_product, kb=kb)
+        if not kb_entry:
+            return None
+        listing_fields = self.kb_listing_entry(kb=kb, managed_product=managed_product)
+        return {field: value for field, value in kb_entry.items() if field not in listing_fields}
 
     @staticmethod
     def html_string_cleaner(html_string):
@@ -665,8 +734,7 @@ class VeeamApiClient:
         :param html_string:
         :return:
         """
-        # remove tags regex
-        clean_regex = re.compile('<.*?>')
-        clean_text = re.sub(clean_regex, '', html_string)
+        # remove tags
+        clean_text = TAG_REGEX.sub('', html_string)
         # replace non-breaking whitespace
         return clean_text.replace("\u00A0", " ")
@@ -26,6 +26,12 @@ current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfra
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 common_service = importlib.import_module("service-common.python.lib.sn_utils")
+cmdb_cache = importlib.import_module("service-common.python.lib.cmdb_cache")
+crawl_engine = importlib.import_module("service-common.python.lib.crawl_engine")
+product_pipeline = importlib.import_module("service-common.python.lib.product_pipeline")
+deadline_scheduler = importlib.import_module("service-common.python.lib.deadline_scheduler")
+fan_out = importlib.import_module("service-common.python.lib.fan_out")
+kb_cache = importlib.import_module("service-common.python.lib.kb_cache")
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -53,17 +59,27 @@ def initiate(*_args, **_kwargs):
     # use a signal handler to set an alarm that will invoke
     signal.signal(signal.SIGALRM, timeout_handler)
     signal.alarm((int(_args[1].get_remaining_time_in_millis() / 1000)) - 1)
+    # stop scheduling crawls before the lambda timeout
+    crawl_engine.set_deadline(remaining_ms=_args[1].get_remaining_time_in_millis())
+    # admit products and kb pages only while their projected cost fits in the time left
+    scheduler = deadline_scheduler.DeadlineScheduler(
+        remaining_ms=_args[1].get_remaining_time_in_millis(), logger=logger
+    )
 
     # service configuration
     vendor_id = "veeam"
     service_id = "veeam-bug-svc"
     service_name = "Veeam Bug Service"
     service_now_id = "servicenow"
+    # kb entries crawled between two deadline checks
+    kb_page_size = 200
     execution_service_message = ""
     service_status = "OPERATIONAL"
     service_error = 0
     started_timestamp = datetime.datetime.utcnow()
     veeam_api_client = VeeamApiClient(vendor_id=vendor_id)
+    # the product published by the coordinator in a fan out worker invocation
+    work_item = fan_out.work_item(_args[0])
 
     # setup an boto3 SNS client to be used for events or to trigger the bugEventProcessor
     sns_client = boto3.client('sns')
@@ -79,7 +95,8 @@ def initiate(*_args, **_kwargs):
         "sn_packages_found": 0,
         "managed_products": 0,
         "new_managed_products": 0,
-        "removed_managed_products": 0
+        "removed_managed_products": 0,
+        "published_products": 0
     }
     # ---------------------------------------------------------------------------------------------------------------- #
     #                                    SERVICE NOW EVENT MANAGEMENT CONFIG                                           #
@@ -156,11 +173,32 @@ def initiate(*_args, **_kwargs):
         # add the manually inserted CMDB Affected CI Query ( from the UI saved under settings )
         sn_ci_query_base = veeam_config.value.get('snAffectedCIQuery', "")
 
-        vendor_products = veeam_api_client.crawl_vendor_products()
-        # stores managedProduct IDs for managedProducts with active CIs in SN CMDB
-        active_managed_product_ids = []
-        # reset the versions for each managed_product
-        for product in vendor_products:
+        if work_item is None:
+            vendor_products = veeam_api_client.crawl_vendor_products()
+            # products and kb pages deferred by the previous run
+            checkpoint = deadline_scheduler.load_checkpoint(vendor_id=vendor_id, logger=logger)
+        else:
+            vendor_products = [work_item["product"]]
+            logger.info(f"'{vendor_id}' - fan out worker | '{work_item['product']['name']}'")
+            # kb pages deferred by the previous worker of the product
+            checkpoint = deadline_scheduler.load_checkpoint(
+                vendor_id=f"{vendor_id}-{work_item['product']['abbr']}", logger=logger
+            )
+        # one batched SN query per CI table instead of a query per product
+        veeam_api_client.plan_sn_queries(
+            query_products=vendor_products, sn_api_url=sn_api_url, sn_auth_token=sn_auth_token,
+            sn_ci_query_base=sn_ci_query_base
+        )
+        def process_product(product, db_client, veeam_api_client, counter):  # pylint: disable=redefined-outer-name
+            """
+            sync a single vendor product and insert its bug updates
+            :param product:
+            :param db_client: product db session
+            :param veeam_api_client: product api client
+            :param counter: product counter
+            :return: the crawled bugs of a product to sync, else the managedProduct ID of a product with active CIs
+                     or None
+            """
             # get managedProducts entries
             product_versions = set()
             product_major_versions = set()
@@ -174,7 +212,7 @@ def initiate(*_args, **_kwargs):
                 sn_ci_query_base=sn_ci_query_base
             )
             if not active_cis:
-                continue
+                return None
             for ci in active_cis:
                 counter["sn_packages_found"] += 1
                 product_version = ci.get("version", None)
@@ -197,10 +235,9 @@ def initiate(*_args, **_kwargs):
             if managed_product:
                 counter["managed_products"] += 1
                 managed_product = managed_product[0]
-                active_managed_product_ids.append(managed_product.id)
                 if managed_product.isDisabled:
                     logger.info(f"'{managed_product.name}' - skipping disabled product")
-                    continue
+                    return managed_product.id
 
                 if managed_product.lastExecution and managed_product.lastExecution > last_executed_gap:
                     delta = utc_now - managed_product.lastExecution
@@ -208,7 +245,7 @@ def initiate(*_args, **_kwargs):
                     logger.info(
                         f"'{managed_product.name}' - skipping managedProduct processed {delta_hours} hours ago"
                     )
-                    continue
+                    return managed_product.id
                 if managed_product.lastExecution:
                     bugs_days_back = (datetime.datetime.utcnow() - managed_product.lastExecution).days
 
@@ -223,50 +260,182 @@ def initiate(*_args, **_kwargs):
                     managed_products_table=managed_products_table, service_settings=veeam_config.value
                 )
                 counter["new_managed_products"] += 1
-                active_managed_product_ids.append(managed_product.id)
 
         # ------------------------------------------------------------------------------------------------------------ #
         #                                              BUG SERVICE                                                     #
         # ------------------------------------------------------------------------------------------------------------ #
-            # get all the kb articles for a given product
-            product_kb_entries = veeam_api_client.get_kb_article_links(product=product)
+            # get all the kb articles for a given product - a fan out worker reuses the kb listing of its work item
+            # and skips the kbs of the products published before it by the coordinator
+            excluded_kb_ids = set(work_item.get("excluded_ids", [])) if work_item else set()
+            if work_item and work_item.get("items") is not None:
+                kb_entries = work_item["items"]
+            else:
+                kb_entries = veeam_api_client.get_kb_article_links(product=product)
+            product_kb_entries = [x for x in kb_entries if x['id'] not in excluded_kb_ids]
+            # a product stopped part way by the previous run resumes at its first kb page that was not crawled
+            kb_offset = checkpoint.page_offset(name=product['name'], ids=[x['id'] for x in product_kb_entries])
             logger.info(
-                f"'{product['name']}' - {len(product_kb_entries)} KB entries retrieved | creating a crawl queue"
-            )
-            # download and parse kb html pages and format bug entries
-            product_bugs = veeam_api_client.get_bugs(
-                bugs_days_back=bugs_days_back, kb_entries=product_kb_entries, managed_product=managed_product,
-                sn_ci_query_base=sn_ci_query_base
+                f"'{product['name']}' - {len(product_kb_entries)} KB entries retrieved | creating a crawl queue "
+                f"from entry {kb_offset}"
             )
+            product_bugs = []
+            completed = True
+            for page_offset in range(kb_offset, len(product_kb_entries), kb_page_size):
+                if not scheduler.admit("kb_page"):
+                    checkpoint.defer_page(
+                        name=product['name'], offset=page_offset, item_id=product_kb_entries[page_offset]['id']
+                    )
+                    completed = False
+                    break
+                with scheduler.track("kb_page"):
+                    # download and parse kb html pages and format bug entries
+                    product_bugs += veeam_api_client.get_bugs(
+                        bugs_days_back=bugs_days_back, managed_product=managed_product,
+                        kb_entries=product_kb_entries[page_offset:page_offset + kb_page_size],
+                        sn_ci_query_base=sn_ci_query_base,
+                        cache=kb_cache.get_cache(name=vendor_id) if kb_cache.ENABLED else None
+                    ) or []
+            if completed:
+                checkpoint.complete_pages(name=product['name'])
+            return {
+                "managed_product": managed_product, "bugs": product_bugs, "completed": completed,
+                # every kb examined for the product, inserted by the first product of the products order examining it
+                "bug_ids": set(veeam_api_client.bug_ids)
+            }
+
+        # kb ids examined by the products already finalized
+        examined_bug_ids = set()
+
+        def finalize_product(_product, result, db_client, counter):
+            """
+            insert the bug updates of a product in the products order - a kb listed by several products is inserted
+            for the first product examining it only, whatever the order the products are crawled in
+            :param _product:
+            :param result: process_product result
+            :param db_client: service db client
+            :param counter: product counter
+            :return: the managedProduct ID of a product with active CIs or None
+            """
+            if not isinstance(result, dict):
+                return result
+            managed_product = product_pipeline.attach(db_client=db_client, instance=result["managed_product"])
+            product_bugs = [x for x in result["bugs"] if x["bugId"] not in examined_bug_ids]
+            if len(product_bugs) < len(result["bugs"]):
+                logger.info(
+                    f"'{managed_product.name}' - skipping {len(result['bugs']) - len(product_bugs)} bugs of kb "
+                    f"articles examined by a previous product"
+                )
+            examined_bug_ids.update(result["bug_ids"])
+            inserts = {"updated_bugs": 0, "inserted_bugs": 0, "skipped_bugs": 0}
             if product_bugs:
                 inserts = db_client.insert_bug_updates(
                     bugs=product_bugs, bugs_table=bugs_table, product_name=managed_product.name
                 )
-                if inserts['updated_bugs'] or inserts['inserted_bugs']:
-                    new_bugs_updates = True
-                counter["updated_bugs"] += inserts["updated_bugs"]
-                counter["inserted_bugs"] += inserts["inserted_bugs"]
-                counter["skipped_bugs"] += inserts["skipped_bugs"]
+            counter["updated_bugs"] += inserts["updated_bugs"]
+            counter["inserted_bugs"] += inserts["inserted_bugs"]
+            counter["skipped_bugs"] += inserts["skipped_bugs"]
+            if not result["completed"]:
+                # lastExecution is not updated - the next run resumes the product at its deferred page
+                logger.info(f"'{managed_product.name}' - sync deferred | {json.dumps(inserts)}")
+                return managed_product.id
+            if any(inserts.values()):
                 logger.info(
                     f"'{managed_product.name}' - sync completed | {json.dumps(inserts)}"
                 )
             else:
                 logger.info(f"'{managed_product.name}' - sync completed | 0 new bugs found")
-                db_client.conn.commit()
 
             logger.info(f"'{managed_product.name}' - updating lastExecution")
             setattr(managed_product, 'lastExecution', datetime.datetime.utcnow())
+            return managed_product.id
+
+        if work_item is None and fan_out.ENABLED:
+            # fan out coordinator - one worker invocation per product with active CIs
+            active_managed_product_ids = []
+            work_items = []
+            # kb ids of the products crawled by the workers published before - a kb listed by several products is
+            # inserted for the first product of the products order only, as in a pipeline run
+            crawled_kb_ids = set()
+            # sn_sync is answered from the batched SN queries planned above, no SN request per product
+            active_products = [
+                product for product in vendor_products if veeam_api_client.sn_sync(
+                    sn_api_url=sn_api_url, sn_auth_token=sn_auth_token, query_product=product,
+                    sn_ci_query_base=sn_ci_query_base
+                )
+            ]
+            # the kb listings are fetched concurrently, once, and passed to the workers in their work items - a
+            # listing not fetched before the deadline is fetched below
+            kb_listings = {}
+            engine = crawl_engine.CrawlEngine(logger=logger)
+            crawl_results = engine.run(
+                items=list(enumerate(active_products)),
+                handler=lambda item: veeam_api_client.get_kb_article_links(product=item[1])
+            )
+            for crawl_result in crawl_results:
+                if crawl_result.error:
+                    raise crawl_result.error
+                kb_listings[crawl_result.item[0]] = [
+                    veeam_api_client.kb_listing_fields(x) for x in crawl_result.result
+                ]
+            for index, product in enumerate(active_products):
+                managed_product = db_client.get_managed_products(
+                    vendor_id=vendor_id, managed_products_table=managed_products_table, product_name=product['name']
+                )
+                if managed_product:
+                    active_managed_product_ids.append(managed_product[0].id)
+                kb_listing = kb_listings.get(index)
+                if kb_listing is None:
+                    kb_listing = [
+                        veeam_api_client.kb_listing_fields(x)
+                        for x in veeam_api_client.get_kb_article_links(product=product)
+                    ]
+                kb_ids = {x['id'] for x in kb_listing}
+                work_items.append(fan_out.format_work_item(
+                    vendor_id=vendor_id, product=product, excluded_ids=sorted(kb_ids & crawled_kb_ids),
+                    items=kb_listing
+                ))
+                # disabled and recently processed products are skipped by their worker
+                if not managed_product or not (
+                        managed_product[0].isDisabled or (
+                            managed_product[0].lastExecution and managed_product[0].lastExecution > last_executed_gap
+                        )
+                ):
+                    crawled_kb_ids |= kb_ids
+            counter["published_products"] = fan_out.get_queue().publish(work_items)
+        else:
+            # independent products are processed concurrently, each with its own db session
+            pipeline = product_pipeline.ProductPipeline(
+                db_client=db_client, api_client=veeam_api_client, scheduler=scheduler, checkpoint=checkpoint,
+                logger=logger
+            )
+            product_counter, managed_product_ids = pipeline.run(
+                products=vendor_products, process=process_product, finalize=finalize_product
+            )
+            for key, value in product_counter.items():
+                counter[key] += value
+            # stores managedProduct IDs for managedProducts with active CIs in SN CMDB
+            active_managed_product_ids = [x for x in managed_product_ids if x is not None]
+            if counter["updated_bugs"] or counter["inserted_bugs"]:
+                new_bugs_updates = True
 
         db_client.conn.commit()
+        checkpoint.save()
+        scheduler.log_stats()
+
+        if checkpoint.incomplete:
+            # deferred products are not in the active managedProduct IDs
+            logger.info(f"'{vendor_id}' - products deferred to the next run | skipping managedProducts removal")
+        elif work_item is None:
+            # fan out workers leave the removal to the coordinator
+            # remove managedProduct and linked bugs that don't have an active CMDB CI
+            removed_managed_products = db_client.remove_non_active_managed_products(
+                bugs_table=bugs_table, managed_products_table=managed_products_table,
+                active_managed_product_ids=active_managed_product_ids, vendor_id=vendor_id
+            )
+            counter['removed_managed_products'] += removed_managed_products
 
-        # remove managedProduct and linked bugs that don't have an active CMDB CI
-        removed_managed_products = db_client.remove_non_active_managed_products(
-            bugs_table=bugs_table, managed_products_table=managed_products_table,
-            active_managed_product_ids=active_managed_product_ids, vendor_id=vendor_id
-        )
-
-        counter['removed_managed_products'] += removed_managed_products
         logger.info(f"'{vendor_id}' sync completed - {json.dumps(counter)}")
+        cmdb_cache.log_stats()
 
         # on existing bug updates - trigger the bugEventProcessor
         if new_bugs_updates:
@@ -283,7 +452,9 @@ def initiate(*_args, **_kwargs):
             )
 
         # update execution message
-        if counter["sn_packages_found"]:
+        if counter["published_products"]:
+            message = f"{counter['published_products']} products sent to the bug service workers"
+        elif counter["sn_packages_found"]:
             message = f"{counter['inserted_bugs']} new bugs published"
         elif not counter["managed_products"]:
             message = 'no active SN CIs matching enabled managed products were found'
@@ -378,12 +549,13 @@ if __name__ == "__main__":  # pragma: no cover
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     handler.setFormatter(formatter)
     logger.addHandler(handler)
-    initiate(
-        "",
-        type("MockContext", (object,), {
-            "log_stream_name": "test",
-            "function_name": "veeam-bug-svc",
-            "log_group_name": "veeam-bug-svc",
-            "get_remaining_time_in_millis": lambda *_args, **_kwargs: 9000000
-        })
-    )
+    mock_context = type("MockContext", (object,), {
+        "log_stream_name": "test",
+        "function_name": "veeam-bug-svc",
+        "log_group_name": "veeam-bug-svc",
+        "get_remaining_time_in_millis": lambda *_args, **_kwargs: 9000000
+    })
+    initiate("", mock_context)
+    if isinstance(fan_out.get_queue(), fan_out.LocalQueue):
+        # run the fan out workers in process
+        fan_out.get_queue().drain(lambda event: initiate(event, mock_context))
@@ -1,12 +1,22 @@
 """
 created 2021-08-02
 
+updated 2026-10-18
+ send session-less requests through the pooled service-common http_client with backoff between retries
 """
+import importlib
+import inspect
 import logging
-import time
+import os
+import sys
 
 import requests
 
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+http_client = importlib.import_module("service-common.python.lib.http_client")
+
 
 def request_instance(url, session, post, ignore_404=False, form_data=False, json=False, headers="", retry=5,
                      logger=logging.getLogger(__name__)):
@@ -27,12 +37,12 @@ def request_instance(url, session, post, ignore_404=False, form_data=False, json
     while tries < retry:
         try:
             if json:
-                request = requests.post(url=url, timeout=20, headers=headers, json=json)
+                request = http_client.request(method="POST", url=url, timeout=20, headers=headers, json=json)
             elif post:
                 if session:
                     request = session.post(url=url, timeout=20, headers=headers, data=form_data)
                 else:
-                    request = requests.post(url=url, timeout=20, headers=headers, data=form_data)
+                    request = http_client.request(method="POST", url=url, timeout=20, headers=headers, data=form_data)
             else:
                 if session:
                     if headers:
@@ -41,9 +51,9 @@ def request_instance(url, session, post, ignore_404=False, form_data=False, json
                         request = session.get(url=url, timeout=20)
                 else:
                     if headers:
-                        request = requests.get(url=url, timeout=20, headers=headers)
+                        request = http_client.request(method="GET", url=url, timeout=20, headers=headers)
                     else:
-                        request = requests.get(url=url, timeout=20)
+                        request = http_client.request(method="GET", url=url, timeout=20)
 
             if request.status_code in [404, 401, 403]:
                 if ignore_404:
@@ -63,21 +73,23 @@ def request_instance(url, session, post, ignore_404=False, form_data=False, json
                     )
                 )
                 tries += 1
+                http_client.backoff(attempt=tries, retry=retry, response=request, logger=logger)
                 continue
 
             return request
 
         except requests.exceptions.ReadTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectTimeout:
             tries += 1
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
         except requests.exceptions.ConnectionError:
-            logger.error(f"{url}: connection error - trying again in 10 sec - {tries} tries left")
-            time.sleep(10)
+            logger.error(f"{url}: connection error - {retry - tries - 1} tries left")
             tries += 1
-
+            http_client.backoff(attempt=tries, retry=retry, logger=logger)
             continue
 
     logger.error(f"{url}: Download failed with with max retires")
@@ -14,7 +14,11 @@ class Test(TestCase):
 ########################################################################################################################
 #                                         request_instance                                                             #
 ########################################################################################################################
-    @patch('requests.post', lambda **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"})
+    )
+    @patch('time.sleep', lambda *_args: None)
     def test_request_instance_post_status_400(*_args):
         """
         test post response with status_code 400 that should return false
@@ -24,7 +28,11 @@ class Test(TestCase):
         from download_manager import request_instance
         assert not request_instance(url="test", headers="", post=True, session=False)
 
-    @patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"})
+    )
+    @patch('time.sleep', lambda *_args: None)
     def test_request_instance_status_400(*_args):
         """
         test post response with status_code 400 that should return false
@@ -34,7 +42,10 @@ class Test(TestCase):
         from download_manager import request_instance
         assert not request_instance(url="test", headers="", post=False, session=False)
 
-    @patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 200, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 200, "url": "test"})
+    )
     def test_request_instance_w_headers(*_args):
         """
         :param _args:
@@ -44,7 +55,10 @@ class Test(TestCase):
         assert request_instance(url="test", headers={"test": ""}, post=False, session=False).status_code == 200    \
 
 
-    @patch('requests.get', lambda **_kwargs: type("request", (object,), {"status_code": 404, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 404, "url": "test"})
+    )
     def test_request_instance_ignore_404(*_args):
         """
         special ignore_404 argument passed returning responses with 404 status setting them to status 200
@@ -56,7 +70,11 @@ class Test(TestCase):
             url="test", headers={"test": ""}, post=False, session=False, ignore_404=True
         ).status_code == 200
 
-    @patch('requests.post', lambda **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"}))
+    @patch(
+        'requests.Session.request',
+        lambda *_args, **_kwargs: type("request", (object,), {"status_code": 400, "url": "test"})
+    )
+    @patch('time.sleep', lambda *_args: None)
     def test_request_instance_post_status_400_with_json(*_args):
         """
         test post response with json form resulting in status_code 400 that should return false